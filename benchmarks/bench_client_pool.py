@@ -0,0 +1,65 @@
+# benchmarks/bench_client_pool.py
+"""
+Compares per-call latency of a fresh OpenAI client per request against the
+shared, pooled client returned by get_openai_client().
+
+Uses the bundled mock server (codex_cli.core.mock_server). Every new TCP
+connection is delayed by --handshake-ms to emulate the TLS handshake and
+round trips that a real API connection costs.
+
+Usage:
+    python benchmarks/bench_client_pool.py --calls 50 --handshake-ms 40
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from openai import OpenAI
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from codex_cli.core import openai_utils  # noqa: E402
+from codex_cli.core.mock_server import MockOpenAIServer, MockServerConfig  # noqa: E402
+from codex_cli.core.stats import percentile  # noqa: E402
+
+def time_calls(make_client, calls: int) -> list[float]:
+    """Returns per-call latencies (seconds) for `calls` requests."""
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = make_client()
+        client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "ping"}])
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def summarize(name: str, latencies: list[float]):
+    ms = [x * 1000 for x in latencies]
+    print(f"{name:<22} mean {statistics.mean(ms):7.2f} ms   p50 {percentile(ms, 50):7.2f} ms   p95 {percentile(ms, 95):7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    with MockOpenAIServer(MockServerConfig(connect_latency=args.handshake_ms / 1000)) as server:
+        os.environ["OPENAI_API_KEY"] = "bench-key"
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+
+        fresh = time_calls(lambda: OpenAI(api_key="bench-key", base_url=server.base_url), args.calls)
+
+        openai_utils.reset_openai_client()
+        openai_utils.warm_openai_client().join() # Same warm-up that `cstudio` runs at startup
+        pooled = time_calls(openai_utils.get_openai_client, args.calls)
+        openai_utils.reset_openai_client()
+
+    print(f"{args.calls} calls, simulated handshake {args.handshake_ms:.0f} ms")
+    summarize("fresh client per call", fresh)
+    summarize("pooled client", pooled)
+    saved = statistics.mean(fresh) - statistics.mean(pooled)
+    print(f"saved per call:        {saved * 1000:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# codex_cli/batch.py
+
+import json
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.syntax import Syntax
+
+from .explain import is_compactable, prepare_explain_prompt
+from .config import format_skeleton_explanation, parse_skeleton_response, prepare_config_prompt
+from .script import SUPPORTED_SCRIPT_TYPES, build_script_prompt, clean_generated_code
+from .core.cache import make_cache_key
+from .core.chunking import CHARS_PER_TOKEN, CHUNK_THRESHOLD_TOKENS, count_tokens
+from .core.ingest import MAX_INPUT_BYTES, IngestError, read_sniffed, sniff
+from .core.ledger import record_usage
+from .core.openai_utils import SYSTEM_MESSAGE, build_messages, get_response_cache
+from .core.routing import select_model
+
+console = Console()
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_MAX_REQUESTS = 50_000 # Per batch file (OpenAI limit)
+BATCH_COST_FACTOR = 0.5 # Batch API price relative to synchronous requests
+SCRIPT_EXTENSIONS = {"bash": "sh", "python": "py", "powershell": "ps1"}
+
+@dataclass
+class BatchTask:
+    """One request of a batch job. `kind` is 'explain', 'config' or 'script.<type>'."""
+    custom_id: str
+    kind: str
+    model: str
+    prompt: str
+
+    def request_line(self) -> dict:
+        """Returns the Batch API request object for this task."""
+        return {
+            "custom_id": self.custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {"model": self.model, "messages": build_messages(self.prompt)},
+        }
+
+def _read_jsonl(path: Path) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Yields (line number, object, error) for each non-empty line, reading lazily."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"invalid JSON ({e.msg})"
+                continue
+            if not isinstance(obj, dict):
+                yield line_number, None, "expected a JSON object"
+                continue
+            yield line_number, obj, None
+
+def build_task(spec: dict, index: int) -> BatchTask:
+    """
+    Turns one task description into a batch request, with the prompt and
+    model the interactive command would use: Python files are compacted,
+    files over the size cap sampled and large configs sent as their
+    skeleton (see prepare_explain_prompt() and prepare_config_prompt()).
+
+    Task formats:
+        {"command": "explain", "input": "<snippet, command or file path>", "detail": "basic", "lang": "en"}
+        {"command": "config", "path": "<configuration file>"}
+        {"command": "script", "task": "<description>", "type": "bash"}
+    An optional "id" names the result (defaults to task-<index>).
+
+    Raises:
+        ValueError: If the task is invalid, unreadable or too large for one request.
+    """
+    command = str(spec.get("command", "")).lower().strip()
+    task_id = str(spec.get("id") or f"task-{index}")
+
+    if command == "explain":
+        input_str = spec.get("input")
+        if not isinstance(input_str, str) or not input_str:
+            raise ValueError("'input' is required for explain tasks")
+        is_file = os.path.isfile(input_str)
+        content, sampled = input_str, False
+        if is_file:
+            try:
+                info = sniff(input_str)
+                if info.binary:
+                    raise ValueError(f"{input_str} appears to be a binary file")
+                compactable = is_compactable(input_str, info.size)
+                if CHUNK_THRESHOLD_TOKENS * CHARS_PER_TOKEN < info.size <= MAX_INPUT_BYTES and not compactable:
+                    raise ValueError("input is too large for one request; explain it interactively (it is chunked)")
+                ingested = read_sniffed(info, max_bytes=0 if compactable else MAX_INPUT_BYTES)
+            except IngestError as e:
+                raise ValueError(f"cannot read {input_str}: {e}")
+            content, sampled = ingested.text, ingested.sampled
+        if not content:
+            raise ValueError("cannot explain empty content")
+        request = prepare_explain_prompt(content, input_str if is_file else None, str(spec.get("detail", "basic")),
+                                         str(spec.get("lang", "en")), sampled=sampled)
+        if request.prompt is None:
+            raise ValueError("input is too large for one request; explain it interactively (it is chunked)")
+        return BatchTask(f"explain:{task_id}", "explain", request.model, request.prompt)
+
+    if command in ("config", "config explain"):
+        path = spec.get("path")
+        if not isinstance(path, str) or not path:
+            raise ValueError("'path' is required for config tasks")
+        file_path = Path(path).resolve()
+        try:
+            info = sniff(file_path)
+            if info.binary:
+                raise ValueError(f"{path} appears to be a binary file")
+            request = prepare_config_prompt(file_path, info)
+        except IngestError as e:
+            raise ValueError(f"cannot read {path}: {e}")
+        if request.prompt is None:
+            raise ValueError("file is too large for one request; explain it interactively (it is chunked)")
+        return BatchTask(f"config:{task_id}", "config", request.model, request.prompt)
+
+    if command == "script":
+        task = spec.get("task")
+        output_type = str(spec.get("type", "bash")).lower()
+        if not isinstance(task, str) or not task:
+            raise ValueError("'task' is required for script tasks")
+        if output_type not in SUPPORTED_SCRIPT_TYPES:
+            raise ValueError(f"unsupported script type '{output_type}' (supported: {', '.join(SUPPORTED_SCRIPT_TYPES)})")
+        model = select_model("script", len(task) // 4)
+        return BatchTask(f"script.{output_type}:{task_id}", f"script.{output_type}", model, build_script_prompt(task, output_type))
+
+    raise ValueError(f"unknown command '{command}' (expected explain, config or script)")
+
+def prepare_batch(tasks_file: Path, output_file: Path, skip_cached: bool = True) -> dict:
+    """
+    Writes a Batch API request file (JSONL) for a file of tasks (JSONL, one task per line).
+
+    Tasks whose response is already in the local cache are skipped unless
+    `skip_cached` is False. Invalid tasks are reported and skipped.
+
+    Args:
+        tasks_file: Task list, see build_task() for the format.
+        output_file: Where to write the requests (replaced atomically).
+        skip_cached: Leave out tasks that would be answered from the cache.
+
+    Returns:
+        Counts: 'written', 'cached', 'invalid' and 'prompt_tokens' (estimated).
+    """
+    counts = {"written": 0, "cached": 0, "invalid": 0, "prompt_tokens": 0}
+    cache = get_response_cache() if skip_cached else None
+    seen_ids: set[str] = set()
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_file.parent, prefix=".tmp-", suffix=".jsonl")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            for index, (line_number, spec, error) in enumerate(_read_jsonl(tasks_file), start=1):
+                try:
+                    if error:
+                        raise ValueError(error)
+                    task = build_task(spec, index)
+                    if task.custom_id in seen_ids:
+                        raise ValueError(f"duplicate id '{task.custom_id}'")
+                except ValueError as e:
+                    console.print(f"[yellow]Skipping task on line {line_number}: {e}[/yellow]")
+                    counts["invalid"] += 1
+                    continue
+                seen_ids.add(task.custom_id)
+                if cache and cache.get(make_cache_key(task.model, SYSTEM_MESSAGE, task.prompt)) is not None:
+                    counts["cached"] += 1
+                    continue
+                out.write(json.dumps(task.request_line(), ensure_ascii=False) + "\n")
+                counts["written"] += 1
+                counts["prompt_tokens"] += count_tokens(task.prompt)
+        os.replace(tmp_name, output_file)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return counts
+
+def _load_cache_keys(requests_file: Path) -> dict[str, tuple[str, str]]:
+    """Maps custom_id -> (model, cache key) for the requests of a prepared batch file."""
+    keys = {}
+    for _, request, error in _read_jsonl(requests_file):
+        if error or "custom_id" not in request:
+            continue
+        body = request.get("body") or {}
+        messages = body.get("messages") or []
+        if len(messages) != 2:
+            continue
+        model = body.get("model", "")
+        keys[request["custom_id"]] = (model, make_cache_key(model, messages[0].get("content", ""), messages[1].get("content", "")))
+    return keys
+
+def _safe_name(task_id: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", task_id).strip("._") or "result"
+
+def _render_result(kind: str, task_id: str, content: str, output_dir: Path | None) -> Path | None:
+    """Writes one result to output_dir (returning the path), or prints it."""
+    script_type = kind.split(".", 1)[1] if kind.startswith("script.") else None
+    if script_type:
+        content = clean_generated_code(content, script_type)
+    elif kind == "config":
+        parsed = parse_skeleton_response(content) # Large configs are answered as JSON for their skeleton
+        if parsed:
+            content = format_skeleton_explanation(*parsed)
+    if output_dir:
+        suffix = SCRIPT_EXTENSIONS.get(script_type, "txt") if script_type else "md"
+        path = output_dir / f"{_safe_name(task_id)}.{suffix}"
+        path.write_text(content + "\n", encoding="utf-8")
+        return path
+    console.print(f"\n✨ [bold green]{kind} {task_id}:[/bold green]")
+    console.print(Syntax(content, script_type, theme="default", line_numbers=True) if script_type else Markdown(content))
+    return None
+
+def ingest_batch(
+    results_file: Path,
+    requests_file: Path | None = None,
+    output_dir: Path | None = None,
+    use_cache: bool = True,
+    render: bool = True,
+) -> dict:
+    """
+    Reads a Batch API results file (JSONL) line by line and renders or stores each result.
+
+    With the prepared requests file, each response is stored in the response
+    cache under the key the interactive command would use, so running that
+    command later is answered locally. Usage is recorded in the ledger at
+    batch prices.
+
+    Args:
+        results_file: Output file of the batch job.
+        requests_file: The request file written by prepare_batch() (needed for caching).
+        output_dir: Write one file per result here instead of printing.
+        use_cache: Store responses in the response cache.
+        render: Print results (ignored when output_dir is given).
+
+    Returns:
+        Counts: 'ok', 'failed', 'cached' and 'written'.
+    """
+    counts = {"ok": 0, "failed": 0, "cached": 0, "written": 0}
+    keys = _load_cache_keys(requests_file) if requests_file and use_cache else {}
+    cache = get_response_cache() if keys else None
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    for line_number, result, error in _read_jsonl(results_file):
+        custom_id = (result or {}).get("custom_id") or f"line-{line_number}"
+        kind, _, task_id = custom_id.partition(":")
+        response = (result or {}).get("response") or {}
+        body = response.get("body") or {}
+        try:
+            if error:
+                raise ValueError(error)
+            if result.get("error"):
+                raise ValueError(result["error"].get("message", "request failed") if isinstance(result["error"], dict) else str(result["error"]))
+            if response.get("status_code") != 200:
+                message = (body.get("error") or {}).get("message", "") if isinstance(body.get("error"), dict) else ""
+                raise ValueError(f"HTTP {response.get('status_code')} {message}".strip())
+            content = ((body.get("choices") or [{}])[0].get("message") or {}).get("content")
+            if not content:
+                raise ValueError("empty response")
+        except (ValueError, AttributeError, TypeError) as e:
+            console.print(f"[bold red]{custom_id}: {e}[/bold red]")
+            counts["failed"] += 1
+            record_usage(body.get("model") or keys.get(custom_id, ("unknown",))[0], 0.0, status="error")
+            continue
+
+        content = content.strip()
+        usage = body.get("usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        model = keys.get(custom_id, (body.get("model", "unknown"),))[0]
+        record_usage(model, 0.0, prompt_tokens, completion_tokens, cost_factor=BATCH_COST_FACTOR)
+        counts["ok"] += 1
+
+        if cache and custom_id in keys:
+            cache.set(keys[custom_id][1], content, model=model, prompt_tokens=prompt_tokens,
+                      completion_tokens=completion_tokens, source="batch")
+            counts["cached"] += 1
+        if output_dir or render:
+            if _render_result(kind, task_id or custom_id, content, output_dir):
+                counts["written"] += 1
+    return counts
+
+def print_prepare_summary(counts: dict, output_file: Path):
+    """Prints the outcome of prepare_batch()."""
+    if not counts["written"]:
+        console.print("[yellow]No requests written (every task was invalid or already cached).[/yellow]")
+        return
+    console.print(f"[bold green]Wrote {counts['written']} request(s) to {output_file}[/bold green] "
+                  f"(~{counts['prompt_tokens']:,} prompt tokens; {counts['cached']} cached, {counts['invalid']} invalid task(s) skipped).")
+    if counts["written"] > BATCH_MAX_REQUESTS:
+        console.print(f"[yellow]Warning: a batch may contain at most {BATCH_MAX_REQUESTS:,} requests; split the task file.[/yellow]")
+    console.print(f"Upload it with purpose 'batch' and create a batch for {BATCH_ENDPOINT}. "
+                  f"Then run: cstudio batch ingest <results.jsonl> --requests {output_file}")
+
+def print_ingest_summary(counts: dict, output_dir: Path | None):
+    """Prints the outcome of ingest_batch()."""
+    parts = [f"{counts['ok']} result(s) ingested"]
+    if counts["cached"]:
+        parts.append(f"{counts['cached']} stored in the cache")
+    if output_dir:
+        parts.append(f"{counts['written']} written to {output_dir}")
+    if counts["failed"]:
+        parts.append(f"[bold red]{counts['failed']} failed[/bold red]")
+    console.print("\n" + ", ".join(parts) + ".")
@@ -0,0 +1,157 @@
+# codex_cli/bench.py
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from . import explain as explain_module
+from . import script as script_module
+from . import config as config_module
+from .core import openai_utils, chunking
+from .core.mock_server import MockOpenAIServer, MockServerConfig
+from .core.stats import percentile
+
+console = Console()
+
+BENCH_COMMANDS = ["explain", "script", "config"]
+
+app = typer.Typer(
+    name="cstudio-bench",
+    help="""⏱️ Load-test harness for Codex CLI Studio.
+
+    Starts a local OpenAI-compatible mock server, drives the explain, script
+    and config commands against it and reports latency percentiles and throughput.
+    """,
+    add_completion=False,
+    rich_markup_mode="markdown",
+)
+
+def _workload(command: str, workdir: Path, stream: bool, use_cache: bool) -> Callable[[int], None]:
+    """Returns a function that runs request number i of the given command."""
+    if command == "explain":
+        return lambda i: explain_module.explain_code(f"grep -rn 'request-{i}' ./src", stream=stream, use_cache=use_cache)
+    if command == "script":
+        return lambda i: script_module.generate_script(f"print the number {i} and exit", "bash", dry_run=True, use_cache=use_cache)
+    if command == "config":
+        def run_config(i: int):
+            config_file = workdir / f"service-{i}.yaml"
+            config_file.write_text(f"service:\n  name: svc-{i}\n  port: {8000 + i}\n  replicas: 2\n", encoding="utf-8")
+            config_module.explain_config(config_file, use_cache=use_cache, stream=stream)
+        return run_config
+    raise typer.BadParameter(f"Unknown command '{command}'. Choose from: {', '.join(BENCH_COMMANDS)}.")
+
+def run_benchmark(
+    commands: List[str],
+    requests: int,
+    concurrency: int,
+    config: MockServerConfig,
+    stream: bool = False,
+    use_cache: bool = False,
+) -> tuple[dict[str, dict], MockOpenAIServer]:
+    """
+    Runs the benchmark and returns per-command results and the (stopped) server.
+
+    Each result has 'latencies' (seconds per request) and 'wall' (total seconds).
+    Command output is suppressed while the benchmark runs, the calls are not
+    recorded in the usage ledger, and the script library is neither searched
+    nor extended (every script request reaches the server).
+    """
+    quiet_consoles = [explain_module.console, script_module.console, config_module.console, openai_utils.console, chunking.console]
+    saved_quiet = [c.quiet for c in quiet_consoles]
+    env_overrides = {"OPENAI_API_KEY": "mock-key", "CSTUDIO_NO_CACHE": "" if use_cache else "1", "CSTUDIO_NO_LEDGER": "1",
+                     "CSTUDIO_NO_LIBRARY": "1"}
+    saved_env = {name: os.environ.get(name) for name in [*env_overrides, "OPENAI_BASE_URL"]}
+    results: dict[str, dict] = {}
+
+    server = MockOpenAIServer(config).start()
+    try:
+        os.environ.update(env_overrides)
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        openai_utils.reset_openai_client()
+        for c in quiet_consoles:
+            c.quiet = True
+        with tempfile.TemporaryDirectory(prefix="cstudio-bench-") as workdir:
+            for command in commands:
+                run_one = _workload(command, Path(workdir), stream, use_cache)
+
+                def timed(i: int) -> float:
+                    start = time.perf_counter()
+                    run_one(i)
+                    return time.perf_counter() - start
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                    latencies = list(pool.map(timed, range(requests)))
+                results[command] = {"latencies": latencies, "wall": time.perf_counter() - start}
+    finally:
+        for c, quiet in zip(quiet_consoles, saved_quiet):
+            c.quiet = quiet
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        openai_utils.reset_openai_client()
+        server.stop()
+    return results, server
+
+def print_report(results: dict[str, dict], server: MockOpenAIServer):
+    """Prints latency percentiles, throughput and server-side counters."""
+    table = Table(title="cstudio-bench results")
+    for column in ("Command", "Requests", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)", "Req/s"):
+        table.add_column(column, justify="right" if column != "Command" else "left")
+    for command, result in results.items():
+        ms = [x * 1000 for x in result["latencies"]]
+        table.add_row(
+            command, str(len(ms)),
+            f"{percentile(ms, 50):.1f}", f"{percentile(ms, 95):.1f}", f"{percentile(ms, 99):.1f}", f"{max(ms):.1f}",
+            f"{len(ms) / result['wall']:.1f}" if result["wall"] else "-",
+        )
+    console.print(table)
+    stats = server.stats
+    statuses = ", ".join(f"{code}: {count}" for code, count in sorted(stats.statuses.items()))
+    console.print(f"Server: {stats.requests} completion requests over {stats.connections} connections ({statuses or 'no responses'}); "
+                  f"{stats.prompt_tokens} prompt / {stats.completion_tokens} completion tokens.")
+
+@app.command()
+def bench(
+    command: List[str] = typer.Option(BENCH_COMMANDS, "--command", "-c", help="Command(s) to drive: explain, script, config. Repeat to select several."),
+    requests: int = typer.Option(50, "--requests", "-n", min=1, help="Requests per command."),
+    concurrency: int = typer.Option(4, "--concurrency", "-j", min=1, help="Concurrent command invocations."),
+    latency: float = typer.Option(0.05, "--latency", help="Mock server time-to-first-token in seconds."),
+    latency_jitter: float = typer.Option(0.0, "--latency-jitter", help="Extra random latency in seconds."),
+    tokens_per_second: float = typer.Option(0.0, "--tokens-per-second", help="Mock generation speed (0 = instant)."),
+    completion_tokens: int = typer.Option(64, "--completion-tokens", help="Tokens per mock completion."),
+    connect_latency: float = typer.Option(0.0, "--connect-latency", help="Delay per new connection (emulates TLS)."),
+    error_rate: float = typer.Option(0.0, "--error-rate", help="Fraction of requests answered with 500/503."),
+    rate_limit_rate: float = typer.Option(0.0, "--rate-limit-rate", help="Fraction of requests answered with 429."),
+    stream: bool = typer.Option(False, "--stream/--no-stream", help="Use the streaming path for explain and config."),
+    use_cache: bool = typer.Option(False, "--cache/--no-cache", help="Allow the response cache (off by default so every request reaches the server)."),
+    seed: int = typer.Option(None, "--seed", help="Random seed for fault injection."),
+):
+    """Run the load test and print the report."""
+    for name in command:
+        if name not in BENCH_COMMANDS:
+            raise typer.BadParameter(f"Unknown command '{name}'. Choose from: {', '.join(BENCH_COMMANDS)}.")
+    config = MockServerConfig(
+        latency=latency, latency_jitter=latency_jitter, tokens_per_second=tokens_per_second,
+        completion_tokens=completion_tokens, connect_latency=connect_latency,
+        error_rate=error_rate, rate_limit_rate=rate_limit_rate, seed=seed,
+    )
+    console.print(f"Running {requests} request(s) per command with concurrency {concurrency}...")
+    results, server = run_benchmark(command, requests, concurrency, config, stream=stream, use_cache=use_cache)
+    print_report(results, server)
+
+def run():
+    """Entry point for the cstudio-bench script."""
+    app()
+
+if __name__ == "__main__":
+    run()
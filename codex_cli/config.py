@@ -1,76 +1,90 @@
 # codex_cli/config.py
 
-import os
+import json
+from dataclasses import dataclass, field
+
 from rich.console import Console
 from rich.markdown import Markdown
 from pathlib import Path # Use Path for type hinting
 
 # Import the utility for making OpenAI API calls
-from .core.openai_utils import get_openai_response
+from .core.openai_utils import get_openai_response, stream_openai_response
+from .core.render import render_markdown_stream
+from .core.config_diff import diff_values, format_changes, text_diff
+from .core.chunking import Chunk, CHARS_PER_TOKEN, CHUNK_THRESHOLD_TOKENS, count_tokens, iter_chunks, map_reduce
+from .core.git import GitError, repo_root, show_file
+from .core.ingest import MAX_INPUT_BYTES, IngestError, FileInfo, open_text, read_sniffed, sniff
+from .core.routing import select_model
+from .core.settings import env_flag
+from .core.skeleton import (
+    MAX_KEY_PATHS, SKELETON_MAX_BYTES, SKELETON_MIN_TOKENS, KeyPathMemo, key_paths, parse_config, skeleton_of, skeleton_text,
+)
 
 # Initialize console for output
 console = Console()
 
-def explain_config(file_path: Path):
-    """
-    Reads a configuration file and asks an AI model to explain it.
+ROUTING_COMMAND = "config explain" # Command name used by the model routing rules
 
-    Args:
-        file_path: Path object pointing to the configuration file.
+def detect_config_type(file_path: Path) -> str:
     """
-    console.print(f"Analyzing configuration file: [cyan]{file_path}[/cyan]")
+    Guesses the configuration format from the file name (used only to help the prompt).
 
-    # --- Read File Content ---
-    try:
-        content = file_path.read_text(encoding='utf-8')
-        if not content.strip():
-            console.print("[yellow]Warning: The configuration file is empty.[/yellow]")
-            # Decide if we should proceed or return
-            # Let's proceed for now, the model might still comment on the filename/type
-            # return
-    except Exception as e:
-        console.print(f"[bold red]Error reading file {file_path}: {e}[/bold red]")
-        # Note: Typer's `readable=True` might catch permission errors before this
-        return
+    Args:
+        file_path: Path of the configuration file.
 
-    # --- Determine File Type (Simple version based on extension/name for the prompt) ---
+    Returns:
+        A short description such as "YAML", "Dockerfile" or "'.cfg'".
+    """
     file_extension = file_path.suffix.lower()
     filename_lower = file_path.name.lower() # Get lower case filename
 
     # Basic type guessing, can be expanded significantly
     if file_extension in ['.yaml', '.yml']:
-        config_type = "YAML"
+        return "YAML"
     elif file_extension == '.json':
-        config_type = "JSON"
+        return "JSON"
     elif file_extension == '.toml':
-        config_type = "TOML"
+        return "TOML"
     elif file_extension == '.ini':
-        config_type = "INI"
+        return "INI"
     elif file_extension == '.conf':
-        config_type = "CONF-style"
+        return "CONF-style"
     elif file_extension == '.xml':
-        config_type = "XML"
+        return "XML"
     # --- FIX: Handle common known filenames without extensions ---
     elif filename_lower == 'dockerfile':
-        config_type = "Dockerfile"
+        return "Dockerfile"
     elif filename_lower == 'makefile':
-         config_type = "Makefile"
+        return "Makefile"
     # --- FIX: Use filename if extension is missing or unknown ---
     elif not file_extension:
-         # If no extension, use the filename itself (maybe it's e.g. 'hosts')
-         config_type = f"'{filename_lower}' (no extension)"
+        # If no extension, use the filename itself (maybe it's e.g. 'hosts')
+        return f"'{filename_lower}' (no extension)"
     else:
-         # Otherwise, use the extension
-         config_type = f"'{file_extension}'"
+        # Otherwise, use the extension
+        return f"'{file_extension}'"
     # Note: This doesn't guarantee correctness, just helps the prompt.
 
+def build_config_prompt(file_name: str, content: str, config_type: str, sampled: bool = False) -> str:
+    """
+    Builds the prompt used to explain a configuration file.
+
+    Args:
+        file_name: Name of the file (shown to the model).
+        content: The configuration text.
+        config_type: Format description from detect_config_type().
+        sampled: True if the content is a sample of a file too large to send.
 
-    # --- Construct the Prompt ---
-    prompt = f"""
+    Returns:
+        The prompt string.
+    """
+    sample_note = ("\n    The file is too large to send whole: the content below is its head, tail and a few middle sections,\n"
+                   "    with the omitted ranges marked. Infer the overall structure from this sample.") if sampled else ""
+    return f"""
     Act as an expert DevOps engineer and system administrator.
-    Explain the following configuration file (likely {config_type} format).
+    Explain the following configuration file (likely {config_type} format).{sample_note}
 
-    File Path: "{file_path.name}"
+    File Path: "{file_name}"
 
     Content:
     ```
@@ -85,13 +99,216 @@ def explain_config(file_path: Path):
     5.  Respond clearly using Markdown formatting.
     """
 
-    # --- Get Explanation from OpenAI ---
-    explanation = get_openai_response(prompt, model="gpt-4o") # Using a capable model
+def build_config_chunk_prompt(chunk: Chunk, file_name: str, config_type: str) -> str:
+    """Builds the map prompt for one chunk of a large configuration file."""
+    return f"""
+    Act as an expert DevOps engineer. You are reading a large configuration file
+    ("{file_name}", likely {config_type} format) piece by piece.
+    Summarize lines {chunk.start_line}-{chunk.end_line} below: which sections, directives or
+    parameters they define and what they configure. Be factual and compact; your notes
+    will be merged with notes on the other parts.
 
-    # --- Display the Explanation ---
+    ```
+    {chunk.text}
+    ```
+    """
+
+def build_config_merge_prompt(partials: list[str], final: bool, file_name: str, config_type: str) -> str:
+    """Builds the reduce prompt that merges notes on several chunks of a configuration file."""
+    notes = "\n\n---\n\n".join(partials)
+    if not final:
+        return f"""
+    Merge the following notes on consecutive parts of the configuration file "{file_name}"
+    into a single set of notes. Keep line references and every important setting; drop repetition.
+
+    {notes}
+    """
+    return f"""
+    Act as an expert DevOps engineer and system administrator.
+    Explain the configuration file "{file_name}" (likely {config_type} format). It was too large
+    to send at once, so below are notes on its consecutive parts, with line ranges.
+
+    Instructions:
+    1.  Identify the primary purpose or technology this configuration file relates to.
+    2.  Explain the overall structure of the file.
+    3.  Describe the meaning and purpose of the key sections, directives, or parameters.
+    4.  If possible, mention any potential best practices or common pitfalls related to this type of configuration.
+    5.  Respond clearly using Markdown formatting.
+
+    {notes}
+    """
+
+def build_skeleton_prompt(file_name: str, config_format: str, skeleton: str, known: dict[str, str], wanted: list[str]) -> str:
+    """
+    Builds the prompt that explains a configuration file from its structural skeleton.
+
+    Args:
+        file_name: Name of the file (shown to the model).
+        config_format: The parsed format ("YAML", "JSON", "TOML" or "INI").
+        skeleton: The rendered skeleton (see skeleton.render_skeleton()).
+        known: Cached explanations of some key paths, given as context.
+        wanted: Key paths to explain.
+
+    Returns:
+        The prompt string.
+    """
+    known_text = "\n".join(f"- `{path}`: {text}" for path, text in known.items()) or "(none)"
+    wanted_text = "\n".join(f"- `{path}`" for path in wanted) or "(none)"
+    return f"""
+    Act as an expert DevOps engineer and system administrator.
+    Explain the {config_format} configuration file "{file_name}". Instead of the full text you get its
+    structural skeleton: every key with its type, example values and counts. `[]` stands for the items
+    of a list and `*` for a group of similar entries merged together (their names are listed).
+
+    Skeleton:
+    ```
+    {skeleton}
+    ```
+
+    Key paths already explained:
+    {known_text}
+
+    Key paths to explain:
+    {wanted_text}
+
+    Respond with a single JSON object and nothing else:
+    {{"overview": "<Markdown: the purpose of the file, its overall structure, the most important settings and any notable pitfalls>",
+      "paths": {{"<key path>": "<one sentence on what this key path configures>", ...}}}}
+    Include in "paths" every key path from the list to explain, spelled exactly as given.
+    """
+
+def parse_skeleton_response(response: str | None) -> tuple[str, dict[str, str]] | None:
+    """
+    Parses the JSON answer to a skeleton prompt, tolerating code fences around it.
+
+    Returns:
+        (overview, path explanations), or None if the response is not such an object.
+    """
+    if not response:
+        return None
+    start, end = response.find("{"), response.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("overview"), str):
+        return None
+    paths = data.get("paths")
+    paths = {str(path): text.strip() for path, text in paths.items() if isinstance(text, str) and text.strip()} if isinstance(paths, dict) else {}
+    return data["overview"], paths
+
+@dataclass
+class SkeletonPlan:
+    """The key paths of a skeleton prompt: those explained from the memo and those asked of the model."""
+    paths: list[str]
+    scope: list[str] # Top-level keys of the file (see KeyPathMemo)
+    known: dict[str, str] = field(default_factory=dict)
+    wanted: list[str] = field(default_factory=list)
+
+@dataclass
+class ConfigPrompt:
+    """
+    What `config explain` sends for a file.
+
+    Attributes:
+        prompt: The prompt, or None if the file is too large for one request and must be chunked.
+        model: The model chosen by the routing policy.
+        config_format: The parsed format ('YAML', 'JSON', ...) when the skeleton is explained, else None.
+        plan: The key paths of a skeleton prompt, else None.
+        sampled: True if the text is a sample of a file over the size cap.
+        unparsed: True if the skeleton was requested but the file did not parse.
+    """
+    prompt: str | None
+    model: str
+    config_format: str | None = None
+    plan: SkeletonPlan | None = None
+    sampled: bool = False
+    unparsed: bool = False
+
+def _key_path_memo(use_cache: bool) -> KeyPathMemo | None:
+    return KeyPathMemo() if use_cache and not env_flag("CSTUDIO_NO_CACHE") else None
+
+def _skeleton_prompt(file_name: str, config_format: str, data, use_cache: bool, refresh: bool) -> ConfigPrompt:
+    """Builds the skeleton prompt of a parsed configuration, with the key paths the memo already explains."""
+    tree = skeleton_of(data)
+    plan = SkeletonPlan(key_paths(tree, MAX_KEY_PATHS), [str(key) for key in data] if isinstance(data, dict) else [])
+    memo = _key_path_memo(use_cache)
+    if memo and not refresh:
+        for path in plan.paths:
+            cached = memo.get(path, plan.scope)
+            if cached:
+                plan.known[path] = cached
+    plan.wanted = [path for path in plan.paths if path not in plan.known]
+    prompt = build_skeleton_prompt(file_name, config_format, skeleton_text(tree), plan.known, plan.wanted)
+    return ConfigPrompt(prompt, select_model(ROUTING_COMMAND, count_tokens(prompt)), config_format, plan)
+
+def prepare_config_prompt(file_path: Path, info: FileInfo, skeleton: bool | None = None, use_cache: bool = True,
+                          refresh: bool = False) -> ConfigPrompt:
+    """
+    Picks how `config explain` sends a file and builds its prompt.
+
+    Parsable configs above SKELETON_MIN_TOKENS (or any, with `skeleton`) get
+    the skeleton prompt; files above the chunking threshold get no prompt
+    (they are chunked); the rest are sent as text, sampled over the size cap.
+    Shared by the interactive command and batch requests, so both use the
+    same prompts (and so the same response cache keys).
+
+    Args:
+        file_path: The configuration file.
+        info: Its sniffed size and encoding (see core.ingest.sniff()).
+        skeleton: True to always use the skeleton of parsable configs, False to always send the text.
+        use_cache: If False, do not take key-path explanations from the memo.
+        refresh: If True, ask for every key path again.
+
+    Raises:
+        IngestError: If the file cannot be read.
+    """
+    size = info.size
+    unparsed = False
+    if skeleton is not False and size <= SKELETON_MAX_BYTES and (skeleton or size // CHARS_PER_TOKEN >= SKELETON_MIN_TOKENS):
+        parsed = parse_config(read_sniffed(info, max_bytes=0).text, file_path.name)
+        if parsed:
+            return _skeleton_prompt(file_path.name, parsed[0], parsed[1], use_cache, refresh)
+        unparsed = bool(skeleton)
+
+    model = select_model(ROUTING_COMMAND, size // CHARS_PER_TOKEN)
+    if CHUNK_THRESHOLD_TOKENS * CHARS_PER_TOKEN < size <= MAX_INPUT_BYTES:
+        return ConfigPrompt(None, model, unparsed=unparsed)
+    ingested = read_sniffed(info, MAX_INPUT_BYTES)
+    prompt = build_config_prompt(file_path.name, ingested.text, detect_config_type(file_path), ingested.sampled)
+    return ConfigPrompt(prompt, select_model(ROUTING_COMMAND, count_tokens(ingested.text)), sampled=ingested.sampled, unparsed=unparsed)
+
+def format_skeleton_explanation(overview: str, explained: dict[str, str], paths: list[str] | None = None) -> str:
+    """Renders the answer to a skeleton prompt as Markdown: the overview and a table of key paths (in `paths` order)."""
+    rows = ["| `{}` | {} |".format(path, explained[path].replace("|", "\\|")) for path in (paths or explained) if path in explained]
+    return overview + ("\n\n### Key Paths\n\n| Path | Meaning |\n|---|---|\n" + "\n".join(rows) if rows else "")
+
+def _explain_skeleton(request: ConfigPrompt, use_cache: bool, refresh: bool):
+    """Explains a configuration from its skeleton prompt and fills the key-path memo."""
+    plan = request.plan
+    response = get_openai_response(request.prompt, model=request.model, use_cache=use_cache, refresh=refresh)
+    parsed = parse_skeleton_response(response)
+    if parsed is None:
+        _print_config_explanation(response) # Not the JSON asked for: show what came back
+        return
+    overview, explained = parsed
+    memo = _key_path_memo(use_cache)
+    if memo:
+        for path in plan.wanted:
+            if path in explained:
+                memo.set(path, plan.scope, explained[path])
+
+    _print_config_explanation(format_skeleton_explanation(overview, {**explained, **plan.known}, plan.paths))
+    if plan.known:
+        console.print(f"[grey50]Reused {len(plan.known)} of {len(plan.paths)} key-path explanations from the memo.[/grey50]")
+
+def _print_config_explanation(explanation, title: str = "Configuration File Explanation:"):
+    """Renders a configuration explanation (or the failure message)."""
     if explanation:
         if isinstance(explanation, str):
-            console.print("\n✨ [bold green]Configuration File Explanation:[/bold green]")
+            console.print(f"\n✨ [bold green]{title}[/bold green]")
             md = Markdown(explanation)
             console.print(md)
         else:
@@ -100,4 +317,216 @@ def explain_config(file_path: Path):
             console.print(f"Raw data: {str(explanation)}")
     else:
         # Handle API call failure
-        console.print("[bold red]Failed to get explanation from OpenAI.[/bold red]")
\ No newline at end of file
+        console.print("[bold red]Failed to get explanation from OpenAI.[/bold red]")
+
+def explain_config(file_path: Path, use_cache: bool = True, refresh: bool = False, stream: bool | None = None,
+                   skeleton: bool | None = None):
+    """
+    Reads a configuration file and asks an AI model to explain it.
+
+    YAML, JSON, TOML and INI files above SKELETON_MIN_TOKENS are parsed
+    locally and explained from their structural skeleton (see
+    core/skeleton.py), with per-key-path explanations memoized across files.
+    Binary files are rejected. Files larger than the chunking threshold are
+    explained chunk by chunk and the partial explanations are merged; files
+    over the size cap (CSTUDIO_MAX_INPUT_BYTES) are sampled instead, so a
+    huge generated file costs one request and is never loaded whole.
+
+    Args:
+        file_path: Path object pointing to the configuration file.
+        use_cache: If False, bypass the on-disk response cache.
+        refresh: If True, ignore any cached response and store the new one.
+        stream: Render the explanation as it arrives. Defaults to True when
+            the console is an interactive terminal.
+        skeleton: True to always explain parsable configs from their skeleton,
+            False to always send the text, None to decide by size.
+    """
+    console.print(f"Analyzing configuration file: [cyan]{file_path}[/cyan]")
+
+    # --- Determine File Type (Simple version based on extension/name for the prompt) ---
+    config_type = detect_config_type(file_path)
+
+    # --- Sniff the File: size, encoding, binary content ---
+    try:
+        info = sniff(file_path)
+    except IngestError as e:
+        console.print(f"[bold red]Error reading file {file_path}: {e}[/bold red]")
+        return
+    if info.binary:
+        console.print(f"[bold red]Error: {file_path} appears to be a binary file, not a configuration file.[/bold red]")
+        return
+
+    # --- Pick the Prompt: the skeleton of structured files, or the (sampled) text ---
+    size = info.size
+    try:
+        request = prepare_config_prompt(file_path, info, skeleton, use_cache, refresh)
+    except IngestError as e:
+        console.print(f"[bold red]Error reading file {file_path}: {e}[/bold red]")
+        return
+    if request.plan:
+        console.print(f"[grey50]Explaining the structural skeleton of the {request.config_format} file (use --raw to send the text).[/grey50]")
+        _explain_skeleton(request, use_cache, refresh)
+        return
+    if request.unparsed:
+        console.print("[yellow]Could not parse the file as YAML, JSON, TOML or INI; sending its text instead.[/yellow]")
+
+    # --- Large Files: stream through the chunking engine ---
+    if request.prompt is None:
+        console.print("[yellow]Large configuration file: explaining in chunks and merging the results.[/yellow]")
+        try:
+            with open_text(info) as f:
+                explanation = map_reduce(
+                    iter_chunks(f, language="config"),
+                    map_prompt=lambda chunk: build_config_chunk_prompt(chunk, file_path.name, config_type),
+                    reduce_prompt=lambda partials, final: build_config_merge_prompt(partials, final, file_path.name, config_type),
+                    model=request.model,
+                    use_cache=use_cache,
+                    refresh=refresh,
+                )
+        except Exception as e:
+            console.print(f"[bold red]Error reading file {file_path}: {e}[/bold red]")
+            return
+        _print_config_explanation(explanation)
+        return
+
+    if size == 0:
+        console.print("[yellow]Warning: The configuration file is empty.[/yellow]")
+    if request.sampled:
+        console.print(f"[yellow]Very large configuration file ({size / 1024 / 1024:.1f} MB): "
+                      "explaining a sample of its head, tail and middle sections.[/yellow]")
+    prompt, model = request.prompt, request.model
+
+    # --- Stream the Explanation (interactive terminals) ---
+    if stream is None:
+        stream = console.is_terminal
+    if stream:
+        chunks = stream_openai_response(prompt, model=model, use_cache=use_cache, refresh=refresh)
+        if not render_markdown_stream(chunks, console, "\n✨ [bold green]Configuration File Explanation:[/bold green]"):
+            console.print("[bold red]Failed to get explanation from OpenAI.[/bold red]")
+        return
+
+    # --- Get Explanation from OpenAI ---
+    explanation = get_openai_response(prompt, model=model, use_cache=use_cache, refresh=refresh)
+
+    # --- Display the Explanation ---
+    _print_config_explanation(explanation)
+
+def build_config_diff_prompt(old_name: str, new_name: str, config_type: str, changes: str, structural: bool,
+                             known: dict[str, str] | None = None) -> str:
+    """
+    Builds the prompt that explains the changes between two versions of a configuration file.
+
+    Args:
+        old_name: Label of the previous version (a file name or `path@rev`).
+        new_name: Label of the new version.
+        config_type: Format description from detect_config_type().
+        changes: The key-path changes (see config_diff.format_changes()) or a unified text diff.
+        structural: True if `changes` is a key-path diff.
+        known: Cached meanings of the changed key paths, given as context.
+
+    Returns:
+        The prompt string.
+    """
+    if structural:
+        notation = ("Each line is one change to a key path: `+ path: value` was added, `- path: value` was removed,\n"
+                    "    `~ path: old → new` changed. List items are named by identity (`containers[name=api]`) or index.")
+    else:
+        notation = "The changes are given as a unified diff."
+    context = ""
+    if known:
+        context = "\n    Meaning of some of the changed key paths:\n" + "\n".join(f"    - `{path}`: {text}" for path, text in known.items()) + "\n"
+    return f"""
+    Act as an expert DevOps engineer reviewing a configuration change before a deploy.
+    Below are only the changes between two versions of a configuration file (likely {config_type} format),
+    "{old_name}" and "{new_name}", not the whole file. {notation}
+    {context}
+    Changes:
+    ```
+    {changes}
+    ```
+
+    Instructions:
+    1.  Summarize what changed in one or two sentences.
+    2.  For each change (or group of related changes), explain its practical impact on the running system.
+    3.  Flag risky changes: security, availability, resource limits, data loss, compatibility, required restarts or migrations.
+    4.  Do not describe settings that did not change.
+    5.  Respond clearly and concisely using Markdown formatting.
+    """
+
+def _read_version(path: Path) -> str:
+    """Reads one version of a config for diffing (raises IngestError)."""
+    info = sniff(path)
+    if info.binary:
+        raise IngestError(f"{path} appears to be a binary file")
+    if info.size > SKELETON_MAX_BYTES:
+        raise IngestError(f"{path} is too large to diff ({info.size // 1024 // 1024} MB)")
+    return read_sniffed(info, max_bytes=0).text
+
+def explain_config_diff(new_path: Path, old_path: Path | None = None, rev: str | None = None, use_cache: bool = True,
+                        refresh: bool = False, stream: bool | None = None):
+    """
+    Explains what changed between two versions of a configuration file and why it matters.
+
+    The key-path diff is computed locally and only the changed paths are
+    sent, so the request grows with the size of the change, not the file.
+    Files that do not parse as YAML, JSON, TOML or INI are compared as text.
+
+    Args:
+        new_path: The new version.
+        old_path: The previous version (a second file).
+        rev: Or a git revision holding the previous version of `new_path`.
+        use_cache: If False, bypass the response cache and the key-path memo.
+        refresh: If True, ignore any cached response and store the new one.
+        stream: Render the explanation as it arrives (default: in a terminal).
+    """
+    try:
+        new_text = _read_version(new_path)
+        if rev is not None:
+            root = repo_root(new_path.parent)
+            old_text = show_file(root, rev, new_path.resolve().relative_to(root.resolve()).as_posix())
+            if old_text is None:
+                console.print(f"[bold red]Error: {new_path.name} does not exist at revision '{rev}'.[/bold red]")
+                return
+            old_name = f"{new_path.name}@{rev}"
+        else:
+            old_text, old_name = _read_version(old_path), old_path.name
+    except (IngestError, GitError, ValueError) as e:
+        console.print(f"[bold red]Error reading configuration versions: {e}[/bold red]")
+        return
+    new_name = new_path.name
+    console.print(f"Comparing [cyan]{old_name}[/cyan] with [cyan]{new_name}[/cyan]")
+
+    config_type = detect_config_type(new_path)
+    old_parsed, new_parsed = parse_config(old_text, new_name), parse_config(new_text, new_name)
+    known = {}
+    if old_parsed and new_parsed:
+        changes = diff_values(old_parsed[1], new_parsed[1])
+        if not changes:
+            console.print("[green]No structural changes: the two versions are equivalent.[/green]")
+            return
+        console.print(f"[grey50]{len(changes)} changed key path(s); sending only the changes.[/grey50]")
+        changes_text = format_changes(changes)
+        if use_cache and not env_flag("CSTUDIO_NO_CACHE"):
+            memo = KeyPathMemo()
+            scope = [str(key) for key in new_parsed[1]] if isinstance(new_parsed[1], dict) else []
+            for path in dict.fromkeys(change.normalized for change in changes[:MAX_KEY_PATHS]):
+                meaning = memo.get(path, scope)
+                if meaning:
+                    known[path] = meaning
+    else:
+        changes_text = text_diff(old_text, new_text, old_name, new_name)
+        if not changes_text:
+            console.print("[green]No changes: the two versions are identical.[/green]")
+            return
+
+    prompt = build_config_diff_prompt(old_name, new_name, config_type, changes_text, bool(old_parsed and new_parsed), known)
+    model = select_model(ROUTING_COMMAND, count_tokens(prompt))
+    title = "Configuration Change Explanation:"
+    if stream is None:
+        stream = console.is_terminal
+    if stream:
+        chunks = stream_openai_response(prompt, model=model, use_cache=use_cache, refresh=refresh)
+        if not render_markdown_stream(chunks, console, f"\n✨ [bold green]{title}[/bold green]"):
+            console.print("[bold red]Failed to get explanation from OpenAI.[/bold red]")
+        return
+    _print_config_explanation(get_openai_response(prompt, model=model, use_cache=use_cache, refresh=refresh), title)
@@ -0,0 +1,212 @@
+# codex_cli/core/cache.py
+
+import hashlib
+import json
+import lzma
+import os
+import random
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from .settings import env_int, get_cache_dir
+
+# --- Default cache settings (override via environment variables) ---
+CACHE_TTL_SECONDS = env_int("CSTUDIO_CACHE_TTL", 7 * 24 * 3600) # One week
+CACHE_MAX_BYTES = env_int("CSTUDIO_CACHE_MAX_MB", 200) * 1024 * 1024
+CACHE_COMPRESSION = os.getenv("CSTUDIO_CACHE_COMPRESSION", "zlib").lower()
+
+# One-byte header identifying how an entry is compressed
+_CODECS = {
+    "zlib": (b"Z", zlib.compress, zlib.decompress),
+    "lzma": (b"X", lzma.compress, lzma.decompress),
+}
+_DECODERS = {header: decompress for header, _, decompress in _CODECS.values()}
+ENTRY_SUFFIX = ".entry"
+SIZE_FILE_NAME = "size" # Running total of entry sizes, so writes need not scan the cache
+RESCAN_EVERY = 256 # On average one write in this many recounts the cache from disk
+
+def make_cache_key(model: str, system_message: str, prompt: str) -> str:
+    """
+    Builds the content address of a request.
+
+    Args:
+        model: The model identifier.
+        system_message: The system message sent with the prompt.
+        prompt: The user prompt.
+
+    Returns:
+        A hex SHA-256 digest identifying the request.
+    """
+    payload = json.dumps([model, system_message, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Persistent, content-addressed store for model responses.
+
+    Each entry is a compressed JSON file named after its key and sharded by the
+    first two hex characters. Writes go to a temporary file that is atomically
+    renamed into place, so several processes can share one cache directory.
+    Reads refresh the file's mtime, which drives LRU eviction once the total
+    size exceeds the cap. Entries older than the TTL are treated as misses.
+
+    The total size is kept in a small file next to the shards and adjusted by
+    each write, so only writes that cross the cap list the directory. Updates
+    from concurrent processes can be lost; the total is recounted from disk
+    whenever it is missing and on a random one in RESCAN_EVERY writes.
+    """
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+        compression: str | None = None,
+    ):
+        self.directory = Path(directory) if directory else get_cache_dir("responses")
+        self.ttl = CACHE_TTL_SECONDS if ttl is None else ttl
+        self.max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        codec = (compression or CACHE_COMPRESSION).lower()
+        self.compression = codec if codec in _CODECS else "zlib"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def get_entry(self, key: str) -> dict | None:
+        """
+        Returns the stored entry (a dict with at least 'response' and 'created') or None.
+
+        Expired or unreadable entries are removed and reported as misses.
+        """
+        path = self._entry_path(key)
+        try:
+            raw = path.read_bytes()
+            entry = json.loads(_DECODERS[raw[:1]](raw[1:]))
+        except FileNotFoundError:
+            return None
+        except Exception: # Corrupt or foreign file: drop it
+            self.delete(key)
+            return None
+
+        if self.ttl and time.time() - entry.get("created", 0) > self.ttl:
+            self.delete(key)
+            return None
+        try:
+            os.utime(path) # Mark as recently used for LRU eviction
+        except OSError:
+            pass
+        return entry
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached response text for `key`, or None on a miss."""
+        entry = self.get_entry(key)
+        return entry.get("response") if entry else None
+
+    def set(self, key: str, response: str, **metadata):
+        """
+        Stores a response atomically, then enforces the size cap.
+
+        Args:
+            key: Cache key from make_cache_key().
+            response: The response text to store.
+            **metadata: Extra JSON-serializable fields saved with the entry.
+        """
+        path = self._entry_path(key)
+        entry = {"created": time.time(), "response": response, **metadata}
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        header, compress, _ = _CODECS[self.compression]
+        data = header + compress(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_name, path) # Atomic on POSIX and Windows
+            except BaseException:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            return # Caching is best-effort; never fail the command
+        self._add_size(len(data) - replaced)
+
+    def delete(self, key: str):
+        """Removes an entry if present."""
+        try:
+            self._entry_path(key).unlink()
+        except OSError:
+            pass
+
+    def _size_path(self) -> Path:
+        return self.directory / SIZE_FILE_NAME
+
+    def _read_size(self) -> int | None:
+        try:
+            return int(self._size_path().read_text(encoding="ascii"))
+        except (OSError, ValueError): # Missing, or caught mid-write by another process
+            return None
+
+    def _write_size(self, total: int):
+        try:
+            self._size_path().write_text(str(max(0, total)), encoding="ascii")
+        except OSError:
+            pass
+
+    def _add_size(self, delta: int):
+        """Adjusts the running total after a write and evicts once it exceeds max_bytes."""
+        if not self.max_bytes:
+            return
+        total = self._read_size()
+        if total is None or total + delta > self.max_bytes or random.randrange(RESCAN_EVERY) == 0:
+            self.evict()
+        else:
+            self._write_size(total + delta)
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        """Lists (mtime, size, path) for every entry in the cache."""
+        entries = []
+        if not self.directory.is_dir():
+            return entries
+        for path in self.directory.glob(f"*/*{ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError: # Removed concurrently by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits within max_bytes, and records the new total."""
+        if not self.max_bytes:
+            return
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._write_size(total)
+
+    def clear(self):
+        """Deletes every entry in the cache."""
+        for _, _, path in self._entries():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        try:
+            self._size_path().unlink()
+        except OSError:
+            pass
@@ -0,0 +1,432 @@
+# codex_cli/core/callgraph.py
+"""
+Call graphs of whole Python packages.
+
+Each module is parsed on its own into a ModuleGraph fragment: the functions
+and classes it defines, the names its imports bind, and the calls made from
+each function as dotted expressions (`helper`, `utils.load`, `self.save`).
+Fragments do not depend on each other, so they are built in parallel by a
+process pool - parsing is CPU-bound and the GIL would serialize threads.
+
+The fragments are then merged into one graph with module-qualified names
+(`pkg.utils.load`). A call is resolved through the caller's module: its own
+definitions first (`self.x` and `cls.x` against the enclosing class), then
+its imports, following re-exports in `__init__` modules. Calls that resolve
+to nothing in the package (builtins, third-party code) are left out.
+
+Fragments are kept in an on-disk cache (FragmentCache), like `__pycache__`:
+a file whose size and modification time are unchanged is not read again,
+and one whose content hash is unchanged is not parsed again. Only changed
+files are parsed on later runs; the merge always runs over all fragments.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from .files import collect_files
+from .settings import env_flag, env_int, get_cache_dir
+
+# Below this many modules, parsing in-process is faster than starting workers
+PARALLEL_MIN_MODULES = env_int("CSTUDIO_VISUALIZE_PARALLEL_MIN", 64)
+# Re-exports followed when resolving an imported name (`from .a import f` in `__init__` importing from `.b`, ...)
+MAX_REEXPORT_DEPTH = 8
+# Bump when ModuleVisitor or ModuleGraph change: cached fragments of other versions are ignored and dropped.
+# The Python version is part of it because the ast module changes between releases.
+FRAGMENT_VERSION = f"1-py{sys.version_info[0]}.{sys.version_info[1]}"
+FRAGMENT_CACHE_MAX_ENTRIES = env_int("CSTUDIO_CALLGRAPH_CACHE_MAX_ENTRIES", 200_000)
+# A file modified this close to when it was cached may change again within the same mtime tick: verify its hash
+RACY_MTIME_NS = 2_000_000_000
+_LOOKUP_BATCH = 500 # SQLite host parameters per query
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fragments (
+    path TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    checked_ns INTEGER NOT NULL,
+    fragment TEXT NOT NULL
+);
+"""
+
+@dataclass
+class ModuleGraph:
+    """
+    The call graph fragment of one module.
+
+    Attributes:
+        module: Dotted module name (`pkg.sub.mod`; a package's `__init__` is `pkg.sub`).
+        path: The source file.
+        functions: Qualified names of the functions and methods defined (`load`, `Store.save`).
+        classes: Qualified names of the classes defined.
+        imports: Local name -> absolute dotted target, for every import in the module.
+        calls: Function qualified name -> dotted callee expressions, in order of first appearance.
+        error: Why the module could not be parsed, or None.
+        size, mtime_ns, digest: The file's size, modification time and sha256 when it was read (for the cache).
+    """
+    module: str
+    path: str
+    functions: list[str] = field(default_factory=list)
+    classes: list[str] = field(default_factory=list)
+    imports: dict[str, str] = field(default_factory=dict)
+    calls: dict[str, list[str]] = field(default_factory=dict)
+    error: str | None = None
+    size: int = 0
+    mtime_ns: int = 0
+    digest: str = ""
+
+@dataclass
+class PackageCallGraph:
+    """A merged call graph and the modules it was built from."""
+    call_graph: dict[str, set[str]]
+    modules: int
+    errors: list[tuple[str, str]] = field(default_factory=list) # (path, reason) of modules that did not parse
+    cached: int = 0 # Modules whose fragment came from the cache
+
+def _dotted(node: ast.AST) -> str | None:
+    """`a.b.c` for a Name/Attribute chain, None for anything else (calls, subscripts, ...)."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+class ModuleVisitor(ast.NodeVisitor):
+    """Collects the definitions, imports and calls of one module into a ModuleGraph."""
+    def __init__(self, graph: ModuleGraph, is_package: bool):
+        self.graph = graph
+        # Package that relative imports are resolved against
+        self.package = graph.module if is_package else graph.module.rpartition(".")[0]
+        self.scope: list[str] = [] # Enclosing class and function names
+        self.classes: list[str] = [] # Qualified names of the enclosing classes
+        self.function: str | None = None
+
+    def _qualify(self, name: str) -> str:
+        return ".".join(self.scope + [name])
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        qualname = self._qualify(node.name)
+        self.graph.classes.append(qualname)
+        self.scope.append(node.name)
+        self.classes.append(qualname)
+        self.generic_visit(node)
+        self.classes.pop()
+        self.scope.pop()
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef):
+        qualname = self._qualify(node.name)
+        self.graph.functions.append(qualname)
+        self.graph.calls.setdefault(qualname, [])
+        outer, self.function = self.function, qualname
+        self.scope.append(node.name)
+        self.generic_visit(node)
+        self.scope.pop()
+        self.function = outer
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            if alias.asname:
+                self.graph.imports[alias.asname] = alias.name
+            else:
+                # `import a.b` binds `a`; `a.b.f()` is then resolved from the package root
+                root = alias.name.split(".")[0]
+                self.graph.imports.setdefault(root, root)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.level:
+            parts = self.package.split(".") if self.package else []
+            if node.level - 1 > len(parts):
+                return # Beyond the top-level package
+            base = ".".join(parts[:len(parts) - (node.level - 1)] + ([node.module] if node.module else []))
+        else:
+            base = node.module or ""
+        for alias in node.names:
+            if alias.name != "*" and base:
+                self.graph.imports[alias.asname or alias.name] = f"{base}.{alias.name}"
+
+    def visit_Call(self, node: ast.Call):
+        if self.function:
+            callee = _dotted(node.func)
+            if callee:
+                head, _, rest = callee.partition(".")
+                if head in ("self", "cls") and rest and self.classes:
+                    callee = f"{self.classes[-1]}.{rest}"
+                calls = self.graph.calls[self.function]
+                if callee not in calls:
+                    calls.append(callee)
+        self.generic_visit(node)
+
+def analyze_module(path: str, module: str, is_package: bool = False) -> ModuleGraph:
+    """
+    Parses one module into its call graph fragment (runs in worker processes).
+
+    Args:
+        path: The source file.
+        module: Its dotted module name.
+        is_package: True for a package's `__init__.py`.
+
+    Returns:
+        The ModuleGraph; `error` is set if the file could not be read or parsed.
+    """
+    graph = ModuleGraph(module, path)
+    try:
+        # Stat before reading: a change made while reading then shows up as a newer mtime
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            source = f.read()
+        graph.size, graph.mtime_ns, graph.digest = stat.st_size, stat.st_mtime_ns, hashlib.sha256(source).hexdigest()
+        tree = ast.parse(source, filename=path) # Bytes: honors PEP 263 encoding declarations
+    except (SyntaxError, ValueError, OSError) as e:
+        graph.error = f"{type(e).__name__}: {e}"
+        return graph
+    ModuleVisitor(graph, is_package).visit(tree)
+    return graph
+
+def module_name(path: Path, root: Path, package_dirs: dict[Path, bool]) -> str:
+    """
+    The dotted name a module is imported by: its path relative to the first
+    directory above it that is not a package (has no `__init__.py`).
+    """
+    parts = [] if path.name == "__init__.py" else [path.stem]
+    directory = path.parent
+    while True:
+        if directory not in package_dirs:
+            package_dirs[directory] = (directory / "__init__.py").is_file()
+        if not package_dirs[directory] or directory == directory.parent:
+            break
+        parts.append(directory.name)
+        directory = directory.parent
+    if not parts: # A namespace-less __init__.py at the top
+        parts = [path.parent.name or root.name]
+    return ".".join(reversed(parts))
+
+def discover_modules(directory: str | Path) -> list[tuple[str, str, bool]]:
+    """
+    Lists the Python modules under a directory (honoring .gitignore; empty files define nothing and are skipped).
+
+    Returns:
+        (path, module name, is package) per module, sorted by path. When two
+        files map to the same module name, the later one is named by its path
+        relative to the directory instead.
+    """
+    selection = collect_files(directory, ["*.py"], max_bytes=0)
+    package_dirs: dict[Path, bool] = {}
+    modules, seen = [], set()
+    for path in selection.files:
+        name = module_name(path, selection.root, package_dirs)
+        if name in seen:
+            name = selection.relative(path).removesuffix(".py").replace("/", ".")
+        seen.add(name)
+        modules.append((str(path), name, path.name == "__init__.py"))
+    return modules
+
+def analyze_modules(modules: list[tuple[str, str, bool]], jobs: int | None = None) -> list[ModuleGraph]:
+    """
+    Builds the fragments of many modules, in parallel across processes when there are enough.
+
+    Args:
+        modules: (path, module name, is package) per module.
+        jobs: Worker processes (defaults to the number of CPUs; 1 parses in-process).
+
+    Returns:
+        One ModuleGraph per module, in the same order.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    paths, names, packages = (list(column) for column in zip(*modules)) if modules else ([], [], [])
+    if jobs > 1 and len(modules) >= PARALLEL_MIN_MODULES:
+        # Large chunks keep the per-task pickling overhead small; several per worker balance uneven files
+        chunksize = max(1, len(modules) // (jobs * 8))
+        try:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(modules))) as executor:
+                return list(executor.map(analyze_module, paths, names, packages, chunksize=chunksize))
+        except (BrokenProcessPool, OSError, NotImplementedError):
+            pass # No usable process pool here (e.g. restricted sandboxes): parse in-process
+    return [analyze_module(path, name, package) for path, name, package in zip(paths, names, packages)]
+
+class _Resolver:
+    """Resolves dotted callee expressions to module-qualified function names."""
+    def __init__(self, graphs: list[ModuleGraph]):
+        self.modules = {graph.module: graph for graph in graphs}
+        self.functions = {graph.module: set(graph.functions) for graph in graphs}
+        self.classes = {graph.module: set(graph.classes) for graph in graphs}
+
+    def _member(self, module: str, name: str, depth: int) -> str | None:
+        """A function (or class constructor) `name` of a module, following the module's imports."""
+        if name in self.functions[module]:
+            return f"{module}.{name}"
+        if name in self.classes[module]:
+            init = f"{name}.__init__"
+            return f"{module}.{init}" if init in self.functions[module] else None
+        head, _, rest = name.partition(".")
+        target = self.modules[module].imports.get(head)
+        if target and depth < MAX_REEXPORT_DEPTH:
+            return self.resolve_target(f"{target}.{rest}" if rest else target, depth + 1)
+        return None
+
+    def resolve_target(self, target: str, depth: int = 0) -> str | None:
+        """Resolves an absolute dotted name (`pkg.mod.Class.method`) against the longest matching module."""
+        parts = target.split(".")
+        for split in range(len(parts) - 1, 0, -1):
+            module = ".".join(parts[:split])
+            if module in self.modules:
+                return self._member(module, ".".join(parts[split:]), depth)
+        return None
+
+    def resolve(self, module: str, callee: str) -> str | None:
+        """Resolves a callee as written in a module."""
+        return self._member(module, callee, 0)
+
+def merge_module_graphs(graphs: list[ModuleGraph]) -> dict[str, set[str]]:
+    """
+    Merges module fragments into one call graph.
+
+    Returns:
+        {caller: {callees}} with module-qualified names; every function of
+        the package is a key, and only calls resolved within the package are kept.
+    """
+    parsed = [graph for graph in graphs if graph.error is None]
+    resolver = _Resolver(parsed)
+    call_graph: dict[str, set[str]] = {}
+    for graph in parsed:
+        for function in graph.functions:
+            callees = call_graph.setdefault(f"{graph.module}.{function}", set())
+            for callee in graph.calls.get(function, []):
+                resolved = resolver.resolve(graph.module, callee)
+                if resolved:
+                    callees.add(resolved)
+    return call_graph
+
+class FragmentCache:
+    """
+    SQLite-backed cache of module fragments, keyed by absolute path.
+
+    An entry is used when its format version, module name and package flag
+    match, and either the file's size and mtime are unchanged or its content
+    hash is (for example after a checkout that only touched the mtime).
+    Fragments of files that did not parse are cached too.
+    """
+    def __init__(self, path: Path | str | None = None, max_entries: int | None = None):
+        self.path = Path(path) if path else get_cache_dir("callgraph.sqlite3")
+        self.max_entries = FRAGMENT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def lookup(self, modules: list[tuple[str, str, bool]]) -> list[ModuleGraph | None]:
+        """
+        Returns the cached fragment of each module that is still valid, None for the others.
+
+        Entries whose file only changed its stat are refreshed in place.
+        """
+        if not self.path.exists() or not modules:
+            return [None] * len(modules)
+        paths = [path for path, _, _ in modules]
+        rows = {}
+        with closing(self._connect()) as connection, connection:
+            for start in range(0, len(paths), _LOOKUP_BATCH):
+                batch = paths[start:start + _LOOKUP_BATCH]
+                rows.update((row[0], row[1:]) for row in connection.execute(
+                    "SELECT path, size, mtime_ns, digest, checked_ns, fragment FROM fragments"
+                    f" WHERE version = ? AND path IN ({', '.join('?' * len(batch))})", (FRAGMENT_VERSION, *batch)))
+            results, touched = [], []
+            for path, module, _ in modules:
+                graph, verified = self._validate(path, module, rows[path]) if path in rows else (None, False)
+                if verified: # Unchanged content, new stat or a racy mtime: trust the stat from now on
+                    touched.append((graph.size, graph.mtime_ns, time.time_ns(), path))
+                results.append(graph)
+            if touched:
+                connection.executemany("UPDATE fragments SET size = ?, mtime_ns = ?, checked_ns = ? WHERE path = ?", touched)
+        return results
+
+    @staticmethod
+    def _validate(path: str, module: str, row: tuple) -> tuple[ModuleGraph | None, bool]:
+        """Returns (the fragment if still valid, whether its content hash had to be checked)."""
+        size, mtime_ns, digest, checked_ns, fragment = row
+        graph = ModuleGraph(**json.loads(fragment))
+        if graph.module != module:
+            return None, False # Renamed by a change in the package layout: relative imports resolve differently
+        try:
+            stat = os.stat(path)
+            if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns) and mtime_ns < checked_ns - RACY_MTIME_NS:
+                return graph, False
+            if stat.st_size != size:
+                return None, False
+            with open(path, "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() != digest:
+                    return None, False
+        except OSError:
+            return None, False
+        graph.size, graph.mtime_ns = stat.st_size, stat.st_mtime_ns
+        return graph, True
+
+    def store(self, graphs: list[ModuleGraph]):
+        """Stores fragments (replacing older ones of the same paths) and drops entries beyond the limit."""
+        now = time.time_ns()
+        rows = [(graph.path, FRAGMENT_VERSION, graph.size, graph.mtime_ns, graph.digest, now, json.dumps(asdict(graph)))
+                for graph in graphs if graph.digest] # A file that could not be read has nothing to key on
+        if not rows:
+            return
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM fragments WHERE version != ?", (FRAGMENT_VERSION,))
+            connection.executemany("INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            if self.max_entries:
+                connection.execute(
+                    "DELETE FROM fragments WHERE path IN (SELECT path FROM fragments ORDER BY checked_ns DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+def build_package_call_graph(directory: str | Path, jobs: int | None = None, use_cache: bool = True) -> PackageCallGraph:
+    """
+    Builds the call graph of every Python module under a directory.
+
+    Only modules without a valid cached fragment are parsed; the cache is
+    skipped when `use_cache` is False or CSTUDIO_NO_CALLGRAPH_CACHE is set,
+    and storage errors fall back to parsing everything.
+
+    Args:
+        directory: A package or a directory containing packages and modules.
+        jobs: Worker processes for parsing (defaults to the number of CPUs).
+        use_cache: If False, neither read nor write the fragment cache.
+
+    Returns:
+        The PackageCallGraph.
+    """
+    modules = discover_modules(directory)
+    cache = FragmentCache() if use_cache and not env_flag("CSTUDIO_NO_CALLGRAPH_CACHE") else None
+    graphs: list[ModuleGraph | None] = [None] * len(modules)
+    if cache:
+        try:
+            graphs = cache.lookup(modules)
+        except (sqlite3.Error, OSError, ValueError, TypeError):
+            cache = None # Unreadable or incompatible cache file: parse everything, do not write
+    missing = [index for index, graph in enumerate(graphs) if graph is None]
+    parsed = analyze_modules([modules[index] for index in missing], jobs)
+    for index, graph in zip(missing, parsed):
+        graphs[index] = graph
+    if cache and parsed:
+        try:
+            cache.store(parsed)
+        except (sqlite3.Error, OSError):
+            pass
+    errors = [(graph.path, graph.error) for graph in graphs if graph.error]
+    return PackageCallGraph(merge_module_graphs(graphs), len(graphs), errors, cached=len(graphs) - len(parsed))
@@ -0,0 +1,275 @@
+# codex_cli/core/chunking.py
+
+import asyncio
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
+
+from rich.console import Console
+
+from .openai_utils import ASYNC_MAX_CONCURRENCY, ResponseSession
+from .settings import env_int
+
+console = Console()
+
+# --- Defaults (override via environment variables) ---
+CHUNK_THRESHOLD_TOKENS = env_int("CSTUDIO_CHUNK_THRESHOLD", 12000) # Inputs above this are chunked
+CHUNK_MAX_TOKENS = env_int("CSTUDIO_CHUNK_TOKENS", 6000) # Size of each map chunk
+REDUCE_MAX_TOKENS = env_int("CSTUDIO_REDUCE_TOKENS", 12000) # Input budget of one reduce call
+CHARS_PER_TOKEN = 4 # Heuristic used when tiktoken is not installed
+
+# Boundary priorities: a chunk is preferably cut before a top-level definition,
+# then after a blank line, and only as a last resort between any two lines.
+BOUNDARY_DEFINITION = 3
+BOUNDARY_BLANK = 2
+BOUNDARY_LINE = 1
+
+DEFINITION_PATTERNS = {
+    "python": re.compile(r"^(?:async\s+def\s|def\s|class\s|@)"),
+    "config": re.compile(r"^(?:\[[^\]]+\]|[A-Za-z0-9_.\"'-]+\s*[:=]|---)"),
+    "generic": re.compile(r"^(?:export\s+)?(?:async\s+)?(?:function|class|def|fn|func|impl|struct|interface|module|public|private|package)\b"),
+}
+
+@dataclass
+class Chunk:
+    """A contiguous run of input lines."""
+    index: int
+    text: str
+    start_line: int # 1-based, inclusive
+    end_line: int # 1-based, inclusive
+    tokens: int
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Returns a tiktoken encoding for `model`, or None if tiktoken is unavailable."""
+    try:
+        import tiktoken # type: ignore # Optional dependency
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """
+    Counts the tokens in `text`.
+
+    Uses tiktoken when it is installed, otherwise estimates roughly four
+    characters per token.
+    """
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def detect_language(name: str) -> str:
+    """Maps a file name to the boundary rules used by iter_chunks()."""
+    lowered = name.lower()
+    if lowered.endswith((".py", ".pyi")):
+        return "python"
+    if lowered.endswith((".yaml", ".yml", ".json", ".toml", ".ini", ".cfg", ".conf", ".env", ".properties")):
+        return "config"
+    return "generic"
+
+def _boundary_priority(line: str, previous: str | None, pattern: re.Pattern) -> int:
+    """Priority of a cut placed just before `line`."""
+    if previous is None:
+        return 0
+    if line[:1].strip() and pattern.match(line) and not previous.startswith("@"):
+        return BOUNDARY_DEFINITION # Never separate a definition from its decorators
+    if not previous.strip() and line.strip():
+        return BOUNDARY_BLANK
+    return BOUNDARY_LINE
+
+def _split_long_line(line: str, max_tokens: int) -> Iterator[str]:
+    """Splits a single oversized line into pieces of roughly max_tokens."""
+    step = max(1, max_tokens * CHARS_PER_TOKEN)
+    for start in range(0, len(line), step):
+        yield line[start:start + step]
+
+def iter_chunks(lines: Iterable[str], max_tokens: int = CHUNK_MAX_TOKENS, language: str = "generic", model: str = "gpt-4o") -> Iterator[Chunk]:
+    """
+    Splits input into chunks of at most `max_tokens`, cutting on natural boundaries.
+
+    Lines are consumed lazily, so only the chunk being built is held in memory.
+    Cuts prefer the last top-level definition (keeping the chunk at least a
+    quarter full), then the last blank line or line break that keeps it at
+    least half full.
+
+    Args:
+        lines: Input lines (with line endings), e.g. an open file object.
+        max_tokens: Token budget per chunk.
+        language: Boundary rules: 'python', 'config' or 'generic'.
+        model: Model whose tokenizer is used for counting.
+
+    Yields:
+        Chunk objects in input order.
+    """
+    pattern = DEFINITION_PATTERNS.get(language, DEFINITION_PATTERNS["generic"])
+    buffer: list[str] = []
+    token_counts: list[int] = []
+    priorities: list[int] = [] # priorities[i]: cut before buffer[i]
+    buffered_tokens = 0
+    first_line = 1 # Line number of buffer[0]
+    index = 0
+    previous: str | None = None
+
+    def emit(count: int) -> Chunk:
+        nonlocal buffer, token_counts, priorities, buffered_tokens, first_line, index
+        tokens = sum(token_counts[:count])
+        chunk = Chunk(index, "".join(buffer[:count]), first_line, first_line + count - 1, tokens)
+        buffer, token_counts, priorities = buffer[count:], token_counts[count:], priorities[count:]
+        if priorities:
+            priorities[0] = 0
+        buffered_tokens -= tokens
+        first_line += count
+        index += 1
+        return chunk
+
+    def best_cut() -> int:
+        total = buffered_tokens
+        running = 0
+        best, best_priority = len(buffer), -1
+        for position in range(1, len(buffer)):
+            running += token_counts[position - 1]
+            if running * 4 < total or (running * 2 < total and priorities[position] < BOUNDARY_DEFINITION):
+                continue # Avoid tiny chunks; only a definition may cut below half full
+            if priorities[position] >= best_priority:
+                best, best_priority = position, priorities[position]
+        return best
+
+    for raw_line in lines:
+        pieces = [raw_line]
+        if count_tokens(raw_line, model) > max_tokens:
+            pieces = list(_split_long_line(raw_line, max_tokens))
+        for line in pieces:
+            tokens = count_tokens(line, model)
+            if buffer and buffered_tokens + tokens > max_tokens:
+                yield emit(best_cut())
+                if buffer and buffered_tokens + tokens > max_tokens:
+                    yield emit(len(buffer))
+            buffer.append(line)
+            token_counts.append(tokens)
+            buffered_tokens += tokens
+            priorities.append(_boundary_priority(line, previous, pattern) if len(buffer) > 1 else 0)
+            previous = line
+    while buffer:
+        yield emit(len(buffer))
+
+def _group_by_budget(texts: list[str], budget: int, model: str) -> list[list[str]]:
+    """Groups consecutive texts so each group fits within `budget` tokens."""
+    groups: list[list[str]] = [[]]
+    used = 0
+    for text in texts:
+        tokens = count_tokens(text, model)
+        if groups[-1] and used + tokens > budget:
+            groups.append([])
+            used = 0
+        groups[-1].append(text)
+        used += tokens
+    return groups
+
+async def map_reduce_async(
+    chunks: Iterable[Chunk],
+    map_prompt: Callable[[Chunk], str],
+    reduce_prompt: Callable[[list[str], bool], str],
+    model: str = "gpt-4o",
+    max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+    reduce_max_tokens: int = REDUCE_MAX_TOKENS,
+    use_cache: bool = True,
+    refresh: bool = False,
+    session: ResponseSession | None = None,
+    quiet: bool = False,
+) -> str | None:
+    """
+    Explains chunks concurrently, then merges the partial results.
+
+    All requests go through one ResponseSession (`session`, or a new one
+    closed at the end), so a single client and connection pool serve the
+    whole pass. Chunks are pulled from the iterable only while fewer than
+    `max_concurrency` are in flight, and the next chunk starts as soon as any
+    request finishes; memory holds the in-flight chunks plus the partial
+    results. If the partial results exceed the reduce budget
+    they are merged in several rounds.
+
+    Args:
+        chunks: Chunks to explain (typically from iter_chunks()).
+        map_prompt: Builds the prompt for one chunk.
+        reduce_prompt: Builds a merge prompt from partial results; the boolean
+            is True for the final merge and False for intermediate rounds.
+        model: The OpenAI model identifier.
+        max_concurrency: Maximum simultaneous map/reduce requests.
+        reduce_max_tokens: Token budget for the input of one reduce request.
+        use_cache: If False, bypass the response cache.
+        refresh: If True, ignore cached responses and store new ones.
+        session: Session to send the requests over (its own cache settings
+            apply); its concurrency limit is shared with its other callers.
+        quiet: If True, print no progress notes.
+
+    Returns:
+        The merged explanation, or None if every chunk failed.
+    """
+    max_concurrency = max(1, max_concurrency)
+    if session is None:
+        async with ResponseSession(max_concurrency, use_cache=use_cache, refresh=refresh) as session:
+            return await map_reduce_async(chunks, map_prompt, reduce_prompt, model, max_concurrency, reduce_max_tokens,
+                                          session=session, quiet=quiet)
+
+    partials: dict[int, str] = {}
+    failed = 0
+    in_flight: dict[asyncio.Future, Chunk] = {}
+
+    def collect(done: set[asyncio.Future]):
+        nonlocal failed
+        for task in done:
+            chunk, response = in_flight.pop(task), task.result()
+            if response is None:
+                failed += 1
+                partials[chunk.index] = f"(Lines {chunk.start_line}-{chunk.end_line} could not be explained.)"
+            else:
+                partials[chunk.index] = f"Lines {chunk.start_line}-{chunk.end_line}:\n{response}"
+
+    if not quiet:
+        console.print(f"[grey50]Explaining chunks (up to {max_concurrency} at a time)...[/grey50]")
+    try:
+        pending = iter(chunks)
+        while True:
+            if len(in_flight) >= max_concurrency: # Take the next chunk only once a slot is free
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+            chunk = next(pending, None)
+            if chunk is None:
+                break
+            in_flight[asyncio.ensure_future(session.ask(map_prompt(chunk), model, chunk.index))] = chunk
+        if in_flight:
+            collect((await asyncio.wait(in_flight))[0])
+    finally:
+        for task in in_flight: # Reached with unfinished tasks only on errors or cancellation
+            task.cancel()
+    if not partials or failed == len(partials):
+        return None
+
+    ordered = [partials[index] for index in sorted(partials)]
+    if len(ordered) == 1:
+        return ordered[0].split("\n", 1)[1]
+
+    # Intermediate rounds until everything fits into one reduce request
+    while count_tokens("\n\n".join(ordered), model) > reduce_max_tokens:
+        groups = _group_by_budget(ordered, reduce_max_tokens, model)
+        if len(groups) == len(ordered):
+            break # Each partial is already over budget on its own; merge anyway
+        if not quiet:
+            console.print(f"[grey50]Merging {len(ordered)} partial explanations in {len(groups)} groups...[/grey50]")
+        merged = await asyncio.gather(*(session.ask(reduce_prompt(group, False), model, index) for index, group in enumerate(groups)))
+        ordered = [text if text is not None else "\n\n".join(group) for text, group in zip(merged, groups)]
+
+    if not quiet:
+        console.print(f"[grey50]Merging {len(ordered)} partial explanations...[/grey50]")
+    return await session.ask(reduce_prompt(ordered, True), model)
+
+def map_reduce(chunks: Iterable[Chunk], map_prompt: Callable[[Chunk], str],
+               reduce_prompt: Callable[[list[str], bool], str], **kwargs) -> str | None:
+    """Synchronous wrapper around map_reduce_async() (same arguments)."""
+    return asyncio.run(map_reduce_async(chunks, map_prompt, reduce_prompt, **kwargs))
@@ -0,0 +1,251 @@
+# codex_cli/core/compact.py
+"""
+Token-budgeted views of Python source for prompts.
+
+The compactor edits the original text (so formatting and comments of the
+kept code survive) using spans from `ast`. Stages are tried from the
+mildest to the strongest until the result fits the budget:
+
+1. Long docstrings are cut to their first line and large literals (data
+   tables, long strings) are replaced by `...` placeholders.
+2. Blocks nested deeper than 3, 2, then 1 levels are replaced by `...`.
+3. Only signatures, class structure and top-level simple statements are kept.
+
+Every elision leaves a marker saying what was omitted, and the result is
+still valid Python.
+"""
+
+import ast
+from dataclasses import dataclass, field
+
+from .chunking import count_tokens
+from .settings import env_int
+
+# Prompt budgets per --detail level
+COMPACT_BUDGETS = {
+    "basic": env_int("CSTUDIO_COMPACT_BASIC_TOKENS", 3000),
+    "detailed": env_int("CSTUDIO_COMPACT_DETAILED_TOKENS", 8000),
+}
+# Python files up to this size are read whole and compacted instead of chunked
+COMPACT_MAX_BYTES = env_int("CSTUDIO_COMPACT_MAX_BYTES", 4 * 1024 * 1024)
+# Literals and docstrings longer than this (in characters) are candidates for elision
+LITERAL_MAX_CHARS = 200
+DOCSTRING_MAX_LINES = 3
+# Block depths tried after trimming docstrings and literals (0 = signatures only)
+DEPTH_STAGES = (3, 2, 1, 0)
+
+_BLOCK_FIELDS = ("body", "orelse", "finalbody")
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+_COLLECTIONS = {ast.List: ("[...]", "list"), ast.Tuple: ("(...)", "tuple"), ast.Set: ("{...}", "set"), ast.Dict: ("{...}", "dict")}
+
+@dataclass
+class CompactResult:
+    """
+    A compacted view of a source file.
+
+    Attributes:
+        text: The compacted source (the original if nothing was elided).
+        original_tokens: Tokens of the original source.
+        tokens: Tokens of `text`.
+        elided: Human-readable descriptions of the stages applied.
+    """
+    text: str
+    original_tokens: int
+    tokens: int
+    elided: list[str] = field(default_factory=list)
+
+    @property
+    def compacted(self) -> bool:
+        return bool(self.elided)
+
+def budget_for(detail: str) -> int:
+    """Returns the prompt budget for a --detail level."""
+    return COMPACT_BUDGETS.get(detail.lower(), COMPACT_BUDGETS["basic"])
+
+class _Source:
+    """Source text with conversions from ast positions (1-based lines, UTF-8 byte columns) to string offsets."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lines = text.splitlines(keepends=True)
+        self.starts = [0]
+        for line in self.lines:
+            self.starts.append(self.starts[-1] + len(line))
+
+    def offset(self, lineno: int, col: int) -> int:
+        line = self.lines[lineno - 1]
+        return self.starts[lineno - 1] + len(line.encode("utf-8")[:col].decode("utf-8", errors="ignore"))
+
+    def line_start(self, lineno: int) -> int:
+        return self.starts[lineno - 1]
+
+    def line_end(self, lineno: int) -> int:
+        """Offset of the end of a line, before its line break."""
+        return self.starts[lineno - 1] + len(self.lines[lineno - 1].rstrip("\r\n"))
+
+    def indent(self, lineno: int) -> str:
+        line = self.lines[lineno - 1]
+        return line[:len(line) - len(line.lstrip())]
+
+    def span(self, node: ast.AST) -> str:
+        return self.text[self.offset(node.lineno, node.col_offset):self.offset(node.end_lineno, node.end_col_offset)]
+
+def _is_docstring(stmt: ast.stmt) -> bool:
+    return isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str)
+
+def _docstring_node(node: ast.AST) -> ast.Constant | None:
+    body = getattr(node, "body", None)
+    return body[0].value if body and _is_docstring(body[0]) else None
+
+def _docstring_edits(tree: ast.Module, source: _Source) -> list[tuple[int, int, str]]:
+    edits = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, *_DEFINITIONS)):
+            continue
+        doc = _docstring_node(node)
+        if doc is None:
+            continue
+        lines = doc.value.strip().splitlines()
+        if len(lines) <= DOCSTRING_MAX_LINES and len(doc.value) <= LITERAL_MAX_CHARS * 2:
+            continue
+        first = lines[0].strip().replace('"""', "'''") if lines else ""
+        replacement = f'"""{first} [docstring trimmed: {len(lines) - 1} more lines]"""'
+        edits.append((source.offset(doc.lineno, doc.col_offset), source.offset(doc.end_lineno, doc.end_col_offset), replacement))
+    return edits
+
+def _large_literals(node: ast.AST, source: _Source):
+    """Yields the outermost large literals inside an expression tree."""
+    for child in ast.iter_child_nodes(node):
+        placeholder = None
+        if isinstance(child, ast.JoinedStr):
+            placeholder = ("f'...'", f"f-string of {len(source.span(child))} chars")
+        elif type(child) in _COLLECTIONS:
+            items = len(child.keys) if isinstance(child, ast.Dict) else len(child.elts)
+            text, kind = _COLLECTIONS[type(child)]
+            placeholder = (text, f"{kind} of {items} items")
+        elif isinstance(child, ast.Constant) and isinstance(child.value, (str, bytes)):
+            placeholder = ("b'...'" if isinstance(child.value, bytes) else "'...'", f"string of {len(child.value)} chars")
+        if placeholder and len(source.span(child)) > LITERAL_MAX_CHARS:
+            yield child, placeholder
+        elif not isinstance(child, ast.JoinedStr):
+            yield from _large_literals(child, source)
+
+def _literal_edits(tree: ast.Module, source: _Source, docstrings: set[int]) -> list[tuple[int, int, str]]:
+    edits = []
+    for stmt in ast.walk(tree):
+        # Only simple statements: the marker comment goes at the end of the statement
+        if not isinstance(stmt, ast.stmt) or any(hasattr(stmt, name) for name in ("body", "handlers", "cases")):
+            continue
+        if id(getattr(stmt, "value", None)) in docstrings:
+            continue
+        found = list(_large_literals(stmt, source))
+        if not found:
+            continue
+        for literal, (placeholder, _) in found:
+            edits.append((source.offset(literal.lineno, literal.col_offset), source.offset(literal.end_lineno, literal.end_col_offset), placeholder))
+        described = ", ".join(description for _, (_, description) in found)
+        end = source.line_end(stmt.end_lineno)
+        edits.append((end, end, f"  # elided: {described}"))
+    return edits
+
+def _blocks(node: ast.AST):
+    """Yields the statement lists nested directly in a compound statement."""
+    for name in _BLOCK_FIELDS:
+        block = getattr(node, name, None)
+        if block and isinstance(block, list) and isinstance(block[0], ast.stmt):
+            yield block
+    for handler in getattr(node, "handlers", None) or []:
+        yield handler.body
+    for case in getattr(node, "cases", None) or []:
+        yield case.body
+
+def _block_edit(block: list[ast.stmt], source: _Source, keep_docstring: bool) -> tuple[int, int, str] | None:
+    """Replaces a statement list by an `...` line with the number of lines elided."""
+    if keep_docstring and _is_docstring(block[0]):
+        block = block[1:]
+    if not block:
+        return None
+    first, last = block[0], block[-1]
+    start = first.decorator_list[0] if getattr(first, "decorator_list", None) else first
+    if source.text[source.line_start(start.lineno):source.offset(start.lineno, start.col_offset)].strip():
+        return None # The block starts on its header's line ('if x: return')
+    lines = last.end_lineno - start.lineno + 1
+    end = source.line_end(last.end_lineno)
+    newline = ""
+    if end < len(source.text):
+        newline = "\n"
+        end = source.starts[last.end_lineno] # Through the line break
+    indent = source.indent(start.lineno)
+    return (source.line_start(start.lineno), end, f"{indent}...  # {lines} line{'s' if lines != 1 else ''} elided{newline}")
+
+def _depth_edits(node: ast.AST, source: _Source, max_depth: int, depth: int = 0) -> list[tuple[int, int, str]]:
+    """
+    Elides blocks nested deeper than `max_depth`.
+
+    Module and class bodies do not count as a level, so methods are treated
+    like top-level functions; a function body is at depth 1.
+    """
+    edits = []
+    transparent = isinstance(node, (ast.Module, ast.ClassDef))
+    block_depth = depth if transparent else depth + 1
+    for block in _blocks(node):
+        if not transparent and block_depth > max_depth:
+            edit = _block_edit(block, source, keep_docstring=isinstance(node, _DEFINITIONS))
+            if edit:
+                edits.append(edit)
+                continue
+        for stmt in block:
+            edits.extend(_depth_edits(stmt, source, max_depth, block_depth))
+    return edits
+
+def _apply(text: str, edits: list[tuple[int, int, str]]) -> str:
+    """Applies non-overlapping edits; an edit inside an earlier, wider one is dropped."""
+    kept, covered_until = [], -1
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], -edit[1])):
+        if start < covered_until:
+            continue
+        kept.append((start, end, replacement))
+        covered_until = max(covered_until, end)
+    for start, end, replacement in reversed(kept):
+        text = text[:start] + replacement + text[end:]
+    return text
+
+def compact_python(source_text: str, budget: int, model: str = "gpt-4o") -> CompactResult:
+    """
+    Returns a view of Python source that fits in `budget` tokens if possible.
+
+    Args:
+        source_text: The module source.
+        budget: Target size in tokens.
+        model: Model whose tokenizer is used for counting.
+
+    Returns:
+        A CompactResult. The source is returned unchanged if it already fits
+        or cannot be parsed; the strongest stage is returned if nothing fits.
+    """
+    original_tokens = count_tokens(source_text, model)
+    result = CompactResult(source_text, original_tokens, original_tokens)
+    if original_tokens <= budget:
+        return result
+    try:
+        tree = ast.parse(source_text)
+    except (SyntaxError, ValueError, RecursionError):
+        return result
+
+    source = _Source(source_text)
+    docstring_edits = _docstring_edits(tree, source)
+    docstrings = {id(_docstring_node(node)) for node in ast.walk(tree) if isinstance(node, (ast.Module, *_DEFINITIONS))}
+    base_edits = docstring_edits + _literal_edits(tree, source, docstrings)
+    base_elided = ["long docstrings trimmed", "large literals elided"] if base_edits else []
+
+    stages = [(base_edits, base_elided)] if base_edits else []
+    for depth in DEPTH_STAGES:
+        described = "function bodies elided (signatures kept)" if depth == 0 else f"blocks nested deeper than {depth} levels elided"
+        stages.append((base_edits + _depth_edits(tree, source, depth), base_elided + [described]))
+
+    for edits, elided in stages:
+        text = _apply(source_text, edits)
+        result = CompactResult(text, original_tokens, count_tokens(text, model), elided)
+        if result.tokens <= budget:
+            break
+    return result
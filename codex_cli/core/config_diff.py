@@ -0,0 +1,167 @@
+# codex_cli/core/config_diff.py
+"""
+Structural diffs of two versions of a config.
+
+Parsed configs (see skeleton.parse_config()) are compared key path by key
+path. List items that carry an identity - a `name`, `id` or `key` field, or
+a Kubernetes kind and metadata.name - are matched by it, so inserting a
+container or reordering documents shows up as one added entry instead of a
+shifted list. A subtree that was added or removed as a whole is reported
+once, at its root. The result scales with the size of the change, not the
+size of the files.
+"""
+
+import difflib
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from .settings import env_int
+
+# Changes listed individually in a prompt; the rest are counted per normalized path
+MAX_CHANGES = env_int("CSTUDIO_CONFIG_DIFF_MAX_CHANGES", 200)
+VALUE_MAX_CHARS = 120
+TEXT_DIFF_CONTEXT = 2
+IDENTITY_FIELDS = ("name", "id", "key")
+
+_INDEX = re.compile(r"\[[^\]]*\]")
+
+@dataclass
+class PathChange:
+    """
+    One change between two versions of a config.
+
+    Attributes:
+        path: Concrete key path, with list items named by identity (`containers[name=api]`) or index (`args[2]`).
+        kind: 'added', 'removed' or 'changed'.
+        old: Previous value (None when added).
+        new: New value (None when removed).
+    """
+    path: str
+    kind: str
+    old: Any = None
+    new: Any = None
+
+    @property
+    def normalized(self) -> str:
+        """The key path with list items written as `[]`, as in config skeletons."""
+        return _INDEX.sub("[]", self.path)
+
+def _join(path: str, key: str) -> str:
+    if key.startswith("["):
+        return path + key
+    return f"{path}.{key}" if path else key
+
+def item_identity(item: Any) -> str | None:
+    """Returns the identity of a list item (e.g. 'name=api', 'Deployment/prod/api'), or None."""
+    if not isinstance(item, dict):
+        return None
+    metadata = item.get("metadata")
+    if item.get("kind") and isinstance(metadata, dict) and metadata.get("name"):
+        return "/".join(str(part) for part in (item["kind"], metadata.get("namespace"), metadata["name"]) if part)
+    for field in IDENTITY_FIELDS:
+        value = item.get(field)
+        if isinstance(value, (str, int)) and not isinstance(value, bool):
+            return f"{field}={value}"
+    return None
+
+def _keyed(items: list) -> dict[str, Any] | None:
+    """Indexes list items by identity, or returns None if some item has none or identities repeat."""
+    keyed = {}
+    for item in items:
+        identity = item_identity(item)
+        if identity is None or identity in keyed:
+            return None
+        keyed[identity] = item
+    return keyed
+
+def diff_values(old: Any, new: Any, path: str = "") -> list[PathChange]:
+    """
+    Compares two parsed config values.
+
+    Args:
+        old: The previous value.
+        new: The new value.
+        path: Key path of both values ('' for the root).
+
+    Returns:
+        The changes, in document order.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [key for key in new if key not in old]:
+            child = _join(path, str(key))
+            if key not in new:
+                changes.append(PathChange(child, "removed", old=old[key]))
+            elif key not in old:
+                changes.append(PathChange(child, "added", new=new[key]))
+            else:
+                changes += diff_values(old[key], new[key], child)
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        old_keyed, new_keyed = _keyed(old), _keyed(new)
+        if old_keyed is not None and new_keyed is not None and (old or new):
+            return _diff_keyed(old_keyed, new_keyed, path)
+        changes = []
+        for index in range(max(len(old), len(new))):
+            child = f"{path}[{index}]"
+            if index >= len(new):
+                changes.append(PathChange(child, "removed", old=old[index]))
+            elif index >= len(old):
+                changes.append(PathChange(child, "added", new=new[index]))
+            else:
+                changes += diff_values(old[index], new[index], child)
+        return changes
+    if old != new or type(old) is not type(new):
+        return [PathChange(path, "changed", old, new)]
+    return []
+
+def _diff_keyed(old: dict[str, Any], new: dict[str, Any], path: str) -> list[PathChange]:
+    changes = []
+    for identity in list(old) + [identity for identity in new if identity not in old]:
+        child = f"{path}[{identity}]"
+        if identity not in new:
+            changes.append(PathChange(child, "removed", old=old[identity]))
+        elif identity not in old:
+            changes.append(PathChange(child, "added", new=new[identity]))
+        else:
+            changes += diff_values(old[identity], new[identity], child)
+    return changes
+
+def brief(value: Any) -> str:
+    """A short rendering of a value for prompts: JSON if it is short, otherwise a summary of the container."""
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    if len(text) <= VALUE_MAX_CHARS:
+        return text
+    if isinstance(value, dict):
+        keys = ", ".join(str(key) for key in list(value)[:6]) + (", …" if len(value) > 6 else "")
+        return f"map of {len(value)} keys ({keys})"
+    if isinstance(value, list):
+        return f"list of {len(value)} items"
+    return text[:VALUE_MAX_CHARS] + "…"
+
+def format_change(change: PathChange) -> str:
+    """Renders a change as one line: `+ path: value`, `- path: value` or `~ path: old → new`."""
+    if change.kind == "added":
+        return f"+ {change.path}: {brief(change.new)}"
+    if change.kind == "removed":
+        return f"- {change.path}: {brief(change.old)}"
+    return f"~ {change.path}: {brief(change.old)} → {brief(change.new)}"
+
+def format_changes(changes: list[PathChange], limit: int = MAX_CHANGES) -> str:
+    """Renders up to `limit` changes, then counts the rest per normalized path."""
+    lines = [format_change(change) for change in changes[:limit]]
+    rest: dict[str, int] = {}
+    for change in changes[limit:]:
+        rest[change.normalized] = rest.get(change.normalized, 0) + 1
+    for path, count in sorted(rest.items(), key=lambda item: -item[1]):
+        lines.append(f"… {count} more change(s) under {path}")
+    return "\n".join(lines)
+
+def text_diff(old_text: str, new_text: str, old_name: str = "old", new_name: str = "new") -> str:
+    """A unified diff with little context, for configs that do not parse."""
+    return "".join(difflib.unified_diff(
+        old_text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+        fromfile=old_name, tofile=new_name, n=TEXT_DIFF_CONTEXT,
+    ))
@@ -0,0 +1,265 @@
+# codex_cli/core/files.py
+"""
+Source file discovery for commands that take a directory or glob.
+
+Directories are walked without following symlinks. Paths matched by
+.gitignore files (those of the enclosing repository down to the walked
+directory, every nested one, and .git/info/exclude) are pruned, and binary, empty or oversized files are reported as skipped.
+"""
+
+import fnmatch
+import glob
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .chunking import CHARS_PER_TOKEN, CHUNK_THRESHOLD_TOKENS
+from .ingest import IngestError, is_binary
+
+# Files larger than this are skipped (default: what fits in one request without chunking)
+MAX_FILE_BYTES = CHUNK_THRESHOLD_TOKENS * CHARS_PER_TOKEN
+ALWAYS_IGNORED = {".git", ".hg", ".svn"}
+GLOB_CHARS = set("*?[")
+
+@dataclass
+class IgnoreRule:
+    """One compiled .gitignore pattern, relative to the directory of its file."""
+    base: str # Directory of the .gitignore, relative to the walk root ('' for the root)
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return bool(self.regex.match(rel_path))
+
+def _translate(pattern: str) -> str:
+    """Translates a gitignore glob into a regex over '/'-separated paths."""
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape("["))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                out.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+                i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+def parse_gitignore(text: str, base: str = "") -> list[IgnoreRule]:
+    """
+    Compiles the patterns of a .gitignore file.
+
+    Args:
+        text: The file content.
+        base: Directory containing the file, relative to the walk root.
+
+    Returns:
+        The rules in file order (later rules override earlier ones).
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        if line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+        anchored = "/" in line
+        regex = _translate(line.lstrip("/"))
+        regex = "^" + regex + "$" if anchored else "^(?:.*/)?" + regex + "$"
+        rules.append(IgnoreRule(base, re.compile(regex), negate, dir_only))
+    return rules
+
+def is_ignored(rules: list[IgnoreRule], rel_path: str, is_dir: bool) -> bool:
+    """Applies rules in order; the last matching rule decides."""
+    ignored = False
+    for rule in rules:
+        if rule.matches(rel_path, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+def _read_rules(path: Path, base: str) -> list[IgnoreRule]:
+    try:
+        return parse_gitignore(path.read_text(encoding="utf-8", errors="replace"), base)
+    except OSError:
+        return []
+
+def is_glob(pattern: str) -> bool:
+    """Returns True if the string contains glob wildcards."""
+    return any(char in GLOB_CHARS for char in pattern)
+
+def is_file_glob(pattern: str) -> bool:
+    """
+    Returns True for a one-line glob pattern that matches at least one file.
+
+    Used to tell a pattern such as 'src/**/*.py' from a snippet or shell
+    command that merely contains wildcards (e.g. 'ls *.txt').
+    """
+    if "\n" in pattern or not is_glob(pattern) or os.path.exists(pattern):
+        return False
+    return any(os.path.isfile(p) for p in glob.iglob(pattern, recursive=True))
+
+@dataclass
+class FileSelection:
+    """Files chosen for processing, and the ones skipped with a reason."""
+    root: Path
+    files: list[Path] = field(default_factory=list)
+    skipped: list[tuple[Path, str]] = field(default_factory=list)
+    ignored: int = 0 # Paths excluded by .gitignore
+
+    def relative(self, path: Path) -> str:
+        """Returns the '/'-separated path relative to the root (used for stable ordering and reports)."""
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+def _matches_any(rel_path: str, patterns: list[str]) -> bool:
+    name = rel_path.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p) for p in patterns)
+
+def _check_file(path: Path, max_bytes: int) -> str | None:
+    """Returns why a file must be skipped, or None."""
+    try:
+        size = path.stat().st_size
+        if size == 0:
+            return "empty"
+        if max_bytes and size > max_bytes:
+            return f"too large ({size // 1024} KB)"
+        if is_binary(path):
+            return "binary"
+    except OSError as e:
+        return f"unreadable ({e.strerror or e})"
+    except IngestError:
+        return "unreadable"
+    return None
+
+def collect_files(
+    target: str | Path,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    max_bytes: int | None = None,
+    use_gitignore: bool = True,
+) -> FileSelection:
+    """
+    Lists the files of a directory or glob pattern, in sorted order.
+
+    Args:
+        target: A directory, or a glob pattern such as 'src/**/*.py'.
+        include: Only keep files whose name or relative path matches one of these globs.
+        exclude: Drop files whose name or relative path matches one of these globs.
+        max_bytes: Skip files larger than this (defaults to MAX_FILE_BYTES; 0 = no limit).
+        use_gitignore: Honor .gitignore files under a walked directory.
+
+    Returns:
+        A FileSelection; `files` and `skipped` are sorted by relative path.
+    """
+    include, exclude = include or [], exclude or []
+    max_bytes = MAX_FILE_BYTES if max_bytes is None else max_bytes
+    target = str(target)
+
+    if os.path.isdir(target):
+        selection = FileSelection(Path(target).resolve())
+        candidates = list(_walk(selection.root, use_gitignore, selection))
+    else:
+        selection = FileSelection(Path.cwd())
+        candidates = [Path(p).resolve() for p in glob.glob(target, recursive=True) if os.path.isfile(p)]
+
+    for path in candidates:
+        rel_path = selection.relative(path)
+        if include and not _matches_any(rel_path, include):
+            continue
+        if exclude and _matches_any(rel_path, exclude):
+            continue
+        reason = _check_file(path, max_bytes)
+        if reason:
+            selection.skipped.append((path, reason))
+        else:
+            selection.files.append(path)
+    selection.files.sort(key=selection.relative)
+    selection.skipped.sort(key=lambda item: selection.relative(item[0]))
+    return selection
+
+def _repo_root(path: Path) -> Path | None:
+    """Returns the nearest directory at or above `path` that contains .git, if any."""
+    for candidate in (path, *path.parents):
+        if (candidate / ".git").exists():
+            return candidate
+    return None
+
+def _walk(root: Path, use_gitignore: bool, selection: FileSelection):
+    """Yields the files under root, pruning ignored directories."""
+    # Patterns are matched against paths relative to the repository root, as git does
+    anchor = (_repo_root(root) if use_gitignore else None) or root
+    rules = []
+    if use_gitignore:
+        rules = _read_rules(anchor / ".git" / "info" / "exclude", "")
+        # .gitignore files of the directories between the repository root and the walk root
+        for directory in reversed(root.parents):
+            if directory == anchor or anchor in directory.parents:
+                base = "" if directory == anchor else directory.relative_to(anchor).as_posix()
+                rules += _read_rules(directory / ".gitignore", base)
+    # Rules in effect per directory: inherited from the parents plus the directory's own .gitignore
+    rules_by_dir = {root: rules}
+    for dirpath, dirnames, filenames in os.walk(root):
+        current = Path(dirpath)
+        rules = rules_by_dir.pop(current, [])
+        rel_dir = "" if current == anchor else current.relative_to(anchor).as_posix()
+        if use_gitignore and ".gitignore" in filenames:
+            rules = rules + _read_rules(current / ".gitignore", rel_dir)
+        kept = []
+        for name in sorted(dirnames):
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if name in ALWAYS_IGNORED or (current / name).is_symlink():
+                continue
+            if is_ignored(rules, rel_path, True):
+                selection.ignored += 1
+                continue
+            kept.append(name)
+            rules_by_dir[current / name] = rules
+        dirnames[:] = kept
+        for name in sorted(filenames):
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if is_ignored(rules, rel_path, False):
+                selection.ignored += 1
+                continue
+            path = current / name
+            if path.is_file():
+                yield path
@@ -0,0 +1,272 @@
+# codex_cli/core/fingerprint.py
+"""
+Normalized fingerprints and MinHash signatures for code and shell input.
+
+Inputs that differ only in whitespace, comments or local variable names
+normalize to the same text:
+- Python: the syntax tree as a compact stream of node types, operators,
+  names and constants, with function-local names renamed in order of appearance
+- shell: the words of each command line with their quoting kept, comments
+  removed and whitespace collapsed
+- anything else: the token stream with comments removed
+
+MinHash signatures of the normalized tokens estimate the Jaccard similarity
+of two inputs, for near-duplicate lookup with locality-sensitive hashing.
+"""
+
+import ast
+import hashlib
+import re
+
+NUM_PERM = 128 # Signature length (number of MinHash values)
+LSH_ROWS = 4 # Signature values per LSH band (32 bands: candidates from ~45% similarity)
+SHINGLE_SIZE = 4 # Tokens per shingle
+MIN_TOKENS = 24 # Shorter inputs are only matched exactly, never as near-duplicates
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w+")
+_PYTHON_START_RE = re.compile(r"\s*(def|class|import|from|async|for|while|if|with|try|return|lambda|print)\b|\s*@\w")
+_SHELL_EXTENSIONS = {".sh", ".bash", ".zsh", ".ksh"}
+_HASH_COMMENT_EXTENSIONS = {".py", ".rb", ".pl", ".r", ".yaml", ".yml", ".toml", ".ini", ".conf", ".cfg", ".mk"}
+# Strings are matched first so comment markers inside them are kept
+_COMMENT_PATTERNS = {
+    "hash": re.compile(r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|(#[^\n]*)"),
+    "c": re.compile(r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|(//[^\n]*|/\*.*?\*/)", re.S),
+    "any": re.compile(r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|(#[^\n]*|//[^\n]*|/\*.*?\*/)", re.S),
+}
+
+def guess_language(content: str, file_name: str | None = None) -> str:
+    """
+    Picks the normalizer for an input: 'python', 'shell' or 'generic'.
+
+    Files are classified by extension. Snippets are treated as Python when
+    they span several lines or start with a Python statement, and as shell
+    commands otherwise (a one-line command such as "ls -la" is also valid Python).
+    """
+    if file_name:
+        lower = file_name.lower()
+        if lower.endswith((".py", ".pyw")):
+            return "python"
+        if lower.endswith(tuple(_SHELL_EXTENSIONS)):
+            return "shell"
+        return "generic"
+    if "\n" in content.strip() or _PYTHON_START_RE.match(content):
+        return "python"
+    return "shell"
+
+class _LocalRenamer(ast.NodeTransformer):
+    """Renames function arguments and locals to _v0, _v1, ... (module-level names are kept)."""
+    def __init__(self):
+        self.scopes: list[dict[str, str]] = []
+
+    def _visit_scope(self, node, arguments: ast.arguments):
+        mapping = dict(self.scopes[-1]) if self.scopes else {}
+        declared = {name for child in ast.walk(node) if isinstance(child, (ast.Global, ast.Nonlocal)) for name in child.names}
+        params = [a.arg for a in arguments.posonlyargs + arguments.args + arguments.kwonlyargs]
+        params += [a.arg for a in (arguments.vararg, arguments.kwarg) if a]
+        stores = [child.id for child in ast.walk(node) if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store)]
+        for name in params + stores:
+            if name not in declared and name not in mapping:
+                mapping[name] = f"_v{len(mapping)}"
+        self.scopes.append(mapping)
+        self.generic_visit(node)
+        self.scopes.pop()
+        return node
+
+    def visit_FunctionDef(self, node):
+        return self._visit_scope(node, node.args)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        return self._visit_scope(node, node.args)
+
+    def visit_arg(self, node):
+        if self.scopes and node.arg in self.scopes[-1]:
+            node.arg = self.scopes[-1][node.arg]
+        return node
+
+    def visit_Name(self, node):
+        if self.scopes and node.id in self.scopes[-1]:
+            node.id = self.scopes[-1][node.id]
+        return node
+
+# Fields that carry no meaning of their own (ctx follows from the position of a name)
+_SKIPPED_FIELDS = {"ctx", "kind", "type_comment", "type_ignores"}
+
+def _python_tokens(node: ast.AST) -> str:
+    """
+    Serializes a syntax tree in preorder: the type of each node (operators
+    included, e.g. Add), names, the repr of constants, and '[ ]' and '~'
+    marking lists and missing fields so the form stays unambiguous.
+
+    Unlike ast.dump() there are no field names, parentheses or contexts, so a
+    changed operator or constant weighs about as much as the code around it.
+    """
+    out: list[str] = []
+
+    def walk(value):
+        if isinstance(value, ast.Constant):
+            out.extend(["Constant", repr(value.value)])
+        elif isinstance(value, ast.AST):
+            out.append(type(value).__name__)
+            for name in value._fields:
+                if name not in _SKIPPED_FIELDS:
+                    walk(getattr(value, name, None))
+        elif isinstance(value, list):
+            out.append("[")
+            for item in value:
+                walk(item)
+            out.append("]")
+        else:
+            out.append("~" if value is None else str(value))
+
+    walk(node)
+    return " ".join(out)
+
+def _shell_words(content: str) -> list[list[str]]:
+    """
+    Splits shell input into commands and words, keeping each word as written
+    (quotes and escapes included) and dropping comments.
+
+    Raises:
+        ValueError: If a quote is not closed.
+    """
+    commands: list[list[str]] = []
+    words: list[str] = []
+    word, quote, i = "", None, 0
+    while i < len(content):
+        char = content[i]
+        if quote:
+            word += char
+            if char == "\\" and quote == '"' and i + 1 < len(content):
+                word += content[i + 1]
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char == "\\" and i + 1 < len(content):
+            if content[i + 1] != "\n": # A line continuation joins the lines
+                word += content[i:i + 2]
+            i += 1
+        elif char in "'\"":
+            word, quote = word + char, char
+        elif char == "#" and not word:
+            while i + 1 < len(content) and content[i + 1] != "\n":
+                i += 1
+        elif char.isspace():
+            if word:
+                words.append(word)
+                word = ""
+            if char == "\n" and words:
+                commands.append(words)
+                words = []
+        else:
+            word += char
+        i += 1
+    if quote:
+        raise ValueError("No closing quotation")
+    if word:
+        words.append(word)
+    if words:
+        commands.append(words)
+    return commands
+
+def _strip_comments(text: str, style: str) -> str:
+    return _COMMENT_PATTERNS[style].sub(lambda m: " " if m.group(1) else m.group(0), text)
+
+def _comment_style(file_name: str | None) -> str:
+    if not file_name:
+        return "any"
+    lower = file_name.lower()
+    if lower.endswith(tuple(_HASH_COMMENT_EXTENSIONS)) or lower in ("makefile", "dockerfile"):
+        return "hash"
+    return "c" if "." in lower else "any"
+
+def normalize(content: str, language: str, file_name: str | None = None) -> str:
+    """
+    Returns the normalized form of an input (see the module docstring).
+
+    Python that does not parse and shell with unbalanced quotes fall back
+    to the generic token stream.
+
+    Args:
+        content: The code, command or file content.
+        language: 'python', 'shell' or 'generic' (see guess_language()).
+        file_name: Optional file name, used to pick the comment syntax.
+    """
+    if language == "python":
+        try:
+            tree = _LocalRenamer().visit(ast.parse(content))
+            return "py:" + _python_tokens(tree)
+        except (SyntaxError, ValueError, RecursionError):
+            pass
+    if language == "shell":
+        try:
+            return "sh:" + "\n".join(" ".join(words) for words in _shell_words(content))
+        except ValueError:
+            pass
+    return "tok:" + " ".join(_TOKEN_RE.findall(_strip_comments(content, _comment_style(file_name))))
+
+def fingerprint(normalized: str) -> str:
+    """Returns a hex digest identifying a normalized input."""
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _tokens(normalized: str) -> list[str]:
+    # Python is compared by its words (node types, operators, names and constants); its markers and quotes are structure
+    if normalized.startswith("py:"):
+        return _WORD_RE.findall(normalized[3:])
+    return _TOKEN_RE.findall(normalized)
+
+def shingles(normalized: str, size: int = SHINGLE_SIZE) -> set[str]:
+    """Returns the set of overlapping token n-grams of a normalized input."""
+    tokens = _tokens(normalized)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+def token_count(normalized: str) -> int:
+    """Returns the number of tokens in a normalized input."""
+    return len(_tokens(normalized))
+
+def minhash_signature(items: set[str], num_perm: int = NUM_PERM) -> list[int]:
+    """
+    Computes a MinHash signature with one-permutation hashing.
+
+    Each item is hashed once and falls into one of `num_perm` bins, which
+    keep their minimum; empty bins borrow from the next non-empty bin
+    (rotation densification). This costs O(len(items)) instead of
+    O(len(items) * num_perm) for classic MinHash.
+
+    Returns:
+        A list of `num_perm` integers, or an empty list for an empty set.
+    """
+    bins: list[int | None] = [None] * num_perm
+    for item in items:
+        value = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+        index, rank = value % num_perm, value // num_perm
+        if bins[index] is None or rank < bins[index]:
+            bins[index] = rank
+    if all(b is None for b in bins):
+        return []
+    offset = 1 << 58 # Larger than any rank, so borrowed values never equal real ones
+    signature = []
+    for i in range(num_perm):
+        distance = 0
+        while bins[(i + distance) % num_perm] is None:
+            distance += 1
+        signature.append(bins[(i + distance) % num_perm] + distance * offset)
+    return signature
+
+def similarity(a: list[int], b: list[int]) -> float:
+    """Estimates the Jaccard similarity of two inputs from their signatures."""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+def lsh_bands(signature: list[int], rows: int = LSH_ROWS) -> list[int]:
+    """Returns one bucket hash per band of `rows` signature values (63-bit, SQLite-safe)."""
+    buckets = []
+    for start in range(0, len(signature) - rows + 1, rows):
+        band = ",".join(map(str, signature[start:start + rows])).encode()
+        buckets.append(int.from_bytes(hashlib.blake2b(band, digest_size=8).digest(), "big") >> 1)
+    return buckets
@@ -0,0 +1,124 @@
+# codex_cli/core/git.py
+"""
+Thin wrappers around the `git` command line (no library dependency).
+"""
+
+import re
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+class GitError(Exception):
+    """Raised when a git command fails (not a repository, unknown revision, ...)."""
+
+def run_git(args: list[str], cwd: Path | str | None = None) -> str:
+    """
+    Runs a git command and returns its standard output.
+
+    Raises:
+        GitError: If git is not installed or the command fails.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "-c", "core.quotePath=false", *args],
+            cwd=cwd, capture_output=True, text=True, encoding="utf-8", errors="replace",
+        )
+    except OSError as e:
+        raise GitError(f"cannot run git: {e}")
+    if result.returncode != 0:
+        raise GitError(result.stderr.strip() or f"git {args[0]} failed with exit code {result.returncode}")
+    return result.stdout
+
+def repo_root(path: Path | str = ".") -> Path:
+    """Returns the top-level directory of the work tree containing `path`."""
+    return Path(run_git(["rev-parse", "--show-toplevel"], cwd=path).strip())
+
+def show_file(root: Path, rev: str, path: str) -> str | None:
+    """Returns the content of `path` at revision `rev`, or None if it did not exist there."""
+    try:
+        return run_git(["show", f"{rev}:{path}"], cwd=root)
+    except GitError:
+        return None
+
+@dataclass
+class FileDiff:
+    """
+    The changes to one file between a revision and the work tree.
+
+    Attributes:
+        path: Path in the work tree, relative to the repository root (None if deleted).
+        old_path: Path at the revision (None if the file is new).
+        hunks: Hunk text, including headers and context lines.
+        touched: Work-tree line numbers that were added or changed, or next to a deletion.
+        binary: True for binary files (no hunks).
+    """
+    path: str | None
+    old_path: str | None
+    hunks: list[str] = field(default_factory=list)
+    touched: set[int] = field(default_factory=set)
+    binary: bool = False
+
+def _strip_prefix(name: str, prefix: str) -> str | None:
+    name = name.rstrip("\t")
+    if name == "/dev/null":
+        return None
+    return name[len(prefix):] if name.startswith(prefix) else name
+
+def parse_diff(text: str) -> list[FileDiff]:
+    """Parses `git diff` output (unified format, a/ and b/ prefixes)."""
+    files: list[FileDiff] = []
+    current: FileDiff | None = None
+    new_line = 0
+    for line in text.splitlines():
+        if line.startswith("diff --git "):
+            current = FileDiff(None, None)
+            files.append(current)
+            match = re.match(r"diff --git a/(.*) b/(.*)$", line)
+            if match: # Paths for diffs without ---/+++ lines (binary files, pure renames)
+                current.old_path, current.path = match.group(1), match.group(2)
+        elif current is None:
+            continue
+        elif line.startswith("new file mode"):
+            current.old_path = None
+        elif line.startswith("deleted file mode"):
+            current.path = None
+        elif line.startswith("Binary files "):
+            current.binary = True
+        elif line.startswith("--- ") and not current.hunks:
+            current.old_path = _strip_prefix(line[4:], "a/")
+        elif line.startswith("+++ ") and not current.hunks:
+            current.path = _strip_prefix(line[4:], "b/")
+        elif line.startswith("@@"):
+            match = _HUNK_RE.match(line)
+            if match:
+                new_line = int(match.group(3))
+                current.hunks.append(line)
+        elif current.hunks:
+            current.hunks[-1] += "\n" + line
+            if line.startswith("+"):
+                current.touched.add(new_line)
+                new_line += 1
+            elif line.startswith("-"):
+                # A deletion touches the lines around the gap it leaves
+                current.touched.update(n for n in (new_line - 1, new_line) if n > 0)
+            elif line.startswith(" "):
+                new_line += 1
+    return files
+
+def diff_against(rev: str, root: Path, paths: list[str] | None = None, context: int = 3) -> list[FileDiff]:
+    """
+    Returns the changes between `rev` and the work tree (staged and unstaged).
+
+    Args:
+        rev: Any revision git understands (e.g. 'HEAD~1', 'origin/main').
+        root: Repository root.
+        paths: Optional pathspecs to limit the diff.
+        context: Context lines per hunk.
+
+    Raises:
+        GitError: If the revision is unknown or git fails.
+    """
+    args = ["diff", "--no-color", "--no-ext-diff", "-M", f"--unified={context}", rev, "--", *(paths or [])]
+    return parse_diff(run_git(args, cwd=root))
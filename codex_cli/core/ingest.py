@@ -0,0 +1,264 @@
+# codex_cli/core/ingest.py
+"""
+Reading input files safely, whatever their size.
+
+The first few KB of a file are sniffed for binary content and the text
+encoding. Files up to a size cap are read whole; larger files are
+memory-mapped and sampled: the head, the tail and a few middle sections
+are kept, each cut at a structural boundary (a line with the shallowest
+indentation nearby, or a separator in minified data), and the omitted
+ranges are marked in the text.
+"""
+
+import codecs
+import mmap
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TextIO
+
+from .chunking import CHARS_PER_TOKEN, CHUNK_THRESHOLD_TOKENS
+from .settings import env_int
+
+SNIFF_BYTES = 8192
+# Files larger than this are sampled instead of read whole
+MAX_INPUT_BYTES = env_int("CSTUDIO_MAX_INPUT_BYTES", 1024 * 1024)
+# Size of a sample (default: what fits in one request)
+SAMPLE_BYTES = env_int("CSTUDIO_SAMPLE_TOKENS", CHUNK_THRESHOLD_TOKENS) * CHARS_PER_TOKEN
+MIDDLE_SECTIONS = 3
+# How far past a cut point to look for a structural boundary
+BOUNDARY_SEARCH_BYTES = 16384
+# Share of a sample given to the head and the tail; the middle sections share the rest
+HEAD_SHARE, TAIL_SHARE = 0.4, 0.2
+# Text files may contain a few control characters (form feeds, escape sequences), not many
+CONTROL_RATIO = 0.1
+NEWLINE_COUNT_BLOCK = 1024 * 1024
+
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_TEXT_CONTROLS = {7, 8, 9, 10, 11, 12, 13, 27}
+_SEPARATORS = (b"},", b"],", b",", b";", b">")
+
+class IngestError(Exception):
+    """Raised when a file cannot be read as text (binary, unreadable)."""
+
+@dataclass
+class FileInfo:
+    """What sniffing the start of a file revealed."""
+    path: Path
+    size: int
+    encoding: str | None # None for binary files
+    binary: bool = False
+
+@dataclass
+class Ingested:
+    """
+    The text of a file, possibly sampled.
+
+    Attributes:
+        text: The full text, or the sampled sections joined by omission markers.
+        info: Size and encoding of the file.
+        sampled: True if parts of the file were omitted.
+        omitted_bytes: Total size of the omitted ranges.
+    """
+    text: str
+    info: FileInfo
+    sampled: bool = False
+    omitted_bytes: int = 0
+    sections: list[tuple[int, int]] = field(default_factory=list) # Byte ranges kept
+
+def _detect_encoding(head: bytes) -> str | None:
+    """Returns the encoding of text that starts with `head`, or None if it looks binary."""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    if b"\0" in head:
+        return None
+    controls = sum(1 for byte in head if byte < 32 and byte not in _TEXT_CONTROLS)
+    if head and controls > CONTROL_RATIO * len(head):
+        return None
+    # The sniffed block may end in the middle of a multi-byte character
+    for trim in range(4):
+        try:
+            head[:len(head) - trim].decode("utf-8")
+            return "utf-8"
+        except UnicodeDecodeError as e:
+            if e.start < len(head) - 4:
+                break
+    try:
+        from charset_normalizer import from_bytes # type: ignore # Optional dependency
+    except ImportError:
+        return "latin-1"
+    match = from_bytes(head).best()
+    return match.encoding if match else "latin-1"
+
+def sniff(path: Path | str) -> FileInfo:
+    """
+    Inspects the first SNIFF_BYTES of a file.
+
+    Raises:
+        IngestError: If the file cannot be opened.
+    """
+    path = Path(path)
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+            size = f.seek(0, 2)
+    except OSError as e:
+        raise IngestError(f"cannot read {path}: {e.strerror or e}")
+    encoding = _detect_encoding(head)
+    return FileInfo(path, size, encoding, binary=encoding is None)
+
+def is_binary(path: Path | str) -> bool:
+    """Returns True if the start of the file looks binary."""
+    return sniff(path).binary
+
+def open_text(info: FileInfo) -> TextIO:
+    """Opens a sniffed text file for line-by-line reading (undecodable bytes are replaced)."""
+    return open(info.path, "r", encoding=info.encoding, errors="replace")
+
+def _shallowest_line_start(data: bytes) -> int | None:
+    """Returns the offset of the least indented line start in `data` (after a newline), if any."""
+    best, best_indent = None, None
+    position = data.find(b"\n")
+    while position != -1 and position + 1 < len(data):
+        start = position + 1
+        line = data[start:start + 256]
+        indent = len(line) - len(line.lstrip(b" \t"))
+        if data[start:start + 1] not in (b"\n", b"\r") and (best_indent is None or indent < best_indent):
+            best, best_indent = start, indent
+            if indent == 0:
+                break
+        position = data.find(b"\n", start)
+    return best
+
+def _boundary_after(mm, offset: int, limit: int) -> int:
+    """Moves a cut point forward to a structural boundary, giving up at most a quarter of the section."""
+    window = mm[offset:offset + min(BOUNDARY_SEARCH_BYTES, (limit - offset) // 4)]
+    line_start = _shallowest_line_start(window)
+    if line_start is not None:
+        return offset + line_start
+    for separator in _SEPARATORS: # Minified data without line breaks
+        position = window.find(separator)
+        if position != -1:
+            return offset + position + len(separator)
+    while offset < limit and 0x80 <= mm[offset] < 0xC0: # Not inside a UTF-8 character
+        offset += 1
+    return offset
+
+def _boundary_before(mm, offset: int, floor: int) -> int:
+    """Moves a cut point back to the end of the last complete line (or separator)."""
+    window = mm[max(floor, offset - BOUNDARY_SEARCH_BYTES):offset]
+    position = window.rfind(b"\n")
+    if position != -1:
+        return offset - len(window) + position + 1
+    for separator in _SEPARATORS:
+        position = window.rfind(separator)
+        if position != -1:
+            return offset - len(window) + position + len(separator)
+    while offset > floor and 0x80 <= mm[offset - 1] < 0xC0:
+        offset -= 1
+    return offset
+
+def _count_newlines(f, start: int, end: int, buffer: bytearray) -> int:
+    """Counts line breaks in a byte range, reading it in fixed-size blocks."""
+    f.seek(start)
+    count, remaining = 0, end - start
+    view = memoryview(buffer)
+    while remaining > 0:
+        read = f.readinto(view[:min(remaining, len(buffer))])
+        if not read:
+            break
+        count += buffer.count(b"\n", 0, read)
+        remaining -= read
+    return count
+
+def _plan_sections(mm, size: int, budget: int) -> list[tuple[int, int]]:
+    """Chooses the byte ranges of a sample: head, middle sections and tail, cut at boundaries."""
+    head_len, tail_len = int(budget * HEAD_SHARE), int(budget * TAIL_SHARE)
+    middle_len = (budget - head_len - tail_len) // MIDDLE_SECTIONS
+    ranges = [(0, head_len)]
+    for i in range(1, MIDDLE_SECTIONS + 1):
+        center = size * i // (MIDDLE_SECTIONS + 1)
+        ranges.append((center - middle_len // 2, center + middle_len // 2))
+    ranges.append((size - tail_len, size))
+
+    sections = []
+    for start, end in ranges:
+        if start > 0:
+            start = _boundary_after(mm, start, end)
+        if end < size:
+            end = _boundary_before(mm, end, start)
+        if sections and start < sections[-1][1]:
+            start = sections[-1][1]
+        if end > start:
+            sections.append((start, end))
+    return sections
+
+def sample_file(info: FileInfo, budget: int = SAMPLE_BYTES) -> Ingested:
+    """
+    Samples a large text file through a memory map.
+
+    Only the sampled sections are decoded. The line numbers shown in the
+    omission markers are counted by reading the gaps in fixed-size blocks
+    (not through the map), so memory use does not depend on the file size.
+    """
+    unit = 4 if info.encoding == "utf-32" else 2 if info.encoding == "utf-16" else 1
+    try:
+        with open(info.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            if unit > 1: # Byte-level boundary search does not apply to UTF-16/32
+                sections = [(0, budget // 2 // unit * unit), ((size - budget // 2) // unit * unit, size)]
+            else:
+                sections = _plan_sections(mm, size, budget)
+            parts, line, previous_end, omitted = [], 1, 0, 0
+            buffer = bytearray(NEWLINE_COUNT_BLOCK) if unit == 1 else bytearray()
+            for start, end in sections:
+                if start > previous_end:
+                    gap_lines = _count_newlines(f, previous_end, start, buffer) if unit == 1 else 0
+                    lines = f"lines {line:,}-{line + gap_lines - 1:,}, " if gap_lines else ""
+                    parts.append(f"\n[... {lines}{start - previous_end:,} bytes omitted ...]\n")
+                    omitted += start - previous_end
+                    line += gap_lines
+                chunk = mm[start:end]
+                parts.append(chunk.decode(info.encoding or "utf-8", errors="replace"))
+                line += chunk.count(b"\n") if unit == 1 else 0
+                previous_end = end
+            if previous_end < size:
+                parts.append(f"\n[... {size - previous_end:,} bytes omitted ...]\n")
+                omitted += size - previous_end
+    except (OSError, ValueError) as e:
+        raise IngestError(f"cannot read {info.path}: {e}")
+    header = f"[Sample of a {size:,}-byte file: {len(sections)} sections are shown; omitted ranges are marked.]\n"
+    return Ingested(header + "".join(parts), info, sampled=True, omitted_bytes=omitted, sections=sections)
+
+def read_sniffed(info: FileInfo, max_bytes: int | None = None, sample_bytes: int = SAMPLE_BYTES) -> Ingested:
+    """
+    Reads a sniffed text file, sampling it if it is larger than `max_bytes`.
+
+    Args:
+        info: The file, as returned by sniff().
+        max_bytes: Size cap (default MAX_INPUT_BYTES; 0 = no cap).
+        sample_bytes: Size of the sample taken from files over the cap.
+
+    Returns:
+        The file text (see Ingested).
+
+    Raises:
+        IngestError: If the file is binary or cannot be read.
+    """
+    if info.binary:
+        raise IngestError(f"{info.path} appears to be a binary file")
+    max_bytes = MAX_INPUT_BYTES if max_bytes is None else max_bytes
+    if max_bytes and info.size > max_bytes:
+        return sample_file(info, sample_bytes)
+    try:
+        with open_text(info) as f:
+            return Ingested(f.read(), info)
+    except OSError as e:
+        raise IngestError(f"cannot read {info.path}: {e.strerror or e}")
+
+def read_file(path: Path | str, max_bytes: int | None = None, sample_bytes: int = SAMPLE_BYTES) -> Ingested:
+    """Sniffs and reads a text file (see read_sniffed())."""
+    return read_sniffed(sniff(path), max_bytes, sample_bytes)
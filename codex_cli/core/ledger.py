@@ -0,0 +1,208 @@
+# codex_cli/core/ledger.py
+"""
+Persistent usage ledger.
+
+Every model call (including cache hits and failures) is appended to a small
+SQLite database in the data directory: command, model, token counts,
+latency, cache hit and estimated cost. `cstudio usage` reports on it.
+Set CSTUDIO_NO_LEDGER=1 to disable recording.
+"""
+
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from .settings import env_flag, get_data_dir
+
+LEDGER_FILE_NAME = "usage.sqlite3"
+
+# Estimated price in USD per one million tokens: (input, output).
+# Dated model snapshots (e.g. "gpt-4o-2024-08-06") match by prefix.
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "o3-mini": (1.10, 4.40),
+    "o4-mini": (1.10, 4.40),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    command TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    latency REAL NOT NULL DEFAULT 0,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    cost REAL,
+    status TEXT NOT NULL DEFAULT 'ok'
+);
+CREATE INDEX IF NOT EXISTS calls_created ON calls (created);
+"""
+
+@dataclass
+class UsageRecord:
+    """One recorded model call. `cost` is None when the model has no known price."""
+    created: float
+    command: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    cache_hit: bool
+    cost: float | None
+    status: str
+
+def model_price(model: str) -> tuple[float, float] | None:
+    """Returns the (input, output) price per million tokens for a model, or None if unknown."""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True): # Longest prefix wins ("gpt-4o-mini" before "gpt-4o")
+        if model == name or model.startswith(name + "-"):
+            return MODEL_PRICES[name]
+    return None
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    """Returns the estimated cost of a call in USD, or None if the model's price is unknown."""
+    price = model_price(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+# Command that calls are attributed to (a process-wide value, so worker threads inherit it)
+_current_command = "api"
+
+def current_command() -> str:
+    """Returns the CLI command being run (e.g. "config explain"), or "api" outside the CLI."""
+    return _current_command
+
+@contextmanager
+def command_scope(command_path: str):
+    """
+    Attributes the calls made inside the block to a CLI command.
+
+    Args:
+        command_path: The command path from the CLI context, e.g. "cstudio config explain"
+            (the program name is dropped).
+    """
+    global _current_command
+    previous = _current_command
+    _current_command = " ".join(command_path.split()[1:]) or "api"
+    try:
+        yield
+    finally:
+        _current_command = previous
+
+class UsageLedger:
+    """
+    SQLite-backed record of model calls.
+
+    Each operation opens its own short-lived connection, so the ledger can be
+    used from several threads and processes at once.
+    """
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path) if path else get_data_dir(LEDGER_FILE_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL") # Concurrent readers do not block writers
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def record(
+        self,
+        command: str,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency: float = 0.0,
+        cache_hit: bool = False,
+        status: str = "ok",
+        created: float | None = None,
+        cost_factor: float = 1.0,
+    ):
+        """
+        Appends one call to the ledger.
+
+        Args:
+            command: CLI command that made the call (see current_command()).
+            model: Model identifier.
+            prompt_tokens: Input tokens (for cache hits: tokens of the original call).
+            completion_tokens: Output tokens.
+            latency: Seconds from request to complete response.
+            cache_hit: True if the response came from the local cache.
+            status: "ok", "error" or "timeout".
+            created: Timestamp of the call (defaults to now).
+            cost_factor: Multiplier on list prices (e.g. 0.5 for Batch API calls).
+        """
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        if cost is not None:
+            cost *= cost_factor
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO calls (created, command, model, prompt_tokens, completion_tokens, latency, cache_hit, cost, status)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (created if created is not None else time.time(), command, model,
+                 prompt_tokens, completion_tokens, latency, int(cache_hit), cost, status),
+            )
+
+    def records(self, since: float | None = None) -> list[UsageRecord]:
+        """Returns recorded calls in chronological order, optionally only those after `since`."""
+        if not self.path.exists():
+            return []
+        query = "SELECT created, command, model, prompt_tokens, completion_tokens, latency, cache_hit, cost, status FROM calls"
+        params: tuple = ()
+        if since is not None:
+            query += " WHERE created >= ?"
+            params = (since,)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(query + " ORDER BY created", params).fetchall()
+        return [UsageRecord(*row[:6], bool(row[6]), *row[7:]) for row in rows]
+
+    def clear(self):
+        """Deletes every recorded call."""
+        if self.path.exists():
+            with closing(self._connect()) as connection, connection:
+                connection.execute("DELETE FROM calls")
+
+def usage_counts(usage) -> tuple[int, int]:
+    """Extracts (prompt_tokens, completion_tokens) from an API usage object, or (0, 0)."""
+    prompt_tokens = getattr(usage, "prompt_tokens", 0)
+    completion_tokens = getattr(usage, "completion_tokens", 0)
+    if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+        return 0, 0
+    return prompt_tokens, completion_tokens
+
+def record_usage(
+    model: str,
+    latency: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cache_hit: bool = False,
+    status: str = "ok",
+    cost_factor: float = 1.0,
+) -> bool:
+    """
+    Records a call for the current command in the default ledger.
+
+    Never raises: the ledger must not break a command. Does nothing when
+    CSTUDIO_NO_LEDGER is set.
+
+    Returns:
+        True if the call was recorded.
+    """
+    if env_flag("CSTUDIO_NO_LEDGER"):
+        return False
+    try:
+        UsageLedger().record(current_command(), model, prompt_tokens, completion_tokens, latency, cache_hit, status, cost_factor=cost_factor)
+        return True
+    except (sqlite3.Error, OSError):
+        return False
@@ -0,0 +1,177 @@
+# codex_cli/core/logs.py
+"""
+Incremental reading of piped input (logs, command output) in bounded windows.
+
+Input is read line by line with a cap on the line length, so memory does not
+depend on the size of the stream. Log-like input is reduced to line
+templates: variable fields (timestamps, numbers, addresses, ids) are masked,
+and lines with the same template are counted instead of repeated.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterator, TextIO
+
+from .chunking import CHUNK_THRESHOLD_TOKENS
+from .settings import env_int
+
+# Token budget of one window (default: what explain sends in one request)
+STDIN_WINDOW_TOKENS = env_int("CSTUDIO_STDIN_WINDOW_TOKENS", CHUNK_THRESHOLD_TOKENS)
+# Longer lines are truncated while reading
+MAX_LINE_CHARS = env_int("CSTUDIO_STDIN_MAX_LINE", 2000)
+# Lines looked at to decide whether the input is a log
+LOG_SAMPLE_LINES = 50
+LOG_SAMPLE_RATIO = 0.5
+TRUNCATED_MARK = " …[truncated]"
+
+# Ordered: earlier patterns mask fields that later ones would split up
+_MASKS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2})?(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<TS>"),
+    (re.compile(r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) +\d{1,2} \d{2}:\d{2}:\d{2}\b"), "<TS>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<TS>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<UUID>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-f]*\d)[0-9a-f]{8,}\b"), "<HEX>"),
+    (re.compile(r"(?<![A-Za-z_<])[-+]?\d+(?:\.\d+)?"), "<NUM>"),
+]
+_LOG_LINE_RE = re.compile(
+    r"^\W{0,2}(?:\d{4}-\d{2}-\d{2}|\d{2}:\d{2}:\d{2}|[A-Z][a-z]{2} +\d{1,2} \d{2}:)"
+    r"|\b(?:TRACE|DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|ERR|FATAL|CRITICAL|PANIC)\b"
+    r"|\blevel=\w+"
+)
+
+def line_template(line: str) -> str:
+    """Masks the variable fields of a log line (e.g. '<TS> GET /users/<NUM> took <NUM>ms')."""
+    for pattern, mask in _MASKS:
+        line = pattern.sub(mask, line)
+    return line
+
+def looks_like_log(lines: list[str]) -> bool:
+    """Returns True if most non-blank lines carry a timestamp or a log level."""
+    sample = [line for line in lines if line.strip()]
+    if not sample:
+        return False
+    return sum(1 for line in sample if _LOG_LINE_RE.search(line)) >= LOG_SAMPLE_RATIO * len(sample)
+
+def read_lines(stream: TextIO, max_line_chars: int = MAX_LINE_CHARS) -> Iterator[str]:
+    """
+    Yields the lines of a text stream without their line endings.
+
+    At most `max_line_chars` characters of a line are kept; the rest is read
+    in pieces of the same size and dropped.
+    """
+    while True:
+        line = stream.readline(max_line_chars)
+        if not line:
+            return
+        if not line.endswith("\n") and len(line) == max_line_chars:
+            rest = stream.readline(max_line_chars)
+            if rest and rest != "\n":
+                line += TRUNCATED_MARK
+            while rest and not rest.endswith("\n"):
+                rest = stream.readline(max_line_chars)
+        yield line.rstrip("\r\n")
+
+@dataclass
+class LineGroup:
+    """Lines of one window that share a template."""
+    template: str
+    example: str
+    first_line: int
+    last_line: int
+    count: int = 1
+
+    def render(self) -> str:
+        if self.count == 1:
+            return f"L{self.first_line}: {self.example}"
+        return f"L{self.first_line}-{self.last_line} ×{self.count}: {self.template}"
+
+@dataclass
+class Window:
+    """
+    A bounded slice of the input, ready to go into a prompt.
+
+    Attributes:
+        index: 0-based window number.
+        start_line, end_line: 1-based range of input lines covered.
+        text: The lines (verbatim) or, for logs, the rendered line groups.
+        is_log: True if repeated lines were grouped into templates.
+        distinct: Number of entries in `text` (groups for logs, lines otherwise).
+        last: True if the input ended with this window.
+    """
+    index: int
+    start_line: int
+    end_line: int
+    text: str
+    is_log: bool
+    distinct: int
+    last: bool = False
+
+    @property
+    def lines(self) -> int:
+        return self.end_line - self.start_line + 1
+
+def iter_windows(stream: TextIO, max_chars: int, is_log: bool | None = None,
+                 max_line_chars: int = MAX_LINE_CHARS) -> Iterator[Window]:
+    """
+    Reads a stream into windows of at most about `max_chars` characters of text.
+
+    For logs, a window holds line groups: a line whose template was already
+    seen in the window only increments a counter, so a window can cover any
+    number of repeated lines while its text stays within the budget.
+
+    Args:
+        stream: Text stream to read (e.g. sys.stdin).
+        max_chars: Text budget of one window.
+        is_log: Group lines by template; None detects it from the first lines.
+        max_line_chars: Longer lines are truncated.
+
+    Yields:
+        Windows in input order; the final one has `last` set.
+    """
+    lines = read_lines(stream, max_line_chars)
+    sample = []
+    for line in lines:
+        sample.append(line)
+        if len(sample) == LOG_SAMPLE_LINES:
+            break
+    if is_log is None:
+        is_log = looks_like_log(sample)
+
+    def all_lines():
+        yield from sample
+        yield from lines
+
+    index, start, used = 0, 1, 0
+    groups: dict[str, LineGroup] = {}
+    buffer: list[str] = []
+    number = 0
+
+    def emit(end_line: int) -> Window:
+        entries = [group.render() for group in groups.values()] if is_log else buffer
+        return Window(index, start, end_line, "\n".join(entries), is_log, len(entries))
+
+    for number, line in enumerate(all_lines(), 1):
+        if is_log:
+            template = line_template(line)
+            group = groups.get(template)
+            if group:
+                group.count += 1
+                group.last_line = number
+                continue
+            size = max(len(template), len(line)) + 16 # Room for the line range and count
+        else:
+            size = len(line) + 1
+        if used and used + size > max_chars:
+            yield emit(number - 1)
+            index, start, used = index + 1, number, 0
+            groups, buffer = {}, []
+        used += size
+        if is_log:
+            groups[template] = LineGroup(template, line, number, number)
+        else:
+            buffer.append(line)
+    if number:
+        window = emit(number)
+        window.last = True
+        yield window
@@ -0,0 +1,294 @@
+# codex_cli/core/mock_server.py
+"""
+Local OpenAI-compatible server for tests and benchmarks.
+
+Implements POST /v1/chat/completions (streaming and non-streaming) on a
+stdlib asyncio HTTP/1.1 server with keep-alive. Latency, generation speed,
+error rates and response size are configurable, and the server counts
+connections and responses so client behavior (connection reuse, retries,
+concurrency) can be measured without network access.
+
+Run standalone:
+    python -m codex_cli.core.mock_server --port 8765 --latency 0.2 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+CHARS_PER_TOKEN = 4
+
+@dataclass
+class MockServerConfig:
+    """
+    Behavior of the mock server.
+
+    Attributes:
+        latency: Seconds before the first byte of a response (time-to-first-token).
+        latency_jitter: Extra random latency, uniform in [0, latency_jitter].
+        tokens_per_second: Generation speed; 0 sends the whole completion at once.
+        completion_tokens: Size of each generated completion, in tokens.
+        connect_latency: Delay for every new TCP connection (emulates TLS handshakes).
+        error_rate: Fraction of requests answered with HTTP 500/503.
+        rate_limit_rate: Fraction of requests answered with HTTP 429.
+        retry_after: Value of the Retry-After header sent with 429 responses.
+        seed: Random seed for reproducible runs (None for random).
+    """
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    tokens_per_second: float = 0.0
+    completion_tokens: int = 32
+    connect_latency: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 0.05
+    seed: int | None = None
+
+@dataclass
+class MockServerStats:
+    """Counters collected while the server runs."""
+    connections: int = 0
+    requests: int = 0
+    streamed: int = 0
+    statuses: Counter = field(default_factory=Counter)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+def _completion_text(tokens: int) -> str:
+    words = ["mock", "token", "stream", "answer", "text", "model", "reply", "data"]
+    return " ".join(words[i % len(words)] for i in range(max(1, tokens)))
+
+def _split_tokens(text: str) -> list[str]:
+    words = text.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+class MockOpenAIServer:
+    """
+    Asyncio HTTP server speaking enough of the OpenAI API for the CLI.
+
+    Use as a context manager (runs in a background thread) or call
+    start()/stop() explicitly. `base_url` is suitable for OPENAI_BASE_URL.
+    """
+    def __init__(self, config: MockServerConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockServerConfig()
+        self.host = host
+        self.port = port
+        self.stats = MockServerStats()
+        self._random = random.Random(self.config.seed)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._connection_tasks: set[asyncio.Task] = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    # --- Lifecycle ---
+
+    async def serve(self):
+        """Starts listening in the running event loop."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def shutdown(self):
+        """Stops accepting connections and closes the open ones."""
+        if self._server is not None:
+            self._server.close()
+        for task in list(self._connection_tasks):
+            task.cancel()
+        await asyncio.gather(*self._connection_tasks, return_exceptions=True)
+
+    def start(self) -> "MockOpenAIServer":
+        """Runs the server in a daemon thread and waits until it accepts connections."""
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.serve())
+            self._ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.shutdown())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-openai-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        """Stops the background server."""
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # --- HTTP handling ---
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.connections += 1
+        task = asyncio.current_task()
+        self._connection_tasks.add(task)
+        try:
+            if self.config.connect_latency:
+                await asyncio.sleep(self.config.connect_latency)
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._dispatch(method, path, body, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            self._connection_tasks.discard(task)
+
+    async def _dispatch(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter):
+        if method == "HEAD" or (method == "GET" and not path.rstrip("/").endswith("/models")):
+            await self._send(writer, 200, b"", "text/plain")
+            return
+        if method == "GET":
+            models = {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "mock"}]}
+            await self._send_json(writer, 200, models)
+            return
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            await self._send_json(writer, 404, {"error": {"message": f"Unknown endpoint {method} {path}", "type": "not_found"}})
+            return
+
+        self.stats.requests += 1
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            await self._send_json(writer, 400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        # Fault injection
+        roll = self._random.random()
+        if roll < self.config.rate_limit_rate:
+            await self._send_json(writer, 429, {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit_error"}},
+                                  extra_headers={"retry-after": str(self.config.retry_after)})
+            return
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            status = self._random.choice((500, 503))
+            await self._send_json(writer, status, {"error": {"message": f"Server error (injected {status})", "type": "server_error"}})
+            return
+
+        await asyncio.sleep(self.config.latency + self._random.uniform(0, self.config.latency_jitter))
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in payload.get("messages", [])) // CHARS_PER_TOKEN + 1
+        completion_count = max(1, int(payload.get("max_tokens") or self.config.completion_tokens))
+        choices = max(1, int(payload.get("n") or 1))
+        text = _completion_text(completion_count)
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.completion_tokens += completion_count * choices
+        model = payload.get("model", "gpt-4o")
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_count * choices,
+                 "total_tokens": prompt_tokens + completion_count * choices}
+
+        if payload.get("stream"):
+            await self._stream_completion(writer, model, text, choices, usage, payload)
+            return
+
+        if self.config.tokens_per_second:
+            await asyncio.sleep(completion_count / self.config.tokens_per_second)
+        await self._send_json(writer, 200, {
+            "id": f"chatcmpl-mock-{self.stats.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": i, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"} for i in range(choices)],
+            "usage": usage,
+        })
+
+    async def _stream_completion(self, writer: asyncio.StreamWriter, model: str, text: str, choices: int, usage: dict, payload: dict):
+        """Sends a server-sent event stream using chunked transfer encoding."""
+        self.stats.streamed += 1
+        self.stats.statuses[200] += 1
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        delay = 1 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+
+        async def send_event(data: str):
+            event = f"data: {data}\n\n".encode()
+            writer.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            await writer.drain()
+
+        created = int(time.time())
+        base = {"id": f"chatcmpl-mock-{self.stats.requests}", "object": "chat.completion.chunk", "created": created, "model": model}
+        for piece in _split_tokens(text):
+            for index in range(choices):
+                await send_event(json.dumps({**base, "choices": [{"index": index, "delta": {"content": piece}, "finish_reason": None}]}))
+            if delay:
+                await asyncio.sleep(delay)
+        final = {**base, "choices": [{"index": i, "delta": {}, "finish_reason": "stop"} for i in range(choices)]}
+        await send_event(json.dumps(final))
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            await send_event(json.dumps({**base, "choices": [], "usage": usage}))
+        await send_event("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: dict, extra_headers: dict | None = None):
+        await self._send(writer, status, json.dumps(payload).encode(), "application/json", extra_headers)
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str, extra_headers: dict | None = None):
+        self.stats.statuses[status] += 1
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+        head = [f"HTTP/1.1 {status} {reasons.get(status, 'Unknown')}", f"Content-Type: {content_type}", f"Content-Length: {len(body)}"]
+        head += [f"{name}: {value}" for name, value in (extra_headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+
+def main():
+    """Runs the mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the first token.")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=32)
+    parser.add_argument("--connect-latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = MockServerConfig(
+        latency=args.latency, latency_jitter=args.latency_jitter, tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens, connect_latency=args.connect_latency,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+    )
+    server = MockOpenAIServer(config, args.host, args.port)
+
+    async def run_forever():
+        await server.serve()
+        print(f"Mock OpenAI server listening on {server.base_url} (set OPENAI_BASE_URL to this)")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,23 @@
 # codex_cli/core/openai_utils.py
 
 import os
-from openai import OpenAI, OpenAIError
+import time
+import asyncio
+import threading
+import importlib.util
+from typing import Callable, Iterator, Sequence
+import httpx
+from openai import OpenAI, AsyncOpenAI, OpenAIError, DefaultHttpxClient, DefaultAsyncHttpxClient
 from rich.console import Console
 from dotenv import load_dotenv
 
+from .cache import ResponseCache, make_cache_key
+from .ledger import current_command, record_usage, usage_counts
+from .resilience import call_with_fallback, call_with_fallback_async
+from .routing import model_chain, select_model
+from .settings import env_int, env_float, env_flag
+from .singleflight import claim, single_flight
+
 # Initialize console for output
 console = Console()
 
@@ -12,68 +25,748 @@ console = Console()
 # This ensures API keys etc. are available when the module loads
 load_dotenv()
 
+# --- Connection pool settings (override via environment variables) ---
+HTTP_MAX_CONNECTIONS = env_int("CSTUDIO_HTTP_MAX_CONNECTIONS", 20)
+HTTP_MAX_KEEPALIVE = env_int("CSTUDIO_HTTP_MAX_KEEPALIVE", 10)
+HTTP_KEEPALIVE_EXPIRY = env_float("CSTUDIO_HTTP_KEEPALIVE_EXPIRY", 60.0)
+HTTP_TIMEOUT = env_float("CSTUDIO_HTTP_TIMEOUT", 120.0)
+HTTP_CONNECT_TIMEOUT = env_float("CSTUDIO_HTTP_CONNECT_TIMEOUT", 10.0)
+ASYNC_MAX_CONCURRENCY = env_int("CSTUDIO_MAX_CONCURRENCY", 8)
+
+# Returned (and never cached) when the model sends no content
+EMPTY_RESPONSE_MESSAGE = "Model returned an empty response."
+
+# System message sent with every prompt (part of the cache key)
+SYSTEM_MESSAGE = "You are a helpful assistant expert in explaining code and shell commands clearly and concisely."
+
+# --- Process-wide client (created lazily, shared by every call) ---
+_client: OpenAI | None = None
+_http_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+def http2_available() -> bool:
+    """Returns True if the optional 'h2' package is installed (needed for HTTP/2)."""
+    return importlib.util.find_spec("h2") is not None
+
+def build_http_client() -> httpx.Client:
+    """
+    Builds the pooled HTTP client used by the OpenAI client.
+
+    Keep-alive connections are reused across requests, so only the first call
+    in a process pays for the TCP/TLS handshake. HTTP/2 is enabled when the
+    optional 'h2' package is installed.
+
+    Returns:
+        A configured httpx.Client instance.
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    return DefaultHttpxClient(http2=http2_available(), limits=limits, timeout=timeout)
+
 def get_openai_client() -> OpenAI | None:
     """
-    Initializes and returns the OpenAI client.
+    Returns the process-wide OpenAI client, creating it on first use.
 
-    Reads the API key from the OPENAI_API_KEY environment variable.
+    Reads the API key from the OPENAI_API_KEY environment variable. The client
+    (and its HTTP connection pool) is shared by all calls in the process.
 
     Returns:
         An initialized OpenAI client instance or None if initialization fails.
     """
+    global _client, _http_client
+    if _client is not None:
+        return _client
+
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         console.print("[bold red]Error: OPENAI_API_KEY environment variable not found.[/bold red]")
         return None
-    try:
-        client = OpenAI(api_key=api_key)
-        # Optional: Perform a simple API call to verify connectivity
-        # client.models.list()
-        return client
-    except OpenAIError as e:
-        console.print(f"[bold red]Error initializing OpenAI client: {e}[/bold red]")
+
+    with _client_lock:
+        if _client is not None: # Another thread created it while we waited
+            return _client
+        try:
+            http_client = build_http_client()
+            # Retries are handled by call_with_retry(), not the SDK
+            _client = OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+            _http_client = http_client
+            return _client
+        except OpenAIError as e:
+            console.print(f"[bold red]Error initializing OpenAI client: {e}[/bold red]")
+            return None
+        except Exception as e: # Catch any other unexpected initialization errors
+            console.print(f"[bold red]An unexpected error occurred during client initialization: {e}[/bold red]")
+            return None
+
+def reset_openai_client():
+    """Closes the shared client and its connection pool (a new one is created on next use)."""
+    global _client, _http_client
+    with _client_lock:
+        if _http_client is not None:
+            try:
+                _http_client.close()
+            except Exception:
+                pass
+        _client = None
+        _http_client = None
+
+def warm_openai_client() -> threading.Thread | None:
+    """
+    Opens a connection to the API host in a background thread.
+
+    Called at startup so the TCP/TLS handshake overlaps with argument parsing
+    and local work (reading files, building prompts). Failures are ignored;
+    the real request will report any problem.
+
+    Returns:
+        The started daemon thread, or None if no API key is configured.
+    """
+    if not os.getenv("OPENAI_API_KEY") or env_flag("CSTUDIO_NO_PREWARM"):
         return None
-    except Exception as e: # Catch any other unexpected initialization errors
-        console.print(f"[bold red]An unexpected error occurred during client initialization: {e}[/bold red]")
+
+    def _warm():
+        try:
+            client = get_openai_client()
+            if client is not None and _http_client is not None:
+                # Any response will do: the point is the pooled keep-alive connection
+                _http_client.head(str(client.base_url))
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=_warm, name="cstudio-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+def debug_print(message: str):
+    """Prints a diagnostic line when the CSTUDIO_DEBUG environment variable is set."""
+    if env_flag("CSTUDIO_DEBUG"):
+        console.print(f"[grey50][debug] {message}[/grey50]")
+
+def _report_retry(error: BaseException, delay: float, retry: int):
+    """Tells the user a transient API error is being retried."""
+    status = getattr(error, "status_code", None)
+    reason = f"HTTP {status}" if status else type(error).__name__
+    console.print(f"[yellow]OpenAI API unavailable ({reason}); retry {retry} in {delay:.1f}s...[/yellow]")
+
+def _report_fallback(failed_model: str, error: BaseException, next_model: str):
+    """Tells the user the request moves on to the next model in the fallback chain."""
+    status = getattr(error, "status_code", None)
+    reason = f"HTTP {status}" if status else type(error).__name__
+    console.print(f"[yellow]Model {failed_model} unavailable ({reason}); falling back to {next_model}...[/yellow]")
+
+def resolve_model(prompt: str, model: str | None) -> str:
+    """
+    Returns `model`, or routes the prompt when it is None.
+
+    Routing uses the current command and a rough size estimate (four
+    characters per token); commands that know the exact input size and
+    detail level call routing.select_model() themselves.
+    """
+    if model:
+        return model
+    return select_model(current_command(), len(prompt) // 4)
+
+class _FallbackTracker:
+    """on_fallback callback that reports each switch, records the failed model and remembers the current one."""
+    def __init__(self, model: str, start: float):
+        self.model = model
+        self.start = start
+
+    def __call__(self, failed_model: str, error: BaseException, next_model: str):
+        record_usage(failed_model, time.perf_counter() - self.start, status="error")
+        _report_fallback(failed_model, error, next_model)
+        self.model = next_model
+
+def build_messages(prompt: str) -> list[dict]:
+    """Returns the chat messages sent for a prompt (the system message plus the prompt)."""
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+
+def get_response_cache() -> ResponseCache:
+    """Returns the on-disk response cache configured by the environment."""
+    return ResponseCache()
+
+def _record_cache_hit(model: str, entry: dict, start: float):
+    """Records a cache hit in the usage ledger with the token counts of the original call."""
+    record_usage(model, time.perf_counter() - start, entry.get("prompt_tokens", 0), entry.get("completion_tokens", 0), cache_hit=True)
+
+def singleflight_enabled() -> bool:
+    """Cross-process deduplication of identical requests; disabled by CSTUDIO_NO_SINGLEFLIGHT."""
+    return not env_flag("CSTUDIO_NO_SINGLEFLIGHT")
+
+def _published_lookup(cache: ResponseCache, prompt: str, model: str, since: float):
+    """
+    Returns a lookup for the response another process publishes for this prompt.
+
+    The response may have been stored under any model of the fallback chain;
+    only entries created at or after `since` count.
+    """
+    keys = [(name, make_cache_key(name, SYSTEM_MESSAGE, prompt)) for name in model_chain(model)]
+
+    def lookup() -> tuple[str, dict] | None:
+        for name, key in keys:
+            entry = cache.get_entry(key)
+            if entry is not None and entry.get("created", 0) >= since:
+                return name, entry
         return None
+    return lookup
 
-def get_openai_response(prompt: str, model: str = "gpt-4o") -> str | None:
+def _report_wait():
+    console.print("[grey50]An identical request is already in progress; waiting for its response...[/grey50]")
+
+def get_openai_response(
+    prompt: str,
+    model: str | None = None,
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> str | None:
     """
     Sends a prompt to the specified OpenAI model and returns the response.
 
+    Responses are stored in the on-disk cache, keyed by model, system message
+    and prompt, so repeating the same request is answered locally. Every call
+    is recorded in the usage ledger. If the model times out or is overloaded,
+    the request falls back to the next model in its routing chain.
+
+    Identical requests made at the same time by several processes are sent
+    once: the first process makes the call and the others wait for its
+    cached response (see singleflight.py).
+
     Args:
         prompt: The prompt string to send to the model.
-        model: The OpenAI model identifier (e.g., "gpt-4o").
+        model: The OpenAI model identifier (e.g., "gpt-4o"); None routes the
+            prompt with the routing policy.
+        use_cache: If False, neither read nor write the response cache.
+            The CSTUDIO_NO_CACHE environment variable has the same effect.
+        refresh: If True, skip the cached response but store the new one.
 
     Returns:
         The model's response content as a string, or None if an error occurs.
     """
-    client = get_openai_client() # Get the client instance
+    model = resolve_model(prompt, model)
+    use_cache = use_cache and not env_flag("CSTUDIO_NO_CACHE")
+    cache = get_response_cache() if use_cache else None
+    start = time.perf_counter()
+    since = time.time() if refresh else 0.0 # A refresh only accepts responses made from now on
+    if cache and not refresh:
+        entry = cache.get_entry(make_cache_key(model, SYSTEM_MESSAGE, prompt))
+        if entry is not None:
+            console.print("[grey50]Using cached response (use --refresh to request a new one).[/grey50]")
+            _record_cache_hit(model, entry, start)
+            return entry.get("response")
+
+    if not cache or not singleflight_enabled():
+        return _request_response(prompt, model, cache, start)
+    result, shared = single_flight(
+        make_cache_key(model, SYSTEM_MESSAGE, prompt),
+        lambda: _request_response(prompt, model, cache, start),
+        _published_lookup(cache, prompt, model, since),
+        on_wait=_report_wait,
+    )
+    if shared:
+        name, entry = result
+        _record_cache_hit(name, entry, start)
+        return entry.get("response")
+    return result
+
+def _request_response(prompt: str, model: str, cache: ResponseCache | None, start: float) -> str | None:
+    """Calls the API for get_openai_response(), records usage and caches the response."""
+    client = get_openai_client() # Get the shared client instance
     if not client:
         # Error message already printed by get_openai_client
         return None
 
+    tracker = _FallbackTracker(model, start)
     try:
         # Indicate API call start
         console.print(f"[grey50]Sending request to OpenAI model: {model}...[/grey50]", end='\r')
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant expert in explaining code and shell commands clearly and concisely."},
-                {"role": "user", "content": prompt}
-            ]
+        model, completion = call_with_fallback(
+            model_chain(model),
+            lambda name, timeout: client.chat.completions.create(
+                model=name,
+                messages=build_messages(prompt),
+                timeout=timeout,
+            ),
+            on_retry=_report_retry,
+            on_fallback=tracker,
         )
         # Clear the "Sending request" message
         console.print(" " * 50, end='\r')
+        prompt_tokens, completion_tokens = usage_counts(getattr(completion, "usage", None))
+        record_usage(model, time.perf_counter() - start, prompt_tokens, completion_tokens)
         response = completion.choices[0].message.content
-        # Return stripped content or a default message if empty
-        return response.strip() if response else "Model returned an empty response."
+        if not response:
+            return EMPTY_RESPONSE_MESSAGE
+        response = response.strip()
+        if cache:
+            # Stored under the model that answered, which may be a fallback
+            cache.set(make_cache_key(model, SYSTEM_MESSAGE, prompt), response, model=model,
+                      prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return response
 
     except OpenAIError as e:
         console.print(" " * 50, end='\r') # Clear the sending message
         console.print(f"[bold red]Error calling OpenAI API: {e}[/bold red]")
+        record_usage(tracker.model, time.perf_counter() - start, status="error")
         return None
     except Exception as e: # Catch any other unexpected errors during API call
         console.print(" " * 50, end='\r') # Clear the sending message
+        record_usage(tracker.model, time.perf_counter() - start, status="error")
         console.print(f"[bold red]An unexpected error occurred: {e}[/bold red]")
-        return None
\ No newline at end of file
+        return None
+
+def stream_openai_response(
+    prompt: str,
+    model: str | None = None,
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> Iterator[str]:
+    """
+    Sends a prompt with stream=True and yields the response text as it arrives.
+
+    Uses the same cache as get_openai_response(): a cached response is yielded
+    as a single chunk, and a completed stream is stored for next time.
+    Time-to-first-token is reported via debug_print(). Token usage is
+    requested with the stream and recorded in the usage ledger. Opening the
+    stream falls back along the routing chain, and identical requests from
+    other processes are deduplicated, like get_openai_response().
+
+    Args:
+        prompt: The prompt string to send to the model.
+        model: The OpenAI model identifier (e.g., "gpt-4o"); None routes the
+            prompt with the routing policy.
+        use_cache: If False, neither read nor write the response cache.
+        refresh: If True, skip the cached response but store the new one.
+
+    Yields:
+        Text deltas. Nothing is yielded if an error occurs (the error is printed).
+    """
+    model = resolve_model(prompt, model)
+    use_cache = use_cache and not env_flag("CSTUDIO_NO_CACHE")
+    cache = get_response_cache() if use_cache else None
+    if cache and not refresh:
+        entry = cache.get_entry(make_cache_key(model, SYSTEM_MESSAGE, prompt))
+        if entry is not None:
+            console.print("[grey50]Using cached response (use --refresh to request a new one).[/grey50]")
+            _record_cache_hit(model, entry, time.perf_counter())
+            yield entry.get("response")
+            return
+
+    lock = None
+    if cache and singleflight_enabled():
+        lock, shared = claim(
+            make_cache_key(model, SYSTEM_MESSAGE, prompt),
+            _published_lookup(cache, prompt, model, time.time() if refresh else 0.0),
+            on_wait=_report_wait,
+        )
+        if shared:
+            name, entry = shared
+            _record_cache_hit(name, entry, time.perf_counter())
+            yield entry.get("response")
+            return
+    try:
+        yield from _stream_response(prompt, model, cache)
+    finally:
+        if lock:
+            lock.release()
+
+def _stream_response(prompt: str, model: str, cache: ResponseCache | None) -> Iterator[str]:
+    """Streams the API response for stream_openai_response(), records usage and caches the result."""
+    client = get_openai_client()
+    if not client:
+        return
+
+    parts: list[str] = []
+    usage = None
+    start = time.perf_counter()
+    tracker = _FallbackTracker(model, start)
+    try:
+        console.print(f"[grey50]Sending request to OpenAI model: {model}...[/grey50]", end='\r')
+        # Only opening the stream is retried; a stream that breaks mid-way is an error
+        model, stream = call_with_fallback(
+            model_chain(model),
+            lambda name, timeout: client.chat.completions.create(
+                model=name,
+                messages=build_messages(prompt),
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+            ),
+            on_retry=_report_retry,
+            on_fallback=tracker,
+        )
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage # Sent in a final chunk without choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if not parts:
+                console.print(" " * 50, end='\r') # Clear the sending message
+                debug_print(f"Time to first token: {time.perf_counter() - start:.2f}s ({model})")
+            parts.append(delta)
+            yield delta
+        if not parts:
+            console.print(" " * 50, end='\r')
+        debug_print(f"Stream completed in {time.perf_counter() - start:.2f}s")
+    except OpenAIError as e:
+        console.print(" " * 50, end='\r')
+        console.print(f"[bold red]Error calling OpenAI API: {e}[/bold red]")
+        record_usage(tracker.model, time.perf_counter() - start, status="error")
+        return
+    except Exception as e:
+        console.print(" " * 50, end='\r')
+        console.print(f"[bold red]An unexpected error occurred: {e}[/bold red]")
+        record_usage(tracker.model, time.perf_counter() - start, status="error")
+        return
+
+    prompt_tokens, completion_tokens = usage_counts(usage)
+    record_usage(model, time.perf_counter() - start, prompt_tokens, completion_tokens)
+    response = "".join(parts).strip()
+    if cache and response:
+        cache.set(make_cache_key(model, SYSTEM_MESSAGE, prompt), response, model=model,
+                  prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+# --- Async batch API ---
+
+def build_async_openai_client(max_connections: int | None = None) -> AsyncOpenAI | None:
+    """
+    Creates an AsyncOpenAI client with its own connection pool.
+
+    Async clients are bound to the event loop that uses them, so one is
+    created per batch instead of being shared process-wide.
+
+    Args:
+        max_connections: Pool size; defaults to HTTP_MAX_CONNECTIONS.
+
+    Returns:
+        An AsyncOpenAI client, or None if no API key is configured.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        console.print("[bold red]Error: OPENAI_API_KEY environment variable not found.[/bold red]")
+        return None
+    connections = max(max_connections or 0, HTTP_MAX_CONNECTIONS)
+    limits = httpx.Limits(
+        max_connections=connections,
+        max_keepalive_connections=connections,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    http_client = DefaultAsyncHttpxClient(http2=http2_available(), limits=limits, timeout=timeout)
+    return AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+async def _complete_async(
+    client: AsyncOpenAI,
+    index: int,
+    prompt: str,
+    model: str,
+    semaphore: asyncio.Semaphore,
+    timeout: float | None,
+) -> tuple[str, str, int, int] | None:
+    """
+    Sends one prompt under the concurrency limit and records its usage.
+
+    Returns:
+        (response, model that answered, prompt tokens, completion tokens), or
+        None on failure or timeout.
+    """
+    async with semaphore:
+        start = time.perf_counter()
+        tracker = _FallbackTracker(model, start)
+        try:
+            model, completion = await asyncio.wait_for(
+                call_with_fallback_async(
+                    model_chain(model),
+                    lambda name, remaining: client.chat.completions.create(
+                        model=name,
+                        messages=build_messages(prompt),
+                        timeout=remaining,
+                    ),
+                    on_retry=_report_retry,
+                    on_fallback=tracker,
+                ),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            console.print(f"[bold red]Request {index + 1} timed out after {timeout}s.[/bold red]")
+            record_usage(tracker.model, time.perf_counter() - start, status="timeout")
+            return None
+        except OpenAIError as e:
+            console.print(f"[bold red]Error calling OpenAI API (request {index + 1}): {e}[/bold red]")
+            record_usage(tracker.model, time.perf_counter() - start, status="error")
+            return None
+        except Exception as e:
+            console.print(f"[bold red]An unexpected error occurred (request {index + 1}): {e}[/bold red]")
+            record_usage(tracker.model, time.perf_counter() - start, status="error")
+            return None
+
+    prompt_tokens, completion_tokens = usage_counts(getattr(completion, "usage", None))
+    record_usage(model, time.perf_counter() - start, prompt_tokens, completion_tokens)
+    response = completion.choices[0].message.content
+    return (response.strip() if response else EMPTY_RESPONSE_MESSAGE), model, prompt_tokens, completion_tokens
+
+async def _request_async(
+    client: AsyncOpenAI,
+    index: int,
+    prompt: str,
+    model: str,
+    semaphore: asyncio.Semaphore,
+    timeout: float | None,
+    cache: ResponseCache | None,
+) -> str | None:
+    """Sends one prompt under the concurrency limit and caches the response; returns None on failure or timeout."""
+    completed = await _complete_async(client, index, prompt, model, semaphore, timeout)
+    if completed is None:
+        return None
+    response, model, prompt_tokens, completion_tokens = completed
+    if cache and response != EMPTY_RESPONSE_MESSAGE:
+        cache.set(make_cache_key(model, SYSTEM_MESSAGE, prompt), response, model=model,
+                  prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    return response
+
+class ResponseSession:
+    """
+    Sends prompts over one AsyncOpenAI client within the running event loop.
+
+    Requests made through the session share its connection pool and its
+    concurrency limit, however they are scheduled, so a caller can feed it
+    prompts as they become available instead of in fixed batches. The client
+    is only created for the first prompt that is not cached. Use it as an
+    async context manager, which closes the client.
+    """
+    def __init__(self, max_concurrency: int = ASYNC_MAX_CONCURRENCY, timeout: float | None = None,
+                 use_cache: bool = True, refresh: bool = False):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.refresh = refresh
+        self.cache = get_response_cache() if use_cache and not env_flag("CSTUDIO_NO_CACHE") else None
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.requests = 0
+        self._client: AsyncOpenAI | None = None
+        self._unavailable = False
+
+    async def __aenter__(self) -> "ResponseSession":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def cached(self, prompt: str, model: str) -> tuple[bool, str | None]:
+        """Looks a prompt up in the response cache; returns (hit, response) and records a hit."""
+        if self.cache is None or self.refresh:
+            return False, None
+        lookup_start = time.perf_counter()
+        entry = self.cache.get_entry(make_cache_key(model, SYSTEM_MESSAGE, prompt))
+        if entry is None:
+            return False, None
+        _record_cache_hit(model, entry, lookup_start)
+        return True, entry.get("response")
+
+    def client(self) -> AsyncOpenAI | None:
+        """The session's client, created on first use; None if no API key is configured."""
+        if self._client is None and not self._unavailable:
+            self._client = build_async_openai_client(max_connections=self.max_concurrency)
+            self._unavailable = self._client is None
+        return self._client
+
+    async def request(self, index: int, prompt: str, model: str) -> str | None:
+        """Sends one prompt (without a cache lookup) and caches its response; None on failure."""
+        client = self.client()
+        if client is None:
+            return None
+        self.requests += 1
+        return await _request_async(client, index, prompt, model, self.semaphore, self.timeout, self.cache)
+
+    async def ask(self, prompt: str, model: str | None = None, index: int = 0) -> str | None:
+        """
+        Answers one prompt from the cache or with a request under the concurrency limit.
+
+        Args:
+            prompt: The prompt to send.
+            model: The OpenAI model identifier, or None to route the prompt with the routing policy.
+            index: Position of the prompt in its batch (used in error messages).
+        """
+        model = resolve_model(prompt, model)
+        hit, response = self.cached(prompt, model)
+        return response if hit else await self.request(index, prompt, model)
+
+async def get_openai_responses_async(
+    prompts: Sequence[str],
+    model: str | Sequence[str] | None = None,
+    max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+    timeout: float | None = None,
+    use_cache: bool = True,
+    refresh: bool = False,
+    on_result: Callable[[int, str | None], None] | None = None,
+) -> list[str | None]:
+    """
+    Sends many prompts concurrently and returns the responses in prompt order.
+
+    At most `max_concurrency` requests are in flight at once. Cached responses
+    are returned without a request. Cancelling the awaiting task cancels every
+    in-flight request.
+
+    Args:
+        prompts: The prompts to send.
+        model: The OpenAI model identifier (e.g., "gpt-4o"), a list with one
+            model per prompt, or None to route each prompt with the routing policy.
+        max_concurrency: Maximum number of simultaneous requests.
+        timeout: Per-request timeout in seconds (None for no extra limit).
+        use_cache: If False, neither read nor write the response cache.
+        refresh: If True, skip cached responses but store the new ones.
+        on_result: Optional callback(index, response) as each prompt completes
+            (e.g. to drive a progress display).
+
+    Returns:
+        A list with one entry per prompt: the response text, or None if that
+        request failed or timed out.
+    """
+    if model is None or isinstance(model, str):
+        models = [resolve_model(prompt, model) for prompt in prompts]
+    else:
+        models = list(model)
+    results: list[str | None] = [None] * len(prompts)
+    async with ResponseSession(max_concurrency, timeout, use_cache, refresh) as session:
+        pending: list[int] = []
+        for index, prompt in enumerate(prompts):
+            hit, results[index] = session.cached(prompt, models[index])
+            if not hit:
+                pending.append(index)
+            elif on_result:
+                on_result(index, results[index])
+        if not pending or session.client() is None:
+            return results
+
+        start = time.perf_counter()
+
+        async def run(index: int) -> str | None:
+            response = await session.request(index, prompts[index], models[index])
+            if on_result:
+                on_result(index, response)
+            return response
+
+        tasks = [asyncio.ensure_future(run(index)) for index in pending]
+        try:
+            responses = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks: # Reached with unfinished tasks only on cancellation
+                task.cancel()
+    for index, response in zip(pending, responses):
+        results[index] = response
+    debug_print(f"{len(pending)} requests completed in {time.perf_counter() - start:.2f}s (concurrency {session.max_concurrency})")
+    return results
+
+def get_openai_responses(prompts: Sequence[str], **kwargs) -> list[str | None]:
+    """
+    Synchronous wrapper around get_openai_responses_async().
+
+    Accepts the same keyword arguments and returns the responses in prompt order.
+    """
+    return asyncio.run(get_openai_responses_async(prompts, **kwargs))
+
+async def get_first_valid_response_async(
+    prompt: str,
+    candidates: int,
+    validate: Callable[[str], str | None],
+    score: Callable[[str], float] | None = None,
+    model: str | None = None,
+    timeout: float | None = None,
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> tuple[str | None, list[str]]:
+    """
+    Requests several completions of one prompt in parallel and keeps a valid one.
+
+    Each response is validated as soon as it arrives. Without a `score`
+    function the first valid response wins and the requests still in flight
+    are cancelled; with one, every request is awaited and the valid response
+    with the highest score wins (earlier responses win ties). Only the
+    winner is stored in the response cache; a valid cached response is
+    returned without any request.
+
+    Args:
+        prompt: The prompt to send.
+        candidates: Number of completions requested at once.
+        validate: Returns an error message for an invalid response, None for a valid one.
+        score: Optional ranking of valid responses (higher is better).
+        model: The OpenAI model identifier, or None to route the prompt.
+        timeout: Per-request timeout in seconds (None for no extra limit).
+        use_cache: If False, neither read nor write the response cache.
+        refresh: If True, skip the cached response but store the new one.
+
+    Returns:
+        (the winning response or None, one message per rejected candidate).
+    """
+    model = resolve_model(prompt, model)
+    use_cache = use_cache and not env_flag("CSTUDIO_NO_CACHE")
+    cache = get_response_cache() if use_cache else None
+    rejected: list[str] = []
+    if cache and not refresh:
+        lookup_start = time.perf_counter()
+        entry = cache.get_entry(make_cache_key(model, SYSTEM_MESSAGE, prompt))
+        if entry is not None and entry.get("response"):
+            error = await asyncio.to_thread(validate, entry["response"])
+            if error is None:
+                console.print("[grey50]Using cached response (use --refresh to request a new one).[/grey50]")
+                _record_cache_hit(model, entry, lookup_start)
+                return entry["response"], rejected
+            rejected.append(f"cached response: {error}")
+
+    candidates = max(1, candidates)
+    client = build_async_openai_client(max_connections=candidates)
+    if client is None:
+        return None, rejected
+    semaphore = asyncio.Semaphore(candidates)
+    start = time.perf_counter()
+    tasks = {asyncio.ensure_future(_complete_async(client, index, prompt, model, semaphore, timeout)): index
+             for index in range(candidates)}
+    valid: list[tuple[float, int, tuple[str, str, int, int]]] = []
+    try:
+        pending = set(tasks)
+        while pending and not (valid and score is None):
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.get):
+                completed = task.result()
+                if completed is None or completed[0] == EMPTY_RESPONSE_MESSAGE:
+                    rejected.append(f"candidate {tasks[task] + 1}: {'request failed' if completed is None else 'empty response'}")
+                    continue
+                error = await asyncio.to_thread(validate, completed[0])
+                if error is not None:
+                    rejected.append(f"candidate {tasks[task] + 1}: {error}")
+                    continue
+                valid.append((score(completed[0]) if score else 0.0, -len(valid), completed))
+    finally:
+        for task in tasks:
+            task.cancel() # Requests still in flight once a winner is known
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.close()
+    debug_print(f"{len(valid)} of {candidates} candidates valid after {time.perf_counter() - start:.2f}s")
+    if not valid:
+        return None, rejected
+
+    response, answered_by, prompt_tokens, completion_tokens = max(valid)[2]
+    if cache:
+        cache.set(make_cache_key(answered_by, SYSTEM_MESSAGE, prompt), response, model=answered_by,
+                  prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    return response, rejected
+
+def get_first_valid_response(prompt: str, candidates: int, validate: Callable[[str], str | None], **kwargs) -> tuple[str | None, list[str]]:
+    """
+    Synchronous wrapper around get_first_valid_response_async().
+
+    Accepts the same keyword arguments and returns (winning response or None, rejection messages).
+    """
+    return asyncio.run(get_first_valid_response_async(prompt, candidates, validate, **kwargs))
@@ -0,0 +1,101 @@
+# codex_cli/core/render.py
+
+import re
+from itertools import chain
+from typing import Iterable
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+
+FENCE_MARKERS = ("```", "~~~")
+_LIST_ITEM = re.compile(r" {0,3}(?:[-*+]|\d{1,9}[.)])(?:[ \t]|$)")
+
+def _continues_block(kind: str, line: str) -> bool:
+    """True if `line`, coming after a blank line, still belongs to the open list or table."""
+    if kind == "list":
+        return line[:1].isspace() or bool(_LIST_ITEM.match(line))
+    return line.lstrip().startswith("|")
+
+def last_block_boundary(text: str, start: int = 0) -> int:
+    """
+    Finds the end of the last complete top-level Markdown block in text[start:].
+
+    A block is complete once it is followed by a blank line that is not inside
+    a fenced code block. A blank line after a list or table only ends it once
+    the next line has arrived and is neither indented nor another item or row,
+    since a list may continue after blank lines. Text before the returned
+    index will not change how it renders when more text is appended.
+
+    Args:
+        text: The Markdown text received so far.
+        start: Offset to scan from (must itself be a block boundary).
+
+    Returns:
+        The index just past the last safe blank line, or `start` if there is none.
+    """
+    boundary = start
+    in_fence = False
+    kind = None # 'list' or 'table' while one is open in the current block
+    after_blank = None # Offset past blank lines that follow a list or table, until the next line decides
+    position = start
+    for line in text[start:].splitlines(keepends=True):
+        position += len(line)
+        if not line.endswith("\n"):
+            break # Incomplete last line
+        stripped = line.strip()
+        if in_fence:
+            in_fence = not stripped.startswith(FENCE_MARKERS)
+            continue
+        if not stripped:
+            if kind:
+                after_blank = position
+            else:
+                boundary = position
+            continue
+        if after_blank is not None:
+            if not _continues_block(kind, line):
+                boundary, kind = after_blank, None
+            after_blank = None
+        if stripped.startswith(FENCE_MARKERS):
+            in_fence = True
+        elif _LIST_ITEM.match(line):
+            kind = "list"
+        elif stripped.startswith("|") and kind != "list":
+            kind = "table"
+    return boundary
+
+def render_markdown_stream(chunks: Iterable[str], console: Console, title: str, refresh_per_second: int = 12) -> str:
+    """
+    Renders streamed Markdown progressively and returns the full text.
+
+    Finished top-level blocks are printed once, above the live area; only the
+    block that is still being written (a whole list or table while it may
+    continue) is re-rendered as new text arrives.
+
+    Args:
+        chunks: Iterable of text deltas (e.g., from stream_openai_response()).
+        console: Console to render to.
+        title: Line printed before the first chunk is shown.
+        refresh_per_second: Maximum refresh rate of the live area.
+
+    Returns:
+        The complete streamed text (empty if nothing was received).
+    """
+    iterator = iter(chunks)
+    first = next(iterator, None)
+    if first is None:
+        return ""
+
+    console.print(title)
+    text = ""
+    committed = 0 # Everything before this offset has been printed permanently
+    with Live(Markdown(""), console=console, refresh_per_second=refresh_per_second, vertical_overflow="visible") as live:
+        for delta in chain([first], iterator):
+            text += delta
+            boundary = last_block_boundary(text, committed)
+            if boundary > committed:
+                live.console.print(Markdown(text[committed:boundary]))
+                committed = boundary
+            live.update(Markdown(text[committed:]))
+        live.update(Markdown(text[committed:]), refresh=True)
+    return text
@@ -0,0 +1,414 @@
+# codex_cli/core/resilience.py
+
+import asyncio
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, TypeVar
+
+from openai import APIConnectionError, APIStatusError, OpenAIError
+
+from .settings import env_float, env_int
+
+T = TypeVar("T")
+
+# --- Default policy (override via environment variables) ---
+RETRY_MAX_ATTEMPTS = env_int("CSTUDIO_RETRY_ATTEMPTS", 5)
+RETRY_BASE_DELAY = env_float("CSTUDIO_RETRY_BASE_DELAY", 0.5)
+RETRY_MAX_DELAY = env_float("CSTUDIO_RETRY_MAX_DELAY", 20.0)
+RETRY_DEADLINE = env_float("CSTUDIO_RETRY_DEADLINE", 180.0)
+BREAKER_THRESHOLD = env_int("CSTUDIO_BREAKER_THRESHOLD", 5)
+BREAKER_COOLDOWN = env_float("CSTUDIO_BREAKER_COOLDOWN", 30.0)
+FALLBACK_ATTEMPTS = env_int("CSTUDIO_FALLBACK_ATTEMPTS", 2) # Attempts per model before falling back to the next
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+RATE_LIMIT_RESETS = (
+    ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+    ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+)
+
+class CircuitOpenError(OpenAIError):
+    """Raised without contacting the API while the circuit breaker is open."""
+
+@dataclass
+class RetryPolicy:
+    """
+    Capped exponential backoff with full jitter, bounded by an overall deadline.
+
+    Attributes:
+        max_attempts: Total attempts, including the first one.
+        base_delay: Backoff ceiling for the first retry, in seconds.
+        max_delay: Upper bound for any single backoff, in seconds.
+        deadline: Time budget for the whole call (all attempts and waits).
+    """
+    max_attempts: int = field(default_factory=lambda: RETRY_MAX_ATTEMPTS)
+    base_delay: float = field(default_factory=lambda: RETRY_BASE_DELAY)
+    max_delay: float = field(default_factory=lambda: RETRY_MAX_DELAY)
+    deadline: float = field(default_factory=lambda: RETRY_DEADLINE)
+
+    def backoff(self, retry: int) -> float:
+        """Returns a random delay in [0, min(max_delay, base_delay * 2**retry)]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated upstream failures.
+
+    After `threshold` consecutive retryable failures (rate limits that say
+    when to retry excepted, see is_throttled()) the circuit opens and
+    calls raise CircuitOpenError. Once `cooldown` seconds have passed, one
+    trial call is let through (half-open); its success closes the circuit,
+    its failure opens it again.
+    """
+    def __init__(self, threshold: int | None = None, cooldown: float | None = None, clock: Callable[[], float] = time.monotonic):
+        self.threshold = BREAKER_THRESHOLD if threshold is None else threshold
+        self.cooldown = BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Closes the circuit and forgets past failures."""
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        """One of 'closed', 'open' or 'half-open'."""
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Raises CircuitOpenError if the call must not be attempted."""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return
+            remaining = max(0.0, self.cooldown - (self.clock() - self.opened_at))
+            raise CircuitOpenError(
+                f"Circuit breaker open after {self.failures} consecutive API failures; "
+                f"not retrying for another {remaining:.0f}s."
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.reset()
+
+    def record_neutral(self):
+        """Ends a trial call without judging upstream health (e.g., a local error)."""
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_progress = False
+            if self.threshold > 0 and (self.failures >= self.threshold or self.opened_at is not None):
+                self.opened_at = self.clock()
+
+# Shared by every API call in the process that does not name a model
+default_breaker = CircuitBreaker()
+
+# One breaker per model, so an overloaded model does not block its fallbacks
+_model_breakers: dict[str, CircuitBreaker] = {}
+_model_breakers_lock = threading.Lock()
+
+def breaker_for(model: str | None) -> CircuitBreaker:
+    """Returns the process-wide circuit breaker of a model (the default breaker for None)."""
+    if model is None:
+        return default_breaker
+    with _model_breakers_lock:
+        breaker = _model_breakers.get(model)
+        if breaker is None:
+            breaker = _model_breakers[model] = CircuitBreaker()
+        return breaker
+
+def reset_breakers():
+    """Closes the default breaker and forgets every per-model breaker."""
+    default_breaker.reset()
+    with _model_breakers_lock:
+        _model_breakers.clear()
+
+def is_retryable(error: BaseException) -> bool:
+    """Returns True for transient failures: connection errors, timeouts, 408/409/429 and 5xx."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, APIConnectionError): # Includes APITimeoutError
+        return True
+    if isinstance(error, APIStatusError):
+        if getattr(error, "code", None) == "insufficient_quota":
+            return False # Retrying cannot fix an exhausted quota
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+def is_throttled(error: BaseException) -> bool:
+    """Returns True for a rate limit (429) that says when to retry (see retry_after_seconds())."""
+    return isinstance(error, APIStatusError) and error.status_code == 429 and retry_after_seconds(error) is not None
+
+def is_fallback_error(error: BaseException) -> bool:
+    """
+    Returns True when another model may succeed where this one failed.
+
+    That covers transient failures (see is_retryable()), an open circuit,
+    and a model the account cannot use (404 model_not_found). An exhausted
+    quota applies to every model, so it does not trigger a fallback.
+    """
+    if isinstance(error, CircuitOpenError):
+        return True
+    if isinstance(error, APIStatusError) and error.status_code == 404:
+        return getattr(error, "code", None) == "model_not_found"
+    return is_retryable(error)
+
+def parse_duration(value: str) -> float | None:
+    """Parses rate-limit reset durations such as '1s', '250ms', '6m0s' or '1h2m3.5s'."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """
+    Returns how long the server asked us to wait, if it said so.
+
+    Checks 'retry-after-ms', 'retry-after' (seconds or HTTP date) and, for
+    rate limits, the reset time of any exhausted 'x-ratelimit-*' budget.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    if headers.get("retry-after-ms"):
+        try:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    resets = []
+    for remaining_header, reset_header in RATE_LIMIT_RESETS:
+        reset = headers.get(reset_header)
+        if reset and headers.get(remaining_header, "0").strip() == "0":
+            seconds = parse_duration(reset)
+            if seconds is not None:
+                resets.append(seconds)
+    return max(resets) if resets else None
+
+def _next_delay(error: BaseException, policy: RetryPolicy, retry: int) -> float:
+    server_delay = retry_after_seconds(error)
+    return server_delay if server_delay is not None else policy.backoff(retry)
+
+def call_with_retry(
+    fn: Callable[[float], T],
+    policy: RetryPolicy | None = None,
+    breaker: CircuitBreaker | None = None,
+    on_retry: Callable[[BaseException, float, int], None] | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> T:
+    """
+    Calls `fn` until it succeeds, a non-retryable error occurs, or the budget runs out.
+
+    Args:
+        fn: Performs one attempt. Receives the seconds left before the deadline,
+            to be used as that attempt's timeout.
+        policy: Backoff policy (defaults from CSTUDIO_RETRY_* settings).
+        breaker: Circuit breaker (defaults to the process-wide one).
+        on_retry: Optional callback(error, delay, retry_number) before each wait.
+        sleep: Sleep function (injectable for tests).
+        clock: Monotonic clock (injectable for tests).
+
+    Returns:
+        Whatever `fn` returns.
+
+    Raises:
+        The last error from `fn`, or CircuitOpenError while the circuit is open.
+    """
+    policy = policy or RetryPolicy()
+    breaker = default_breaker if breaker is None else breaker
+    deadline = clock() + policy.deadline
+    retry = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = fn(max(0.001, deadline - clock()))
+        except Exception as error:
+            if not is_retryable(error):
+                # A definitive API answer (e.g., 400) still proves the service is up
+                if isinstance(error, APIStatusError):
+                    breaker.record_success()
+                else:
+                    breaker.record_neutral()
+                raise
+            if is_throttled(error):
+                breaker.record_neutral() # Waiting it out is the fix; a burst of these says nothing about health
+            else:
+                breaker.record_failure()
+            retry += 1
+            delay = _next_delay(error, policy, retry - 1)
+            if retry >= policy.max_attempts or clock() + delay >= deadline:
+                raise
+            if on_retry:
+                on_retry(error, delay, retry)
+            sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+async def call_with_retry_async(
+    fn: Callable[[float], Awaitable[T]],
+    policy: RetryPolicy | None = None,
+    breaker: CircuitBreaker | None = None,
+    on_retry: Callable[[BaseException, float, int], None] | None = None,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> T:
+    """Async counterpart of call_with_retry(); `fn` and `sleep` return awaitables."""
+    policy = policy or RetryPolicy()
+    breaker = default_breaker if breaker is None else breaker
+    deadline = clock() + policy.deadline
+    retry = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = await fn(max(0.001, deadline - clock()))
+        except Exception as error:
+            if not is_retryable(error):
+                # A definitive API answer (e.g., 400) still proves the service is up
+                if isinstance(error, APIStatusError):
+                    breaker.record_success()
+                else:
+                    breaker.record_neutral()
+                raise
+            if is_throttled(error):
+                breaker.record_neutral() # Waiting it out is the fix; a burst of these says nothing about health
+            else:
+                breaker.record_failure()
+            retry += 1
+            delay = _next_delay(error, policy, retry - 1)
+            if retry >= policy.max_attempts or clock() + delay >= deadline:
+                raise
+            if on_retry:
+                on_retry(error, delay, retry)
+            await sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+def _fallback_policy(is_last: bool, remaining: float) -> RetryPolicy:
+    """
+    Full retries for the last model in a chain, FALLBACK_ATTEMPTS for the others,
+    within the `remaining` seconds of the chain's deadline.
+    """
+    policy = RetryPolicy(deadline=remaining)
+    if not is_last:
+        policy.max_attempts = min(policy.max_attempts, max(1, FALLBACK_ATTEMPTS))
+    return policy
+
+def call_with_fallback(
+    models: list[str],
+    fn: Callable[[str, float], T],
+    on_retry: Callable[[BaseException, float, int], None] | None = None,
+    on_fallback: Callable[[str, BaseException, str], None] | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> tuple[str, T]:
+    """
+    Calls `fn` with each model in turn until one succeeds.
+
+    Each model is retried with its own circuit breaker (see breaker_for());
+    models before the last get only FALLBACK_ATTEMPTS attempts so an
+    overloaded model is abandoned quickly. The whole chain shares one
+    RETRY_DEADLINE: each model gets what the models before it left, and no
+    fallback starts once it has passed. Errors that another model cannot
+    fix (see is_fallback_error()) are raised immediately.
+
+    Args:
+        models: Models to try, in order (at least one).
+        fn: Performs one attempt: fn(model, seconds_left_before_deadline).
+        on_retry: Optional callback(error, delay, retry_number) before each wait.
+        on_fallback: Optional callback(failed_model, error, next_model).
+        sleep: Sleep function (injectable for tests).
+        clock: Monotonic clock (injectable for tests).
+
+    Returns:
+        A (model, result) tuple naming the model that answered.
+
+    Raises:
+        The error from the last model tried.
+    """
+    deadline = clock() + RETRY_DEADLINE
+    for position, model in enumerate(models):
+        is_last = position == len(models) - 1
+        try:
+            result = call_with_retry(
+                lambda timeout: fn(model, timeout),
+                policy=_fallback_policy(is_last, deadline - clock()),
+                breaker=breaker_for(model),
+                on_retry=on_retry,
+                sleep=sleep,
+                clock=clock,
+            )
+            return model, result
+        except Exception as error:
+            if is_last or not is_fallback_error(error) or clock() >= deadline:
+                raise
+            if on_fallback:
+                on_fallback(model, error, models[position + 1])
+    raise ValueError("call_with_fallback() needs at least one model")
+
+async def call_with_fallback_async(
+    models: list[str],
+    fn: Callable[[str, float], Awaitable[T]],
+    on_retry: Callable[[BaseException, float, int], None] | None = None,
+    on_fallback: Callable[[str, BaseException, str], None] | None = None,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> tuple[str, T]:
+    """Async counterpart of call_with_fallback(); `fn` and `sleep` return awaitables."""
+    deadline = clock() + RETRY_DEADLINE
+    for position, model in enumerate(models):
+        is_last = position == len(models) - 1
+        try:
+            result = await call_with_retry_async(
+                lambda timeout: fn(model, timeout),
+                policy=_fallback_policy(is_last, deadline - clock()),
+                breaker=breaker_for(model),
+                on_retry=on_retry,
+                sleep=sleep,
+                clock=clock,
+            )
+            return model, result
+        except Exception as error:
+            if is_last or not is_fallback_error(error) or clock() >= deadline:
+                raise
+            if on_fallback:
+                on_fallback(model, error, models[position + 1])
+    raise ValueError("call_with_fallback_async() needs at least one model")
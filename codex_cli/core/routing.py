@@ -0,0 +1,188 @@
+# codex_cli/core/routing.py
+"""
+Model routing: picks a model from the command, input size and detail level,
+and names the models to fall back to when one is timing out or overloaded.
+
+Rules live in a TOML (or JSON) file, by default
+$XDG_CONFIG_HOME/codex-cli-studio/routing.toml, or the path in
+CSTUDIO_ROUTING_FILE. The first matching rule wins:
+
+    default_model = "gpt-4o"
+
+    [[rules]]
+    commands = ["explain"]
+    detail = "basic"
+    max_tokens = 1000
+    model = "gpt-4o-mini"
+
+    [fallbacks]
+    "gpt-4o" = ["gpt-4o-mini"]
+    "gpt-4o-mini" = ["gpt-4o"]
+
+CSTUDIO_MODEL pins one model for every command; CSTUDIO_NO_FALLBACK=1
+disables fallbacks.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .settings import env_flag, get_config_dir
+
+try:
+    import tomllib # Python 3.11+
+except ImportError: # pragma: no cover - older Pythons
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+DEFAULT_MODEL = "gpt-4o"
+SMALL_MODEL = "gpt-4o-mini"
+ROUTING_FILE_NAME = "routing.toml"
+
+@dataclass
+class RoutingRule:
+    """
+    Selects `model` when every given condition matches.
+
+    Attributes:
+        model: Model to use.
+        commands: Command names the rule applies to (e.g. "explain", "config explain"); empty = any.
+        detail: Detail level ("basic" or "detailed"); None = any.
+        min_tokens: Smallest input size (tokens) the rule applies to.
+        max_tokens: Largest input size (tokens) the rule applies to; None = no limit.
+    """
+    model: str
+    commands: list[str] = field(default_factory=list)
+    detail: str | None = None
+    min_tokens: int = 0
+    max_tokens: int | None = None
+
+    def matches(self, command: str, tokens: int, detail: str | None) -> bool:
+        if self.commands and command not in self.commands:
+            return False
+        if self.detail is not None and (detail or "").lower() != self.detail.lower():
+            return False
+        if tokens < self.min_tokens:
+            return False
+        return self.max_tokens is None or tokens <= self.max_tokens
+
+@dataclass
+class RoutingPolicy:
+    """Rules, default model and fallback chains."""
+    default_model: str = DEFAULT_MODEL
+    rules: list[RoutingRule] = field(default_factory=list)
+    fallbacks: dict[str, list[str]] = field(default_factory=dict)
+
+    def select(self, command: str, tokens: int, detail: str | None = None) -> str:
+        """Returns the model of the first matching rule, or the default model."""
+        for rule in self.rules:
+            if rule.matches(command, tokens, detail):
+                return rule.model
+        return self.default_model
+
+    def chain(self, model: str) -> list[str]:
+        """Returns `model` followed by its fallbacks, without repeats."""
+        chain = [model]
+        for candidate in self.fallbacks.get(model, []):
+            if candidate not in chain:
+                chain.append(candidate)
+        return chain
+
+def default_policy() -> RoutingPolicy:
+    """Built-in policy: short basic explanations go to the small model, everything else to the default."""
+    return RoutingPolicy(
+        default_model=DEFAULT_MODEL,
+        rules=[RoutingRule(model=SMALL_MODEL, commands=["explain"], detail="basic", max_tokens=1000)],
+        fallbacks={DEFAULT_MODEL: [SMALL_MODEL], SMALL_MODEL: [DEFAULT_MODEL]},
+    )
+
+def parse_policy(data: dict) -> RoutingPolicy:
+    """
+    Builds a policy from parsed TOML/JSON data.
+
+    Raises:
+        ValueError: If the data does not describe a valid policy.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("routing config must be a table/object")
+    rules = []
+    for index, raw in enumerate(data.get("rules", []), start=1):
+        if not isinstance(raw, dict) or not isinstance(raw.get("model"), str):
+            raise ValueError(f"rule {index} needs a 'model'")
+        commands = raw.get("commands", raw.get("command", []))
+        rules.append(RoutingRule(
+            model=raw["model"],
+            commands=[commands] if isinstance(commands, str) else list(commands),
+            detail=raw.get("detail"),
+            min_tokens=int(raw.get("min_tokens", 0)),
+            max_tokens=int(raw["max_tokens"]) if raw.get("max_tokens") is not None else None,
+        ))
+    fallbacks = data.get("fallbacks", {})
+    if not isinstance(fallbacks, dict) or not all(isinstance(v, list) for v in fallbacks.values()):
+        raise ValueError("'fallbacks' must map a model to a list of models")
+    return RoutingPolicy(default_model=str(data.get("default_model", DEFAULT_MODEL)), rules=rules, fallbacks=fallbacks)
+
+def routing_file() -> Path:
+    """Returns the path of the routing config file (which may not exist)."""
+    return Path(os.getenv("CSTUDIO_ROUTING_FILE") or get_config_dir(ROUTING_FILE_NAME))
+
+# Parsed policy, reloaded when the file changes
+_cache_lock = threading.Lock()
+_cached: tuple[tuple, RoutingPolicy] | None = None
+
+def load_policy() -> RoutingPolicy:
+    """
+    Returns the routing policy from the config file, or the built-in policy
+    if there is no file. An invalid file is reported once and ignored.
+    """
+    global _cached
+    path = routing_file()
+    try:
+        stat = path.stat()
+        signature = (str(path), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return default_policy()
+    with _cache_lock:
+        if _cached and _cached[0] == signature:
+            return _cached[1]
+        try:
+            if path.suffix.lower() == ".json":
+                data = json.loads(path.read_text(encoding="utf-8"))
+            elif tomllib is None:
+                raise ValueError("reading TOML needs Python 3.11+ or the 'tomli' package (or use a .json file)")
+            else:
+                data = tomllib.loads(path.read_text(encoding="utf-8"))
+            policy = parse_policy(data)
+        except (OSError, ValueError, TypeError) as e: # tomllib.TOMLDecodeError is a ValueError
+            from rich.console import Console
+            Console(stderr=True).print(f"[bold yellow]Warning: ignoring routing config {path}: {e}[/bold yellow]")
+            policy = default_policy()
+        _cached = (signature, policy)
+        return policy
+
+def select_model(command: str, tokens: int, detail: str | None = None) -> str:
+    """
+    Picks the model for a request.
+
+    Args:
+        command: The CLI command (e.g. "explain", "config explain", "script").
+        tokens: Size of the input in tokens.
+        detail: Requested detail level, if the command has one.
+
+    Returns:
+        CSTUDIO_MODEL if set, otherwise the model chosen by the routing policy.
+    """
+    pinned = os.getenv("CSTUDIO_MODEL")
+    if pinned:
+        return pinned
+    return load_policy().select(command, tokens, detail)
+
+def model_chain(model: str) -> list[str]:
+    """Returns the models to try in order for a request routed to `model`."""
+    if env_flag("CSTUDIO_NO_FALLBACK"):
+        return [model]
+    return load_policy().chain(model)
@@ -0,0 +1,242 @@
+# codex_cli/core/sandbox.py
+"""
+Sandboxed runs of generated scripts.
+
+A script is written to a fresh temporary directory and run there in its own
+session, with a minimal environment (HOME and TMPDIR point into the
+directory, no API keys) and resource limits set in the child before exec:
+CPU seconds, address space and the size of files it may write. A
+wall-clock timeout kills the whole process group. Network access is
+removed where the platform can do it without privileges - a network
+namespace via `unshare -rn` on Linux, `sandbox-exec` on macOS - and the
+result says whether it was.
+
+This is a budget check, not a security boundary: the script can still
+read (and write) any file the user can, by absolute path.
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from .settings import env_float, env_int
+
+RUN_TIMEOUT = env_float("CSTUDIO_RUN_TIMEOUT", 60) # Wall-clock seconds
+RUN_CPU_SECONDS = env_int("CSTUDIO_RUN_CPU_SECONDS", 60)
+RUN_MEMORY_MB = env_int("CSTUDIO_RUN_MEMORY_MB", 1024) # Address space
+RUN_FILE_MB = env_int("CSTUDIO_RUN_FILE_MB", 100) # Largest file the script may write
+# Characters of stdout/stderr kept (the end of the output)
+OUTPUT_MAX_CHARS = 4000
+RUNNABLE_SCRIPT_TYPES = ["bash", "python"]
+
+_MACOS_PROFILE = "(version 1)(allow default)(deny network*)"
+_ENV_PASSTHROUGH = ("PATH", "LANG", "LC_ALL", "LC_CTYPE", "TZ")
+_SIGNAL_REASONS = {
+    "SIGXCPU": "CPU time limit exceeded",
+    "SIGXFSZ": "file size limit exceeded",
+    "SIGSEGV": "crashed (possibly out of memory)",
+}
+
+class SandboxError(Exception):
+    """Raised when a script cannot be run in the sandbox on this system."""
+
+@dataclass
+class RunLimits:
+    """Budget of a sandboxed run; 0 disables a limit."""
+    timeout: float = field(default_factory=lambda: RUN_TIMEOUT)
+    cpu_seconds: int = field(default_factory=lambda: RUN_CPU_SECONDS)
+    memory_mb: int = field(default_factory=lambda: RUN_MEMORY_MB)
+    file_mb: int = field(default_factory=lambda: RUN_FILE_MB)
+
+@dataclass
+class RunResult:
+    """
+    Outcome and resource usage of a sandboxed run.
+
+    Attributes:
+        exit_code: Exit status, or minus the signal number if the script was killed.
+        wall_time: Seconds from start to exit.
+        cpu_time: User plus system CPU seconds of the script and the processes it waited for.
+        peak_rss: Largest resident set size in bytes.
+        timed_out: True if the wall-clock timeout killed the script.
+        network_isolated: True if the script had no network access.
+        stdout: The end of the standard output.
+        stderr: The end of the standard error.
+    """
+    exit_code: int
+    wall_time: float
+    cpu_time: float
+    peak_rss: int
+    timed_out: bool = False
+    network_isolated: bool = False
+    stdout: str = ""
+    stderr: str = ""
+
+    @property
+    def ok(self) -> bool:
+        """True if the script exited with status 0 within its budget."""
+        return self.exit_code == 0 and not self.timed_out
+
+    @property
+    def status(self) -> str:
+        """The exit status in words (e.g. 'exit code 0', 'killed: CPU time limit exceeded')."""
+        if self.timed_out:
+            return "killed: wall-clock timeout"
+        if self.exit_code >= 0:
+            # Shells exit with 128 + N when a command they ran was killed by signal N
+            reason = _SIGNAL_REASONS.get(_signal_name(self.exit_code - 128)) if self.exit_code > 128 else None
+            return f"exit code {self.exit_code}" + (f" (a command was killed: {reason})" if reason else "")
+        name = _signal_name(-self.exit_code)
+        return f"killed: {_SIGNAL_REASONS.get(name, name)}"
+
+def _signal_name(number: int) -> str:
+    try:
+        return signal.Signals(number).name
+    except ValueError:
+        return f"signal {number}"
+
+def _probe(command: list[str]) -> bool:
+    try:
+        return subprocess.run(command, capture_output=True, timeout=5).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+@lru_cache(maxsize=1)
+def network_wrapper() -> tuple[str, ...] | None:
+    """The command prefix that runs a program without network access here, or None if there is none."""
+    if sys.platform.startswith("linux"):
+        unshare = shutil.which("unshare")
+        if unshare and _probe([unshare, "-rn", "true"]):
+            return (unshare, "-rn")
+    elif sys.platform == "darwin":
+        sandbox_exec = shutil.which("sandbox-exec")
+        if sandbox_exec and _probe([sandbox_exec, "-p", _MACOS_PROFILE, "true"]):
+            return (sandbox_exec, "-p", _MACOS_PROFILE)
+    return None
+
+def interpreter(script_type: str) -> list[str]:
+    """
+    The command that runs a script of a type.
+
+    Raises:
+        SandboxError: If the type is not runnable or its interpreter is missing.
+    """
+    if script_type == "bash":
+        bash = shutil.which("bash")
+        if not bash:
+            raise SandboxError("bash was not found on PATH.")
+        return [bash]
+    if script_type == "python":
+        return [shutil.which("python3") or sys.executable]
+    raise SandboxError(f"Only {' and '.join(RUNNABLE_SCRIPT_TYPES)} scripts can be run (got '{script_type}').")
+
+def _set_limits(limits: RunLimits):
+    """Returns the preexec function applying the resource limits in the child."""
+    import resource
+
+    def apply():
+        if limits.cpu_seconds:
+            # SIGXCPU at the soft limit, SIGKILL one second later if it is ignored
+            resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 1))
+        if limits.memory_mb:
+            size = limits.memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (size, size))
+        if limits.file_mb:
+            size = limits.file_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_FSIZE, (size, size))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    return apply
+
+def _kill_group(pid: int):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def _tail(path: Path) -> str:
+    """The last OUTPUT_MAX_CHARS characters of a file."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - OUTPUT_MAX_CHARS * 4))
+            text = f.read().decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+    return text if len(text) <= OUTPUT_MAX_CHARS else "…" + text[-OUTPUT_MAX_CHARS:]
+
+def run_script(code: str, script_type: str, limits: RunLimits | None = None, isolate_network: bool = True) -> RunResult:
+    """
+    Runs a script in a temporary directory under resource limits.
+
+    Args:
+        code: The script source.
+        script_type: 'bash' or 'python'.
+        limits: CPU, memory, file size and wall-clock budget (defaults from CSTUDIO_RUN_* settings).
+        isolate_network: If False, do not try to remove network access.
+
+    Returns:
+        The RunResult.
+
+    Raises:
+        SandboxError: If the script type cannot be run or the platform has no resource limits.
+    """
+    if os.name != "posix":
+        raise SandboxError("Sandboxed runs need a POSIX system (resource limits and process groups).")
+    limits = limits or RunLimits()
+    command = interpreter(script_type)
+    wrapper = network_wrapper() if isolate_network else None
+
+    with tempfile.TemporaryDirectory(prefix="cstudio-run-") as root:
+        workdir = Path(root, "work")
+        workdir.mkdir()
+        script = Path(root, "script.py" if script_type == "python" else "script.sh")
+        script.write_text(code, encoding="utf-8")
+        stdout_path, stderr_path = Path(root, "stdout"), Path(root, "stderr")
+        env = {name: os.environ[name] for name in _ENV_PASSTHROUGH if name in os.environ}
+        env.update(HOME=str(workdir), TMPDIR=str(workdir), PYTHONDONTWRITEBYTECODE="1")
+
+        with open(stdout_path, "wb") as stdout, open(stderr_path, "wb") as stderr:
+            start = time.perf_counter()
+            try:
+                process = subprocess.Popen(
+                    [*(wrapper or ()), *command, str(script)], cwd=workdir, env=env,
+                    stdin=subprocess.DEVNULL, stdout=stdout, stderr=stderr,
+                    start_new_session=True, preexec_fn=_set_limits(limits),
+                )
+            except OSError as e:
+                raise SandboxError(f"Could not start the script: {e}") from e
+            timed_out = threading.Event()
+
+            def on_timeout():
+                timed_out.set()
+                _kill_group(process.pid)
+
+            timer = threading.Timer(limits.timeout, on_timeout) if limits.timeout else None
+            if timer:
+                timer.daemon = True
+                timer.start()
+            try:
+                # wait4() reaps the process and returns its rusage (including the children it waited for)
+                _, status, usage = os.wait4(process.pid, 0)
+            finally:
+                wall_time = time.perf_counter() - start
+                if timer:
+                    timer.cancel()
+            process.returncode = os.waitstatus_to_exitcode(status)
+            _kill_group(process.pid) # Background processes the script left behind
+
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+        return RunResult(
+            exit_code=process.returncode, wall_time=wall_time, cpu_time=usage.ru_utime + usage.ru_stime,
+            peak_rss=peak_rss, timed_out=timed_out.is_set(), network_isolated=wrapper is not None,
+            stdout=_tail(stdout_path), stderr=_tail(stderr_path),
+        )
@@ -0,0 +1,78 @@
+# codex_cli/core/script_check.py
+"""
+Local static checks of generated scripts.
+
+A script is parsed, never run: `bash -n` for bash, compile() for Python and
+the PowerShell language parser (through `pwsh`) for PowerShell. A check
+whose tool is not installed passes, so a missing interpreter never blocks
+generation.
+"""
+
+import re
+import shutil
+import subprocess
+
+CHECK_TIMEOUT = 10 # Seconds per external parse
+
+_PWSH_PARSE = (
+    "$errors = $null; "
+    "[void][System.Management.Automation.Language.Parser]::ParseInput([Console]::In.ReadToEnd(), [ref]$null, [ref]$errors); "
+    "foreach ($e in $errors) { 'line ' + $e.Extent.StartLineNumber + ': ' + $e.Message }; "
+    "if ($errors) { exit 1 }"
+)
+
+def _first_error(output: str) -> str:
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    return lines[0] if lines else "syntax error"
+
+def _run_parser(command: list[str], code: str) -> str | None:
+    try:
+        result = subprocess.run(command, input=code, capture_output=True, text=True, timeout=CHECK_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return "syntax check timed out"
+    except OSError:
+        return None
+    if result.returncode == 0:
+        return None
+    # bash reports "/usr/bin/bash: line 3: syntax error ..."; the interpreter path adds nothing
+    return re.sub(r"^\S*bash: ", "", _first_error(result.stdout + "\n" + result.stderr))
+
+def check_script(code: str, script_type: str) -> str | None:
+    """
+    Parses a script without running it.
+
+    Args:
+        code: The script source.
+        script_type: 'bash', 'python' or 'powershell'.
+
+    Returns:
+        The first syntax error (e.g. 'line 4: syntax error near unexpected token `fi''),
+        or None if the script parses or cannot be checked here.
+    """
+    if not code.strip():
+        return "empty script"
+    if script_type == "python":
+        try:
+            compile(code, "<script>", "exec")
+        except SyntaxError as e:
+            return f"line {e.lineno}: {e.msg}"
+        except ValueError as e: # Null bytes
+            return str(e)
+        return None
+    if script_type == "bash":
+        bash = shutil.which("bash")
+        return _run_parser([bash, "-n"], code) if bash else None
+    if script_type == "powershell":
+        pwsh = shutil.which("pwsh")
+        return _run_parser([pwsh, "-NoProfile", "-NonInteractive", "-Command", _PWSH_PARSE], code) if pwsh else None
+    return None
+
+def checker_name(script_type: str) -> str | None:
+    """The check applied to a script type here ('bash -n', 'compile()', 'pwsh parser'), or None if there is none."""
+    if script_type == "python":
+        return "compile()"
+    if script_type == "bash" and shutil.which("bash"):
+        return "bash -n"
+    if script_type == "powershell" and shutil.which("pwsh"):
+        return "pwsh parser"
+    return None
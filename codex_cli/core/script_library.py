@@ -0,0 +1,346 @@
+# codex_cli/core/script_library.py
+"""
+A local library of generated scripts, reused for similar tasks.
+
+Task descriptions are normalized into templates: numbers (with their
+units), paths, file names and globs, URLs, quoted strings and names after
+"named"/"called" are pulled out as typed parameters, so "find files
+larger than 100MB in /data" and "find files larger than 2MB in /var/log"
+share the template "find files larger than <num>mb in <path>".
+
+Templates are searched with an in-process BM25 index over the entries of
+one script type. A match is confident when the BM25 score, normalized in
+both directions, is above a threshold, the parameters have the same kinds
+and units, and every changed parameter value occurs in the stored script's
+code (not only its comments) as a whole token, so it can be replaced by the
+new one.
+"""
+
+import json
+import math
+import re
+import sqlite3
+import time
+from collections import Counter
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .settings import env_flag, env_float, env_int, get_data_dir
+
+LIBRARY_FILE_NAME = "scripts.sqlite3"
+# Minimum normalized BM25 score (0-1, both directions) of a confident match
+LIBRARY_MIN_SCORE = env_float("CSTUDIO_LIBRARY_MIN_SCORE", 0.85)
+LIBRARY_MAX_ENTRIES = env_int("CSTUDIO_LIBRARY_MAX_ENTRIES", 2000)
+BM25_K1, BM25_B = 1.2, 0.75
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scripts (
+    id INTEGER PRIMARY KEY,
+    script_type TEXT NOT NULL,
+    template TEXT NOT NULL,
+    params TEXT NOT NULL,
+    task TEXT NOT NULL,
+    script TEXT NOT NULL,
+    model TEXT NOT NULL DEFAULT '',
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    used REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (script_type, template)
+);
+"""
+
+# Parameter patterns, tried in order at each position (kind, regex)
+_PARAMETERS = [
+    ("str", re.compile(r"\"([^\"]+)\"|'([^']+)'|`([^`]+)`")),
+    ("url", re.compile(r"\b(?:https?|ftp|s3|gs)://[^\s,;]+")),
+    ("path", re.compile(r"(?:(?<=\s)|^)(?:~|\.{1,2})?(?:/[\w.*?\-{}$]+)+/?|\b[A-Za-z]:\\[^\s,;]*")),
+    ("file", re.compile(r"(?<![\w/])[\w*?\-]*[\w*?]\.[A-Za-z][\w]{0,5}\b")),
+    ("name", re.compile(r"(?<=\bnamed )[\w.\-]+|(?<=\bcalled )[\w.\-]+")),
+    ("num", re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)([A-Za-z%]{0,3})\b")),
+]
+_STOPWORDS = {"a", "an", "the", "please", "all", "that", "which", "me", "my", "to", "of", "and", "script"}
+_WORD = re.compile(r"<\w+>|\w+")
+
+@dataclass
+class Parameter:
+    """A value pulled out of a task description; `unit` is kept in the template (e.g. 'mb')."""
+    kind: str
+    value: str
+    unit: str = ""
+
+@dataclass
+class Task:
+    """A normalized task description."""
+    template: str
+    params: list[Parameter] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> list[str]:
+        return [token for token in _WORD.findall(self.template) if token not in _STOPWORDS]
+
+    @property
+    def signature(self) -> list[str]:
+        return [f"{param.kind}:{param.unit.lower()}" for param in self.params]
+
+@dataclass
+class LibraryMatch:
+    """A library script adapted to a new task."""
+    script: str
+    task: str # The task the script was generated for
+    score: float
+    substitutions: list[tuple[str, str]] # (old value, new value) for the parameters that changed
+    model: str = ""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+def parse_task(description: str) -> Task:
+    """
+    Normalizes a task description and pulls out its parameters.
+
+    Returns:
+        The Task: a lower-case template with `<kind>` placeholders, and the
+        parameters in order of appearance.
+    """
+    text = description.strip()
+    spans = []
+    for kind, pattern in _PARAMETERS:
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if any(start < taken_end and end > taken_start for taken_start, taken_end, _ in spans):
+                continue
+            if kind == "str":
+                param = Parameter(kind, next(group for group in match.groups() if group is not None))
+            elif kind == "num":
+                param = Parameter(kind, match.group(1), match.group(2))
+            elif kind == "path":
+                param = Parameter(kind, match.group(0).rstrip("/\\") or match.group(0))
+            else:
+                param = Parameter(kind, match.group(0))
+            spans.append((start, end, param))
+    spans.sort(key=lambda span: span[0])
+
+    parts, position = [], 0
+    for start, end, param in spans:
+        parts.append(text[position:start])
+        parts.append(f" <{param.kind}>{param.unit.lower()} ")
+        position = end
+    parts.append(text[position:])
+    template = " ".join(re.sub(r"[^\w<>\s]", " ", "".join(parts)).lower().split())
+    return Task(template, [param for _, _, param in spans])
+
+def comment_spans(script: str) -> list[tuple[int, int]]:
+    """
+    Returns the (start, end) offsets of the comments in a bash, Python or PowerShell script.
+
+    A `#` starts a comment at the start of a line or after whitespace, outside
+    quotes (PowerShell `<# ... #>` blocks too). Quotes that never close mark the
+    rest of the script as code, so unusual scripts err on the side of code.
+    """
+    spans, quote, position, length = [], None, 0, len(script)
+    while position < length:
+        char = script[position]
+        if quote:
+            if char == "\\" and quote != "'":
+                position += 2
+                continue
+            if script.startswith(quote, position):
+                position += len(quote)
+                quote = None
+                continue
+        elif char == "\\":
+            position += 2
+            continue
+        elif script.startswith(('"""', "'''"), position):
+            quote = script[position:position + 3]
+            position += 3
+            continue
+        elif char in "\"'":
+            quote = char
+        elif script.startswith("<#", position):
+            end = script.find("#>", position + 2)
+            end = length if end < 0 else end + 2
+            spans.append((position, end))
+            position = end
+            continue
+        elif char == "#" and (position == 0 or script[position - 1].isspace()):
+            end = script.find("\n", position)
+            end = length if end < 0 else end
+            spans.append((position, end))
+            position = end
+            continue
+        position += 1
+    return spans
+
+def _value_pattern(param: Parameter) -> str:
+    """A regex matching a parameter value as a whole token, not inside a longer number, word or path."""
+    value = re.escape(param.value)
+    if param.kind == "num":
+        return rf"(?<![\w.]){value}(?!\d|\.\d)"
+    # `/data` must not match `/database` or `/srv/data`, but may be the directory in `/data/2024`
+    lead = r"(?<![\w./~\-])" if re.match(r"[\w./~]", param.value) else ""
+    tail = r"(?![\w\-]|\.\w)" if re.search(r"[\w*?]$", param.value) else ""
+    return lead + value + tail
+
+# A number right after these is an exit status, file descriptor (`>&2`) or redirection target
+_STATUS_OR_FD_BEFORE = re.compile(r"(?:\b(?:exit|return)\s*\(?\s*|[<>]&\s*)$")
+# ... and a number right before a redirection is a file descriptor (`2>/dev/null`, `3<file`)
+_FD_AFTER = re.compile(r"[<>]")
+
+def _is_status_or_fd(script: str, start: int, end: int) -> bool:
+    return bool(_STATUS_OR_FD_BEFORE.search(script, max(0, start - 16), start) or _FD_AFTER.match(script, end))
+
+def substitute(script: str, old: list[Parameter], new: list[Parameter]) -> tuple[str, list[tuple[str, str]]] | None:
+    """
+    Replaces the old parameter values in a script by the new ones.
+
+    A value is only replaced as a whole token, and it must occur exactly once
+    in the script's code. A value found only in comments (e.g. "keep 3
+    backups" above `tail -n +4`) is encoded some other way, and a value found
+    several times may also be a file descriptor or an unrelated constant
+    (`head -n 2 f 2>/dev/null`), so either way the script cannot be adapted
+    safely. Nor is an exit status, return value or file descriptor ever
+    rewritten. Occurrences in comments are rewritten along with the code.
+
+    Returns:
+        (script, substitutions), or None if a value that changed cannot be
+        located unambiguously in the script's code.
+    """
+    changed = [(before, after) for before, after in zip(old, new) if before.value != after.value]
+    if not changed:
+        return script, []
+    old_values = [param.value for param in old]
+    comments = comment_spans(script)
+    patterns = []
+    for before, after in changed:
+        if old_values.count(before.value) > 1:
+            return None # Two parameters had the same value: which one goes where is unknown
+        pattern = re.compile(_value_pattern(before))
+        in_code = [match for match in pattern.finditer(script) if not any(start <= match.start() < end for start, end in comments)]
+        if len(in_code) != 1 or _is_status_or_fd(script, *in_code[0].span()):
+            return None
+        patterns.append((pattern, after.value))
+    # One pass over the script, so a new value is never replaced again by a later parameter
+    combined = re.compile("|".join(f"(?P<p{index}>{pattern.pattern})" for index, (pattern, _) in enumerate(patterns)))
+    result = combined.sub(lambda match: patterns[int(match.lastgroup[1:])][1], script)
+    return result, [(before.value, after.value) for before, after in changed]
+
+def bm25_scores(query: list[str], documents: list[list[str]]) -> list[float]:
+    """Scores documents (token lists) against a query with Okapi BM25."""
+    if not documents:
+        return []
+    average = sum(len(document) for document in documents) / len(documents) or 1
+    frequencies = Counter(token for document in documents for token in set(document))
+    total = len(documents)
+    idf = {token: math.log(1 + (total - frequencies[token] + 0.5) / (frequencies[token] + 0.5)) for token in set(query)}
+    scores = []
+    for document in documents:
+        counts = Counter(document)
+        score = 0.0
+        for token in query:
+            count = counts.get(token, 0)
+            if count:
+                score += idf[token] * count * (BM25_K1 + 1) / (count + BM25_K1 * (1 - BM25_B + BM25_B * len(document) / average))
+        scores.append(score)
+    return scores
+
+def _match_score(query: list[str], document: list[str], corpus: list[list[str]]) -> float:
+    """BM25 score of a pair relative to a perfect match, the lower of both directions (1.0 = same tokens)."""
+    ratios = []
+    for a, b in ((query, document), (document, query)):
+        best = bm25_scores(a, corpus + [a])[-1]
+        ratios.append(min(1.0, bm25_scores(a, corpus + [b])[-1] / best) if best else 0.0)
+    return min(ratios)
+
+class ScriptLibrary:
+    """SQLite-backed store of generated scripts, searched by normalized task."""
+    def __init__(self, path: Path | str | None = None, min_score: float | None = None, max_entries: int | None = None):
+        self.path = Path(path) if path else get_data_dir(LIBRARY_FILE_NAME)
+        self.min_score = LIBRARY_MIN_SCORE if min_score is None else min_score
+        self.max_entries = LIBRARY_MAX_ENTRIES if max_entries is None else max_entries
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def search(self, description: str, script_type: str) -> LibraryMatch | None:
+        """
+        Finds a library script for a task, with the task's parameters substituted.
+
+        Args:
+            description: The task in natural language.
+            script_type: 'bash', 'python' or 'powershell'.
+
+        Returns:
+            The best confident match, or None.
+        """
+        if not self.path.exists():
+            return None
+        task = parse_task(description)
+        if not task.tokens:
+            return None
+        with closing(self._connect()) as connection, connection:
+            rows = connection.execute(
+                "SELECT id, template, params, task, script, model, prompt_tokens, completion_tokens FROM scripts WHERE script_type = ?",
+                (script_type,),
+            ).fetchall()
+            if not rows:
+                return None
+            parsed = [Task(row[1], [Parameter(**param) for param in json.loads(row[2])]) for row in rows]
+            corpus = [entry.tokens for entry in parsed]
+            ranked = sorted(zip(bm25_scores(task.tokens, corpus), rows, parsed), key=lambda item: -item[0])
+            for score, row, entry in ranked[:5]:
+                if score <= 0 or entry.signature != task.signature:
+                    continue
+                confidence = _match_score(task.tokens, entry.tokens, corpus)
+                if confidence < self.min_score:
+                    continue
+                adapted = substitute(row[4], entry.params, task.params)
+                if adapted is None:
+                    continue
+                connection.execute("UPDATE scripts SET used = ?, uses = uses + 1 WHERE id = ?", (time.time(), row[0]))
+                return LibraryMatch(adapted[0], row[3], confidence, adapted[1], row[5], row[6], row[7])
+        return None
+
+    def add(self, description: str, script_type: str, script: str, model: str = "",
+            prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Stores a script for a task, replacing any entry with the same template."""
+        task = parse_task(description)
+        now = time.time()
+        params = json.dumps([param.__dict__ for param in task.params])
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO scripts (script_type, template, params, task, script, model, prompt_tokens,"
+                " completion_tokens, created, used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (script_type, task.template, params, description, script, model, prompt_tokens, completion_tokens, now, now),
+            )
+            if self.max_entries:
+                connection.execute(
+                    "DELETE FROM scripts WHERE id IN (SELECT id FROM scripts ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+def find_script(description: str, script_type: str) -> LibraryMatch | None:
+    """Searches the default library; returns None when disabled (CSTUDIO_NO_LIBRARY) or on any storage error."""
+    if env_flag("CSTUDIO_NO_LIBRARY"):
+        return None
+    try:
+        return ScriptLibrary().search(description, script_type)
+    except (sqlite3.Error, OSError, ValueError, TypeError):
+        return None
+
+def store_script(description: str, script_type: str, script: str, model: str = "",
+                 prompt_tokens: int = 0, completion_tokens: int = 0) -> bool:
+    """Adds a script to the default library; returns False when disabled or on error."""
+    if env_flag("CSTUDIO_NO_LIBRARY"):
+        return False
+    try:
+        ScriptLibrary().add(description, script_type, script, model, prompt_tokens, completion_tokens)
+        return True
+    except (sqlite3.Error, OSError, ValueError):
+        return False
@@ -0,0 +1,72 @@
+# codex_cli/core/settings.py
+
+import os
+from pathlib import Path
+
+APP_DIR_NAME = "codex-cli-studio"
+
+def env_int(name: str, default: int) -> int:
+    """Reads an integer setting from the environment, falling back to a default."""
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def env_float(name: str, default: float) -> float:
+    """Reads a float setting from the environment, falling back to a default."""
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def env_flag(name: str) -> bool:
+    """Returns True if the environment variable is set to a truthy value (1, true, yes, on)."""
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+def get_cache_dir(*parts: str) -> Path:
+    """
+    Returns the directory used for cached data (not created automatically).
+
+    Uses CSTUDIO_CACHE_DIR if set, otherwise $XDG_CACHE_HOME/codex-cli-studio
+    (defaulting to ~/.cache/codex-cli-studio).
+
+    Args:
+        *parts: Optional sub-directory names appended to the cache root.
+    """
+    base = os.getenv("CSTUDIO_CACHE_DIR")
+    if not base:
+        xdg_cache = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(xdg_cache, APP_DIR_NAME)
+    return Path(base, *parts)
+
+def get_data_dir(*parts: str) -> Path:
+    """
+    Returns the directory used for persistent data such as the usage ledger (not created automatically).
+
+    Uses CSTUDIO_DATA_DIR if set, otherwise $XDG_DATA_HOME/codex-cli-studio
+    (defaulting to ~/.local/share/codex-cli-studio).
+
+    Args:
+        *parts: Optional sub-directory or file names appended to the data root.
+    """
+    base = os.getenv("CSTUDIO_DATA_DIR")
+    if not base:
+        xdg_data = os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        base = os.path.join(xdg_data, APP_DIR_NAME)
+    return Path(base, *parts)
+
+def get_config_dir(*parts: str) -> Path:
+    """
+    Returns the directory for user configuration files such as routing rules (not created automatically).
+
+    Uses CSTUDIO_CONFIG_DIR if set, otherwise $XDG_CONFIG_HOME/codex-cli-studio
+    (defaulting to ~/.config/codex-cli-studio).
+
+    Args:
+        *parts: Optional sub-directory or file names appended to the config root.
+    """
+    base = os.getenv("CSTUDIO_CONFIG_DIR")
+    if not base:
+        xdg_config = os.getenv("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+        base = os.path.join(xdg_config, APP_DIR_NAME)
+    return Path(base, *parts)
@@ -0,0 +1,204 @@
+# codex_cli/core/similar_cache.py
+"""
+Second cache tier that matches inputs by normalized fingerprint.
+
+The exact response cache only helps when a prompt repeats byte for byte.
+This tier stores explanations keyed by the normalized fingerprint of the
+input (see fingerprint.py), plus a MinHash signature indexed with
+locality-sensitive hashing, so inputs that differ only in formatting,
+comments or local names - or that are near-duplicates above a similarity
+threshold - are answered locally.
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+
+from .cache import CACHE_TTL_SECONDS
+from .fingerprint import MIN_TOKENS, fingerprint, lsh_bands, minhash_signature, normalize, shingles, similarity, token_count
+from .settings import env_flag, env_float, env_int, get_cache_dir
+
+# 1.0 = exact normalized matches only. A one-operator change to a short function
+# can still score ~0.9, so near-duplicate reuse is opt-in.
+SIMILARITY_THRESHOLD = env_float("CSTUDIO_SIMILARITY_THRESHOLD", 1.0)
+SIMILAR_MAX_ENTRIES = env_int("CSTUDIO_SIMILAR_MAX_ENTRIES", 5000)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    response TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    used REAL NOT NULL,
+    UNIQUE (namespace, fingerprint)
+);
+CREATE TABLE IF NOT EXISTS bands (
+    namespace TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    entry_id INTEGER NOT NULL REFERENCES entries (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS bands_lookup ON bands (namespace, band, bucket);
+CREATE INDEX IF NOT EXISTS bands_entry ON bands (entry_id);
+"""
+
+@dataclass
+class SimilarMatch:
+    """A cached response for an equivalent or similar input."""
+    response: str
+    similarity: float # 1.0 for an exact normalized match
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def exact(self) -> bool:
+        return self.similarity >= 1.0
+
+class SimilarityCache:
+    """
+    SQLite-backed cache of responses keyed by normalized input.
+
+    Entries are scoped by a namespace string that must capture everything
+    else that shaped the response (command, model, detail level, language).
+    """
+    def __init__(self, path: Path | str | None = None, threshold: float | None = None,
+                 ttl: float | None = None, max_entries: int | None = None):
+        self.path = Path(path) if path else get_cache_dir("similar.sqlite3")
+        self.threshold = SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.ttl = CACHE_TTL_SECONDS if ttl is None else ttl
+        self.max_entries = SIMILAR_MAX_ENTRIES if max_entries is None else max_entries
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def lookup(self, namespace: str, content: str, language: str, file_name: str | None = None) -> SimilarMatch | None:
+        """
+        Finds a cached response for an equivalent or similar input.
+
+        An exact normalized match is returned first. Otherwise, if the input
+        is long enough and the threshold is below 1, LSH candidates are
+        compared by MinHash similarity and the best one at or above the
+        threshold is returned.
+
+        Args:
+            namespace: Scope of the lookup (see the class docstring).
+            content: The raw input.
+            language: Normalizer to use (see fingerprint.guess_language()).
+            file_name: Optional file name, used to pick the comment syntax.
+
+        Returns:
+            The match, or None.
+        """
+        if not self.path.exists():
+            return None
+        normalized = normalize(content, language, file_name)
+        now = time.time()
+        oldest = now - self.ttl if self.ttl else 0
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT id, response, prompt_tokens, completion_tokens FROM entries"
+                " WHERE namespace = ? AND fingerprint = ? AND created >= ?",
+                (namespace, fingerprint(normalized), oldest),
+            ).fetchone()
+            if row:
+                connection.execute("UPDATE entries SET used = ? WHERE id = ?", (now, row[0]))
+                return SimilarMatch(row[1], 1.0, row[2], row[3])
+
+            if self.threshold >= 1.0 or token_count(normalized) < MIN_TOKENS:
+                return None
+            signature = minhash_signature(shingles(normalized))
+            if not signature:
+                return None
+            buckets = lsh_bands(signature)
+            candidates = connection.execute(
+                "SELECT DISTINCT e.id, e.signature, e.response, e.prompt_tokens, e.completion_tokens FROM bands b"
+                " JOIN entries e ON e.id = b.entry_id"
+                f" WHERE b.namespace = ? AND e.created >= ? AND ({' OR '.join(['(b.band = ? AND b.bucket = ?)'] * len(buckets))})",
+                (namespace, oldest, *[value for pair in enumerate(buckets) for value in pair]),
+            ).fetchall()
+            best = None
+            for entry_id, stored, response, prompt_tokens, completion_tokens in candidates:
+                score = similarity(signature, json.loads(stored))
+                if score >= self.threshold and (best is None or score > best.similarity):
+                    best, best_id = SimilarMatch(response, score, prompt_tokens, completion_tokens), entry_id
+            if best:
+                connection.execute("UPDATE entries SET used = ? WHERE id = ?", (now, best_id))
+            return best
+
+    def add(self, namespace: str, content: str, language: str, response: str,
+            file_name: str | None = None, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """
+        Stores the response for an input, replacing any entry with the same fingerprint.
+
+        Inputs shorter than fingerprint.MIN_TOKENS are stored for exact
+        normalized matching only.
+        """
+        normalized = normalize(content, language, file_name)
+        signature = minhash_signature(shingles(normalized)) if token_count(normalized) >= MIN_TOKENS else []
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM entries WHERE namespace = ? AND fingerprint = ?", (namespace, fingerprint(normalized)))
+            cursor = connection.execute(
+                "INSERT INTO entries (namespace, fingerprint, signature, response, prompt_tokens, completion_tokens, created, used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (namespace, fingerprint(normalized), json.dumps(signature), response, prompt_tokens, completion_tokens, now, now),
+            )
+            connection.executemany(
+                "INSERT INTO bands (namespace, band, bucket, entry_id) VALUES (?, ?, ?, ?)",
+                [(namespace, band, bucket, cursor.lastrowid) for band, bucket in enumerate(lsh_bands(signature))],
+            )
+            self._evict(connection, now)
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        """Drops expired entries and the least recently used ones beyond max_entries."""
+        if self.ttl:
+            connection.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+        if self.max_entries:
+            connection.execute(
+                "DELETE FROM entries WHERE id IN (SELECT id FROM entries ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        """Removes every entry."""
+        if self.path.exists():
+            with closing(self._connect()) as connection, connection:
+                connection.execute("DELETE FROM entries")
+
+def find_similar(namespace: str, content: str, language: str, file_name: str | None = None,
+                 threshold: float | None = None) -> SimilarMatch | None:
+    """
+    Looks up the default similarity cache; returns None when disabled or on any storage error.
+
+    The tier is disabled by CSTUDIO_NO_CACHE or CSTUDIO_NO_SIMILAR.
+    """
+    if env_flag("CSTUDIO_NO_CACHE") or env_flag("CSTUDIO_NO_SIMILAR"):
+        return None
+    try:
+        return SimilarityCache(threshold=threshold).lookup(namespace, content, language, file_name)
+    except (sqlite3.Error, OSError, ValueError):
+        return None
+
+def store_similar(namespace: str, content: str, language: str, response: str, file_name: str | None = None,
+                  prompt_tokens: int = 0, completion_tokens: int = 0) -> bool:
+    """Stores a response in the default similarity cache; returns False when disabled or on error."""
+    if env_flag("CSTUDIO_NO_CACHE") or env_flag("CSTUDIO_NO_SIMILAR"):
+        return False
+    try:
+        SimilarityCache().add(namespace, content, language, response, file_name, prompt_tokens, completion_tokens)
+        return True
+    except (sqlite3.Error, OSError, ValueError):
+        return False
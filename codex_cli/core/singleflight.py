@@ -0,0 +1,197 @@
+# codex_cli/core/singleflight.py
+"""
+Cross-process single-flight coordination of identical requests.
+
+The first process to claim a request key creates a lock file next to the
+response cache and makes the API call; other processes asking for the same
+key wait until the lock is released and then read the response from the
+cache. The owner refreshes the lock's mtime while it works, so a lock whose
+owner crashed (a dead PID on this host, or no heartbeat for
+SINGLEFLIGHT_STALE_SECONDS) is detected and broken.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from .settings import env_float, get_cache_dir
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+SINGLEFLIGHT_STALE_SECONDS = env_float("CSTUDIO_SINGLEFLIGHT_STALE", 30.0) # No heartbeat for this long = stale
+HEARTBEAT_INTERVAL = 5.0
+POLL_INITIAL = 0.05
+POLL_MAX = 0.5
+
+def _pid_alive(pid: int) -> bool:
+    """Returns False only when the process certainly does not exist."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, ValueError): # No permission, or not supported (e.g. Windows): assume alive
+        return True
+    return True
+
+class InFlightLock:
+    """
+    Lock file claiming one request key.
+
+    Created with O_EXCL, so exactly one process (or thread) owns a key at a
+    time. The file holds the owner's host, PID and a random token.
+    """
+    def __init__(self, key: str, directory: Path | str | None = None, stale_after: float | None = None):
+        self.directory = Path(directory) if directory else get_cache_dir("inflight")
+        self.path = self.directory / f"{key}.lock"
+        self.stale_after = SINGLEFLIGHT_STALE_SECONDS if stale_after is None else stale_after
+        self.token = uuid.uuid4().hex
+        self._stop = threading.Event()
+        self._heartbeat: threading.Thread | None = None
+
+    def acquire(self) -> bool:
+        """Tries to claim the key without waiting; returns True if this lock now owns it."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            json.dump({"host": socket.gethostname(), "pid": os.getpid(), "token": self.token, "created": time.time()}, f)
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name="cstudio-singleflight", daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def _beat(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                os.utime(self.path)
+            except OSError:
+                return
+
+    def release(self):
+        """Removes the lock file if this lock still owns it."""
+        self._stop.set()
+        if self._read_owner().get("token") == self.token:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def _read_owner(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def is_stale(self) -> bool:
+        """Returns True if the current owner crashed or stopped sending heartbeats."""
+        try:
+            age = time.time() - self.path.stat().st_mtime
+        except OSError:
+            return False # Released
+        owner = self._read_owner()
+        if owner.get("host") == socket.gethostname() and isinstance(owner.get("pid"), int) and not _pid_alive(owner["pid"]):
+            return True
+        return age > self.stale_after
+
+    def break_stale(self) -> bool:
+        """Removes the lock file if it is stale; returns True if it was removed."""
+        owner = self._read_owner()
+        if not self.is_stale():
+            return False
+        # Only delete the lock that was judged stale, not one claimed since
+        if self._read_owner().get("token") != owner.get("token"):
+            return False
+        try:
+            self.path.unlink()
+            return True
+        except OSError:
+            return False
+
+    def wait(self, lookup: Callable[[], T | None], timeout: float | None = None,
+             sleep: Callable[[float], None] = time.sleep) -> T | None:
+        """
+        Waits until the owner releases the key, polling `lookup` for its result.
+
+        Returns:
+            The first non-None result of `lookup`, or None once the lock is
+            gone (or stale, or `timeout` passed) without a result.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        delay = POLL_INITIAL
+        while True:
+            result = lookup()
+            if result is not None:
+                return result
+            if not self.path.exists():
+                return lookup()
+            if self.is_stale() or (deadline is not None and time.monotonic() >= deadline):
+                return None
+            sleep(delay)
+            delay = min(POLL_MAX, delay * 1.5)
+
+def claim(key: str, lookup: Callable[[], R | None], directory: Path | str | None = None,
+          on_wait: Callable[[], None] | None = None) -> tuple[InFlightLock | None, R | None]:
+    """
+    Claims a key, or waits for the process that already claimed it.
+
+    Args:
+        key: Identifies the request (e.g. its cache key).
+        lookup: Returns the published result of a finished request, or None.
+        directory: Lock directory (defaults to the 'inflight' cache directory).
+        on_wait: Called once if this process has to wait for another one.
+
+    Returns:
+        (None, result) when another process published the result; otherwise
+        (lock, None) and the caller must compute the result and release the
+        lock (lock is None if the lock directory is unusable). If the other
+        process fails or its lock goes stale, the key is claimed here.
+    """
+    waited = False
+    while True:
+        lock = InFlightLock(key, directory)
+        try:
+            if lock.acquire():
+                result = lookup() # Published by an owner that finished just before the claim
+                if result is not None:
+                    lock.release()
+                    return None, result
+                return lock, None
+        except OSError:
+            return None, None # Locking is best-effort; never fail the command
+        if not waited:
+            waited = True
+            if on_wait:
+                on_wait()
+        result = lock.wait(lookup)
+        if result is not None:
+            return None, result
+        lock.break_stale()
+
+def single_flight(key: str, compute: Callable[[], T], lookup: Callable[[], R | None],
+                  directory: Path | str | None = None, on_wait: Callable[[], None] | None = None) -> tuple[T | R | None, bool]:
+    """
+    Runs `compute` unless another process is already computing the same key.
+
+    `compute` must publish its result (e.g. in the response cache) so that
+    `lookup` in other processes can find it.
+
+    Returns:
+        A (result, shared) tuple; `shared` is True when the result is the
+        `lookup` value published by another process.
+    """
+    lock, result = claim(key, lookup, directory, on_wait)
+    if result is not None:
+        return result, True
+    try:
+        return compute(), False
+    finally:
+        if lock:
+            lock.release()
@@ -0,0 +1,416 @@
+# codex_cli/core/skeleton.py
+"""
+Structural skeletons of configuration files.
+
+A config file (YAML, JSON, TOML or INI) is parsed into a typed key-path
+tree: every node records its type, how many entries were merged into it
+and a few example values. Repeated structure collapses:
+
+- the items of a list merge into one `[]` node;
+- a mapping whose values are similar mappings (Compose services, Helm
+  sub-charts) merges them into one `*` node, listing their names.
+
+The rendered skeleton is usually orders of magnitude smaller than the
+file, and its normalized key paths (e.g.
+`spec.template.spec.containers[].resources`) are stable across files,
+which makes per-path explanations reusable.
+"""
+
+import configparser
+import hashlib
+import json
+import re
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+from .cache import ResponseCache
+from .settings import env_int, get_cache_dir
+
+try:
+    import tomllib # Python 3.11+
+except ImportError: # pragma: no cover - older Pythons
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Configs up to this size are parsed for a skeleton; larger ones are chunked or sampled as text
+SKELETON_MAX_BYTES = env_int("CSTUDIO_SKELETON_MAX_BYTES", 16 * 1024 * 1024)
+# Smaller configs are sent verbatim unless --skeleton is given
+SKELETON_MIN_TOKENS = env_int("CSTUDIO_SKELETON_MIN_TOKENS", 2000)
+# Key paths explained per file (shallow paths first)
+MAX_KEY_PATHS = env_int("CSTUDIO_SKELETON_MAX_PATHS", 150)
+# A mapping collapses into `*` when it has at least this many similar mapping values
+COLLAPSE_MIN_ENTRIES = 3
+# ... and one key is shared by at least this share of them
+COLLAPSE_KEY_SHARE = 0.75
+MAX_EXAMPLES = 3
+EXAMPLE_MAX_CHARS = 60
+# Keys shown per mapping; the rest are counted
+MAX_KEYS_SHOWN = env_int("CSTUDIO_SKELETON_MAX_KEYS", 40)
+ANY_KEY, ANY_ITEM = "*", "[]"
+# Characters read at a time from a JSON stream
+JSON_CHUNK_CHARS = 64 * 1024
+# Largest single JSON document decoded from a stream (the stream itself may be larger)
+JSON_DOCUMENT_MAX_BYTES = env_int("CSTUDIO_JSON_DOCUMENT_MAX_BYTES", 256 * 1024 * 1024)
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Top-level keys whose values are part of a document's shape (the Kubernetes resource type)
+IDENTITY_KEYS = ("apiVersion", "kind")
+
+@dataclass
+class SkeletonNode:
+    """
+    One normalized key path of a config and what was found there.
+
+    Attributes:
+        path: Normalized key path ('' for the root).
+        kind: 'map', 'list', 'str', 'int', 'float', 'bool', 'null' or 'mixed'.
+        count: Number of values merged into this node.
+        present: Number of parent entries that have this key (for the '(in N of M)' note).
+        children: Child nodes by key ('*' for collapsed entries, '[]' for list items).
+        examples: Up to MAX_EXAMPLES distinct scalar examples.
+        collapsed: Distinct names of the entries merged into a '*' child.
+        types: The value types found, for 'mixed' nodes.
+        hidden: Keys not shown because of MAX_KEYS_SHOWN.
+    """
+    path: str
+    kind: str
+    count: int = 1
+    present: int = 1
+    children: dict[str, "SkeletonNode"] = field(default_factory=dict)
+    examples: list[Any] = field(default_factory=list)
+    collapsed: list[str] = field(default_factory=list)
+    types: list[str] = field(default_factory=list)
+    hidden: int = 0
+
+    def walk(self):
+        """Yields the nodes of the tree, breadth first (shallow paths first)."""
+        queue = deque([self])
+        while queue:
+            node = queue.popleft()
+            yield node
+            queue.extend(node.children.values())
+
+def parse_config(text: str, file_name: str) -> tuple[str, Any] | None:
+    """
+    Parses a config file by its extension.
+
+    Returns:
+        (format, data), or None if the format is not supported, the parser is
+        not installed or the text does not parse into a mapping or list.
+    """
+    suffix = file_name.lower().rsplit(".", 1)[-1] if "." in file_name else ""
+    try:
+        if suffix == "json":
+            result = ("JSON", json.loads(text))
+        elif suffix in ("yaml", "yml"):
+            loader = _yaml_loader()
+            if loader is None:
+                return None
+            import yaml # type: ignore
+            documents = [doc for doc in yaml.load_all(text, Loader=loader) if doc is not None]
+            result = ("YAML", documents[0] if len(documents) == 1 else documents)
+        elif suffix == "toml":
+            if tomllib is None:
+                return None
+            result = ("TOML", tomllib.loads(text))
+        elif suffix in ("ini", "cfg"):
+            parser = configparser.ConfigParser(interpolation=None)
+            parser.read_string(text)
+            data = {section: dict(parser[section]) for section in parser.sections()}
+            if parser.defaults():
+                data = {"DEFAULT": dict(parser.defaults()), **data}
+            result = ("INI", data)
+        else:
+            return None
+    except Exception: # Each parser has its own error types; any failure means "send the raw text"
+        return None
+    return result if isinstance(result[1], (dict, list)) and result[1] else None
+
+def _yaml_loader():
+    """Returns PyYAML's safe loader (the libyaml one if available), or None if PyYAML is not installed."""
+    try:
+        import yaml # type: ignore # Optional dependency (PyYAML)
+    except ImportError:
+        return None
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader) # libyaml is several times faster
+
+def _json_documents(stream: TextIO) -> Iterator[Any]:
+    """
+    Decodes concatenated JSON values (a single document or several dumps) from a stream.
+
+    Only the document being decoded and the text read after it are buffered.
+    When a document is incomplete, as much text again as the buffer holds is
+    read before decoding it again, so a large document is retried O(log n) times.
+
+    Raises:
+        ValueError: If a document does not parse or exceeds JSON_DOCUMENT_MAX_BYTES.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    while True:
+        position = _JSON_WHITESPACE.match(buffer, position).end()
+        error = None
+        if position < len(buffer):
+            try:
+                document, end = decoder.raw_decode(buffer, position)
+                # A value that ends with the buffer (e.g. a number) may continue in the next chunk
+                if end < len(buffer) or eof:
+                    yield document
+                    position = end
+                    continue
+            except json.JSONDecodeError as e:
+                error = e
+        elif eof:
+            return
+        if eof:
+            raise error
+        buffer = buffer[position:]
+        position = 0
+        if len(buffer) > JSON_DOCUMENT_MAX_BYTES:
+            raise ValueError(f"A JSON document is larger than {JSON_DOCUMENT_MAX_BYTES} bytes (CSTUDIO_JSON_DOCUMENT_MAX_BYTES)")
+        chunk = stream.read(max(JSON_CHUNK_CHARS, len(buffer)))
+        eof = not chunk
+        buffer += chunk
+
+def _json_lines(stream: TextIO) -> Iterator[Any]:
+    """Decodes JSON Lines one line at a time; blank lines are skipped."""
+    for number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {number}: {e}") from e
+
+def iter_documents(stream: TextIO, config_format: str) -> Iterator[Any]:
+    """
+    Parses the documents of a YAML or JSON stream one at a time.
+
+    The stream is never loaded whole: YAML is parsed lazily, JSON Lines line
+    by line and other JSON one document at a time, so a multi-gigabyte dump
+    only needs memory for its largest document. Empty documents are skipped
+    and `kind: List` wrappers (as printed by `kubectl get -o yaml`) are
+    expanded into their items.
+
+    Args:
+        stream: Text stream to read.
+        config_format: 'YAML', 'JSON' (one or more concatenated values) or 'JSONL'.
+
+    Raises:
+        ImportError: If YAML is requested and PyYAML is not installed.
+        ValueError: If a document does not parse.
+    """
+    if config_format == "JSONL":
+        documents = _json_lines(stream)
+    elif config_format == "JSON":
+        documents = _json_documents(stream)
+    else:
+        loader = _yaml_loader()
+        if loader is None:
+            raise ImportError("PyYAML is required for YAML documents (pip install codex-cli-studio[yaml])")
+        import yaml # type: ignore
+        def _load():
+            try:
+                yield from yaml.load_all(stream, Loader=loader)
+            except yaml.YAMLError as e:
+                raise ValueError(str(e)) from e
+        documents = _load()
+    for document in documents:
+        if isinstance(document, dict) and document.get("kind") == "List" and isinstance(document.get("items"), list):
+            yield from (item for item in document["items"] if item is not None)
+        elif document is not None:
+            yield document
+
+def _shape(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(key): _shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        shapes = {json.dumps(_shape(item), sort_keys=True) for item in value}
+        return [json.loads(shape) for shape in sorted(shapes)] # List lengths and item order do not matter
+    return _kind(value)
+
+def document_shape(document: Any) -> str:
+    """
+    Returns a structural fingerprint of a document.
+
+    Two documents have the same fingerprint when they have the same keys and
+    value types everywhere (list lengths aside) and the same IDENTITY_KEYS
+    values: resources that differ only by names, images or other values share it.
+    """
+    identity = [document.get(key) for key in IDENTITY_KEYS] if isinstance(document, dict) else []
+    canonical = json.dumps([identity, _shape(document)], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def _kind(value: Any) -> str:
+    if isinstance(value, dict):
+        return "map"
+    if isinstance(value, list):
+        return "list"
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "str"
+
+def _join(path: str, key: str) -> str:
+    if key == ANY_ITEM:
+        return path + ANY_ITEM
+    return f"{path}.{key}" if path else str(key)
+
+def _collapsible(maps: list[dict]) -> bool:
+    """True if the values of these mappings are similar mappings under different names (entries of one kind)."""
+    values = [value for mapping in maps for value in mapping.values()]
+    if len({key for mapping in maps for key in mapping}) < COLLAPSE_MIN_ENTRIES:
+        return False
+    if not all(isinstance(value, dict) and value for value in values):
+        return False
+    key_counts = Counter(key for value in values for key in value)
+    return key_counts.most_common(1)[0][1] >= COLLAPSE_KEY_SHARE * len(values)
+
+def _example(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > EXAMPLE_MAX_CHARS:
+        return value[:EXAMPLE_MAX_CHARS] + "…"
+    return value
+
+def build_skeleton(values: list[Any], path: str = "") -> SkeletonNode:
+    """
+    Builds the skeleton node for all values found at one normalized path.
+
+    Args:
+        values: The values to merge (one for the root of a file).
+        path: Their normalized key path.
+    """
+    kinds = Counter(_kind(value) for value in values)
+    if "map" in kinds or "list" in kinds: # Containers mixed with other types: describe the containers
+        kind = "map" if kinds["map"] >= kinds["list"] else "list"
+    else:
+        kind = kinds.most_common(1)[0][0] if len(kinds) == 1 else "mixed"
+    node = SkeletonNode(path, kind, count=len(values))
+    if kind == "mixed":
+        node.types = sorted(kinds)
+
+    if kind == "map":
+        maps = [value for value in values if isinstance(value, dict)]
+        node.count = len(maps)
+        if _collapsible(maps):
+            node.collapsed = list(dict.fromkeys(str(key) for mapping in maps for key in mapping))
+            child = build_skeleton([value for mapping in maps for value in mapping.values()], _join(path, ANY_KEY))
+            child.present = child.count
+            node.children[ANY_KEY] = child
+            return node
+        keys = list(dict.fromkeys(key for mapping in maps for key in mapping))
+        node.hidden = max(0, len(keys) - MAX_KEYS_SHOWN)
+        for key in keys[:MAX_KEYS_SHOWN]:
+            found = [mapping[key] for mapping in maps if key in mapping]
+            child = build_skeleton(found, _join(path, str(key)))
+            child.present = len(found)
+            node.children[str(key)] = child
+    elif kind == "list":
+        items = [item for value in values if isinstance(value, list) for item in value]
+        node.count = len(items)
+        if items:
+            child = build_skeleton(items, _join(path, ANY_ITEM))
+            child.present = child.count
+            node.children[ANY_ITEM] = child
+    elif kind != "null":
+        for value in values:
+            example = _example(value)
+            if example not in node.examples:
+                node.examples.append(example)
+                if len(node.examples) == MAX_EXAMPLES:
+                    break
+    return node
+
+def skeleton_of(data: Any) -> SkeletonNode:
+    """Returns the skeleton of a parsed config."""
+    return build_skeleton([data])
+
+def _format_examples(node: SkeletonNode) -> str:
+    examples = ", ".join(json.dumps(example, ensure_ascii=False, default=str) for example in node.examples)
+    if node.count <= len(node.examples):
+        return examples
+    if len(node.examples) == 1: # Fewer than MAX_EXAMPLES examples means they are all the distinct values
+        return f"{examples} (all {node.count})"
+    if len(node.examples) < MAX_EXAMPLES:
+        return f"one of {examples} ({node.count} values)"
+    return f"e.g. {examples} ({node.count} values)"
+
+def render_skeleton(node: SkeletonNode, key: str | None = None, indent: int = 0, parent_count: int = 1) -> list[str]:
+    """
+    Renders a skeleton as indented `key: type  # notes` lines.
+
+    Args:
+        node: The node to render.
+        key: Its key in the parent (None for the root).
+        indent: Indentation level.
+        parent_count: Number of entries merged into the parent (for presence notes).
+
+    Returns:
+        The lines of the rendered skeleton.
+    """
+    notes = []
+    if key is not None and node.present < parent_count:
+        notes.append(f"in {node.present} of {parent_count}")
+    if node.kind == "map":
+        if node.collapsed:
+            names = ", ".join(node.collapsed[:5]) + (", …" if len(node.collapsed) > 5 else "")
+            notes.append(f"{len(node.collapsed)} similar `{_join(node.path, ANY_KEY)}` entries: {names}")
+        if node.hidden:
+            notes.append(f"{node.hidden} more keys not shown")
+    elif node.kind == "list":
+        notes.append(f"list of {node.count} item{'s' if node.count != 1 else ''}" if node.count else "empty list")
+    else:
+        if node.types:
+            notes.append("types: " + ", ".join(node.types))
+        if node.examples:
+            notes.append(_format_examples(node))
+    comment = f"  # {'; '.join(notes)}" if notes else ""
+
+    lines = []
+    if key is None:
+        if comment:
+            lines.append(f"# root {node.kind}:{comment[3:]}")
+    else:
+        header = "" if node.kind in ("map", "list") else f" {node.kind}"
+        lines.append(f"{'  ' * indent}{key}:{header}{comment}")
+        indent += 1
+    for child_key, child in node.children.items():
+        lines.extend(render_skeleton(child, child_key, indent, node.count if node.kind == "map" else child.count))
+    return lines
+
+def skeleton_text(node: SkeletonNode) -> str:
+    """Returns the rendered skeleton as text."""
+    return "\n".join(render_skeleton(node))
+
+def key_paths(node: SkeletonNode, limit: int | None = None) -> list[str]:
+    """Returns the normalized key paths of a skeleton, shallow paths first."""
+    paths = [child.path for child in node.walk() if child.path]
+    return paths[:limit] if limit else paths
+
+class KeyPathMemo:
+    """
+    Explanations of normalized key paths, shared by all config files.
+
+    Deep paths (`spec.template.spec.containers[].resources`) mean the same
+    thing wherever they appear. Top-level keys such as `name` or `version`
+    do not, so they are keyed together with the file's top-level keys.
+    """
+    def __init__(self, directory: Path | str | None = None):
+        self.cache = ResponseCache(directory or get_cache_dir("keypaths"))
+
+    @staticmethod
+    def key(path: str, scope: list[str]) -> str:
+        context = sorted(scope) if "." not in path.replace(ANY_ITEM, ".") else []
+        return hashlib.sha256(json.dumps(["keypath", path, context]).encode()).hexdigest()
+
+    def get(self, path: str, scope: list[str]) -> str | None:
+        return self.cache.get(self.key(path, scope))
+
+    def set(self, path: str, scope: list[str], explanation: str):
+        self.cache.set(self.key(path, scope), explanation)
@@ -0,0 +1,24 @@
+# codex_cli/core/stats.py
+
+import math
+from typing import Sequence
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Returns the q-th percentile (0-100) using linear interpolation.
+
+    Args:
+        values: Sample values (need not be sorted).
+        q: Percentile between 0 and 100.
+
+    Returns:
+        The interpolated percentile, or 0.0 for an empty sample.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
@@ -0,0 +1,313 @@
+# codex_cli/diff.py
+"""
+Incremental explanations of a git diff.
+
+Only the top-level functions and classes whose code changed are sent to the
+model, with a compact summary of the rest of the file as context. Each
+explanation is memoized under the hash of the unit's normalized AST (see
+fingerprint.normalize()), so a unit that is unchanged since it was last
+explained - even if it still differs from the base revision - is answered
+locally. Non-Python files are explained hunk by hunk, memoized the same way.
+"""
+
+import ast
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from rich.console import Console
+from rich.markdown import Markdown
+
+from .core.cache import ResponseCache
+from .core.chunking import count_tokens
+from .core.fingerprint import fingerprint, normalize
+from .core.git import FileDiff, GitError, diff_against, repo_root, show_file
+from .core.openai_utils import ASYNC_MAX_CONCURRENCY, EMPTY_RESPONSE_MESSAGE, get_openai_responses
+from .core.routing import select_model
+from .core.settings import env_flag, get_cache_dir
+from .explain import REPORT_FORMATS
+
+console = Console()
+
+MODULE_UNIT = "<module>" # Changed top-level statements outside functions and classes
+CONTEXT_MAX_LINES = 40
+
+@dataclass
+class CodeUnit:
+    """A top-level function, class, or the module-level statements of a Python file."""
+    name: str
+    kind: str # 'function', 'class', 'module code' or 'diff'
+    start: int
+    end: int
+    source: str
+    digest: str # Hash of the normalized AST (or normalized text for diffs)
+
+@dataclass
+class UnitChange:
+    """A unit in the diff and its explanation."""
+    path: str
+    name: str
+    kind: str
+    status: str # 'added', 'modified', 'removed' or 'formatting'
+    explanation: str | None = None
+    memoized: bool = False
+
+def _digest(source: str, language: str) -> str:
+    return fingerprint(normalize(source, language))
+
+def extract_units(source: str) -> tuple[list[CodeUnit], list[tuple[int, int, str]]] | None:
+    """
+    Splits Python source into its top-level functions and classes.
+
+    Returns:
+        (units, statements): the units in file order and (start, end, source)
+        of every other top-level statement; None if the source does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    lines = source.splitlines(keepends=True)
+    units, statements = [], []
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        end = node.end_lineno or node.lineno
+        text = "".join(lines[start - 1:end])
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            kind = "class" if isinstance(node, ast.ClassDef) else "function"
+            units.append(CodeUnit(node.name, kind, start, end, text, _digest(text, "python")))
+        else:
+            statements.append((start, end, text))
+    return units, statements
+
+def _module_unit(statements: list[tuple[int, int, str]], touched: set[int]) -> CodeUnit | None:
+    """Groups the touched top-level statements outside functions and classes into one unit."""
+    parts = [s for s in statements if any(s[0] <= n <= s[1] for n in touched)]
+    if not parts:
+        return None
+    text = "".join(part[2] for part in parts)
+    return CodeUnit(MODULE_UNIT, "module code", parts[0][0], parts[-1][1], text, _digest(text, "python"))
+
+def file_context(source: str, units: list[CodeUnit], exclude: str) -> str:
+    """Compact context for a unit: the file's imports and the signatures of the other units."""
+    lines = []
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return ""
+    source_lines = source.splitlines()
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.extend(source_lines[node.lineno - 1:(node.end_lineno or node.lineno)])
+    for unit in units:
+        if unit.name != exclude:
+            header = next((l.strip() for l in unit.source.splitlines() if l.lstrip().startswith(("def ", "async def ", "class "))), unit.name)
+            lines.append(header.rstrip(":") + ": ...")
+    if len(lines) > CONTEXT_MAX_LINES:
+        lines = lines[:CONTEXT_MAX_LINES] + [f"# ... {len(lines) - CONTEXT_MAX_LINES} more"]
+    return "\n".join(lines)
+
+def build_unit_prompt(unit: CodeUnit, path: str, context: str, detail: str = "basic", lang: str = "en") -> str:
+    """Builds the prompt explaining one changed unit."""
+    detail_instruction = "Provide a detailed, in-depth explanation." if detail.lower() == "detailed" else "Provide a clear and concise explanation."
+    if unit.kind == "diff":
+        return f"""
+    Your task is to explain the following changes to the file {path} (unified diff hunks).
+    {detail_instruction}
+    Describe what changed and its likely effect. Use Markdown for formatting.
+    Respond ONLY in the following language: {lang}.
+
+    ```diff
+    {unit.source}
+    ```
+    """
+    return f"""
+    Your task is to explain the {unit.kind} `{unit.name}` from the Python file {path}.
+    {detail_instruction}
+    Explain its purpose and key parts. Use Markdown for formatting.
+    Respond ONLY in the following language: {lang}.
+
+    Context from the same file (imports and other definitions, for reference only):
+    ```python
+    {context}
+    ```
+
+    The {unit.kind}:
+    ```python
+    {unit.source}
+    ```
+    """
+
+class UnitMemo:
+    """Explanations keyed by the normalized-AST hash of a unit, the detail level and the language."""
+    def __init__(self, directory: Path | str | None = None):
+        self.cache = ResponseCache(directory or get_cache_dir("units"))
+
+    @staticmethod
+    def key(digest: str, detail: str, lang: str) -> str:
+        return hashlib.sha256(json.dumps(["unit", digest, detail.lower(), lang.lower()]).encode()).hexdigest()
+
+    def get(self, digest: str, detail: str, lang: str) -> str | None:
+        return self.cache.get(self.key(digest, detail, lang))
+
+    def set(self, digest: str, detail: str, lang: str, explanation: str):
+        self.cache.set(self.key(digest, detail, lang), explanation)
+
+def changed_units(file_diff: FileDiff, root: Path, rev: str) -> tuple[list[tuple[CodeUnit, str, str]], list[UnitChange]]:
+    """
+    Finds the units of one file that need an explanation.
+
+    Returns:
+        (to_explain, notes): (unit, status, context) for each changed unit,
+        and UnitChange entries that need no model call (removed units and
+        units whose change was only formatting or comments).
+    """
+    path = file_diff.path or file_diff.old_path
+    notes: list[UnitChange] = []
+    if file_diff.path is None:
+        return [], [UnitChange(path, path, "file", "removed")]
+    if not file_diff.hunks:
+        return [], notes # Renamed without changes
+
+    try:
+        new_source = (root / file_diff.path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        new_source = None
+    new_parsed = extract_units(new_source) if new_source is not None and path.endswith((".py", ".pyw")) else None
+    if new_parsed is None:
+        # Not Python (or does not parse): explain the hunks themselves
+        text = "\n".join(file_diff.hunks)
+        unit = CodeUnit(path, "diff", 0, 0, text, _digest(text, "generic"))
+        return [(unit, "added" if file_diff.old_path is None else "modified", "")], notes
+
+    units, statements = new_parsed
+    old_source = show_file(root, rev, file_diff.old_path) if file_diff.old_path else None
+    old_parsed = extract_units(old_source) if old_source is not None else None
+    old_units = {u.name: u for u in old_parsed[0]} if old_parsed else {}
+    old_module = "".join(s[2] for s in old_parsed[1]) if old_parsed else ""
+
+    to_explain = []
+    candidates = [u for u in units if any(u.start <= n <= u.end for n in file_diff.touched)]
+    module_unit = _module_unit(statements, file_diff.touched)
+    if module_unit:
+        if old_parsed is None or _digest("".join(s[2] for s in statements), "python") != _digest(old_module, "python"):
+            candidates.append(module_unit)
+        else:
+            notes.append(UnitChange(path, MODULE_UNIT, module_unit.kind, "formatting"))
+    for unit in candidates:
+        old = old_units.get(unit.name)
+        if unit.name != MODULE_UNIT and old is not None and old.digest == unit.digest:
+            notes.append(UnitChange(path, unit.name, unit.kind, "formatting"))
+            continue
+        status = "added" if old is None and unit.name != MODULE_UNIT else "modified"
+        to_explain.append((unit, status, file_context(new_source, units, unit.name)))
+    new_names = {u.name for u in units}
+    notes += [UnitChange(path, u.name, u.kind, "removed") for u in old_units.values() if u.name not in new_names]
+    return to_explain, notes
+
+def build_diff_report(rev: str, changes: list[UnitChange], report_format: str = "markdown") -> str:
+    """Builds the Markdown or JSON report of an incremental explanation."""
+    if report_format == "json":
+        return json.dumps({"rev": rev, "units": [asdict(c) for c in changes]}, indent=2, ensure_ascii=False) + "\n"
+    explained = [c for c in changes if c.status in ("added", "modified")]
+    memoized = sum(1 for c in explained if c.memoized)
+    lines = [f"# Changes since `{rev}`", "",
+             f"{len(explained)} changed unit(s) explained ({memoized} from the memo) in {len({c.path for c in changes})} file(s)."]
+    for path in sorted({c.path for c in changes}):
+        lines += ["", f"## `{path}`"]
+        for change in (c for c in changes if c.path == path):
+            if change.status in ("added", "modified"):
+                title = "Changes" if change.kind == "diff" else f"`{change.name}` ({change.kind}, {change.status})"
+                lines += ["", f"### {title}", "", change.explanation or "_The explanation could not be generated._"]
+        for status, label in (("removed", "Removed"), ("formatting", "Formatting or comments only")):
+            names = [f"`{c.name}`" for c in changes if c.path == path and c.status == status]
+            if names:
+                lines += ["", f"{label}: {', '.join(names)}"]
+    return "\n".join(lines) + "\n"
+
+def explain_diff(rev: str, paths: list[str] | None = None, detail: str = "basic", lang: str = "en",
+                 output: Path | None = None, report_format: str = "markdown", jobs: int = ASYNC_MAX_CONCURRENCY,
+                 use_cache: bool = True, refresh: bool = False) -> dict | None:
+    """
+    Explains what changed between a revision and the work tree.
+
+    Args:
+        rev: Base revision (e.g. 'HEAD~1', 'origin/main').
+        paths: Optional files or directories limiting the diff.
+        detail: 'basic' or 'detailed'.
+        lang: Language code for the explanations.
+        output: Write the report here; print it when None.
+        report_format: 'markdown' or 'json'.
+        jobs: Maximum simultaneous requests.
+        use_cache: If False, neither read nor write the memo and response cache.
+        refresh: If True, ignore memoized explanations and store new ones.
+
+    Returns:
+        Counts (explained, memoized, failed), or None on error.
+    """
+    report_format = report_format.lower()
+    if report_format not in REPORT_FORMATS:
+        console.print(f"[bold red]Error: Unknown report format '{report_format}'. Choose from: {', '.join(REPORT_FORMATS)}.[/bold red]")
+        return None
+    try:
+        first = Path(paths[0]) if paths else Path(".")
+        root = repo_root(first if first.is_dir() else first.parent)
+        file_diffs = diff_against(rev, root, [str(Path(p).resolve()) for p in paths or []])
+    except GitError as e:
+        console.print(f"[bold red]Error reading git diff against '{rev}': {e}[/bold red]")
+        return None
+
+    changes: list[UnitChange] = []
+    pending: list[tuple[UnitChange, CodeUnit, str]] = []
+    use_memo = use_cache and not env_flag("CSTUDIO_NO_CACHE")
+    memo = UnitMemo() if use_memo else None
+    for file_diff in file_diffs:
+        if file_diff.binary:
+            continue
+        to_explain, notes = changed_units(file_diff, root, rev)
+        changes += notes
+        for unit, status, context in to_explain:
+            change = UnitChange(file_diff.path, unit.name, unit.kind, status)
+            changes.append(change)
+            cached = memo.get(unit.digest, detail, lang) if memo and not refresh else None
+            if cached is not None:
+                change.explanation, change.memoized = cached, True
+            else:
+                pending.append((change, unit, build_unit_prompt(unit, file_diff.path, context, detail, lang)))
+
+    if not changes:
+        console.print(f"[yellow]No changes since '{rev}'.[/yellow]")
+        return {"explained": 0, "memoized": 0, "failed": 0}
+    status_console = Console(stderr=True)
+    status_console.print(f"{len(changes)} changed unit(s); {len(pending)} to explain, "
+                         f"{sum(1 for c in changes if c.memoized)} from the memo.")
+
+    if pending:
+        prompts = [prompt for _, _, prompt in pending]
+        models = [select_model("explain", count_tokens(unit.source), detail) for _, unit, _ in pending]
+        responses = get_openai_responses(prompts, model=models, max_concurrency=max(1, jobs), use_cache=use_cache, refresh=refresh)
+        for (change, unit, _), response in zip(pending, responses):
+            change.explanation = response
+            if memo and response and response != EMPTY_RESPONSE_MESSAGE:
+                memo.set(unit.digest, detail, lang, response)
+
+    report = build_diff_report(rev, changes, report_format)
+    if output:
+        try:
+            Path(output).write_text(report, encoding="utf-8")
+        except OSError as e:
+            console.print(f"[bold red]Error writing report {output}: {e}[/bold red]")
+            return None
+        status_console.print(f"Report written to [cyan]{output}[/cyan].")
+    elif report_format == "json":
+        print(report, end="")
+    else:
+        console.print(Markdown(report))
+
+    explained = [c for c in changes if c.status in ("added", "modified")]
+    return {
+        "explained": sum(1 for c in explained if c.explanation),
+        "memoized": sum(1 for c in explained if c.memoized),
+        "failed": sum(1 for c in explained if not c.explanation),
+    }
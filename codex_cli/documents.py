@@ -0,0 +1,258 @@
+# codex_cli/documents.py
+"""
+Explanations of multi-document config streams.
+
+Kubernetes dumps (`kubectl get -o yaml`, `helm template`) hold thousands of
+YAML documents, most of them identical apart from names and values. The
+documents of every file, directory or standard input given are parsed one
+at a time and grouped by structural fingerprint (see
+skeleton.document_shape()). Only a few samples of each group are kept, so
+memory grows with the number of distinct shapes, not documents. Each
+unique shape is explained once, concurrently, and the report is an index
+of which resources share which explanation.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TextIO
+
+from rich.console import Console
+from rich.markdown import Markdown
+
+from .config import ROUTING_COMMAND
+from .core.chunking import count_tokens
+from .core.files import collect_files
+from .core.ingest import IngestError, open_text, sniff
+from .core.openai_utils import ASYNC_MAX_CONCURRENCY, get_openai_responses
+from .core.routing import select_model
+from .core.skeleton import build_skeleton, document_shape, iter_documents, render_skeleton
+from .explain import REPORT_FORMATS
+
+console = Console()
+
+DOCUMENT_GLOBS = ["*.yaml", "*.yml", "*.json", "*.jsonl"]
+# Documents of a shape kept to build its skeleton (for example values)
+SHAPE_SAMPLES = 3
+# Resource names shown in a prompt (the report lists them all)
+PROMPT_NAMES = 5
+STDIN_NAME = "<stdin>"
+
+@dataclass
+class ShapeGroup:
+    """Documents that share one structural fingerprint."""
+    digest: str
+    label: str
+    resources: list[str] = field(default_factory=list)
+    samples: list[Any] = field(default_factory=list)
+    explanation: str | None = None
+
+    @property
+    def count(self) -> int:
+        return len(self.resources)
+
+def resource_name(document: Any, source: str, index: int) -> str:
+    """Names a document: `Kind/namespace/name` for Kubernetes resources, `source#index` otherwise."""
+    if isinstance(document, dict) and document.get("kind"):
+        metadata = document.get("metadata") if isinstance(document.get("metadata"), dict) else {}
+        parts = [str(document["kind"]), metadata.get("namespace"), metadata.get("name")]
+        if parts[2]:
+            return "/".join(str(part) for part in parts if part)
+    return f"{source}#{index}"
+
+def shape_label(document: Any) -> str:
+    """Describes a shape for the report: its Kubernetes kind, or its top-level keys."""
+    if isinstance(document, dict):
+        if document.get("kind"):
+            api_version = f" ({document['apiVersion']})" if document.get("apiVersion") else ""
+            return f"{document['kind']}{api_version}"
+        keys = [str(key) for key in document]
+        return "{" + ", ".join(keys[:4]) + (", …" if len(keys) > 4 else "") + "}"
+    return "list" if isinstance(document, list) else type(document).__name__
+
+def _format_of(name: str, head: str = "") -> str:
+    """'JSONL' for .jsonl files, 'JSON' for .json files (or a stream starting like JSON), 'YAML' otherwise."""
+    if name.lower().endswith(".jsonl"):
+        return "JSONL"
+    if name.lower().endswith(".json"):
+        return "JSON"
+    return "JSON" if name == STDIN_NAME and head.lstrip()[:1] in ("{", "[") else "YAML"
+
+class _Prefixed:
+    """A text stream with its already-read first characters put back (used to sniff standard input)."""
+    def __init__(self, prefix: str, stream: TextIO | None):
+        self.prefix, self.stream = prefix, stream
+
+    def read(self, size: int = -1) -> str:
+        prefix, self.prefix = self.prefix, ""
+        if self.stream is None:
+            return prefix
+        if size is None or size < 0:
+            return prefix + self.stream.read()
+        return prefix + self.stream.read(max(0, size - len(prefix)))
+
+def group_documents(stream: TextIO, source: str, config_format: str, groups: dict[str, ShapeGroup]) -> int:
+    """
+    Adds the documents of one stream to the shape groups.
+
+    Returns:
+        The number of documents read.
+
+    Raises:
+        ImportError: If the stream is YAML and PyYAML is not installed.
+        ValueError: If a document does not parse (documents before it are kept).
+    """
+    count = 0
+    for count, document in enumerate(iter_documents(stream, config_format), start=1):
+        digest = document_shape(document)
+        group = groups.get(digest)
+        if group is None:
+            group = groups[digest] = ShapeGroup(digest, shape_label(document))
+        group.resources.append(resource_name(document, source, count))
+        if len(group.samples) < SHAPE_SAMPLES:
+            group.samples.append(document)
+    return count
+
+def build_shape_prompt(group: ShapeGroup) -> str:
+    """Builds the prompt explaining one unique document shape."""
+    skeleton = "\n".join(render_skeleton(build_skeleton(group.samples)))
+    names = ", ".join(group.resources[:PROMPT_NAMES]) + (", …" if group.count > PROMPT_NAMES else "")
+    return f"""
+    Act as an expert DevOps engineer and Kubernetes administrator.
+    A configuration dump contains {group.count} document(s) of type {group.label} with the same structure,
+    differing only in names and values (e.g. {names}).
+
+    Below is the structural skeleton of these documents: every key with its type and example values.
+    `[]` stands for the items of a list and `*` for a group of similar entries merged together.
+
+    ```
+    {skeleton}
+    ```
+
+    Instructions:
+    1.  Explain what a resource of this shape does and how its important fields configure it.
+    2.  Point out fields whose values usually differ between such resources.
+    3.  Mention notable settings, risks or best practices visible in the structure.
+    4.  Respond concisely using Markdown formatting (no top-level heading).
+    """
+
+def build_documents_report(groups: list[ShapeGroup], documents: int, skipped: list[tuple[str, str]],
+                           report_format: str = "markdown") -> str:
+    """Builds the Markdown or JSON index of shapes, their resources and explanations."""
+    if report_format == "json":
+        return json.dumps({
+            "documents": documents,
+            "shapes": [{"id": g.digest[:12], "label": g.label, "count": g.count, "resources": g.resources,
+                        "explanation": g.explanation} for g in groups],
+            "skipped": [{"source": source, "reason": reason} for source, reason in skipped],
+        }, indent=2, ensure_ascii=False) + "\n"
+
+    lines = ["# Configuration documents", "",
+             f"{documents} document(s) in {len(groups)} unique shape(s)."]
+    lines += ["", "| Shape | Type | Documents |", "|---|---|---|"]
+    lines += [f"| `{g.digest[:12]}` | {g.label} | {g.count} |" for g in groups]
+    for group in groups:
+        lines += ["", f"## {group.label} `{group.digest[:12]}` ({group.count} document(s))", ""]
+        lines.append(group.explanation or "_The explanation could not be generated._")
+        lines += ["", "Resources: " + ", ".join(f"`{name}`" for name in group.resources)]
+    if skipped:
+        lines += ["", "## Skipped sources", "", "| Source | Reason |", "|---|---|"]
+        lines += [f"| `{source}` | {reason} |" for source, reason in skipped]
+    return "\n".join(lines) + "\n"
+
+def explain_documents(sources: list[str], stdin: TextIO | None = None, jobs: int = ASYNC_MAX_CONCURRENCY,
+                      output: Path | None = None, report_format: str = "markdown",
+                      use_cache: bool = True, refresh: bool = False) -> dict | None:
+    """
+    Explains every unique document shape of YAML/JSON files, directories or standard input.
+
+    Args:
+        sources: Files, directories (their YAML and JSON files are read) or '-' for standard input.
+        stdin: Stream read for '-'.
+        jobs: Maximum simultaneous requests.
+        output: Write the report here; print it when None.
+        report_format: 'markdown' or 'json'.
+        use_cache: If False, bypass the response cache.
+        refresh: If True, ignore cached responses and store new ones.
+
+    Returns:
+        Counts (documents, shapes, failed, skipped), or None if nothing could be explained.
+    """
+    report_format = report_format.lower()
+    if report_format not in REPORT_FORMATS:
+        console.print(f"[bold red]Error: Unknown report format '{report_format}'. Choose from: {', '.join(REPORT_FORMATS)}.[/bold red]")
+        return None
+
+    files: list[tuple[str, Path | None]] = []
+    skipped: list[tuple[str, str]] = []
+    for source in sources:
+        if source == "-":
+            files.append((STDIN_NAME, None))
+        elif Path(source).is_dir():
+            selection = collect_files(source, DOCUMENT_GLOBS, max_bytes=0)
+            files += [(str(path), path) for path in selection.files]
+            skipped += [(str(path), reason) for path, reason in selection.skipped]
+        elif Path(source).is_file():
+            files.append((source, Path(source)))
+        else:
+            skipped.append((source, "not found"))
+
+    status = Console(stderr=True) # Keeps stdout clean for the report
+    groups: dict[str, ShapeGroup] = {}
+    documents = 0
+    for name, path in files:
+        try:
+            if path is None:
+                head = stdin.read(1) if stdin else ""
+                stream = _Prefixed(head, stdin)
+                documents += group_documents(stream, name, _format_of(name, head), groups)
+                continue
+            info = sniff(path)
+            if info.binary:
+                skipped.append((name, "binary"))
+                continue
+            with open_text(info) as f:
+                documents += group_documents(f, name, _format_of(name), groups)
+        except ImportError as e:
+            console.print(f"[bold red]Error: {e}[/bold red]")
+            return None
+        except ValueError as e:
+            # Documents read before the error are kept
+            skipped.append((name, f"parse error ({(str(e).splitlines() or [type(e).__name__])[0]})"))
+        except (IngestError, OSError) as e:
+            skipped.append((name, f"unreadable ({e})"))
+
+    if not groups:
+        console.print("[yellow]No documents to explain.[/yellow] Check the paths (YAML and JSON files are read).")
+        return None
+    status.print(f"{documents} document(s) in {len(groups)} unique shape(s); explaining each shape once.")
+
+    ordered = sorted(groups.values(), key=lambda g: (-g.count, g.label, g.digest))
+    prompts = [build_shape_prompt(group) for group in ordered]
+    models = [select_model(ROUTING_COMMAND, count_tokens(prompt)) for prompt in prompts]
+    responses = get_openai_responses(prompts, model=models, max_concurrency=max(1, jobs), use_cache=use_cache, refresh=refresh)
+    for group, response in zip(ordered, responses):
+        group.explanation = response
+
+    report = build_documents_report(ordered, documents, skipped, report_format)
+    if output:
+        try:
+            Path(output).write_text(report, encoding="utf-8")
+        except OSError as e:
+            console.print(f"[bold red]Error writing report {output}: {e}[/bold red]")
+            return None
+        status.print(f"Report written to [cyan]{output}[/cyan].")
+    elif report_format == "json":
+        print(report, end="")
+    else:
+        console.print(Markdown(report))
+
+    counts = {
+        "documents": documents,
+        "shapes": len(ordered),
+        "failed": sum(1 for g in ordered if g.explanation is None),
+        "skipped": len(skipped),
+    }
+    status.print(f"[bold green]{counts['shapes'] - counts['failed']} shape(s) explained[/bold green], "
+                 f"{counts['failed']} failed, {counts['skipped']} source(s) skipped.")
+    return counts
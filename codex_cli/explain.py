@@ -1,29 +1,290 @@
 # codex_cli/explain.py
 
+import asyncio
+import itertools
+import json
 import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TextIO
 from rich.console import Console
 from rich.markdown import Markdown
-from .core.openai_utils import get_openai_response
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, ProgressColumn, SpinnerColumn, TextColumn, TimeRemainingColumn
+from rich.text import Text
+from .core.openai_utils import ASYNC_MAX_CONCURRENCY, EMPTY_RESPONSE_MESSAGE, ResponseSession, get_openai_response, stream_openai_response
+from .core.files import FileSelection, collect_files
+from .core.logs import STDIN_WINDOW_TOKENS, Window, iter_windows
+from .core.render import render_markdown_stream
+from .core.ingest import MAX_INPUT_BYTES, FileInfo, IngestError, open_text, read_sniffed, sniff
+from .core.compact import COMPACT_MAX_BYTES, budget_for, compact_python
+from .core.chunking import Chunk, CHARS_PER_TOKEN, CHUNK_THRESHOLD_TOKENS, count_tokens, detect_language, iter_chunks, map_reduce, map_reduce_async
+from .core.fingerprint import guess_language
+from .core.ledger import record_usage
+from .core.routing import select_model
+from .core.similar_cache import SimilarMatch, find_similar, store_similar
 
 console = Console()
 
+def _detail_instruction(detail: str) -> str:
+    """Returns the prompt sentence for the requested level of detail."""
+    return "Provide a detailed, in-depth explanation." if detail.lower() == "detailed" else "Provide a clear and concise explanation."
+
+def build_explain_prompt(content: str, is_file: bool = False, detail: str = "basic", lang: str = "en", compacted: bool = False,
+                         sampled: bool = False) -> str:
+    """
+    Builds the prompt used to explain a snippet, command or file content.
+
+    Args:
+        content: The code, command or file content to explain.
+        is_file: True if the content was read from a file.
+        detail: 'basic' or 'detailed'.
+        lang: Language code for the explanation.
+        compacted: True if parts of the content were elided by the compactor.
+        sampled: True if the content is a sample of a file too large to send.
+
+    Returns:
+        The prompt string.
+    """
+    prompt_type = "content from a file" if is_file else "code snippet or shell command"
+    # Determine detail level instruction based on the option
+    detail_instruction = _detail_instruction(detail)
+    # Specify the desired language
+    language_instruction = f"Respond ONLY in the following language: {lang}."
+    compacted_note = ("\n    Parts of the file were elided to save space; `...` placeholders and their comments say what was omitted.\n"
+                      "    Explain the overall picture from the structure that is shown; do not guess the elided details.") if compacted else ""
+    if sampled:
+        compacted_note += ("\n    The file is too large to send whole: below are its head, tail and a few middle sections, with the\n"
+                           "    omitted ranges marked. Explain the whole file from this sample.")
+
+    return f"""
+    Your task is to explain the following {prompt_type}.
+    {detail_instruction}
+    Explain its purpose and key parts. Use Markdown for formatting.{compacted_note}
+    Make sure your entire response is {language_instruction}
+
+    ```
+    {content}
+    ```
+    """
+
+def build_chunk_prompt(chunk: Chunk, source_name: str) -> str:
+    """Builds the map prompt for one chunk of a large input."""
+    return f"""
+    You are reading a large input ({source_name}) piece by piece.
+    Summarize what lines {chunk.start_line}-{chunk.end_line} below do: their purpose, the main
+    definitions or sections, and how they relate to the rest of the input if apparent.
+    Be factual and compact; your notes will be merged with notes on the other parts.
+
+    ```
+    {chunk.text}
+    ```
+    """
+
+def build_merge_prompt(partials: list[str], final: bool, is_file: bool = False, detail: str = "basic", lang: str = "en") -> str:
+    """Builds the reduce prompt that merges notes on several chunks."""
+    notes = "\n\n---\n\n".join(partials)
+    if not final:
+        return f"""
+    Merge the following notes on consecutive parts of one input into a single set of notes.
+    Keep line references and every important definition; drop repetition.
+
+    {notes}
+    """
+    prompt_type = "content from a file" if is_file else "code snippet or shell command"
+    return f"""
+    Your task is to explain a large {prompt_type}. It was too large to send at once,
+    so below are notes on its consecutive parts, with line ranges.
+    {_detail_instruction(detail)}
+    Explain its overall purpose, structure and key parts as one coherent explanation. Use Markdown for formatting.
+    Respond ONLY in the following language: {lang}.
+
+    {notes}
+    """
+
+def _explain_in_chunks(lines, source_name: str, language: str, is_file: bool, detail: str, lang: str, use_cache: bool, refresh: bool,
+                       model: str) -> str | None:
+    """Explains a large input with a concurrent map pass and a merging reduce pass."""
+    return map_reduce(
+        iter_chunks(lines, language=language),
+        map_prompt=lambda chunk: build_chunk_prompt(chunk, source_name),
+        reduce_prompt=lambda partials, final: build_merge_prompt(partials, final, is_file, detail, lang),
+        model=model,
+        use_cache=use_cache,
+        refresh=refresh,
+    )
+
+async def _explain_in_chunks_async(lines, source_name: str, language: str, detail: str, lang: str, model: str,
+                                   session: ResponseSession, max_concurrency: int) -> str | None:
+    """Explains a large file like _explain_in_chunks(), over a session shared with other files and without progress notes."""
+    return await map_reduce_async(
+        iter_chunks(lines, language=language),
+        map_prompt=lambda chunk: build_chunk_prompt(chunk, source_name),
+        reduce_prompt=lambda partials, final: build_merge_prompt(partials, final, True, detail, lang),
+        model=model,
+        max_concurrency=max_concurrency,
+        session=session,
+        quiet=True,
+    )
+
+def _similarity_namespace(model: str, is_file: bool, detail: str, lang: str) -> str:
+    """Scope of the similarity cache: everything besides the input that shapes the prompt."""
+    return f"explain|{model}|{'file' if is_file else 'snippet'}|{detail.lower()}|{lang.lower()}"
+
+def _print_similar_match(match: SimilarMatch):
+    """Labels and renders an explanation served from the similarity cache."""
+    if match.exact:
+        label = "an equivalent input (same code up to formatting, comments and local names)"
+    else:
+        label = f"a similar input ({match.similarity:.0%} similar)"
+    console.print(f"[grey50]Cached result from {label}; use --refresh to request a new one.[/grey50]")
+    _print_explanation(match.response)
+
+def _print_explanation(explanation):
+    """Renders an explanation (or the failure message)."""
+    if explanation:
+        if isinstance(explanation, str):
+            console.print("\n✨ [bold green]Explanation:[/bold green]")
+            md = Markdown(explanation)
+            console.print(md)
+        else:
+            console.print("\n[bold yellow]Warning: Received non-string data as explanation.[/bold yellow]")
+            console.print(f"Raw data: {str(explanation)}")
+    else:
+        console.print("[bold red]Failed to get explanation from OpenAI.[/bold red]")
+
+def _deliver(prompt: str, model: str, use_cache: bool, refresh: bool, stream: bool | None):
+    """Requests an explanation and renders it, streamed when `stream` is set (None: in a terminal)."""
+    if stream is None:
+        stream = console.is_terminal
+    if stream:
+        chunks = stream_openai_response(prompt, model=model, use_cache=use_cache, refresh=refresh)
+        explanation = render_markdown_stream(chunks, console, "\n✨ [bold green]Explanation:[/bold green]")
+        if not explanation:
+            console.print("[bold red]Failed to get explanation from OpenAI.[/bold red]")
+    else:
+        explanation = get_openai_response(prompt, model=model, use_cache=use_cache, refresh=refresh)
+        _print_explanation(explanation)
+    return explanation
+
+def _compact_for_prompt(content: str, file_name: str, detail: str) -> tuple[str, bool]:
+    """Compacts Python file content to the budget of `detail`; returns the content to send and whether it was compacted."""
+    if detect_language(file_name) != "python":
+        return content, False
+    result = compact_python(content, budget_for(detail))
+    return result.text, result.compacted
+
+def is_compactable(file_name: str, size: int, compact: bool = True) -> bool:
+    """True if a file is read whole to be compacted rather than chunked or sampled."""
+    return compact and detect_language(file_name) == "python" and size <= COMPACT_MAX_BYTES
+
+def streams_in_chunks(info: FileInfo, compact: bool = True) -> bool:
+    """True if a file is too large for one request and is chunked line by line instead of read whole."""
+    return CHUNK_THRESHOLD_TOKENS * CHARS_PER_TOKEN < info.size <= MAX_INPUT_BYTES and not is_compactable(str(info.path), info.size, compact)
+
+@dataclass
+class ExplainPrompt:
+    """
+    What `explain` sends for an input that was read.
+
+    Attributes:
+        prompt: The prompt, or None if the input is too large for one request and must be chunked.
+        model: The model chosen by the routing policy.
+        content: The content to send (compacted if it was).
+        compacted: True if parts of the content were elided by the compactor.
+    """
+    prompt: str | None
+    model: str
+    content: str
+    compacted: bool = False
+
+def prepare_explain_prompt(content: str, file_name: str | None = None, detail: str = "basic", lang: str = "en",
+                           compact: bool = True, sampled: bool = False) -> ExplainPrompt:
+    """
+    Compacts an input, routes it to a model and builds its prompt, as `explain` does.
+
+    Shared by the interactive command and batch requests, so both use the same
+    prompts (and so the same response cache keys).
+
+    Args:
+        content: The snippet, command or file content.
+        file_name: The file the content was read from, or None for a snippet.
+        detail: 'basic' or 'detailed'.
+        lang: Language code for the explanation.
+        compact: If False, never compact Python files.
+        sampled: True if the content is a sample of a file too large to send.
+    """
+    is_file = file_name is not None
+    compacted = False
+    if is_file and compact:
+        content, compacted = _compact_for_prompt(content, file_name, detail)
+    tokens = count_tokens(content)
+    model = select_model("explain", tokens, detail)
+    if tokens > CHUNK_THRESHOLD_TOKENS:
+        return ExplainPrompt(None, model, content, compacted)
+    return ExplainPrompt(build_explain_prompt(content, is_file, detail, lang, compacted, sampled), model, content, compacted)
+
 # --- UPDATED SIGNATURE: Added detail and lang ---
-def explain_code(input_str: str, detail: str = "basic", lang: str = "en"):
-    """Explains a code snippet, shell command, or the content of a file."""
+def explain_code(input_str: str, detail: str = "basic", lang: str = "en", use_cache: bool = True, refresh: bool = False,
+                 stream: bool | None = None, similarity: float | None = None, compact: bool = True):
+    """
+    Explains a code snippet, shell command, or the content of a file.
+
+    When `stream` is None, the explanation is streamed only if the console is
+    an interactive terminal. Python files over the token budget of `detail`
+    are compacted first (see core.compact) unless `compact` is False.
+    Inputs still larger than the chunking threshold are split into chunks
+    that are explained concurrently and then merged. The model is chosen by
+    the routing policy from the input size and `detail`.
+
+    Inputs equivalent to one explained before (same code apart from
+    whitespace, comments or local names) or at least `similarity` similar
+    to one are answered from the similarity cache, labeled as such.
+    `similarity` defaults to CSTUDIO_SIMILARITY_THRESHOLD (1.0: equivalent
+    inputs only).
+    """
     content_to_explain = ""
     is_file = False
     read_error = False
 
+    sampled = False
+
     if os.path.isfile(input_str):
         is_file = True
         try:
-            with open(input_str, 'r') as f:
-                content_to_explain = f.read()
+            info = sniff(input_str)
+        except IngestError as e:
+            console.print(f"[bold red]Error reading file {input_str}: {e}[/bold red]")
+            return
+        if info.binary:
+            console.print(f"[bold red]Error: {input_str} appears to be a binary file; nothing to explain.[/bold red]")
+            return
+        size = info.size
+        compactable = is_compactable(input_str, size, compact)
+        # Large files are streamed through the chunking engine instead of read whole
+        if streams_in_chunks(info, compact):
+            console.print(f"Explaining content from file: {input_str}")
+            console.print("[yellow]Large input: explaining in chunks and merging the results.[/yellow]")
+            model = select_model("explain", size // CHARS_PER_TOKEN, detail)
+            try:
+                with open_text(info) as f:
+                    explanation = _explain_in_chunks(f, os.path.basename(input_str), detect_language(input_str), True, detail, lang, use_cache, refresh, model)
+            except Exception as e:
+                console.print(f"[bold red]Error reading file {input_str}: {e}[/bold red]")
+                return
+            _print_explanation(explanation)
+            return
+        try:
+            # Files over the size cap are sampled (head, tail and middle sections)
+            ingested = read_sniffed(info, max_bytes=0 if compactable else MAX_INPUT_BYTES)
+            content_to_explain, sampled = ingested.text, ingested.sampled
             console.print(f"Explaining content from file: {input_str}")
-        except Exception as e:
+        except IngestError as e:
             console.print(f"[bold red]Error reading file {input_str}: {e}[/bold red]")
             read_error = True
             return
+        if sampled:
+            console.print(f"[yellow]Very large file ({size / 1024 / 1024:.1f} MB): explaining a sample of its head, tail and middle sections.[/yellow]")
     else:
         content_to_explain = input_str
 
@@ -32,34 +293,341 @@ def explain_code(input_str: str, detail: str = "basic", lang: str = "en"):
         console.print("[bold red]Cannot explain empty content.[/bold red]")
         return
 
-    # --- UPDATED PROMPT CONSTRUCTION ---
-    prompt_type = "content from a file" if is_file else "code snippet or shell command"
-    # Determine detail level instruction based on the option
-    detail_instruction = "Provide a detailed, in-depth explanation." if detail.lower() == "detailed" else "Provide a clear and concise explanation."
-    # Specify the desired language
-    language_instruction = f"Respond ONLY in the following language: {lang}."
+    original_tokens = count_tokens(content_to_explain)
+    request = prepare_explain_prompt(content_to_explain, input_str if is_file else None, detail, lang, compact, sampled)
+    content_to_explain, model, prompt = request.content, request.model, request.prompt
+    if request.compacted:
+        console.print(f"[grey50]Compacted the file from {original_tokens:,} to {count_tokens(content_to_explain):,} tokens "
+                      "(use --no-compact to send it verbatim).[/grey50]")
 
-    prompt = f"""
-    Your task is to explain the following {prompt_type}.
-    {detail_instruction}
-    Explain its purpose and key parts. Use Markdown for formatting.
-    Make sure your entire response is {language_instruction}
+    if prompt is None:
+        console.print("[yellow]Large input: explaining in chunks and merging the results.[/yellow]")
+        source_name = os.path.basename(input_str) if is_file else "snippet"
+        language = detect_language(input_str) if is_file else "generic"
+        explanation = _explain_in_chunks(content_to_explain.splitlines(keepends=True), source_name, language, is_file, detail, lang, use_cache, refresh, model)
+        _print_explanation(explanation)
+        return
+
+    # --- Similarity Cache: equivalent or near-duplicate inputs explained before ---
+    file_name = os.path.basename(input_str) if is_file else None
+    fingerprint_language = guess_language(content_to_explain, file_name)
+    namespace = _similarity_namespace(model, is_file, detail, lang)
+    if use_cache and not refresh:
+        start = time.perf_counter()
+        match = find_similar(namespace, content_to_explain, fingerprint_language, file_name, threshold=similarity)
+        if match:
+            record_usage(model, time.perf_counter() - start, match.prompt_tokens, match.completion_tokens, cache_hit=True)
+            _print_similar_match(match)
+            return
+
+    explanation = _deliver(prompt, model, use_cache, refresh, stream)
+
+    if use_cache and isinstance(explanation, str) and explanation and explanation != EMPTY_RESPONSE_MESSAGE:
+        store_similar(namespace, content_to_explain, fingerprint_language, explanation, file_name,
+                      count_tokens(prompt), count_tokens(explanation))
+
+# --- Standard input mode ---
+
+LOG_NOTATION = """Repeated lines are grouped: `L10-5000 ×812: <template>` means 812 lines between lines 10 and 5000
+    matched the template, where <TS>, <NUM>, <IP>, <UUID> and <HEX> stand for values that varied.
+    `L7: ...` is a line that occurred once."""
+
+def _input_kind(is_log: bool) -> str:
+    return "log output" if is_log else "text piped to standard input (code, command output or data)"
+
+def build_stdin_prompt(window: Window, detail: str = "basic", lang: str = "en") -> str:
+    """Builds the prompt for piped input that fits in one window."""
+    if not window.is_log:
+        return build_explain_prompt(window.text, False, detail, lang)
+    return f"""
+    Your task is to explain the following log output ({window.lines} lines) for an engineer triaging an issue.
+    {_detail_instruction(detail)}
+    {LOG_NOTATION}
+    Explain what the system was doing, point out errors, warnings and anomalies with their line numbers
+    and frequency, and suggest likely causes. Use Markdown for formatting.
+    Respond ONLY in the following language: {lang}.
 
     ```
-    {content_to_explain}
+    {window.text}
     ```
     """
-    # --- END UPDATED PROMPT ---
 
-    explanation = get_openai_response(prompt)
+def build_window_prompt(window: Window, summary: str | None) -> str:
+    """Builds the rolling prompt that folds one window of a long input into the running notes."""
+    notation = LOG_NOTATION if window.is_log else ""
+    if window.start_line > 1:
+        previous = f"Notes on lines 1-{window.start_line - 1} so far:\n\n    {summary}"
+    else:
+        previous = "There are no notes yet: this is the beginning of the input."
+    return f"""
+    You are reading a long stream of {_input_kind(window.is_log)} window by window, keeping running notes.
+    {notation}
+    {previous}
 
-    if explanation:
-        if isinstance(explanation, str):
-            console.print("\n✨ [bold green]Explanation:[/bold green]")
-            md = Markdown(explanation)
-            console.print(md)
-        else:
-            console.print("\n[bold yellow]Warning: Received non-string data as explanation.[/bold yellow]")
-            console.print(f"Raw data: {str(explanation)}")
+    Update the notes with lines {window.start_line}-{window.end_line} below. Keep the timeline, every distinct
+    error, warning or anomaly with line numbers and counts, and the overall purpose; drop repetition.
+    Reply with the updated notes only, compact enough to stay short however long the input is.
+
+    ```
+    {window.text}
+    ```
+    """
+
+def build_stream_final_prompt(summary: str, total_lines: int, is_log: bool, detail: str = "basic", lang: str = "en") -> str:
+    """Builds the prompt that turns the running notes on a long input into the explanation."""
+    focus = ("what the system was doing, the errors, warnings and anomalies (with line numbers and frequency), "
+             "and likely causes") if is_log else "its overall purpose, structure and key parts"
+    return f"""
+    Your task is to explain a long stream of {_input_kind(is_log)} ({total_lines} lines). It was read in windows,
+    and below are running notes on all of it.
+    {_detail_instruction(detail)}
+    Explain {focus} as one coherent explanation. Use Markdown for formatting.
+    Respond ONLY in the following language: {lang}.
+
+    {summary}
+    """
+
+def explain_stdin(stream: TextIO, detail: str = "basic", lang: str = "en", use_cache: bool = True, refresh: bool = False,
+                  render_stream: bool | None = None, is_log: bool | None = None, window_tokens: int = STDIN_WINDOW_TOKENS):
+    """
+    Explains input piped to standard input (e.g. `kubectl logs ... | cstudio explain -`).
+
+    The input is read incrementally in windows of about `window_tokens`
+    tokens (see core.logs.iter_windows). For log-like input, repeated lines
+    are grouped into templates with counts. Input that fits in one window is
+    explained in one request; longer input is folded window by window into
+    running notes, which are then explained, so memory use does not grow
+    with the size of the stream.
+
+    Args:
+        stream: The text stream to read.
+        detail: 'basic' or 'detailed'.
+        lang: Language code for the explanation.
+        use_cache: If False, bypass the response cache.
+        refresh: If True, ignore cached responses and store new ones.
+        render_stream: Render the final explanation as it is generated (None: in a terminal).
+        is_log: Group repeated lines; None detects log-like input.
+        window_tokens: Token budget of one window.
+    """
+    try:
+        windows = iter_windows(stream, window_tokens * CHARS_PER_TOKEN, is_log)
+        first = next(windows, None)
+    except (OSError, UnicodeDecodeError) as e:
+        console.print(f"[bold red]Error reading standard input: {e}[/bold red]")
+        return
+    if first is None or not first.text.strip():
+        console.print("[bold red]Cannot explain empty content.[/bold red]")
+        return
+
+    if first.last:
+        prompt = build_stdin_prompt(first, detail, lang)
+        if first.is_log and first.distinct < first.lines:
+            console.print(f"[grey50]Grouped {first.lines} log lines into {first.distinct} distinct entries.[/grey50]")
+        model = select_model("explain", count_tokens(first.text), detail)
+        _deliver(prompt, model, use_cache, refresh, render_stream)
+        return
+
+    console.print("[yellow]Large input: summarizing standard input in rolling windows.[/yellow]")
+    model = select_model("explain", window_tokens, detail)
+    summary, total_lines, read, failed = None, 0, 0, 0
+    try:
+        for window in itertools.chain([first], windows):
+            grouped = f", {window.distinct} distinct" if window.is_log else ""
+            console.print(f"[grey50]Reading lines {window.start_line}-{window.end_line} ({window.lines} lines{grouped})...[/grey50]")
+            notes = get_openai_response(build_window_prompt(window, summary), model=model, use_cache=use_cache, refresh=refresh)
+            read += 1
+            if notes is None or notes == EMPTY_RESPONSE_MESSAGE:
+                failed += 1
+                gap = f"(Lines {window.start_line}-{window.end_line} could not be summarized.)"
+                summary = f"{summary}\n\n{gap}" if summary else gap
+            else:
+                summary = notes
+            total_lines = window.end_line
+    except (OSError, UnicodeDecodeError) as e:
+        console.print(f"[bold red]Error reading standard input: {e}[/bold red]")
+        return
+    if failed == read:
+        console.print("[bold red]Failed to get explanation from OpenAI.[/bold red]")
+        return
+    _deliver(build_stream_final_prompt(summary, total_lines, first.is_log, detail, lang), model, use_cache, refresh, render_stream)
+
+# --- Directory and glob mode ---
+
+REPORT_FORMATS = ("markdown", "json")
+
+class _RateColumn(ProgressColumn):
+    """Shows throughput in files per second."""
+    def render(self, task) -> Text:
+        speed = task.finished_speed or task.speed
+        return Text(f"{speed:.1f} files/s" if speed else "- files/s", style="progress.data.speed")
+
+def build_report(selection: FileSelection, results: list[dict], report_format: str = "markdown",
+                 detail: str = "basic", lang: str = "en") -> str:
+    """
+    Builds the consolidated report of a directory explanation.
+
+    Args:
+        selection: The files that were explained and the skipped ones.
+        results: One dict per explained file (path, model, explanation), in file order.
+        report_format: 'markdown' or 'json'.
+        detail: Detail level used, recorded in the report.
+        lang: Explanation language, recorded in the report.
+
+    Returns:
+        The report text.
+    """
+    skipped = [{"path": selection.relative(path), "reason": reason} for path, reason in selection.skipped]
+    if report_format == "json":
+        return json.dumps({
+            "root": str(selection.root), "detail": detail, "lang": lang,
+            "files": results, "skipped": skipped,
+        }, indent=2, ensure_ascii=False) + "\n"
+
+    failed = sum(1 for r in results if r["explanation"] is None)
+    lines = [f"# Explanations: {selection.root.name or selection.root}", ""]
+    lines.append(f"{len(results) - failed} file(s) explained, {failed} failed, {len(skipped)} skipped.")
+    for result in results:
+        lines += ["", f"## `{result['path']}`", ""]
+        lines.append(result["explanation"] if result["explanation"] is not None else "_The explanation could not be generated._")
+    if skipped:
+        lines += ["", "## Skipped files", "", "| File | Reason |", "|---|---|"]
+        lines += [f"| `{item['path']}` | {item['reason']} |" for item in skipped]
+    return "\n".join(lines) + "\n"
+
+async def _explain_file_async(path: Path, session: ResponseSession, detail: str, lang: str, compact: bool,
+                              max_concurrency: int) -> tuple[str, str | None]:
+    """
+    Explains one file of a directory over a shared session, the way explain_code() explains a file.
+
+    The file is read only here, so a directory run holds the content of the
+    files in progress rather than of every file. Files too large for one
+    request are compacted, chunked or sampled as in single-file mode.
+
+    Returns:
+        (model, explanation); the explanation is None if the request failed.
+
+    Raises:
+        IngestError: If the file cannot be read.
+    """
+    info = sniff(path)
+    language = detect_language(path.name)
+    if streams_in_chunks(info, compact):
+        model = select_model("explain", info.size // CHARS_PER_TOKEN, detail)
+        try:
+            with open_text(info) as f:
+                return model, await _explain_in_chunks_async(f, path.name, language, detail, lang, model, session, max_concurrency)
+        except OSError as e:
+            raise IngestError(e.strerror or str(e)) from e
+    ingested = read_sniffed(info, max_bytes=0 if is_compactable(path.name, info.size, compact) else MAX_INPUT_BYTES)
+    request = prepare_explain_prompt(ingested.text, path.name, detail, lang, compact, ingested.sampled)
+    if request.prompt is None:
+        lines = request.content.splitlines(keepends=True)
+        return request.model, await _explain_in_chunks_async(lines, path.name, language, detail, lang, request.model, session, max_concurrency)
+    return request.model, await session.ask(request.prompt, request.model)
+
+async def _explain_files_async(paths: list[Path], jobs: int, detail: str, lang: str, compact: bool, use_cache: bool, refresh: bool,
+                               on_file=None) -> list[tuple[str, str | None] | IngestError]:
+    """
+    Explains files with `jobs` workers sharing one session; returns one outcome per path, in order.
+
+    A worker reads a file and builds its prompt only when it takes the file,
+    and takes the next one as soon as it is done. The session caps requests
+    in flight at `jobs`, chunk requests of large files included.
+    """
+    outcomes: list[tuple[str, str | None] | IngestError | None] = [None] * len(paths)
+    pending = iter(enumerate(paths))
+    async with ResponseSession(jobs, use_cache=use_cache, refresh=refresh) as session:
+        async def worker():
+            for index, path in pending: # Shared by the workers: each file is taken once
+                try:
+                    outcomes[index] = await _explain_file_async(path, session, detail, lang, compact, jobs)
+                except IngestError as e:
+                    outcomes[index] = e
+                if on_file:
+                    on_file()
+
+        await asyncio.gather(*(worker() for _ in range(min(jobs, len(paths)))))
+    return outcomes
+
+def explain_directory(target: str, include: list[str] | None = None, exclude: list[str] | None = None,
+                      jobs: int = ASYNC_MAX_CONCURRENCY, detail: str = "basic", lang: str = "en",
+                      output: Path | None = None, report_format: str = "markdown",
+                      use_cache: bool = True, refresh: bool = False, max_bytes: int | None = None,
+                      compact: bool = True) -> dict | None:
+    """
+    Explains every file of a directory or glob pattern concurrently.
+
+    The tree is walked honoring .gitignore; binary and empty files are
+    skipped. Files are read and their prompts built only when one of `jobs`
+    workers takes them, and files too large for one request are compacted,
+    chunked or sampled as in single-file mode. At most `jobs` requests are in
+    flight at once while a progress bar shows throughput and ETA. The consolidated report lists
+    files in sorted path order, so repeated runs produce the same layout.
+
+    Args:
+        target: A directory or a glob pattern (e.g. 'src/**/*.py').
+        include: Only explain files matching one of these globs (e.g. '*.py').
+        exclude: Skip files matching one of these globs.
+        jobs: Maximum simultaneous requests.
+        detail: 'basic' or 'detailed'.
+        lang: Language code for the explanations.
+        output: Write the report here; print it when None.
+        report_format: 'markdown' or 'json'.
+        use_cache: If False, bypass the response cache.
+        refresh: If True, ignore cached responses and store new ones.
+        max_bytes: Skip files larger than this (default: no limit).
+        compact: Compact Python files over the budget of `detail` (see core.compact).
+
+    Returns:
+        Counts (explained, failed, skipped), or None if nothing could be explained.
+    """
+    report_format = report_format.lower()
+    if report_format not in REPORT_FORMATS:
+        console.print(f"[bold red]Error: Unknown report format '{report_format}'. Choose from: {', '.join(REPORT_FORMATS)}.[/bold red]")
+        return None
+
+    selection = collect_files(target, include, exclude, 0 if max_bytes is None else max_bytes)
+    status = Console(stderr=True) # Keeps stdout clean for the report
+    status.print(f"Explaining {len(selection.files)} file(s) from [cyan]{target}[/cyan]"
+                 f" ({len(selection.skipped)} skipped, {selection.ignored} ignored by .gitignore).")
+    if not selection.files:
+        console.print("[yellow]No files to explain.[/yellow] Check the path and the --include/--exclude patterns.")
+        return None
+
+    jobs = max(1, jobs)
+    columns = (SpinnerColumn(), TextColumn("{task.description}"), BarColumn(), MofNCompleteColumn(), _RateColumn(), TimeRemainingColumn())
+    with Progress(*columns, console=status) as progress:
+        task = progress.add_task("Explaining", total=len(selection.files))
+        outcomes = asyncio.run(_explain_files_async(selection.files, jobs, detail, lang, compact, use_cache, refresh,
+                                                    on_file=lambda: progress.advance(task)))
+
+    results, readable = [], []
+    for path, outcome in zip(selection.files, outcomes):
+        if isinstance(outcome, IngestError):
+            selection.skipped.append((path, f"unreadable ({outcome})"))
+            continue
+        model, explanation = outcome
+        readable.append(path)
+        results.append({"path": selection.relative(path), "model": model, "explanation": explanation})
+    selection.files = readable
+    selection.skipped.sort(key=lambda item: selection.relative(item[0]))
+    report = build_report(selection, results, report_format, detail, lang)
+    if output:
+        try:
+            Path(output).write_text(report, encoding="utf-8")
+        except OSError as e:
+            console.print(f"[bold red]Error writing report {output}: {e}[/bold red]")
+            return None
+        status.print(f"Report written to [cyan]{output}[/cyan].")
+    elif report_format == "json":
+        print(report, end="")
     else:
-        console.print("[bold red]Failed to get explanation from OpenAI.[/bold red]")
\ No newline at end of file
+        console.print(Markdown(report))
+
+    counts = {
+        "explained": sum(1 for r in results if r["explanation"] is not None),
+        "failed": sum(1 for r in results if r["explanation"] is None),
+        "skipped": len(selection.skipped),
+    }
+    status.print(f"[bold green]{counts['explained']} explained[/bold green], {counts['failed']} failed, {counts['skipped']} skipped.")
+    return counts
@@ -3,8 +3,9 @@
 import typer
 from rich.console import Console
 import os
+import sys
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Import command handlers
@@ -12,6 +13,14 @@ from . import explain as explain_module
 from . import script as script_module
 from . import visualize as visualize_module
 from . import config as config_module
+from . import usage as usage_module
+from . import batch as batch_module
+from . import diff as diff_module
+from . import documents as documents_module
+from .core.files import is_file_glob
+from .core.openai_utils import ASYNC_MAX_CONCURRENCY, warm_openai_client
+from .core.ledger import command_scope
+from .core.sandbox import RunLimits
 
 # Load environment variables from .env file
 load_dotenv()
@@ -46,6 +55,14 @@ app = typer.Typer(
 
 console = Console()
 
+def _stdin():
+    """Standard input as text, replacing undecodable bytes instead of failing on them."""
+    try:
+        sys.stdin.reconfigure(errors="replace")
+    except (AttributeError, ValueError):
+        pass
+    return sys.stdin
+
 # --- Explain Command ---
 @app.command(
     name="explain",
@@ -59,17 +76,59 @@ console = Console()
             "\n  cstudio explain 'grep -r \"TODO\" ./src' -d detailed -l ru"
             "\n\n  # Explain a file (basic, Spanish)"
             "\n  cstudio explain path/to/script.js --lang es"
+            "\n\n  # Triage piped logs (repeated lines are grouped)"
+            "\n  kubectl logs deploy/api --since=1h | cstudio explain -"
+            "\n\n  # Explain only the functions and classes changed since main"
+            "\n  cstudio explain --diff origin/main"
+            "\n\n  # Explain every Python file of a directory, 8 at a time, into one report"
+            "\n  cstudio explain src/ --include '*.py' --jobs 8 -o docs/src.md"
             "\n---"
             )
 )
 def explain(
     ctx: typer.Context,
-    input_str: str = typer.Argument(..., help="The code snippet, shell command, or file path to explain."),
+    input_str: Optional[str] = typer.Argument(None, help="The code snippet, shell command, file path, directory or glob pattern to explain, or '-' to read standard input (with --diff: optional paths to limit the diff)."),
     detail: str = typer.Option("basic", "--detail", "-d", help="Level of detail: 'basic' or 'detailed'.", case_sensitive=False),
-    lang: str = typer.Option("en", "--lang", "-l", help="Language code for the explanation (e.g., 'en', 'ru', 'es', 'ja').", case_sensitive=False)
+    lang: str = typer.Option("en", "--lang", "-l", help="Language code for the explanation (e.g., 'en', 'ru', 'es', 'ja').", case_sensitive=False),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Do not read or write the local response cache."),
+    refresh: bool = typer.Option(False, "--refresh", help="Ignore cached responses and store a fresh one."),
+    stream: Optional[bool] = typer.Option(None, "--stream/--no-stream", help="Render the explanation as it is generated (default: on in a terminal)."),
+    similarity: Optional[float] = typer.Option(None, "--similarity", min=0.0, max=1.0, help="Also reuse the cached explanation of an input at least this similar, e.g. 0.95 (default 1 = equivalent inputs only)."),
+    include: Optional[List[str]] = typer.Option(None, "--include", help="Directory/glob mode: only explain files matching this glob (repeatable)."),
+    exclude: Optional[List[str]] = typer.Option(None, "--exclude", help="Directory/glob mode: skip files matching this glob (repeatable)."),
+    jobs: int = typer.Option(ASYNC_MAX_CONCURRENCY, "--jobs", "-j", min=1, help="Directory/glob mode: files explained at the same time."),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", dir_okay=False, help="Directory/glob mode: write the report to this file instead of printing it."),
+    report_format: str = typer.Option("markdown", "--format", "-f", help="Directory/glob/diff mode: report format, 'markdown' or 'json'.", case_sensitive=False),
+    diff: Optional[str] = typer.Option(None, "--diff", metavar="REV", help="Explain only the functions and classes changed since git revision REV."),
+    no_compact: bool = typer.Option(False, "--no-compact", help="Send Python files verbatim instead of compacting those over the budget of --detail."),
+    logs: Optional[bool] = typer.Option(None, "--logs/--no-logs", help="Standard input ('-'): group repeated log lines into templates with counts (default: detected)."),
 ):
     """Process the explain command."""
-    explain_module.explain_code(input_str, detail, lang)
+    with command_scope(ctx.command_path):
+        if diff is not None:
+            counts = diff_module.explain_diff(
+                diff, [input_str] if input_str else None, detail, lang, output, report_format, jobs,
+                use_cache=not no_cache, refresh=refresh,
+            )
+            if counts is None or (counts["failed"] and not counts["explained"]):
+                raise typer.Exit(code=1)
+            return
+        if not input_str:
+            console.print("[bold red]Error: Provide something to explain, or use --diff REV.[/bold red]")
+            raise typer.Exit(code=1)
+        if input_str == "-":
+            explain_module.explain_stdin(_stdin(), detail, lang, use_cache=not no_cache, refresh=refresh, render_stream=stream, is_log=logs)
+            return
+        if os.path.isdir(input_str) or is_file_glob(input_str):
+            counts = explain_module.explain_directory(
+                input_str, include, exclude, jobs, detail, lang, output, report_format,
+                use_cache=not no_cache, refresh=refresh, compact=not no_compact,
+            )
+            if counts is None or (counts["failed"] and not counts["explained"]):
+                raise typer.Exit(code=1)
+            return
+        explain_module.explain_code(input_str, detail, lang, use_cache=not no_cache, refresh=refresh, stream=stream, similarity=similarity,
+                                    compact=not no_compact)
 
 # --- Script Command ---
 @app.command(
@@ -84,6 +143,12 @@ def explain(
             "\n  cstudio script \"read csv data.csv and print first column\" -t python"
             "\n\n  # Generate PowerShell script (dry run)"
             "\n  cstudio script \"get running processes\" --type powershell --dry-run"
+            "\n\n  # Reuses the script saved for \"... larger than 100MB in /data\" (with --save) without an API call"
+            "\n  cstudio script \"find files larger than 500MB in /var/log\""
+            "\n\n  # Request 3 scripts in parallel and keep the first that passes 'bash -n'"
+            "\n  cstudio script \"rotate the logs in /var/log/app\" --candidates 3"
+            "\n\n  # Run the script in a sandbox and check it stays within 30 s and 256 MB"
+            "\n  cstudio script \"sum the sizes of all files under /data\" -t python --run --timeout 30 --memory-limit 256"
             "\n---"
             )
 )
@@ -91,15 +156,35 @@ def script(
     ctx: typer.Context,
     task_description: str = typer.Argument(..., help="The task description in natural language."),
     output_type: str = typer.Option("bash", "--type", "-t", help=f"Output script type. Supported: {', '.join(script_module.SUPPORTED_SCRIPT_TYPES)}.", case_sensitive=False),
-    dry_run: bool = typer.Option(False, "--dry-run", help="Only generate and display the script.", is_flag=True)
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only generate and display the script.", is_flag=True),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Do not read or write the local response cache."),
+    refresh: bool = typer.Option(False, "--refresh", help="Ignore cached responses and store a fresh one."),
+    no_library: bool = typer.Option(False, "--no-library", help="Do not reuse or add to the local library of generated scripts."),
+    save: bool = typer.Option(False, "--save", help="Add the generated script to the local library (scripts that pass --run are added anyway)."),
+    run: bool = typer.Option(False, "--run", help="Run the bash/python script in a sandbox and report time, CPU and memory (exit code 1 if it fails)."),
+    timeout: Optional[float] = typer.Option(None, "--timeout", min=0, help="Wall-clock limit of --run in seconds (0 = none; default: CSTUDIO_RUN_TIMEOUT or 60)."),
+    cpu_limit: Optional[int] = typer.Option(None, "--cpu-limit", min=0, help="CPU seconds limit of --run (0 = none; default: CSTUDIO_RUN_CPU_SECONDS or 60)."),
+    memory_limit: Optional[int] = typer.Option(None, "--memory-limit", min=0, help="Address space limit of --run in MB (0 = none; default: CSTUDIO_RUN_MEMORY_MB or 1024)."),
+    candidates: int = typer.Option(1, "--candidates", "-n", min=1, max=10, help="Request N scripts in parallel and keep the first one that passes a local syntax check."),
 ):
     """Process the script command."""
-    script_module.generate_script(task_description, output_type, dry_run)
+    with command_scope(ctx.command_path):
+        limits = RunLimits()
+        if timeout is not None:
+            limits.timeout = timeout
+        if cpu_limit is not None:
+            limits.cpu_seconds = cpu_limit
+        if memory_limit is not None:
+            limits.memory_mb = memory_limit
+        result = script_module.generate_script(task_description, output_type, dry_run, use_cache=not no_cache, refresh=refresh,
+                                               use_library=not no_library, run=run, limits=limits, candidates=candidates, save=save)
+        if run and not dry_run and (result is None or not result.ok):
+            raise typer.Exit(code=1)
 
 # --- Visualize Command ---
 @app.command(
     name="visualize",
-    help="🧠 Generate a function call graph for a Python file (DOT/image).",
+    help="🧠 Generate a function call graph for a Python file or package (DOT/image).",
     # --- FIX: Corrected examples to use 'cstudio' ---
      epilog=("\n---"
              "\n**Examples:**"
@@ -109,19 +194,24 @@ def script(
              "\n  cstudio visualize path/to/module.py -f png -o graph.png"
              "\n\n  # Generate SVG image"
              "\n  cstudio visualize path/to/module.py --format svg"
+             "\n\n  # Call graph of a whole package, parsed on 8 cores"
+             "\n  cstudio visualize path/to/pkg/ -j 8 -o pkg.gv"
              "\n---"
              "\nRequires Graphviz 'dot' command for image formats."
              )
 )
 def visualize(
     ctx: typer.Context,
-    file_path: Path = typer.Argument(..., exists=True, file_okay=True, dir_okay=False, readable=True, resolve_path=True, help="Path to the Python file (.py) to visualize."),
+    file_path: Path = typer.Argument(..., exists=True, file_okay=True, dir_okay=True, readable=True, resolve_path=True, help="Path to the Python file (.py) or package directory to visualize."),
     output_file: Path = typer.Option(None, "--output", "-o", help="Path to save the output graph file (e.g., graph.gv, graph.png).", writable=True, resolve_path=True),
-    output_format: Optional[str] = typer.Option(None, "--format", "-f", help="Output format (e.g., png, svg, pdf, dot/gv).", case_sensitive=False)
+    output_format: Optional[str] = typer.Option(None, "--format", "-f", help="Output format (e.g., png, svg, pdf, dot/gv).", case_sensitive=False),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", min=1, help="Processes used to parse a package directory (default: number of CPUs)."),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Parse every module of a package instead of reusing cached call-graph fragments."),
 ):
     """Process the visualize command."""
     final_output_path: Optional[str] = str(output_file) if output_file else None
-    visualize_module.generate_visualization(str(file_path), output_dot_or_image_file=final_output_path, output_format=output_format)
+    visualize_module.generate_visualization(str(file_path), output_dot_or_image_file=final_output_path, output_format=output_format, jobs=jobs,
+                                            use_cache=not no_cache)
 
 # --- Config Command Group ---
 config_app = typer.Typer(
@@ -145,19 +235,168 @@ app.add_typer(config_app, name="config")
             "\n  cstudio config explain /etc/nginx/nginx.conf"
             "\n\n  # Explain a TOML config"
             "\n  cstudio config explain pyproject.toml"
+            "\n\n  # Explain a large Helm values file from its structural skeleton"
+            "\n  cstudio config explain values.yaml --skeleton"
+            "\n\n  # Explain what changed between two versions"
+            "\n  cstudio config explain old.yaml new.yaml"
+            "\n\n  # Explain what changed since the last commit"
+            "\n  cstudio config explain values.yaml --rev HEAD~1"
             "\n---"
             )
 )
 def config_explain(
     ctx: typer.Context,
-    file_path: Path = typer.Argument(..., exists=True, file_okay=True, dir_okay=False, readable=True, resolve_path=True, help="Path to the configuration file to explain."),
+    file_path: Path = typer.Argument(..., exists=True, file_okay=True, dir_okay=False, readable=True, resolve_path=True, help="Path to the configuration file to explain (the old version when a second file is given)."),
+    new_file_path: Optional[Path] = typer.Argument(None, exists=True, file_okay=True, dir_okay=False, readable=True, resolve_path=True, help="New version of the file: explain the changes between the two."),
+    rev: Optional[str] = typer.Option(None, "--rev", metavar="REV", help="Explain the changes to the file since git revision REV."),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Do not read or write the local response cache."),
+    refresh: bool = typer.Option(False, "--refresh", help="Ignore cached responses and store a fresh one."),
+    stream: Optional[bool] = typer.Option(None, "--stream/--no-stream", help="Render the explanation as it is generated (default: on in a terminal)."),
+    skeleton: Optional[bool] = typer.Option(None, "--skeleton/--raw", help="Explain YAML, JSON, TOML and INI files from their parsed structure, or send the raw text (default: skeleton for large files)."),
 ):
     """Process the config explain subcommand."""
-    config_module.explain_config(file_path)
+    with command_scope(ctx.command_path):
+        if new_file_path is not None and rev is not None:
+            console.print("[bold red]Error: Give either a second file or --rev, not both.[/bold red]")
+            raise typer.Exit(code=1)
+        if new_file_path is not None:
+            config_module.explain_config_diff(new_file_path, old_path=file_path, use_cache=not no_cache, refresh=refresh, stream=stream)
+        elif rev is not None:
+            config_module.explain_config_diff(file_path, rev=rev, use_cache=not no_cache, refresh=refresh, stream=stream)
+        else:
+            config_module.explain_config(file_path, use_cache=not no_cache, refresh=refresh, stream=stream, skeleton=skeleton)
+
+# --- Config Documents Subcommand ---
+@config_app.command(
+    "documents",
+    help="🗂️ Explain multi-document YAML/JSON (e.g. Kubernetes dumps) once per unique document shape.",
+    epilog=("\n---"
+            "\n**Examples:**"
+            "\n\n  # Explain every resource type of a cluster dump"
+            "\n  kubectl get all -A -o yaml | cstudio config documents -"
+            "\n\n  # Explain rendered Helm manifests into a JSON index"
+            "\n  helm template ./chart > out.yaml && cstudio config documents out.yaml -f json -o index.json"
+            "\n\n  # Explain every YAML and JSON file of a directory"
+            "\n  cstudio config documents k8s/ --jobs 8"
+            "\n---"
+            )
+)
+def config_documents(
+    ctx: typer.Context,
+    sources: List[str] = typer.Argument(..., help="YAML/JSON files, directories, or '-' to read standard input."),
+    jobs: int = typer.Option(ASYNC_MAX_CONCURRENCY, "--jobs", "-j", min=1, help="Shapes explained at the same time."),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", dir_okay=False, help="Write the report to this file instead of printing it."),
+    report_format: str = typer.Option("markdown", "--format", "-f", help="Report format, 'markdown' or 'json'.", case_sensitive=False),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Do not read or write the local response cache."),
+    refresh: bool = typer.Option(False, "--refresh", help="Ignore cached responses and store a fresh one."),
+):
+    """Process the config documents subcommand."""
+    with command_scope(ctx.command_path):
+        counts = documents_module.explain_documents(
+            sources, _stdin() if "-" in sources else None, jobs, output, report_format,
+            use_cache=not no_cache, refresh=refresh,
+        )
+        if counts is None or (counts["failed"] and counts["failed"] == counts["shapes"]):
+            raise typer.Exit(code=1)
+
+# --- Batch Command Group ---
+batch_app = typer.Typer(
+    name="batch",
+    help="📦 Prepare and ingest OpenAI Batch API jobs (about half the price, no rate limits).",
+    no_args_is_help=True,
+    rich_markup_mode="markdown",
+)
+app.add_typer(batch_app, name="batch")
+
+@batch_app.command(
+    "prepare",
+    help="📝 Turn a JSONL file of explain, config and script tasks into a Batch API request file.",
+    epilog=("\n---"
+            "\n**Task file (one JSON object per line):**"
+            "\n\n  {\"command\": \"explain\", \"input\": \"src/app.py\", \"detail\": \"basic\", \"lang\": \"en\"}"
+            "\n\n  {\"command\": \"config\", \"path\": \"deploy/nginx.conf\"}"
+            "\n\n  {\"command\": \"script\", \"task\": \"rotate logs in /var/log/app\", \"type\": \"bash\", \"id\": \"rotate-logs\"}"
+            "\n\n**Example:**"
+            "\n\n  cstudio batch prepare nightly_tasks.jsonl -o batch_requests.jsonl"
+            "\n---"
+            )
+)
+def batch_prepare(
+    ctx: typer.Context,
+    tasks_file: Path = typer.Argument(..., exists=True, file_okay=True, dir_okay=False, readable=True, help="JSONL file with one task per line."),
+    output_file: Path = typer.Option(Path("batch_requests.jsonl"), "--output", "-o", help="Where to write the Batch API requests."),
+    include_cached: bool = typer.Option(False, "--include-cached", help="Also include tasks whose answer is already in the local cache."),
+):
+    """Process the batch prepare subcommand."""
+    with command_scope(ctx.command_path):
+        counts = batch_module.prepare_batch(tasks_file, output_file, skip_cached=not include_cached)
+        batch_module.print_prepare_summary(counts, output_file)
+
+@batch_app.command(
+    "ingest",
+    help="📥 Read a Batch API results file into rendered outputs and the local cache.",
+    epilog=("\n---"
+            "\n**Examples:**"
+            "\n\n  # Fill the cache and write one file per result"
+            "\n  cstudio batch ingest results.jsonl --requests batch_requests.jsonl -o explanations/"
+            "\n\n  # Print the results"
+            "\n  cstudio batch ingest results.jsonl"
+            "\n---"
+            )
+)
+def batch_ingest(
+    ctx: typer.Context,
+    results_file: Path = typer.Argument(..., exists=True, file_okay=True, dir_okay=False, readable=True, help="Batch output file (JSONL)."),
+    requests_file: Optional[Path] = typer.Option(None, "--requests", "-r", exists=True, dir_okay=False, readable=True, help="The prepared request file; needed to store results in the cache."),
+    output_dir: Optional[Path] = typer.Option(None, "--output-dir", "-o", file_okay=False, help="Write one file per result (.md, or the script's extension)."),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Do not store results in the local response cache."),
+    no_render: bool = typer.Option(False, "--no-render", help="Do not print results (e.g. when only filling the cache)."),
+):
+    """Process the batch ingest subcommand."""
+    with command_scope(ctx.command_path):
+        counts = batch_module.ingest_batch(results_file, requests_file, output_dir, use_cache=not no_cache, render=not no_render)
+        batch_module.print_ingest_summary(counts, output_dir)
+        if counts["failed"] and not counts["ok"]:
+            raise typer.Exit(code=1)
+
+# --- Usage Command ---
+@app.command(
+    name="usage",
+    help="📊 Report token usage, estimated cost and latency of past API calls.",
+    epilog=("\n---"
+            "\n**Examples:**"
+            "\n\n  # Usage of the last 30 days by day, command and model"
+            "\n  cstudio usage"
+            "\n\n  # Cost per model for the last week"
+            "\n  cstudio usage --days 7 --by model"
+            "\n---"
+            )
+)
+def usage(
+    ctx: typer.Context,
+    days: int = typer.Option(30, "--days", min=0, help="Only include the last N days (0 for all time)."),
+    by: Optional[List[str]] = typer.Option(None, "--by", help="Breakdown: day, command or model. Repeat for several (default: all)."),
+):
+    """Process the usage command."""
+    if not usage_module.show_usage(days, by):
+        raise typer.Exit(code=1)
 
 # --- Application Runner ---
+# Commands that talk to the OpenAI API (the connection is pre-warmed for these)
+API_COMMANDS = {"explain", "script", "config"}
+
+def _needs_api(argv: list[str]) -> bool:
+    """Returns True if the command line invokes a command that calls the API."""
+    if "--help" in argv:
+        return False
+    positional = [arg for arg in argv if not arg.startswith("-")]
+    return bool(positional) and positional[0] in API_COMMANDS
+
 def run():
     """Main entry point for the CLI application."""
+    # Open the API connection in the background while Typer parses arguments
+    if _needs_api(sys.argv[1:]):
+        warm_openai_client()
     app()
 
 if __name__ == "__main__":
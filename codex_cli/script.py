@@ -1,8 +1,19 @@
 import os
 import re
+import time
+from functools import partial
+from typing import Callable
+from rich import box
 from rich.console import Console
 from rich.syntax import Syntax
-from .core.openai_utils import get_openai_response
+from rich.table import Table
+from .core.chunking import count_tokens
+from .core.ledger import record_usage
+from .core.openai_utils import get_first_valid_response, get_openai_response
+from .core.routing import select_model
+from .core.sandbox import RUNNABLE_SCRIPT_TYPES, RunLimits, RunResult, SandboxError, run_script
+from .core.script_check import check_script, checker_name
+from .core.script_library import LibraryMatch, find_script, store_script
 
 console = Console()
 SUPPORTED_SCRIPT_TYPES = ["bash", "python", "powershell"]
@@ -15,64 +26,187 @@ def clean_generated_code(code: str, language: str) -> str:
     match = pattern.match(code)
     return match.group(1).strip() if match else code
 
-# --- UPDATED SIGNATURE: Added dry_run ---
-def generate_script(task_description: str, output_type: str = "bash", dry_run: bool = False):
+def build_script_prompt(task_description: str, output_type: str) -> str:
+    """
+    Builds the prompt used to generate a script.
+
+    Args:
+        task_description: The task in natural language.
+        output_type: Lower-case script type (one of SUPPORTED_SCRIPT_TYPES).
+
+    Returns:
+        The prompt string.
+    """
+    return f"""
+    You are an expert script generator. Your task is to generate a functional and safe script based on the user's request.
+
+    User Request: "{task_description}"
+
+    Desired Script Type: {output_type}
+
+    Instructions:
+    1.  Generate a complete, runnable script that performs the requested task.
+    2.  Prioritize clarity and readability.
+    3.  Add comments to explain key parts of the script, especially complex logic.
+    4.  If the task involves potentially destructive actions (e.g., deleting files, modifying system settings), include safety checks (e.g., user confirmation prompts, dry-run options if applicable) or at least warn the user in comments.
+    5.  Ensure the script uses standard libraries and commands commonly available on most systems for the specified script type.
+    6.  IMPORTANT: Output ONLY the raw script code itself. Do not include *any* surrounding text, explanations, or markdown formatting like ```script_type ... ```. Just the code.
+
+    Begin script code:
+    """
+
+def _print_script(code: str, output_type: str):
+    """Renders a script with syntax highlighting and the review warning."""
+    lexer_map = {"bash": "bash", "python": "python", "powershell": "powershell"}
+    lexer_name = lexer_map.get(output_type, "text")
+    syntax = Syntax(code, lexer_name, theme="default", line_numbers=True)
+    console.print(syntax)
+    console.print("\n[bold yellow]⚠️ Warning:[/bold yellow] [yellow]Always review generated scripts carefully before executing them, especially if they involve file operations or system changes.[/yellow]")
+
+def _print_library_match(match: LibraryMatch, output_type: str):
+    """Labels and renders a script reused from the library."""
+    changes = ", ".join(f"{old} → {new}" for old, new in match.substitutions)
+    console.print(f"[grey50]Reused a library script for \"{match.task}\" ({match.score:.0%} match"
+                  f"{'; parameters: ' + changes if changes else ''}); use --refresh to generate a new one.[/grey50]")
+    console.print("\n✨ [bold green]Generated Script:[/bold green]")
+    _print_script(match.script, output_type)
+
+def _megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+def _print_run_result(result: RunResult, limits: RunLimits):
+    """Prints the status and resource usage of a sandboxed run, then the end of its output."""
+    def limit(value, unit: str) -> str:
+        return f" / {value:g} {unit}" if value else ""
+
+    table = Table(title="Sandboxed Run", box=box.SIMPLE_HEAD, show_header=False, pad_edge=False)
+    table.add_column("Metric", style="bold")
+    table.add_column("Value")
+    table.add_row("Status", f"[{'green' if result.ok else 'red'}]{result.status}[/]")
+    table.add_row("Wall time", f"{result.wall_time:.2f} s{limit(limits.timeout, 's')}")
+    table.add_row("CPU time", f"{result.cpu_time:.2f} s{limit(limits.cpu_seconds, 's')}")
+    table.add_row("Peak RSS", f"{_megabytes(result.peak_rss)}{limit(limits.memory_mb, 'MB address space')}")
+    table.add_row("Network", "isolated" if result.network_isolated else "[yellow]not isolated on this system[/yellow]")
+    console.print(table)
+    for name, text in (("stdout", result.stdout), ("stderr", result.stderr)):
+        if text.strip():
+            console.print(f"[bold]{name}:[/bold]")
+            console.print(text.rstrip(), markup=False, highlight=False)
+
+def _run_generated_script(code: str, output_type: str, limits: RunLimits) -> RunResult | None:
+    """Runs a script in the sandbox and prints the report; returns None if it could not be run."""
+    console.print("\n[bold cyan]Running the script in a sandbox...[/bold cyan] "
+                  "[grey50](temporary directory, resource limits; files outside it are still reachable)[/grey50]")
+    try:
+        result = run_script(code, output_type, limits)
+    except SandboxError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        return None
+    _print_run_result(result, limits)
+    return result
+
+def generate_script(task_description: str, output_type: str = "bash", dry_run: bool = False, use_cache: bool = True, refresh: bool = False,
+                    use_library: bool = True, run: bool = False, limits: RunLimits | None = None, candidates: int = 1,
+                    score: Callable[[str], float] | None = None, save: bool = False) -> RunResult | None:
     """
     Generates a script based on a natural language task description.
 
+    Tasks are first looked up in the local script library (see
+    core/script_library.py): a confident match for the same task with other
+    numbers, paths or names is served instantly with the new values
+    substituted, provided it still passes the local syntax check. Otherwise
+    the script is generated. A generated script is only added to the library
+    once it is vouched for: with `save`, or after a successful sandboxed run.
+    Dry runs never add to it.
+
+    Generated scripts are parsed locally (see core/script_check.py). With
+    several candidates, the completions are requested in parallel and the
+    first one that parses is kept; the other requests are cancelled.
+
     Args:
         task_description: The description of the task for the script.
         output_type: The desired script type (e.g., "bash", "python"). Defaults to "bash".
-        dry_run: If True, indicates that the script should only be displayed (currently always true).
+        dry_run: If True, only display the script, even if `run` is set.
+        use_cache: If False, bypass the on-disk response cache.
+        refresh: If True, ignore any cached response and store the new one.
+        use_library: If False, neither search nor extend the script library.
+        run: If True, run the script in a sandbox (see core/sandbox.py) and report its resource usage.
+        limits: Budget of the sandboxed run (defaults from CSTUDIO_RUN_* settings).
+        candidates: Number of completions requested in parallel (1 = a single, cached request).
+        score: Optional ranking of the candidates that parse (higher is better); when given,
+            every candidate is awaited and the best one is kept.
+        save: If True, add the generated script to the library (unless `dry_run` is set).
+
+    Returns:
+        The RunResult of the sandboxed run, or None if the script was not run.
     """
     output_type_lower = output_type.lower()
     if output_type_lower not in SUPPORTED_SCRIPT_TYPES:
         console.print(f"[bold red]Error: Unsupported script type '{output_type}'.[/bold red]")
         console.print(f"Supported types are: {', '.join(SUPPORTED_SCRIPT_TYPES)}")
-        return
+        return None
+    if run and not dry_run and output_type_lower not in RUNNABLE_SCRIPT_TYPES:
+        console.print(f"[bold red]Error: --run supports {' and '.join(RUNNABLE_SCRIPT_TYPES)} scripts only.[/bold red]")
+        return None
 
     console.print(f"Generating [bold yellow]{output_type_lower}[/bold yellow] script for task: '{task_description}'...")
     # --- Add message if dry_run is active ---
     if dry_run:
         console.print("[cyan]--dry-run active: Script will only be displayed.[/cyan]")
+    code = None
+    store = None # Adds the generated script to the library once it is vouched for
 
-    # Construct the prompt
-    prompt = f"""
-    You are an expert script generator. Your task is to generate a functional and safe script based on the user's request.
+    # --- Script Library: the same task with other parameters, generated before ---
+    if use_library and not refresh:
+        start = time.perf_counter()
+        match = find_script(task_description, output_type_lower)
+        error = check_script(match.script, output_type_lower) if match else None
+        if error:
+            console.print(f"[grey50]Skipped a library script for \"{match.task}\" that does not pass "
+                          f"{checker_name(output_type_lower)} after substitution ({error}).[/grey50]")
+        elif match:
+            record_usage(match.model or "library", time.perf_counter() - start, match.prompt_tokens, match.completion_tokens, cache_hit=True)
+            _print_library_match(match, output_type_lower)
+            code = match.script
 
-    User Request: "{task_description}"
+    if code is None:
+        # Construct the prompt
+        prompt = build_script_prompt(task_description, output_type_lower)
 
-    Desired Script Type: {output_type_lower}
+        model = select_model("script", len(task_description) // 4)
+        checker = checker_name(output_type_lower)
+        if candidates > 1:
+            console.print(f"[grey50]Requesting {candidates} candidates in parallel"
+                          f"{f', keeping the first that passes {checker}' if checker else ''}...[/grey50]")
+            generated_code, rejected = get_first_valid_response(
+                prompt, candidates, lambda response: check_script(clean_generated_code(response, output_type_lower), output_type_lower),
+                score=(lambda response: score(clean_generated_code(response, output_type_lower))) if score else None,
+                model=model, use_cache=use_cache, refresh=refresh,
+            )
+            for message in rejected:
+                console.print(f"[grey50]Rejected {message}[/grey50]")
+        else:
+            generated_code = get_openai_response(prompt, model=model, use_cache=use_cache, refresh=refresh)
+        processed_code = clean_generated_code(generated_code, output_type_lower) if generated_code else ""
 
-    Instructions:
-    1.  Generate a complete, runnable script that performs the requested task.
-    2.  Prioritize clarity and readability.
-    3.  Add comments to explain key parts of the script, especially complex logic.
-    4.  If the task involves potentially destructive actions (e.g., deleting files, modifying system settings), include safety checks (e.g., user confirmation prompts, dry-run options if applicable) or at least warn the user in comments.
-    5.  Ensure the script uses standard libraries and commands commonly available on most systems for the specified script type.
-    6.  IMPORTANT: Output ONLY the raw script code itself. Do not include *any* surrounding text, explanations, or markdown formatting like ```script_type ... ```. Just the code.
-
-    Begin script code:
-    """
+        if processed_code and processed_code != "Model returned an empty response.":
+            error = check_script(processed_code, output_type_lower) if candidates <= 1 else None
+            console.print("\n✨ [bold green]Generated Script:[/bold green]")
+            _print_script(processed_code, output_type_lower)
+            if error:
+                console.print(f"[bold yellow]The script does not pass {checker}:[/bold yellow] [yellow]{error}[/yellow]\n"
+                              "[grey50]Use --candidates N to request several scripts and keep one that parses.[/grey50]")
+            elif use_library and not dry_run:
+                store = partial(store_script, task_description, output_type_lower, processed_code, model,
+                                count_tokens(prompt), count_tokens(generated_code))
+            code = processed_code
+        else:
+            console.print(f"[bold red]Failed to generate the {output_type_lower} script.[/bold red]")
+            if generated_code and not processed_code:
+                 console.print(f"[grey50]Model original (unprocessed) response: {generated_code}[/grey50]")
+            return None
 
-    generated_code = get_openai_response(prompt, model="gpt-4o")
-    processed_code = clean_generated_code(generated_code, output_type_lower) if generated_code else ""
-
-    if processed_code and processed_code != "Model returned an empty response.":
-        console.print("\n✨ [bold green]Generated Script:[/bold green]")
-        lexer_map = {"bash": "bash", "python": "python", "powershell": "powershell"}
-        lexer_name = lexer_map.get(output_type_lower, "text")
-        syntax = Syntax(processed_code, lexer_name, theme="default", line_numbers=True)
-        console.print(syntax)
-        console.print("\n[bold yellow]⚠️ Warning:[/bold yellow] [yellow]Always review generated scripts carefully before executing them, especially if they involve file operations or system changes.[/yellow]")
-    else:
-        console.print(f"[bold red]Failed to generate the {output_type_lower} script.[/bold red]")
-        if generated_code and not processed_code:
-             console.print(f"[grey50]Model original (unprocessed) response: {generated_code}[/grey50]")
-
-    # --- Placeholder for future execution logic ---
-    # if not dry_run:
-    #     # Execute the script here (use with extreme caution!)
-    #     # Consider saving to file and running, or using subprocess
-    #     console.print("\n[grey50]Execution logic not implemented.[/grey50]")
-    # --- END Placeholder ---
\ No newline at end of file
+    result = _run_generated_script(code, output_type_lower, limits or RunLimits()) if run and not dry_run else None
+    if store and (save or (result is not None and result.ok)):
+        store()
+    return result
\ No newline at end of file
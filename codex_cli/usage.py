@@ -0,0 +1,126 @@
+# codex_cli/usage.py
+
+import time
+from datetime import datetime
+from typing import Callable
+
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+from .core.ledger import UsageLedger, UsageRecord
+from .core.stats import percentile
+
+console = Console()
+
+# Supported breakdowns: name -> function returning the group of a record
+GROUPINGS: dict[str, Callable[[UsageRecord], str]] = {
+    "day": lambda record: datetime.fromtimestamp(record.created).strftime("%Y-%m-%d"),
+    "command": lambda record: record.command,
+    "model": lambda record: record.model,
+}
+
+def summarize(records: list[UsageRecord]) -> dict:
+    """
+    Aggregates a list of ledger records.
+
+    Cost is split into `spent` (API calls) and `saved` (cache hits, priced
+    at the tokens of the original call). Latency percentiles cover API
+    calls only.
+
+    Args:
+        records: The records to aggregate.
+
+    Returns:
+        A dict with calls, cache_hits, errors, prompt_tokens,
+        completion_tokens, spent, saved, unpriced, p50, p95 and p99
+        (latencies in seconds, None when there were no API calls).
+    """
+    api_calls = [r for r in records if not r.cache_hit]
+    latencies = [r.latency for r in api_calls if r.status == "ok"]
+    return {
+        "calls": len(records),
+        "cache_hits": len(records) - len(api_calls),
+        "errors": sum(1 for r in records if r.status != "ok"),
+        "prompt_tokens": sum(r.prompt_tokens for r in api_calls),
+        "completion_tokens": sum(r.completion_tokens for r in api_calls),
+        "spent": sum(r.cost or 0.0 for r in api_calls),
+        "saved": sum(r.cost or 0.0 for r in records if r.cache_hit),
+        "unpriced": sum(1 for r in records if r.cost is None and r.status == "ok"),
+        "p50": percentile(latencies, 50) if latencies else None,
+        "p95": percentile(latencies, 95) if latencies else None,
+        "p99": percentile(latencies, 99) if latencies else None,
+    }
+
+def group_records(records: list[UsageRecord], by: str) -> dict[str, dict]:
+    """Returns summarize() results per group, in sorted group order."""
+    key = GROUPINGS[by]
+    groups: dict[str, list[UsageRecord]] = {}
+    for record in records:
+        groups.setdefault(key(record), []).append(record)
+    return {name: summarize(groups[name]) for name in sorted(groups)}
+
+def _ms(seconds: float | None) -> str:
+    return f"{seconds * 1000:.0f}" if seconds is not None else "-"
+
+def _count(tokens: int) -> str:
+    """Formats a token count compactly (e.g. 950, 12.3k, 4.1M)."""
+    if tokens >= 1_000_000:
+        return f"{tokens / 1_000_000:.1f}M"
+    if tokens >= 10_000:
+        return f"{tokens / 1000:.1f}k"
+    return str(tokens)
+
+def _build_table(title: str, first_column: str, rows: dict[str, dict]) -> Table:
+    table = Table(title=title, caption="Latency percentiles in ms (API calls only)", box=box.SIMPLE_HEAD, pad_edge=False)
+    table.add_column(first_column, overflow="fold")
+    for column in ("Calls", "Hits", "Err", "Tokens", "Cost $", "Saved $", "p50", "p95", "p99"):
+        table.add_column(column, justify="right", no_wrap=True, min_width=len(column))
+    for name, s in rows.items():
+        table.add_row(
+            name, str(s["calls"]), f"{s['cache_hits'] / s['calls']:.0%}" if s["calls"] else "-", str(s["errors"]),
+            _count(s["prompt_tokens"] + s["completion_tokens"]),
+            f"{s['spent']:.3f}", f"{s['saved']:.3f}",
+            _ms(s["p50"]), _ms(s["p95"]), _ms(s["p99"]),
+        )
+    return table
+
+def show_usage(days: int | None = 30, by: list[str] | None = None, ledger: UsageLedger | None = None) -> bool:
+    """
+    Prints token, cost and latency reports from the usage ledger.
+
+    Args:
+        days: Only include calls from the last N days (None or 0 for all).
+        by: Breakdowns to print, any of 'day', 'command', 'model' (default: all).
+        ledger: Ledger to read (defaults to the one in the data directory).
+
+    Returns:
+        False if a breakdown is unknown or the ledger cannot be read, True otherwise.
+    """
+    ledger = ledger or UsageLedger()
+    by = by or list(GROUPINGS)
+    unknown = [name for name in by if name not in GROUPINGS]
+    if unknown:
+        console.print(f"[bold red]Error: Unknown breakdown '{unknown[0]}'. Choose from: {', '.join(GROUPINGS)}.[/bold red]")
+        return False
+
+    since = time.time() - days * 86400 if days else None
+    try:
+        records = ledger.records(since=since)
+    except Exception as e:
+        console.print(f"[bold red]Error reading usage ledger {ledger.path}: {e}[/bold red]")
+        return False
+    period = f"last {days} day(s)" if days else "all time"
+    if not records:
+        console.print(f"[yellow]No API usage recorded ({period}).[/yellow] Ledger: {ledger.path}")
+        return True
+
+    console.print(_build_table(f"Usage ({period})", "Total", {"all": summarize(records)}))
+    for name in by:
+        console.print(_build_table(f"By {name}", name.capitalize(), group_records(records, name)))
+
+    unpriced = summarize(records)["unpriced"]
+    if unpriced:
+        console.print(f"[yellow]{unpriced} call(s) used models without a known price and are not included in costs.[/yellow]")
+    console.print("[grey50]Costs are estimates from list prices. Hits: share of calls answered from the local cache.[/grey50]")
+    return True
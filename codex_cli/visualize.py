@@ -7,6 +7,8 @@ import shutil # For checking if 'dot' exists
 from rich.console import Console
 import graphviz # type: ignore # graphviz lib might not have type stubs
 
+from .core.callgraph import build_package_call_graph
+
 console = Console()
 
 class CallGraphVisitor(ast.NodeVisitor):
@@ -77,32 +79,41 @@ def is_tool_available(name: str) -> bool:
 def generate_visualization(
     file_path: str,
     output_dot_or_image_file: str | None = None,
-    output_format: str | None = None
+    output_format: str | None = None,
+    jobs: int | None = None,
+    use_cache: bool = True,
 ):
     """
-    Parses a Python file, builds a call graph, and saves it as a DOT file
+    Parses a Python file or package, builds a call graph, and saves it as a DOT file
     or renders it to an image format using the Graphviz 'dot' command.
 
+    For a directory, every module under it is parsed in parallel (see
+    core/callgraph.py) and functions are named by module (`pkg.utils.load`),
+    with calls between modules resolved through their imports.
+
     Args:
-        file_path: Path to the Python file (.py) to analyze.
+        file_path: Path to the Python file (.py) or package directory to analyze.
         output_dot_or_image_file: Path to save the output (DOT or image).
                                   If None, name is based on input file.
         output_format: The desired output format (e.g., png, svg, pdf, dot, gv).
                        Format is inferred from output_file extension if not specified,
                        defaulting to 'gv' (DOT).
+        jobs: Worker processes used to parse a package (defaults to the number of CPUs).
+        use_cache: If False, parse every module of a package instead of reusing cached fragments.
     """
     # Basic input validation
-    if not os.path.isfile(file_path):
+    is_package = os.path.isdir(file_path)
+    if not is_package and not os.path.isfile(file_path):
         console.print(f"[bold red]Error: File not found at '{file_path}'[/bold red]")
         return
-    if not file_path.endswith(".py"):
-        console.print(f"[bold red]Error: Input file must be a Python file (.py)[/bold red]")
+    if not is_package and not file_path.endswith(".py"):
+        console.print(f"[bold red]Error: Input file must be a Python file (.py) or a directory[/bold red]")
         return
 
-    console.print(f"Analyzing Python file: [cyan]{file_path}[/cyan]")
+    console.print(f"Analyzing Python {'package' if is_package else 'file'}: [cyan]{file_path}[/cyan]")
 
     # Determine effective output format and path
-    input_filename_base = os.path.splitext(os.path.basename(file_path))[0]
+    input_filename_base = os.path.splitext(os.path.basename(os.path.normpath(os.path.abspath(file_path))))[0]
     default_format = "gv"
     effective_format = default_format
 
@@ -128,22 +139,40 @@ def generate_visualization(
         else:
             final_output_path = output_dot_or_image_file
 
-    # --- Parse AST ---
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f: # Specify encoding
-            source_code = f.read()
-        tree = ast.parse(source_code, filename=file_path)
-    except Exception as e:
-        console.print(f"[bold red]Error reading or parsing file: {e}[/bold red]")
-        return
-
-    # --- Build Call Graph ---
-    visitor = CallGraphVisitor()
-    visitor.visit(tree)
-    call_graph_data = visitor.call_graph
-    if not call_graph_data:
-        console.print("[yellow]No function definitions or calls found within the file.[/yellow]")
-        return
+    if is_package:
+        # --- Parse every module in parallel and merge their call graphs ---
+        package_graph = build_package_call_graph(file_path, jobs=jobs, use_cache=use_cache)
+        if not package_graph.modules:
+            console.print("[yellow]No Python files found in the directory.[/yellow]")
+            return
+        for path, reason in package_graph.errors[:5]:
+            console.print(f"[yellow]Skipped {path}: {reason}[/yellow]")
+        if len(package_graph.errors) > 5:
+            console.print(f"[yellow]... and {len(package_graph.errors) - 5} more module(s) that could not be parsed.[/yellow]")
+        call_graph_data = package_graph.call_graph
+        edges = sum(len(callees) for callees in call_graph_data.values())
+        console.print(f"[grey50]{package_graph.modules} module(s) ({package_graph.cached} unchanged since the last run), "
+                      f"{len(call_graph_data)} function(s), {edges} call(s) within the package.[/grey50]")
+        if not call_graph_data:
+            console.print("[yellow]No function definitions found in the package.[/yellow]")
+            return
+    else:
+        # --- Parse AST ---
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f: # Specify encoding
+                source_code = f.read()
+            tree = ast.parse(source_code, filename=file_path)
+        except Exception as e:
+            console.print(f"[bold red]Error reading or parsing file: {e}[/bold red]")
+            return
+
+        # --- Build Call Graph ---
+        visitor = CallGraphVisitor()
+        visitor.visit(tree)
+        call_graph_data = visitor.call_graph
+        if not call_graph_data:
+            console.print("[yellow]No function definitions or calls found within the file.[/yellow]")
+            return
 
     # --- Generate Graphviz Object ---
     graph_name = input_filename_base + "_CallGraph"
@@ -0,0 +1,32 @@
+# tests/conftest.py
+
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(monkeypatch, tmp_path):
+    """Point the on-disk cache at a per-test temporary directory."""
+    cache_dir = tmp_path / "cstudio-cache"
+    monkeypatch.setenv("CSTUDIO_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(monkeypatch, tmp_path):
+    """Point persistent data (the usage ledger) at a per-test temporary directory."""
+    data_dir = tmp_path / "cstudio-data"
+    monkeypatch.setenv("CSTUDIO_DATA_DIR", str(data_dir))
+    return data_dir
+
+@pytest.fixture(autouse=True)
+def closed_circuit_breaker():
+    """Start every test with the process-wide circuit breakers closed."""
+    from codex_cli.core.resilience import reset_breakers
+    reset_breakers()
+    yield
+    reset_breakers()
+
+@pytest.fixture(autouse=True)
+def default_routing(monkeypatch, tmp_path):
+    """Use the built-in routing policy, ignoring any routing file or pinned model of the user."""
+    monkeypatch.setenv("CSTUDIO_ROUTING_FILE", str(tmp_path / "no-routing.toml"))
+    monkeypatch.delenv("CSTUDIO_MODEL", raising=False)
+    monkeypatch.delenv("CSTUDIO_NO_FALLBACK", raising=False)
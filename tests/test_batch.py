@@ -0,0 +1,174 @@
+# tests/test_batch.py
+
+import json
+
+from typer.testing import CliRunner
+
+from codex_cli import config
+from codex_cli.main import app
+from codex_cli.config import build_config_prompt
+from codex_cli.explain import build_explain_prompt
+from codex_cli.script import build_script_prompt
+from codex_cli.core import compact, openai_utils
+from codex_cli.core.ledger import UsageLedger, estimate_cost
+from codex_cli.core.routing import select_model
+
+runner = CliRunner()
+
+def write_jsonl(path, objects):
+    path.write_text("\n".join(json.dumps(o) for o in objects) + "\n", encoding="utf-8")
+    return path
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+def make_result(custom_id, content, status=200, model="gpt-4o"):
+    """Builds one line of a Batch API output file."""
+    body = {"model": model, "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50}}
+    if status != 200:
+        body = {"error": {"message": "Rate limit exceeded"}}
+    return {"id": f"batch_req_{custom_id}", "custom_id": custom_id, "response": {"status_code": status, "body": body}, "error": None}
+
+def make_tasks(tmp_path):
+    config_file = tmp_path / "app.yaml"
+    config_file.write_text("server:\n  port: 8080\n", encoding="utf-8")
+    tasks = [
+        {"command": "explain", "input": "ls -la", "id": "ls"},
+        {"command": "config", "path": str(config_file), "id": "app"},
+        {"command": "script", "task": "list large files", "type": "python", "id": "large"},
+    ]
+    return write_jsonl(tmp_path / "tasks.jsonl", tasks), config_file
+
+# --- Test Suite for 'batch prepare' ---
+
+def test_prepare_uses_interactive_prompt_builders(tmp_path):
+    """Each request carries exactly the prompt and model the interactive command would send."""
+    tasks_file, config_file = make_tasks(tmp_path)
+    output = tmp_path / "requests.jsonl"
+    result = runner.invoke(app, ["batch", "prepare", str(tasks_file), "-o", str(output)])
+    assert result.exit_code == 0
+    assert "Wrote 3 request(s)" in result.stdout
+
+    requests = read_jsonl(output)
+    assert [r["custom_id"] for r in requests] == ["explain:ls", "config:app", "script.python:large"]
+    assert all(r["method"] == "POST" and r["url"] == "/v1/chat/completions" for r in requests)
+    prompts = [r["body"]["messages"][-1]["content"] for r in requests]
+    assert prompts[0] == build_explain_prompt("ls -la", False, "basic", "en")
+    assert prompts[1] == build_config_prompt("app.yaml", config_file.read_text(), "YAML")
+    assert prompts[2] == build_script_prompt("list large files", "python")
+    assert requests[0]["body"]["messages"][0]["content"] == openai_utils.SYSTEM_MESSAGE
+
+def test_prepare_skips_invalid_and_duplicate_tasks(tmp_path):
+    """Invalid lines are reported and skipped without aborting the batch."""
+    tasks_file = tmp_path / "tasks.jsonl"
+    tasks_file.write_text("\n".join([
+        json.dumps({"command": "explain", "input": "pwd", "id": "a"}),
+        "not json",
+        json.dumps({"command": "explain", "input": "whoami", "id": "a"}),
+        json.dumps({"command": "script", "task": "x", "type": "cobol"}),
+        json.dumps({"command": "deploy"}),
+        json.dumps({"command": "config", "path": str(tmp_path / "missing.yaml")}),
+    ]), encoding="utf-8")
+    output = tmp_path / "requests.jsonl"
+    result = runner.invoke(app, ["batch", "prepare", str(tasks_file), "-o", str(output)])
+    assert result.exit_code == 0
+    assert len(read_jsonl(output)) == 1
+    assert "5 invalid task(s) skipped" in result.stdout
+    assert "duplicate id 'explain:a'" in result.stdout
+
+def test_prepare_skips_cached_tasks(tmp_path, mocker):
+    """Tasks already answered in the cache are left out unless --include-cached is given."""
+    tasks_file, _ = make_tasks(tmp_path)
+    prompt = build_explain_prompt("ls -la", False, "basic", "en")
+    openai_utils.get_response_cache().set(openai_utils.make_cache_key(select_model("explain", 3, "basic"), openai_utils.SYSTEM_MESSAGE, prompt), "cached")
+    output = tmp_path / "requests.jsonl"
+    runner.invoke(app, ["batch", "prepare", str(tasks_file), "-o", str(output)])
+    assert len(read_jsonl(output)) == 2
+    runner.invoke(app, ["batch", "prepare", str(tasks_file), "-o", str(output), "--include-cached"])
+    assert len(read_jsonl(output)) == 3
+
+# --- Test Suite for 'batch ingest' ---
+
+def test_ingest_fills_cache_for_interactive_commands(tmp_path, mocker):
+    """Ingested results answer the matching interactive command without an API call."""
+    tasks_file, config_file = make_tasks(tmp_path)
+    requests_file = tmp_path / "requests.jsonl"
+    runner.invoke(app, ["batch", "prepare", str(tasks_file), "-o", str(requests_file)])
+    results_file = write_jsonl(tmp_path / "results.jsonl", [
+        make_result("explain:ls", "Lists files in long format."),
+        make_result("config:app", "Configures the server port."),
+        make_result("script.python:large", "```python\nprint('large')\n```"),
+    ])
+
+    result = runner.invoke(app, ["batch", "ingest", str(results_file), "--requests", str(requests_file), "--no-render"])
+    assert result.exit_code == 0
+    assert "3 result(s) ingested, 3 stored in the cache" in result.stdout
+
+    get_client = mocker.patch('codex_cli.core.openai_utils.get_openai_client')
+    explained = runner.invoke(app, ["explain", "ls -la", "--no-stream"])
+    assert "Lists files in long format." in explained.stdout
+    configured = runner.invoke(app, ["config", "explain", str(config_file), "--no-stream"])
+    assert "Configures the server port." in configured.stdout
+    scripted = runner.invoke(app, ["script", "list large files", "-t", "python"])
+    assert "print('large')" in scripted.stdout
+    get_client.assert_not_called()
+
+def test_batch_prompts_match_compacted_and_skeleton_paths(tmp_path, mocker, monkeypatch):
+    """Large Python files are compacted and large configs sent as their skeleton, as interactively."""
+    monkeypatch.setattr(compact, "COMPACT_BUDGETS", {"basic": 200, "detailed": 400})
+    monkeypatch.setattr(config, "SKELETON_MIN_TOKENS", 1)
+    module = tmp_path / "module.py"
+    module.write_text("\n\n".join(f'def handler_{i}(event):\n    """Handles event {i}."""\n    return event * {i} + sum(range({i}))'
+                                  for i in range(60)), encoding="utf-8")
+    config_file = tmp_path / "app.yaml"
+    config_file.write_text("server:\n  port: 8080\n", encoding="utf-8")
+    tasks_file = write_jsonl(tmp_path / "tasks.jsonl", [
+        {"command": "explain", "input": str(module), "id": "module"},
+        {"command": "config", "path": str(config_file), "id": "app"},
+    ])
+    requests_file = tmp_path / "requests.jsonl"
+    runner.invoke(app, ["batch", "prepare", str(tasks_file), "-o", str(requests_file)])
+    prompts = [r["body"]["messages"][-1]["content"] for r in read_jsonl(requests_file)]
+    assert "Parts of the file were elided" in prompts[0]
+    assert "structural skeleton" in prompts[1]
+
+    results_file = write_jsonl(tmp_path / "results.jsonl", [
+        make_result("explain:module", "Defines sixty handlers."),
+        make_result("config:app", json.dumps({"overview": "Configures the server.", "paths": {"server.port": "Port to listen on."}})),
+    ])
+    runner.invoke(app, ["batch", "ingest", str(results_file), "--requests", str(requests_file), "--no-render"])
+
+    get_client = mocker.patch('codex_cli.core.openai_utils.get_openai_client')
+    explained = runner.invoke(app, ["explain", str(module), "--no-stream"])
+    assert "Defines sixty handlers." in explained.stdout
+    configured = runner.invoke(app, ["config", "explain", str(config_file), "--no-stream"])
+    assert "Configures the server." in configured.stdout and "Port to listen on." in configured.stdout
+    get_client.assert_not_called()
+
+def test_ingest_writes_outputs_and_reports_failures(tmp_path):
+    """Results are written one file per task; failed requests are counted and recorded."""
+    results_file = write_jsonl(tmp_path / "results.jsonl", [
+        make_result("explain:ls", "Lists files."),
+        make_result("script.bash:cleanup", "```bash\nrm -rf ./tmp\n```"),
+        make_result("config:app", "", status=429),
+    ])
+    out_dir = tmp_path / "out"
+    result = runner.invoke(app, ["batch", "ingest", str(results_file), "-o", str(out_dir)])
+    assert result.exit_code == 0
+    assert (out_dir / "ls.md").read_text() == "Lists files.\n"
+    assert (out_dir / "cleanup.sh").read_text() == "rm -rf ./tmp\n"
+    assert "config:app: HTTP 429 Rate limit exceeded" in result.stdout
+    assert "1 failed" in result.stdout
+
+    records = UsageLedger().records()
+    assert [r.status for r in records] == ["ok", "ok", "error"]
+    assert all(r.command == "batch ingest" for r in records)
+    # Batch requests are priced at half the synchronous rate
+    assert records[0].cost == estimate_cost("gpt-4o", 100, 50) * 0.5
+
+def test_ingest_all_failed_exits_with_error(tmp_path):
+    """A results file with only failures exits with a non-zero code."""
+    results_file = write_jsonl(tmp_path / "results.jsonl", [make_result("explain:x", "", status=500)])
+    result = runner.invoke(app, ["batch", "ingest", str(results_file)])
+    assert result.exit_code != 0
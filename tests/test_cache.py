@@ -0,0 +1,145 @@
+# tests/test_cache.py
+
+import os
+import time
+import pytest
+from types import SimpleNamespace
+from typer.testing import CliRunner
+
+from codex_cli.main import app
+from codex_cli.core import cache as cache_module, openai_utils
+from codex_cli.core.cache import ResponseCache, make_cache_key
+
+runner = CliRunner()
+
+def make_completion(content: str):
+    """Builds an object shaped like a chat completion response."""
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+@pytest.fixture
+def mock_client(mocker):
+    """Replace the shared OpenAI client with a mock."""
+    client = mocker.MagicMock()
+    client.chat.completions.create.return_value = make_completion("fresh answer")
+    mocker.patch('codex_cli.core.openai_utils.get_openai_client', return_value=client)
+    return client
+
+# --- Test Suite for ResponseCache ---
+
+def test_cache_key_depends_on_all_parts():
+    """Model, system message and prompt all change the key."""
+    base = make_cache_key("gpt-4o", "system", "prompt")
+    assert base == make_cache_key("gpt-4o", "system", "prompt")
+    assert base != make_cache_key("gpt-4o-mini", "system", "prompt")
+    assert base != make_cache_key("gpt-4o", "other", "prompt")
+    assert base != make_cache_key("gpt-4o", "system", "prompt!")
+
+@pytest.mark.parametrize("compression", ["zlib", "lzma"])
+def test_cache_roundtrip(tmp_path, compression):
+    """Stored responses are read back unchanged with either codec."""
+    cache = ResponseCache(tmp_path, compression=compression)
+    key = make_cache_key("m", "s", "p")
+    assert cache.get(key) is None
+    cache.set(key, "héllo " * 100)
+    assert cache.get(key) == "héllo " * 100
+    entry_file = next(tmp_path.glob("*/*.entry"))
+    assert entry_file.stat().st_size < len("héllo " * 100) # Compressed on disk
+    assert not list(tmp_path.glob("*/.tmp-*")) # No temporary files left behind
+
+def test_cache_ttl_expiry(tmp_path, monkeypatch):
+    """Entries older than the TTL are misses and get removed."""
+    cache = ResponseCache(tmp_path, ttl=10)
+    key = make_cache_key("m", "s", "p")
+    cache.set(key, "old")
+    assert cache.get(key) == "old"
+
+    later = time.time() + 11
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get(key) is None
+    assert not list(tmp_path.glob("*/*.entry"))
+
+def test_cache_lru_eviction(tmp_path):
+    """The least recently used entries are evicted once the size cap is exceeded."""
+    cache = ResponseCache(tmp_path, max_bytes=0)
+    keys = [make_cache_key("m", "s", str(i)) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.set(key, os.urandom(400).hex()) # Incompressible payloads
+        path = cache._entry_path(key)
+        os.utime(path, (1000 + i, 1000 + i))
+    total_size = sum(cache._entry_path(key).stat().st_size for key in keys)
+    os.utime(cache._entry_path(keys[0]), (2000, 2000)) # Key 0 was used most recently
+
+    cache.max_bytes = total_size - 1 # Room for all but one entry
+    cache.evict()
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None # Oldest access time
+    assert cache.get(keys[2]) is not None
+
+def test_cache_writes_keep_a_running_size(tmp_path, mocker, monkeypatch):
+    """Writes under the cap adjust the stored total instead of listing the cache; crossing the cap evicts."""
+    monkeypatch.setattr(cache_module, "RESCAN_EVERY", 10**9)
+    cache = ResponseCache(tmp_path, max_bytes=10**6)
+    keys = [make_cache_key("m", "s", str(i)) for i in range(5)]
+    cache.set(keys[0], os.urandom(400).hex()) # No total yet: counted from disk
+    scan = mocker.spy(cache, "_entries")
+    for key in keys[1:]:
+        cache.set(key, os.urandom(400).hex())
+    cache.set(keys[1], os.urandom(400).hex()) # Replacing an entry counts only the difference
+    assert scan.call_count == 0
+    assert cache._read_size() == sum(cache._entry_path(key).stat().st_size for key in keys)
+
+    cache.max_bytes = cache._read_size() + 100
+    cache.set(make_cache_key("m", "s", "new"), os.urandom(400).hex())
+    assert scan.call_count == 1
+    assert cache._read_size() <= cache.max_bytes
+    assert len(list(tmp_path.glob("*/*.entry"))) == 5 # The least recently used entry was evicted
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    """Unreadable entries are dropped instead of raising."""
+    cache = ResponseCache(tmp_path)
+    key = make_cache_key("m", "s", "p")
+    cache.set(key, "value")
+    cache._entry_path(key).write_bytes(b"garbage")
+    assert cache.get(key) is None
+
+# --- get_openai_response integration ---
+
+def test_response_served_from_cache(mock_client):
+    """A repeated request is answered from the cache without an API call."""
+    assert openai_utils.get_openai_response("explain this") == "fresh answer"
+    assert openai_utils.get_openai_response("explain this") == "fresh answer"
+    assert mock_client.chat.completions.create.call_count == 1
+
+def test_response_no_cache(mock_client):
+    """use_cache=False always calls the API and stores nothing."""
+    openai_utils.get_openai_response("explain this", use_cache=False)
+    openai_utils.get_openai_response("explain this", use_cache=False)
+    assert mock_client.chat.completions.create.call_count == 2
+    assert openai_utils.get_response_cache()._entries() == []
+
+def test_response_refresh(mock_client):
+    """refresh=True skips the cached value but stores the new one."""
+    openai_utils.get_openai_response("explain this")
+    mock_client.chat.completions.create.return_value = make_completion("newer answer")
+    assert openai_utils.get_openai_response("explain this", refresh=True) == "newer answer"
+    assert openai_utils.get_openai_response("explain this") == "newer answer"
+    assert mock_client.chat.completions.create.call_count == 2
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        (["explain", "ls", "--no-cache"], {"use_cache": False, "refresh": False}),
+        (["explain", "ls", "--refresh"], {"use_cache": True, "refresh": True}),
+        (["script", "list files", "--no-cache"], {"use_cache": False, "refresh": False}),
+    ]
+)
+def test_cache_flags_reach_api_call(mocker, argv, expected):
+    """--no-cache and --refresh are passed through to get_openai_response."""
+    module = argv[0]
+    mock_api_call = mocker.patch(f'codex_cli.{module}.get_openai_response', return_value="ok")
+    result = runner.invoke(app, argv)
+    assert result.exit_code == 0
+    args, kwargs = mock_api_call.call_args
+    for name, value in expected.items():
+        assert kwargs[name] == value
@@ -0,0 +1,151 @@
+# tests/test_callgraph.py
+
+import os
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from codex_cli.main import app
+from codex_cli.core import callgraph
+from codex_cli.core.callgraph import analyze_modules, build_package_call_graph, discover_modules
+
+runner = CliRunner()
+
+PACKAGE = {
+    "shop/__init__.py": "from .store import Store\nfrom .util import slugify as make_slug\n",
+    "shop/util.py": """
+def slugify(text):
+    return normalize(text).replace(" ", "-")
+
+def normalize(text):
+    return text.strip().lower()
+""",
+    "shop/store.py": """
+from . import util
+from .util import normalize
+
+class Store:
+    def __init__(self, name):
+        self.slug = util.slugify(name)
+
+    def save(self):
+        self.validate()
+        return normalize(self.slug)
+
+    def validate(self):
+        return len(self.slug) > 0
+""",
+    "shop/api/__init__.py": "",
+    "shop/api/views.py": """
+import json
+import shop.util
+from shop import Store, make_slug
+from ..store import Store as S
+
+def create(name):
+    store = Store(name)
+    store.save()
+    print(json.dumps({"slug": make_slug(name)}))
+    return S(name), shop.util.normalize(name)
+""",
+    "shop/broken.py": "def oops(:\n",
+}
+
+def write_package(root: Path) -> Path:
+    for name, source in PACKAGE.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+    return root / "shop"
+
+def test_discover_modules_names_by_package(tmp_path):
+    package = write_package(tmp_path)
+    names = {name: is_package for _, name, is_package in discover_modules(package)}
+
+    # The empty shop/api/__init__.py defines nothing and is skipped, but still makes `api` a package
+    assert names == {"shop": True, "shop.api.views": False, "shop.broken": False, "shop.store": False, "shop.util": False}
+
+def test_calls_are_resolved_across_modules(tmp_path):
+    """Calls resolve through imports (absolute, relative, aliased, re-exported) and self; builtins are dropped."""
+    result = build_package_call_graph(write_package(tmp_path), jobs=1)
+    graph = result.call_graph
+
+    assert graph["shop.util.slugify"] == {"shop.util.normalize"}
+    assert graph["shop.store.Store.__init__"] == {"shop.util.slugify"}
+    assert graph["shop.store.Store.save"] == {"shop.store.Store.validate", "shop.util.normalize"}
+    assert graph["shop.api.views.create"] == {"shop.store.Store.__init__", "shop.util.slugify", "shop.util.normalize"}
+    assert result.modules == 5
+    assert [Path(path).name for path, _ in result.errors] == ["broken.py"]
+
+def test_parallel_analysis_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(callgraph, "PARALLEL_MIN_MODULES", 1)
+    modules = discover_modules(write_package(tmp_path))
+
+    assert analyze_modules(modules, jobs=2) == analyze_modules(modules, jobs=1)
+
+def test_visualize_package_directory(tmp_path):
+    package = write_package(tmp_path)
+    output = tmp_path / "shop.gv"
+
+    result = runner.invoke(app, ["visualize", str(package), "-o", str(output), "-j", "1"])
+
+    assert result.exit_code == 0
+    assert "5 module(s)" in result.stdout
+    assert "Skipped" in result.stdout
+    dot = output.read_text()
+    assert '"shop.api.views.create" -> "shop.util.slugify"' in dot
+    assert "print" not in dot
+
+# --- Fragment cache ---
+
+def test_fragment_cache_reparses_only_changed_files(tmp_path, mocker):
+    package = write_package(tmp_path)
+    first = build_package_call_graph(package, jobs=1)
+    assert first.cached == 0
+
+    spy = mocker.spy(callgraph, "analyze_module")
+    second = build_package_call_graph(package, jobs=1)
+    assert second.cached == 5
+    assert spy.call_count == 0
+    assert second.call_graph == first.call_graph
+    assert second.errors == first.errors # Files that did not parse are cached as such
+
+    (package / "util.py").write_text("def slugify(text):\n    return text\n")
+    third = build_package_call_graph(package, jobs=1)
+    assert third.cached == 4
+    assert [call.args[0] for call in spy.call_args_list] == [str(package / "util.py")]
+    assert third.call_graph["shop.util.slugify"] == set()
+    assert "shop.util.normalize" not in third.call_graph
+
+def test_fragment_cache_checks_the_hash_when_only_the_mtime_changed(tmp_path, mocker):
+    package = write_package(tmp_path)
+    build_package_call_graph(package, jobs=1)
+    util = package / "util.py"
+    stat = util.stat()
+    os.utime(util, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    spy = mocker.spy(callgraph, "analyze_module")
+    assert build_package_call_graph(package, jobs=1).cached == 5
+    assert spy.call_count == 0
+
+def test_fragment_cache_ignores_other_versions_and_can_be_disabled(tmp_path, monkeypatch):
+    package = write_package(tmp_path)
+    build_package_call_graph(package, jobs=1)
+
+    assert build_package_call_graph(package, jobs=1, use_cache=False).cached == 0
+    monkeypatch.setattr(callgraph, "FRAGMENT_VERSION", "0-test")
+    assert build_package_call_graph(package, jobs=1).cached == 0
+    assert build_package_call_graph(package, jobs=1).cached == 5
+
+def test_fragment_cache_trusts_stat_only_after_racy_window(tmp_path, mocker):
+    """A file cached right after it was written is verified by hash instead of trusting its mtime."""
+    package = write_package(tmp_path)
+    build_package_call_graph(package, jobs=1)
+    read = mocker.spy(callgraph.hashlib, "sha256")
+
+    build_package_call_graph(package, jobs=1)
+    assert read.call_count == 5 # Just written: every file is hashed once
+    read.reset_mock()
+    mocker.patch.object(callgraph, "RACY_MTIME_NS", -10**12)
+    build_package_call_graph(package, jobs=1)
+    assert read.call_count == 0
@@ -0,0 +1,172 @@
+# tests/test_chunking.py
+
+import asyncio
+import itertools
+from pathlib import Path
+from types import SimpleNamespace
+from typer.testing import CliRunner
+
+from codex_cli.main import app
+from codex_cli.core import chunking
+from codex_cli.core.chunking import count_tokens, iter_chunks, map_reduce
+
+runner = CliRunner()
+
+def make_python_module(functions: int, body_lines: int = 20) -> str:
+    """Builds a module of decorated top-level functions."""
+    parts = []
+    for i in range(functions):
+        body = "".join(f"    value_{j} = compute({j}, {i})\n" for j in range(body_lines))
+        parts.append(f"@decorator\ndef function_{i}(arg):\n{body}    return value_0\n\n")
+    return "".join(parts)
+
+# --- Test Suite for iter_chunks ---
+
+def test_chunks_cover_input_within_budget():
+    """Chunks reassemble to the input and respect the token budget."""
+    source = make_python_module(30)
+    chunks = list(iter_chunks(source.splitlines(keepends=True), max_tokens=400, language="python"))
+    assert len(chunks) > 1
+    assert "".join(chunk.text for chunk in chunks) == source
+    assert all(chunk.tokens <= 400 for chunk in chunks)
+    # Line numbers are contiguous
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.start_line == previous.end_line + 1
+
+def test_chunks_cut_before_definitions():
+    """Python chunks start at a decorator/definition, never between them."""
+    source = make_python_module(30)
+    chunks = list(iter_chunks(source.splitlines(keepends=True), max_tokens=400, language="python"))
+    for chunk in chunks:
+        assert chunk.text.startswith("@decorator\ndef function_")
+
+def test_oversized_line_is_split():
+    """A single line larger than the budget is split into several chunks."""
+    line = "x" * 4000 + "\n"
+    chunks = list(iter_chunks([line], max_tokens=100))
+    assert len(chunks) > 1
+    assert "".join(chunk.text for chunk in chunks) == line
+
+def test_chunks_are_produced_lazily():
+    """Chunks are yielded while the input is still being read."""
+    endless = ("line %d\n" % i for i in itertools.count())
+    first_two = list(itertools.islice(iter_chunks(endless, max_tokens=50), 2))
+    assert [chunk.index for chunk in first_two] == [0, 1]
+
+def test_count_tokens_heuristic(monkeypatch):
+    """Without tiktoken, about four characters count as one token."""
+    monkeypatch.setattr(chunking, "_get_encoding", lambda model: None)
+    assert count_tokens("a" * 40) == 10
+
+# --- Test Suite for map_reduce ---
+
+class FakeAsyncClient:
+    """Stands in for AsyncOpenAI, answering prompts via `respond` and tracking concurrency."""
+    def __init__(self, respond, delay=lambda prompt: 0.01):
+        self.respond, self.delay = respond, delay
+        self.prompts: list[str] = []
+        self.in_flight = self.max_in_flight = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay(prompt))
+        finally:
+            self.in_flight -= 1
+        answer = self.respond(prompt)
+        if answer is None:
+            raise RuntimeError("request failed")
+        message = SimpleNamespace(content=answer)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    async def close(self):
+        self.closed = True
+
+def test_map_reduce_merges_partials(mocker):
+    """Every chunk is explained once over a single client and the notes are merged in order."""
+    fake = FakeAsyncClient(lambda p: "merged" if p.startswith("final") else f"notes {p}",
+                           delay=lambda p: 0.05 if p == "0" else 0.01) # The first chunk finishes last
+    build = mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+    chunks = iter_chunks([f"line {i}\n" for i in range(100)], max_tokens=40)
+
+    result = map_reduce(chunks, lambda c: str(c.index), lambda partials, final: "final " + "|".join(partials),
+                        max_concurrency=4, use_cache=False)
+    assert result == "merged"
+    build.assert_called_once()
+    assert fake.closed
+    explained = sorted((p for p in fake.prompts if not p.startswith("final")), key=int)
+    assert explained == [str(i) for i in range(len(explained))]
+    assert fake.max_in_flight == 4 # Slots refill while the slow first chunk is still running
+    assert fake.prompts.index("0") == 0 and fake.prompts.index("4") < len(explained) - 1
+    final_prompt = fake.prompts[-1]
+    assert final_prompt.index("notes 0") < final_prompt.index("notes 1")
+
+def test_map_reduce_pulls_chunks_lazily(mocker):
+    """Chunks are taken from the iterable only as request slots free up."""
+    taken, answered, ahead = [], [], []
+    def respond(prompt):
+        ahead.append(len(taken) - len(answered))
+        answered.append(prompt)
+        return "notes"
+    fake = FakeAsyncClient(respond)
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+    def chunks():
+        for chunk in iter_chunks([f"line {i}\n" for i in range(100)], max_tokens=10):
+            taken.append(chunk)
+            yield chunk
+
+    assert map_reduce(chunks(), lambda c: f"map {c.index}", lambda partials, final: "reduce", max_concurrency=3, use_cache=False)
+    assert len(taken) > 6 and max(ahead) <= 3
+
+def test_map_reduce_hierarchical_reduce(mocker):
+    """Partial results over the reduce budget are merged in several rounds."""
+    fake = FakeAsyncClient(lambda p: "x" * 200 if p.startswith("map") else "short merge")
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+    chunks = iter_chunks([f"line {i}\n" for i in range(200)], max_tokens=40)
+
+    result = map_reduce(chunks, lambda c: f"map {c.index}", lambda partials, final: "final" if final else "reduce",
+                        reduce_max_tokens=200, use_cache=False)
+    assert result == "short merge"
+    assert "reduce" in fake.prompts and fake.prompts[-1] == "final"
+
+def test_map_reduce_all_chunks_failed(mocker):
+    """None is returned when no chunk could be explained, without a merge request."""
+    fake = FakeAsyncClient(lambda p: None)
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+    chunks = iter_chunks([f"line {i}\n" for i in range(50)], max_tokens=40)
+    assert map_reduce(chunks, lambda c: f"p {c.index}", lambda partials, final: "r", use_cache=False) is None
+    assert "r" not in fake.prompts
+
+# --- Command integration ---
+
+def test_explain_large_file_uses_chunking(mocker, tmp_path: Path):
+    """Files over the threshold are explained via map-reduce, not one prompt."""
+    mocker.patch('codex_cli.explain.CHUNK_THRESHOLD_TOKENS', 100)
+    mock_map_reduce = mocker.patch('codex_cli.explain.map_reduce', return_value="Chunked explanation")
+    mock_api_call = mocker.patch('codex_cli.explain.get_openai_response')
+    big_file = tmp_path / "big.py"
+    big_file.write_text(make_python_module(10))
+
+    result = runner.invoke(app, ["explain", str(big_file)])
+    assert result.exit_code == 0
+    assert "explaining in chunks" in result.stdout
+    assert "Chunked explanation" in result.stdout
+    mock_map_reduce.assert_called_once()
+    mock_api_call.assert_not_called()
+
+def test_config_explain_large_file_uses_chunking(mocker, tmp_path: Path):
+    """Large configuration files go through map-reduce as well."""
+    mocker.patch('codex_cli.config.CHUNK_THRESHOLD_TOKENS', 10)
+    mock_map_reduce = mocker.patch('codex_cli.config.map_reduce', return_value="Chunked config explanation")
+    big_file = tmp_path / "values.yaml"
+    big_file.write_text("".join(f"key_{i}: value\n" for i in range(100)))
+
+    result = runner.invoke(app, ["config", "explain", str(big_file)])
+    assert result.exit_code == 0
+    assert "Chunked config explanation" in result.stdout
+    mock_map_reduce.assert_called_once()
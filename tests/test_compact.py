@@ -0,0 +1,73 @@
+# tests/test_compact.py
+
+import ast
+
+from codex_cli.core.compact import budget_for, compact_python
+from codex_cli.core.chunking import count_tokens
+
+SOURCE = '''"""Inventory helpers.
+
+A long module docstring
+that goes on
+for several lines.
+"""
+import os
+
+PRICES = {''' + ", ".join(f'"item{i}": {i}' for i in range(60)) + '''}
+
+@cached
+def restock(items, limit=10):
+    """Restock items."""
+    for item in items:
+        if item.low:
+            while item.count < limit:
+                item.count += 1  # deep
+    return items
+
+class Store:
+    """A store."""
+
+    def get(self, key): return key
+
+    def report(self):
+        lines = []
+        for name, price in PRICES.items():
+            lines.append(f"{name}: {price}")
+        return "\\n".join(lines)
+'''
+
+def test_source_within_budget_is_unchanged():
+    result = compact_python(SOURCE, 100000)
+    assert result.text == SOURCE and not result.compacted
+    assert result.tokens == result.original_tokens
+
+def test_literals_and_docstrings_are_elided_first():
+    tokens = count_tokens(SOURCE)
+    result = compact_python(SOURCE, tokens - 1)
+    assert result.elided == ["long docstrings trimmed", "large literals elided"]
+    assert '"""Inventory helpers. [docstring trimmed: 4 more lines]"""' in result.text
+    assert "PRICES = {...}  # elided: dict of 60 items" in result.text
+    assert "item.count += 1  # deep" in result.text # Bodies intact
+    ast.parse(result.text)
+
+def test_deep_blocks_then_bodies_are_elided():
+    trimmed = compact_python(SOURCE, count_tokens(SOURCE) - 1)
+    deeper = compact_python(SOURCE, trimmed.tokens - 1)
+    assert deeper.elided[-1] == "blocks nested deeper than 3 levels elided"
+    assert "while item.count < limit:\n                ...  # 1 line elided" in deeper.text
+
+    signatures = compact_python(SOURCE, 1)
+    assert signatures.elided[-1] == "function bodies elided (signatures kept)"
+    assert '@cached\ndef restock(items, limit=10):\n    """Restock items."""\n    ...  # 5 lines elided' in signatures.text
+    assert "    def report(self):\n        ...  # 4 lines elided" in signatures.text
+    assert "def get(self, key): return key" in signatures.text # One-line bodies are kept
+    assert signatures.tokens < deeper.tokens < trimmed.tokens
+    ast.parse(signatures.text)
+
+def test_unparsable_source_is_returned_as_is():
+    source = "def broken(:\n" + "x = 1\n" * 500
+    assert compact_python(source, 10).text == source
+
+def test_budget_for_detail():
+    assert budget_for("detailed") > budget_for("basic")
+    assert budget_for("BASIC") == budget_for("unknown")
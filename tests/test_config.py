@@ -4,6 +4,7 @@ import pytest
 from typer.testing import CliRunner
 from pathlib import Path
 import os
+import subprocess
 
 # Import the main app and config module specifics
 from codex_cli.main import app
@@ -101,4 +102,126 @@ def test_config_explain_api_failure(mocker, tmp_path: Path):
     assert result.exit_code == 0
     assert "Failed to get explanation from OpenAI" in result.stdout
     assert "Configuration File Explanation:" not in result.stdout # No explanation title
-    mock_api_call.assert_called_once()
\ No newline at end of file
+    mock_api_call.assert_called_once()
+def test_config_explain_binary_file(mocker, tmp_path: Path):
+    """Binary files are rejected before any request."""
+    mock_api_call = mocker.patch('codex_cli.config.get_openai_response')
+    input_file: Path = tmp_path / "settings.db"
+    input_file.write_bytes(b"SQLite format 3\0" + bytes(256))
+    result = runner.invoke(app, ["config", "explain", str(input_file)])
+
+    assert "appears to be a binary file" in " ".join(result.stdout.split())
+    mock_api_call.assert_not_called()
+
+def test_config_explain_samples_file_over_cap(mocker, tmp_path: Path):
+    """A file over the size cap is sampled into one request instead of being chunked."""
+    mock_api_call = mocker.patch('codex_cli.config.get_openai_response', return_value=MOCK_CONFIG_EXPLANATION)
+    mocker.patch('codex_cli.config.MAX_INPUT_BYTES', 1000)
+    input_file: Path = tmp_path / "generated.yaml"
+    input_file.write_text("".join(f"key_{i}: value_{i}\n" for i in range(5000)))
+    result = runner.invoke(app, ["config", "explain", str(input_file), "--no-stream", "--raw"])
+
+    assert result.exit_code == 0
+    mock_api_call.assert_called_once()
+    prompt = mock_api_call.call_args.args[0]
+    assert "too large to send whole" in prompt and "bytes omitted" in prompt
+    assert "key_0: value_0" in prompt and "key_4999: value_4999" in prompt
+
+def _compose_file(tmp_path: Path, name: str = "docker-compose.yml", services: int = 80) -> Path:
+    lines = ["version: '3.8'", "services:"]
+    for i in range(services):
+        lines += [f"  svc{i}:", f"    image: registry.example.com/svc{i}:1.{i}", "    ports:", f"      - '{8000 + i}:80'",
+                  "    environment:", "      LOG_LEVEL: info", f"      SERVICE_NAME: svc{i}"]
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+def test_config_explain_large_file_uses_skeleton(mocker, tmp_path: Path):
+    """Large structured configs are explained from their skeleton, with a table of key paths."""
+    response = '```json\n{"overview": "A Compose stack.", "paths": {"services.*.image": "Container image.", "services.*.ports[]": "Port mapping."}}\n```'
+    mock_api_call = mocker.patch('codex_cli.config.get_openai_response', return_value=response)
+    input_file = _compose_file(tmp_path)
+    result = runner.invoke(app, ["config", "explain", str(input_file), "--no-stream"])
+
+    assert result.exit_code == 0
+    prompt = mock_api_call.call_args.args[0]
+    assert "80 similar `services.*` entries" in prompt
+    assert "- `services.*.ports[]`" in prompt
+    assert "svc79:1.79" not in prompt # Not the full text
+    assert len(prompt) < input_file.stat().st_size
+    assert "A Compose stack." in result.stdout and "Container image." in result.stdout
+
+def test_config_explain_reuses_key_path_explanations(mocker, tmp_path: Path):
+    """Key-path explanations from one file are reused for another file with the same paths."""
+    first = '{"overview": "First.", "paths": {"services.*.image": "Container image."}}'
+    mock_api_call = mocker.patch('codex_cli.config.get_openai_response', return_value=first)
+    runner.invoke(app, ["config", "explain", str(_compose_file(tmp_path, "a.yml")), "--no-stream"])
+
+    mock_api_call.return_value = '{"overview": "Second.", "paths": {}}'
+    result = runner.invoke(app, ["config", "explain", str(_compose_file(tmp_path, "b.yml", services=100)), "--no-stream"])
+    prompt = mock_api_call.call_args.args[0]
+    assert "- `services.*.image`: Container image." in prompt # Sent as known context...
+    wanted = prompt.split("Key paths to explain:")[1]
+    assert "`services.*.image`" not in wanted # ...not asked for again
+    assert "Container image." in result.stdout
+    assert "Reused 1 of" in " ".join(result.stdout.split())
+
+def test_config_explain_raw_and_unparsable(mocker, tmp_path: Path):
+    """--raw sends the text; a forced skeleton of an unparsable file falls back to the text."""
+    mock_api_call = mocker.patch('codex_cli.config.get_openai_response', return_value=MOCK_CONFIG_EXPLANATION)
+    input_file = _compose_file(tmp_path)
+    runner.invoke(app, ["config", "explain", str(input_file), "--no-stream", "--raw"])
+    assert "svc79:1.79" in mock_api_call.call_args.args[0]
+
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"a": [1, 2')
+    result = runner.invoke(app, ["config", "explain", str(broken), "--no-stream", "--skeleton"])
+    assert "Could not parse the file" in result.stdout
+    assert '{"a": [1, 2' in mock_api_call.call_args.args[0]
+    assert MOCK_CONFIG_EXPLANATION in result.stdout
+
+def test_config_explain_two_versions_sends_only_changes(mocker, tmp_path: Path):
+    """Two files: only the changed key paths are sent, whatever the file size."""
+    mock_api_call = mocker.patch('codex_cli.config.get_openai_response', return_value="Replicas went up.")
+    services = "".join(f"  svc{i}:\n    image: img:{i}\n    replicas: 1\n" for i in range(500))
+    old_file, new_file = tmp_path / "old.yaml", tmp_path / "new.yaml"
+    old_file.write_text("services:\n" + services)
+    new_file.write_text("services:\n" + services.replace("image: img:7\n    replicas: 1", "image: img:7\n    replicas: 3"))
+    result = runner.invoke(app, ["config", "explain", str(old_file), str(new_file), "--no-stream"])
+
+    assert result.exit_code == 0
+    prompt = mock_api_call.call_args.args[0]
+    assert "~ services.svc7.replicas: 1 → 3" in prompt
+    assert "svc8" not in prompt and len(prompt) < 3000
+    assert "Configuration Change Explanation:" in result.stdout and "Replicas went up." in result.stdout
+
+def test_config_explain_equivalent_versions_skip_the_request(mocker, tmp_path: Path):
+    mock_api_call = mocker.patch('codex_cli.config.get_openai_response')
+    (tmp_path / "a.json").write_text('{"a": 1, "b": [1, 2]}')
+    (tmp_path / "b.json").write_text('{\n  "b": [1, 2],\n  "a": 1\n}\n')
+    result = runner.invoke(app, ["config", "explain", str(tmp_path / "a.json"), str(tmp_path / "b.json")])
+    assert "No structural changes" in result.stdout
+    mock_api_call.assert_not_called()
+
+def test_config_explain_rev_and_text_fallback(mocker, tmp_path: Path):
+    """--rev diffs against git; formats that do not parse are compared as text."""
+    mock_api_call = mocker.patch('codex_cli.config.get_openai_response', return_value=MOCK_CONFIG_EXPLANATION)
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+    git("init", "-q")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "Test")
+    nginx = tmp_path / "nginx.conf"
+    nginx.write_text("server {\n  listen 80;\n  server_name example.com;\n}\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "base")
+    nginx.write_text("server {\n  listen 443 ssl;\n  server_name example.com;\n}\n")
+    result = runner.invoke(app, ["config", "explain", str(nginx), "--rev", "HEAD", "--no-stream"])
+
+    assert result.exit_code == 0
+    prompt = mock_api_call.call_args.args[0]
+    assert "unified diff" in prompt and "-  listen 80;" in prompt and "+  listen 443 ssl;" in prompt
+    assert '"nginx.conf@HEAD"' in prompt
+
+    missing = runner.invoke(app, ["config", "explain", str(nginx), "--rev", "no-such-rev"])
+    assert "does not exist at revision" in " ".join(missing.stdout.split())
@@ -0,0 +1,45 @@
+# tests/test_config_diff.py
+
+from codex_cli.core.config_diff import PathChange, diff_values, format_change, format_changes, item_identity
+
+OLD = {
+    "spec": {"replicas": 2, "template": {"spec": {"containers": [
+        {"name": "api", "image": "api:1", "env": [{"name": "A", "value": "1"}]},
+        {"name": "sidecar", "image": "proxy:1"},
+    ]}}},
+    "args": ["--verbose", "--port", "80"],
+    "debug": True,
+}
+
+NEW = {
+    "spec": {"replicas": 5, "template": {"spec": {"containers": [
+        {"name": "sidecar", "image": "proxy:1"}, # Reordered: not a change
+        {"name": "api", "image": "api:2", "env": [{"name": "A", "value": "1"}, {"name": "B", "value": "x"}],
+         "resources": {"limits": {"memory": "512Mi"}}},
+    ]}}},
+    "args": ["--verbose", "--port", "8080"],
+}
+
+def test_diff_matches_list_items_by_identity():
+    changes = [format_change(change) for change in diff_values(OLD, NEW)]
+    assert changes == [
+        "~ spec.replicas: 2 → 5",
+        '~ spec.template.spec.containers[name=api].image: "api:1" → "api:2"',
+        '+ spec.template.spec.containers[name=api].env[name=B]: {"name": "B", "value": "x"}',
+        '+ spec.template.spec.containers[name=api].resources: {"limits": {"memory": "512Mi"}}',
+        '~ args[2]: "80" → "8080"',
+        "- debug: true",
+    ]
+
+def test_identical_values_and_type_changes():
+    assert diff_values(OLD, OLD) == []
+    assert diff_values({"port": 80}, {"port": "80"}) == [PathChange("port", "changed", 80, "80")]
+    assert item_identity({"kind": "Service", "metadata": {"name": "web", "namespace": "prod"}}) == "Service/prod/web"
+    assert item_identity({"port": 80}) is None
+
+def test_normalized_paths_and_overflow():
+    change = PathChange("spec.containers[name=api].env[3].value", "changed", "a", "b")
+    assert change.normalized == "spec.containers[].env[].value"
+    many = diff_values({"items": [{"v": i} for i in range(50)]}, {"items": [{"v": -i - 1} for i in range(50)]})
+    text = format_changes(many, limit=10)
+    assert text.count("\n~ ") == 9 and text.endswith("… 40 more change(s) under items[].v")
@@ -0,0 +1,128 @@
+# tests/test_diff.py
+
+import json
+import subprocess
+
+import pytest
+from typer.testing import CliRunner
+
+from codex_cli.main import app
+from codex_cli.core.git import parse_diff
+from codex_cli.diff import extract_units
+
+runner = CliRunner()
+
+ORIGINAL = '''import os
+
+LIMIT = 10
+
+def keep(x):
+    return x + 1
+
+def change(items):
+    return [i for i in items if i]
+
+class Store:
+    def get(self, key):
+        return key
+'''
+
+EDITED = '''import os
+
+LIMIT = 10
+
+def keep(x):
+    # Comment only; same AST
+    return x + 1
+
+def change(items):
+    return [i * 2 for i in items if i]
+
+def added():
+    return LIMIT
+'''
+
+def git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A git repository with one committed Python file and one text file."""
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "Test")
+    (tmp_path / "mod.py").write_text(ORIGINAL)
+    (tmp_path / "notes.txt").write_text("alpha\nbeta\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "base")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def fake_responses(prompts, **kwargs):
+    return [f"Explained: {p.split('`')[1] if '`' in p else 'diff'}" for p in prompts]
+
+# --- Parsing ---
+
+def test_parse_diff_tracks_touched_lines():
+    text = """diff --git a/f.py b/f.py
+--- a/f.py
++++ b/f.py
+@@ -1,4 +1,4 @@
+ a
+-b
++B
+ c
+-d
+"""
+    [file_diff] = parse_diff(text)
+    assert (file_diff.old_path, file_diff.path) == ("f.py", "f.py")
+    assert 2 in file_diff.touched and 3 in file_diff.touched
+    assert file_diff.hunks[0].startswith("@@ -1,4 +1,4 @@")
+
+def test_extract_units_includes_decorators():
+    units, statements = extract_units("import x\n\n@dec\ndef f():\n    pass\n\nclass C:\n    pass\n")
+    assert [(u.name, u.kind, u.start, u.end) for u in units] == [("f", "function", 3, 5), ("C", "class", 7, 8)]
+    assert statements[0][2] == "import x\n"
+
+# --- explain --diff ---
+
+def test_explain_diff_sends_only_changed_units(repo, mocker):
+    """Modified and added units are explained; comment-only edits and removals are listed without a call."""
+    (repo / "mod.py").write_text(EDITED)
+    (repo / "notes.txt").write_text("alpha\ngamma\n")
+    mock_batch = mocker.patch("codex_cli.diff.get_openai_responses", side_effect=fake_responses)
+    result = runner.invoke(app, ["explain", "--diff", "HEAD", "-f", "json", "-o", "report.json"])
+
+    assert result.exit_code == 0
+    prompts = mock_batch.call_args.args[0]
+    assert len(prompts) == 3
+    assert "def change(items)" in prompts[0] and "def keep(x): ..." in prompts[0] # Unit plus compact context
+    units = {(u["path"], u["name"]): u for u in json.loads((repo / "report.json").read_text())["units"]}
+    assert units[("mod.py", "change")]["status"] == "modified"
+    assert units[("mod.py", "added")]["status"] == "added"
+    assert units[("mod.py", "keep")]["status"] == "formatting"
+    assert units[("mod.py", "Store")]["status"] == "removed"
+    assert units[("notes.txt", "notes.txt")]["kind"] == "diff"
+
+def test_explain_diff_memoizes_units(repo, mocker):
+    """A unit explained on a previous run is not sent again, even after reformatting."""
+    (repo / "mod.py").write_text(EDITED)
+    mock_batch = mocker.patch("codex_cli.diff.get_openai_responses", side_effect=fake_responses)
+    runner.invoke(app, ["explain", "--diff", "HEAD", "mod.py"])
+    assert mock_batch.call_count == 1
+
+    (repo / "mod.py").write_text(EDITED.replace("return LIMIT", "return   LIMIT  # same"))
+    result = runner.invoke(app, ["explain", "--diff", "HEAD", "mod.py", "-f", "json", "-o", "report.json"])
+    assert result.exit_code == 0
+    assert mock_batch.call_count == 1
+    units = json.loads((repo / "report.json").read_text())["units"]
+    assert all(u["memoized"] for u in units if u["status"] in ("added", "modified"))
+
+def test_explain_diff_bad_revision(repo):
+    result = runner.invoke(app, ["explain", "--diff", "no-such-rev"])
+    assert result.exit_code == 1
+    assert "Error reading git diff" in result.stdout
+
+def test_explain_requires_input_or_diff():
+    result = runner.invoke(app, ["explain"])
+    assert result.exit_code == 1
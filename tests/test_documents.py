@@ -0,0 +1,112 @@
+# tests/test_documents.py
+
+import io
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from codex_cli.core import skeleton
+from codex_cli.core.skeleton import document_shape, iter_documents
+from codex_cli.documents import group_documents
+from codex_cli.main import app
+
+runner = CliRunner()
+
+def _deployment(name: str, replicas: int = 1, namespace: str = "prod") -> str:
+    return (f"apiVersion: apps/v1\nkind: Deployment\nmetadata:\n  name: {name}\n  namespace: {namespace}\n"
+            f"spec:\n  replicas: {replicas}\n  template:\n    spec:\n      containers:\n      - name: app\n        image: {name}:1\n")
+
+SERVICE = "apiVersion: v1\nkind: Service\nmetadata:\n  name: web\nspec:\n  ports:\n  - port: 80\n"
+
+def _fake_responses(prompts, **kwargs):
+    return [f"Explanation {i}." for i in range(len(prompts))]
+
+def test_iter_documents_streams_yaml_and_json():
+    yaml_stream = io.StringIO("a: 1\n---\n---\nkind: List\nitems:\n- b: 2\n- b: 3\n")
+    assert list(iter_documents(yaml_stream, "YAML")) == [{"a": 1}, {"b": 2}, {"b": 3}]
+    json_lines = io.StringIO('{"a": 1}\n{"a": 2}\n')
+    assert list(iter_documents(json_lines, "JSON")) == [{"a": 1}, {"a": 2}]
+    assert list(iter_documents(io.StringIO('{"a": 1}\n\n{"a": 2}\n'), "JSONL")) == [{"a": 1}, {"a": 2}]
+
+class _ChunkedReader(io.StringIO):
+    """A stream that refuses to be read whole and records the size of each read."""
+    def __init__(self, text):
+        super().__init__(text)
+        self.reads = []
+
+    def read(self, size=-1):
+        assert size is not None and size > 0, "the stream was read whole"
+        self.reads.append(size)
+        return super().read(size)
+
+def test_iter_documents_decodes_concatenated_json_incrementally(monkeypatch):
+    """Documents are decoded from a bounded buffer, including values split across reads."""
+    monkeypatch.setattr(skeleton, "JSON_CHUNK_CHARS", 8)
+    documents = [{"kind": "Pod", "metadata": {"name": f"pod-{i}"}} for i in range(20)] + [12345678901, "text", [1, 2]]
+    stream = _ChunkedReader(" ".join(json.dumps(document) for document in documents) + "\n")
+
+    assert list(iter_documents(stream, "JSON")) == documents
+    assert max(stream.reads) < 128 # Never more than about one document at a time
+
+def test_iter_documents_json_errors(monkeypatch):
+    monkeypatch.setattr(skeleton, "JSON_CHUNK_CHARS", 8)
+    documents = iter_documents(io.StringIO('{"a": 1} {"b": '), "JSON")
+    assert next(documents) == {"a": 1}
+    with pytest.raises(ValueError):
+        next(documents)
+
+    monkeypatch.setattr(skeleton, "JSON_DOCUMENT_MAX_BYTES", 64)
+    with pytest.raises(ValueError, match="larger than 64 bytes"):
+        list(iter_documents(io.StringIO(json.dumps({"data": "x" * 200})), "JSON"))
+
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_documents(io.StringIO('{"a": 1}\n{"a": \n'), "JSONL"))
+
+def test_document_shape_ignores_values_not_structure():
+    first = {"kind": "Pod", "metadata": {"name": "a"}, "ports": [80, 443]}
+    assert document_shape(first) == document_shape({"kind": "Pod", "metadata": {"name": "b"}, "ports": [8080]})
+    assert document_shape(first) != document_shape({"kind": "Job", "metadata": {"name": "a"}, "ports": [80]})
+    assert document_shape(first) != document_shape({"kind": "Pod", "metadata": {"name": "a", "labels": {}}, "ports": [80]})
+
+def test_group_documents_keeps_a_few_samples():
+    groups = {}
+    text = "---\n".join(_deployment(f"app{i}", i) for i in range(50)) + "---\n" + SERVICE
+    assert group_documents(io.StringIO(text), "dump.yaml", "YAML", groups) == 51
+    deployments = next(g for g in groups.values() if g.label == "Deployment (apps/v1)")
+    assert deployments.count == 50 and len(deployments.samples) == 3
+    assert deployments.resources[:2] == ["Deployment/prod/app0", "Deployment/prod/app1"]
+
+def test_config_documents_explains_each_shape_once(mocker):
+    mock_api = mocker.patch("codex_cli.documents.get_openai_responses", side_effect=_fake_responses)
+    text = "---\n".join(_deployment(f"app{i}", i) for i in range(200)) + "---\n" + SERVICE
+    result = runner.invoke(app, ["config", "documents", "-", "-f", "json"], input=text)
+
+    assert result.exit_code == 0
+    prompts = mock_api.call_args.args[0]
+    assert len(prompts) == 2 # 201 documents, 2 shapes
+    assert "200 document(s) of type Deployment (apps/v1)" in prompts[0]
+    assert 'image: str  # "app0:1", "app1:1", "app2:1"' in prompts[0] and "app199" not in prompts[0]
+    report = json.loads(result.stdout)
+    assert report["documents"] == 201
+    assert [(shape["label"], shape["count"]) for shape in report["shapes"]] == [("Deployment (apps/v1)", 200), ("Service (v1)", 1)]
+    assert "Deployment/prod/app199" in report["shapes"][0]["resources"]
+    assert report["shapes"][1]["explanation"] == "Explanation 1."
+
+def test_config_documents_reads_directories_and_reports_bad_files(mocker, tmp_path):
+    mocker.patch("codex_cli.documents.get_openai_responses", side_effect=_fake_responses)
+    (tmp_path / "a.yaml").write_text(_deployment("api"))
+    (tmp_path / "b.yml").write_text(_deployment("worker", namespace="jobs"))
+    (tmp_path / "c.json").write_text(json.dumps({"kind": "List", "items": [json.loads('{"kind": "ConfigMap", "metadata": {"name": "cfg"}}')]}))
+    (tmp_path / "broken.yaml").write_text("a: [1, 2\n")
+    (tmp_path / "notes.txt").write_text("not a manifest")
+    output = tmp_path / "index.md"
+    result = runner.invoke(app, ["config", "documents", str(tmp_path), "-o", str(output)])
+
+    assert result.exit_code == 0
+    report = output.read_text()
+    assert "3 document(s) in 2 unique shape(s)." in report
+    assert "`Deployment/prod/api`, `Deployment/jobs/worker`" in report
+    assert "`ConfigMap/cfg`" in report
+    assert "broken.yaml` | parse error" in report
+    assert "notes.txt" not in report
@@ -0,0 +1,85 @@
+# tests/test_files.py
+
+import pytest
+
+from codex_cli.core.files import collect_files, is_file_glob, is_ignored, parse_gitignore
+
+def make_tree(root, files: dict):
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content)
+
+# --- .gitignore matching ---
+
+@pytest.mark.parametrize(
+    "pattern, path, is_dir, expected",
+    [
+        ("*.pyc", "pkg/mod.pyc", False, True),
+        ("build/", "build", True, True),
+        ("build/", "build", False, False),
+        ("/dist", "dist", True, True),
+        ("/dist", "pkg/dist", True, False),
+        ("docs/*.md", "docs/a.md", False, True),
+        ("docs/*.md", "docs/sub/a.md", False, False),
+        ("**/cache", "a/b/cache", True, True),
+        ("logs/**", "logs/x/y.log", False, True),
+        ("a/**/b", "a/x/y/b", False, True),
+        ("file[0-9].txt", "file7.txt", False, True),
+        ("\\#literal", "#literal", False, True),
+    ]
+)
+def test_gitignore_patterns(pattern, path, is_dir, expected):
+    assert is_ignored(parse_gitignore(pattern), path, is_dir) == expected
+
+def test_gitignore_negation_and_comments():
+    rules = parse_gitignore("# comment\n*.log\n!keep.log\n")
+    assert is_ignored(rules, "debug.log", False)
+    assert not is_ignored(rules, "keep.log", False)
+
+# --- Discovery ---
+
+def test_collect_files_honors_gitignore_and_skips(tmp_path):
+    """Ignored paths are pruned; binary, empty and large files are skipped with a reason."""
+    make_tree(tmp_path, {
+        ".gitignore": "build/\n*.log\n",
+        "src/app.py": "print('app')\n",
+        "src/.gitignore": "generated.py\n",
+        "src/generated.py": "x = 1\n",
+        "src/image.png": b"\x89PNG\x00\x01",
+        "src/empty.py": "",
+        "src/big.py": "x = 1\n" * 100,
+        "build/out.py": "y = 2\n",
+        "debug.log": "log\n",
+        ".git/config": "[core]\n",
+    })
+    selection = collect_files(tmp_path, max_bytes=200)
+    assert [selection.relative(p) for p in selection.files] == [".gitignore", "src/.gitignore", "src/app.py"]
+    assert [(selection.relative(p), reason.split(" ")[0]) for p, reason in selection.skipped] == [
+        ("src/big.py", "too"), ("src/empty.py", "empty"), ("src/image.png", "binary"),
+    ]
+    assert selection.ignored == 3
+
+def test_collect_files_include_exclude(tmp_path):
+    make_tree(tmp_path, {"a.py": "a\n", "b.txt": "b\n", "tests/test_a.py": "t\n"})
+    selection = collect_files(tmp_path, include=["*.py"], exclude=["tests/*"])
+    assert [selection.relative(p) for p in selection.files] == ["a.py"]
+
+def test_collect_files_glob(tmp_path, monkeypatch):
+    make_tree(tmp_path, {"src/a.py": "a\n", "src/sub/b.py": "b\n", "src/c.txt": "c\n"})
+    monkeypatch.chdir(tmp_path)
+    assert is_file_glob("src/**/*.py")
+    assert not is_file_glob("ls *.nothing")
+    selection = collect_files("src/**/*.py")
+    assert [selection.relative(p) for p in selection.files] == ["src/a.py", "src/sub/b.py"]
+
+def test_collect_files_uses_gitignore_of_enclosing_repository(tmp_path):
+    """Walking a subdirectory still applies the repository's root .gitignore."""
+    make_tree(tmp_path, {".git/info/exclude": "secret.py\n", ".gitignore": "__pycache__/\n/pkg/gen_*.py\n",
+                         "pkg/a.py": "a\n", "pkg/gen_x.py": "g\n", "pkg/secret.py": "s\n", "pkg/__pycache__/a.pyc": "c\n"})
+    selection = collect_files(tmp_path / "pkg")
+    assert [selection.relative(p) for p in selection.files] == ["a.py"]
+    assert selection.ignored == 3
@@ -0,0 +1,193 @@
+# tests/test_fingerprint.py
+
+import pytest
+from typer.testing import CliRunner
+
+from codex_cli.main import app
+from codex_cli.core.fingerprint import (guess_language, normalize, shingles, minhash_signature,
+                                        similarity, lsh_bands, NUM_PERM)
+from codex_cli.core.similar_cache import SimilarityCache
+
+runner = CliRunner()
+
+PY_ORIGINAL = '''
+def total_price(items, tax):
+    # Sum the prices
+    subtotal = 0
+    for item in items:
+        subtotal += item.price
+    return subtotal * (1 + tax)
+'''
+
+PY_RENAMED = '''
+def total_price(products,   rate):
+    """Same logic, other names."""
+    acc = 0  # running total
+    for p in products:
+        acc += p.price
+
+    return acc * (1 + rate)
+'''.replace('    """Same logic, other names."""\n', '')
+
+BOILERPLATE = "\n".join(f"parser.add_argument('--option-{i}', type=int, default={i}, help='Option number {i}')" for i in range(30))
+
+# --- Test Suite for normalization ---
+
+@pytest.mark.parametrize(
+    "content, file_name, expected",
+    [
+        ("ls -la", None, "shell"),
+        ("import os\nprint(os.getcwd())", None, "python"),
+        ("def f(): pass", None, "python"),
+        ("echo hi", "run.sh", "shell"),
+        ("x = 1", "main.py", "python"),
+        ("const x = 1;", "main.js", "generic"),
+    ]
+)
+def test_guess_language(content, file_name, expected):
+    """Files use their extension; one-line snippets are shell unless they start like Python."""
+    assert guess_language(content, file_name) == expected
+
+def test_python_normalization_ignores_comments_whitespace_and_locals():
+    """Renamed locals, comments and blank lines do not change the fingerprint."""
+    assert normalize(PY_ORIGINAL, "python") == normalize(PY_RENAMED, "python")
+
+def test_python_normalization_keeps_module_level_names():
+    """Function names and attribute names still distinguish inputs."""
+    assert normalize(PY_ORIGINAL, "python") != normalize(PY_ORIGINAL.replace("total_price", "net_price"), "python")
+    assert normalize(PY_ORIGINAL, "python") != normalize(PY_ORIGINAL.replace(".price", ".cost"), "python")
+
+def test_python_global_names_are_not_renamed():
+    """Names declared global inside a function keep their identity."""
+    a = "def f():\n    global counter\n    counter = 1\n"
+    b = "def f():\n    global total\n    total = 1\n"
+    assert normalize(a, "python") != normalize(b, "python")
+
+def test_shell_normalization():
+    """Spacing, line continuations and comments do not matter for shell commands."""
+    assert normalize("grep  -rn 'TODO'   ./src  # find todos", "shell") == normalize("grep -rn 'TODO' ./src", "shell")
+    assert normalize("ls \\\n  -la\n\n# done", "shell") == normalize("ls -la", "shell")
+    assert normalize('echo "a  # b" x#y', "shell") == 'sh:echo "a  # b" x#y'
+    assert normalize("ls -la", "shell") != normalize("ls -l", "shell")
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ('rm -rf "$DIR/*"', "rm -rf $DIR/*"),
+        ("echo '$HOME'", "echo $HOME"),
+        ("grep -rn 'TODO' ./src", "grep -rn TODO ./src"),
+        ("touch a\\ b", "touch a b"),
+    ]
+)
+def test_shell_normalization_keeps_quoting(a, b):
+    """Quotes and escapes change what a command does, so they are part of its normal form."""
+    assert normalize(a, "shell") != normalize(b, "shell")
+
+def test_generic_normalization_strips_comments_not_strings():
+    """Comments are removed from token streams; comment markers inside strings are kept."""
+    a = 'const url = "http://example.com"; // the endpoint\n/* block */ call(url);'
+    b = 'const url = "http://example.com";\ncall( url );'
+    assert normalize(a, "generic", "main.js") == normalize(b, "generic", "main.js")
+    assert "http : / / example" in normalize(a, "generic", "main.js")
+
+def test_invalid_input_falls_back_to_tokens():
+    """Unparsable Python and unbalanced shell quotes still normalize."""
+    assert normalize("def broken(:", "python").startswith("tok:")
+    assert normalize("echo 'unterminated", "shell").startswith("tok:")
+
+# --- Test Suite for MinHash ---
+
+def test_minhash_similarity_estimates_jaccard():
+    """Near-identical inputs score high, unrelated inputs low."""
+    a = shingles(normalize(BOILERPLATE, "python"))
+    b = shingles(normalize(BOILERPLATE.replace("Option number 7", "Seventh option"), "python"))
+    c = shingles(normalize(PY_ORIGINAL * 5, "python"))
+    sig_a, sig_b, sig_c = minhash_signature(a), minhash_signature(b), minhash_signature(c)
+    assert len(sig_a) == NUM_PERM
+    assert similarity(sig_a, sig_a) == 1.0
+    assert similarity(sig_a, sig_b) > 0.8
+    assert similarity(sig_a, sig_c) < 0.3
+    assert minhash_signature(set()) == []
+
+def test_lsh_bands_share_buckets_for_similar_inputs():
+    """Similar signatures collide in at least one band."""
+    sig_a = minhash_signature(shingles(normalize(BOILERPLATE, "python")))
+    sig_b = minhash_signature(shingles(normalize(BOILERPLATE.replace("default=3", "default=4"), "python")))
+    assert set(enumerate(lsh_bands(sig_a))) & set(enumerate(lsh_bands(sig_b)))
+
+# --- Test Suite for the similarity cache ---
+
+def test_similarity_cache_exact_and_near_matches(tmp_path):
+    """Equivalent inputs match exactly; near-duplicates match above the threshold only."""
+    cache = SimilarityCache(tmp_path / "similar.sqlite3", threshold=0.8)
+    cache.add("ns", PY_ORIGINAL, "python", "explanation A")
+    match = cache.lookup("ns", PY_RENAMED, "python")
+    assert match.response == "explanation A" and match.exact
+    assert cache.lookup("other-ns", PY_RENAMED, "python") is None
+
+    cache.add("ns", BOILERPLATE, "python", "explanation B")
+    near = cache.lookup("ns", BOILERPLATE.replace("Option number 7", "Seventh option"), "python")
+    assert near.response == "explanation B" and 0.8 <= near.similarity < 1.0
+
+    strict = SimilarityCache(tmp_path / "similar.sqlite3", threshold=1.0)
+    assert strict.lookup("ns", BOILERPLATE.replace("Option number 7", "Seventh option"), "python") is None
+
+def test_functions_differing_in_one_operator_miss_the_cache(tmp_path):
+    """Near-duplicates are opt-in, and a changed operator is not boilerplate-diluted into a match."""
+    a = PY_ORIGINAL.replace("    return", "    if discount:\n        subtotal -= discount\n    return").replace("(items, tax)", "(items, tax, discount)")
+    b = a.replace("(1 + tax)", "(1 - tax)")
+    cache = SimilarityCache(tmp_path / "similar.sqlite3")
+    cache.add("ns", a, "python", "adds tax")
+    assert cache.lookup("ns", b, "python") is None
+
+    sig_a, sig_b = (minhash_signature(shingles(normalize(code, "python"))) for code in (a, b))
+    assert similarity(sig_a, sig_b) < 0.9
+    assert SimilarityCache(tmp_path / "similar.sqlite3", threshold=0.9).lookup("ns", b, "python") is None
+
+def test_short_inputs_only_match_exactly(tmp_path):
+    """Short commands never match as near-duplicates."""
+    cache = SimilarityCache(tmp_path / "similar.sqlite3", threshold=0.1)
+    cache.add("ns", "rm -rf ./build", "shell", "removes build")
+    assert cache.lookup("ns", "rm  -rf ./build", "shell").response == "removes build"
+    assert cache.lookup("ns", "rm -rf ./dist", "shell") is None
+
+def test_similarity_cache_evicts_least_recently_used(tmp_path):
+    """Entries beyond max_entries are evicted, oldest use first."""
+    cache = SimilarityCache(tmp_path / "similar.sqlite3", max_entries=2)
+    for i in range(3):
+        cache.add("ns", f"echo {i}", "shell", f"answer {i}")
+    assert cache.lookup("ns", "echo 0", "shell") is None
+    assert cache.lookup("ns", "echo 2", "shell").response == "answer 2"
+
+# --- Test Suite for explain integration ---
+
+def test_explain_serves_equivalent_input_from_similarity_cache(mocker):
+    """A reformatted copy of an explained snippet is answered locally and labeled."""
+    mock_api_call = mocker.patch('codex_cli.explain.get_openai_response', return_value="Computes a total.")
+    first = runner.invoke(app, ["explain", PY_ORIGINAL])
+    assert first.exit_code == 0
+    second = runner.invoke(app, ["explain", PY_RENAMED])
+    assert second.exit_code == 0
+    mock_api_call.assert_called_once()
+    assert "Cached result from an equivalent input" in second.stdout
+    assert "Computes a total." in second.stdout
+
+def test_explain_similarity_respects_options(mocker):
+    """Other detail levels, --refresh and --no-cache bypass the similarity cache."""
+    mock_api_call = mocker.patch('codex_cli.explain.get_openai_response', return_value="Computes a total.")
+    runner.invoke(app, ["explain", PY_ORIGINAL])
+    runner.invoke(app, ["explain", PY_RENAMED, "--detail", "detailed"])
+    runner.invoke(app, ["explain", PY_RENAMED, "--refresh"])
+    runner.invoke(app, ["explain", PY_RENAMED, "--no-cache"])
+    assert mock_api_call.call_count == 4
+
+def test_explain_near_duplicate_threshold(mocker):
+    """--similarity controls whether a near-duplicate is served from the cache."""
+    mock_api_call = mocker.patch('codex_cli.explain.get_openai_response', return_value="Defines options.")
+    runner.invoke(app, ["explain", BOILERPLATE])
+    variant = BOILERPLATE.replace("Option number 7", "Seventh option")
+    strict = runner.invoke(app, ["explain", variant, "--similarity", "1"])
+    assert mock_api_call.call_count == 2
+    relaxed = runner.invoke(app, ["explain", variant.replace("number 9", "nine"), "--similarity", "0.7"])
+    assert mock_api_call.call_count == 2
+    assert "Cached result from a similar input" in relaxed.stdout
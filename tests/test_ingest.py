@@ -0,0 +1,66 @@
+# tests/test_ingest.py
+
+import json
+
+import pytest
+
+from codex_cli.core.ingest import IngestError, read_file, sniff
+
+def test_sniff_detects_binary_and_encodings(tmp_path):
+    binary = tmp_path / "image.png"
+    binary.write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR" + bytes(range(256)))
+    assert sniff(binary).binary
+
+    utf16 = tmp_path / "utf16.conf"
+    utf16.write_text("key = värde\n", encoding="utf-16")
+    assert sniff(utf16).encoding == "utf-16" and not sniff(utf16).binary
+    assert read_file(utf16).text == "key = värde\n"
+
+    # A UTF-8 character cut by the end of the sniffed block is still UTF-8
+    cut = tmp_path / "cut.txt"
+    cut.write_bytes(b"a" * 8191 + "é".encode("utf-8"))
+    assert sniff(cut).encoding == "utf-8"
+
+    legacy = tmp_path / "legacy.ini"
+    legacy.write_bytes("name = Zoë\n".encode("cp1252"))
+    assert "Zo" in read_file(legacy).text
+
+def test_read_file_rejects_binary(tmp_path):
+    binary = tmp_path / "data.bin"
+    binary.write_bytes(b"\0\1\2\3" * 100)
+    with pytest.raises(IngestError, match="binary"):
+        read_file(binary)
+
+def test_small_file_is_read_whole(tmp_path):
+    path = tmp_path / "app.yaml"
+    path.write_text("server:\n  port: 8080\n")
+    ingested = read_file(path, max_bytes=1024)
+    assert ingested.text == "server:\n  port: 8080\n" and not ingested.sampled
+
+def test_large_file_is_sampled_at_line_boundaries(tmp_path):
+    path = tmp_path / "items.json"
+    lines = ["{", '  "items": ['] + [f'    {{"id": {i}, "name": "item-{i}"}},' for i in range(20000)] + ['    {"id": -1}', "  ]", "}"]
+    path.write_text("\n".join(lines) + "\n")
+    ingested = read_file(path, max_bytes=10000, sample_bytes=4000)
+
+    assert ingested.sampled and len(ingested.sections) == 5
+    assert ingested.text.startswith("[Sample of a ")
+    body = ingested.text.split("\n", 1)[1]
+    assert body.startswith('{\n  "items": [\n    {"id": 0,')
+    assert body.endswith('    {"id": -1}\n  ]\n}\n')
+    markers = [line for line in body.splitlines() if line.startswith("[... ")]
+    assert len(markers) == 4 and all("bytes omitted" in marker for marker in markers)
+    assert markers[0].startswith("[... lines ")
+    # Every kept line is complete
+    kept = [line for line in body.splitlines() if line and not line.startswith("[... ")]
+    assert all(line in lines for line in kept)
+    assert ingested.omitted_bytes + sum(end - start for start, end in ingested.sections) == path.stat().st_size
+
+def test_minified_file_is_cut_at_separators(tmp_path):
+    path = tmp_path / "min.json"
+    path.write_text(json.dumps([{"id": i, "name": f"item-{i}"} for i in range(20000)], separators=(",", ":")))
+    ingested = read_file(path, max_bytes=10000, sample_bytes=4000)
+    body = ingested.text.split("\n", 1)[1]
+    parts = [part for part in body.split("\n") if part and not part.startswith("[... ")]
+    assert parts[0].startswith('[{"id":0,') and parts[-1].endswith('"name":"item-19999"}]')
+    assert all(part.startswith(("[", "{")) for part in parts) # Middle sections start at an object
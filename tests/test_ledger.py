@@ -0,0 +1,158 @@
+# tests/test_ledger.py
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from typer.testing import CliRunner
+
+from codex_cli.main import app
+from codex_cli.core import openai_utils
+from codex_cli.core.ledger import UsageLedger, estimate_cost, model_price, record_usage
+from codex_cli.usage import group_records, summarize
+
+runner = CliRunner()
+
+def make_completion(content="answer", prompt_tokens=100, completion_tokens=20):
+    """Builds an object shaped like a chat completion with usage."""
+    message = SimpleNamespace(content=content)
+    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+# --- Test Suite for prices ---
+
+def test_model_price_matches_dated_snapshots():
+    """Dated snapshots use their base model's price; the longest prefix wins."""
+    assert model_price("gpt-4o-2024-08-06") == model_price("gpt-4o")
+    assert model_price("gpt-4o-mini") != model_price("gpt-4o")
+    assert model_price("unknown-model") is None
+
+def test_estimate_cost():
+    """Cost is computed per million input and output tokens."""
+    input_price, output_price = model_price("gpt-4o")
+    assert estimate_cost("gpt-4o", 1_000_000, 1_000_000) == pytest.approx(input_price + output_price)
+    assert estimate_cost("unknown-model", 10, 10) is None
+
+# --- Test Suite for the ledger ---
+
+def test_ledger_record_and_read(tmp_path):
+    """Recorded calls are read back in order and can be filtered by time."""
+    ledger = UsageLedger(tmp_path / "usage.sqlite3")
+    assert ledger.records() == []
+    ledger.record("explain", "gpt-4o", 100, 20, 0.5, created=1000.0)
+    ledger.record("script", "gpt-4o", 50, 10, 0.0, cache_hit=True, created=2000.0)
+    records = ledger.records()
+    assert [r.command for r in records] == ["explain", "script"]
+    assert records[1].cache_hit is True
+    assert records[0].cost == pytest.approx(estimate_cost("gpt-4o", 100, 20))
+    assert [r.command for r in ledger.records(since=1500.0)] == ["script"]
+    ledger.clear()
+    assert ledger.records() == []
+
+def test_record_usage_can_be_disabled(monkeypatch):
+    """CSTUDIO_NO_LEDGER turns recording off."""
+    monkeypatch.setenv("CSTUDIO_NO_LEDGER", "1")
+    assert record_usage("gpt-4o", 0.1, 1, 1) is False
+    assert UsageLedger().records() == []
+
+def test_record_usage_never_raises(monkeypatch, tmp_path):
+    """An unusable ledger location does not break the calling command."""
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("x")
+    monkeypatch.setenv("CSTUDIO_DATA_DIR", str(blocker))
+    assert record_usage("gpt-4o", 0.1, 1, 1) is False
+
+# --- Test Suite for recording API calls ---
+
+def test_api_calls_and_cache_hits_are_recorded(mocker):
+    """A call is recorded with its usage; the repeat is a cache hit with the same tokens."""
+    client = mocker.MagicMock()
+    client.chat.completions.create.return_value = make_completion()
+    mocker.patch('codex_cli.core.openai_utils.get_openai_client', return_value=client)
+
+    assert openai_utils.get_openai_response("prompt") == "answer"
+    assert openai_utils.get_openai_response("prompt") == "answer"
+    first, second = UsageLedger().records()
+    assert (first.command, first.model, first.prompt_tokens, first.completion_tokens) == ("api", "gpt-4o", 100, 20)
+    assert first.cache_hit is False and second.cache_hit is True
+    assert second.prompt_tokens == 100
+
+def test_failed_calls_are_recorded(mocker):
+    """Errors are recorded with status 'error' and no tokens."""
+    client = mocker.MagicMock()
+    client.chat.completions.create.side_effect = RuntimeError("boom")
+    mocker.patch('codex_cli.core.openai_utils.get_openai_client', return_value=client)
+    assert openai_utils.get_openai_response("prompt") is None
+    (record,) = UsageLedger().records()
+    assert record.status == "error"
+    assert record.prompt_tokens == 0
+
+def test_stream_usage_is_recorded(mocker):
+    """Usage sent in the final stream chunk is recorded."""
+    chunks = [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="hi"))], usage=None),
+        SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=7, completion_tokens=3)),
+    ]
+    client = mocker.MagicMock()
+    client.chat.completions.create.return_value = iter(chunks)
+    mocker.patch('codex_cli.core.openai_utils.get_openai_client', return_value=client)
+
+    assert list(openai_utils.stream_openai_response("prompt")) == ["hi"]
+    assert client.chat.completions.create.call_args.kwargs["stream_options"] == {"include_usage": True}
+    (record,) = UsageLedger().records()
+    assert (record.prompt_tokens, record.completion_tokens) == (7, 3)
+
+def test_cli_command_is_recorded(mocker):
+    """Calls made while a CLI command runs are attributed to that command."""
+    client = mocker.MagicMock()
+    client.chat.completions.create.return_value = make_completion()
+    mocker.patch('codex_cli.core.openai_utils.get_openai_client', return_value=client)
+    result = runner.invoke(app, ["script", "list files", "--dry-run"])
+    assert result.exit_code == 0
+    (record,) = UsageLedger().records()
+    assert record.command == "script"
+
+# --- Test Suite for 'usage' command ---
+
+def test_summarize_splits_spend_and_savings():
+    """Cache hits count as savings and are excluded from tokens and latency."""
+    ledger_records = [
+        SimpleNamespace(created=0, command="explain", model="gpt-4o", prompt_tokens=100, completion_tokens=10,
+                        latency=latency, cache_hit=False, cost=0.01, status="ok")
+        for latency in (0.1, 0.2, 0.3)
+    ] + [SimpleNamespace(created=0, command="explain", model="gpt-4o", prompt_tokens=100, completion_tokens=10,
+                         latency=0.001, cache_hit=True, cost=0.01, status="ok")]
+    summary = summarize(ledger_records)
+    assert summary["calls"] == 4 and summary["cache_hits"] == 1
+    assert summary["prompt_tokens"] == 300
+    assert summary["spent"] == pytest.approx(0.03)
+    assert summary["saved"] == pytest.approx(0.01)
+    assert summary["p50"] == pytest.approx(0.2)
+
+def test_usage_command_reports_breakdowns():
+    """The report shows totals and a table per breakdown."""
+    ledger = UsageLedger()
+    now = time.time()
+    ledger.record("explain", "gpt-4o", 1000, 200, 1.2, created=now)
+    ledger.record("config explain", "gpt-4o-mini", 500, 100, 0.4, created=now)
+    ledger.record("explain", "gpt-4o", 1000, 200, 0.0, cache_hit=True, created=now)
+
+    result = runner.invoke(app, ["usage"])
+    assert result.exit_code == 0
+    for text in ("By day", "By command", "By model", "Saved $", "p95"):
+        assert text in result.stdout
+    assert set(group_records(ledger.records(), "command")) == {"config explain", "explain"}
+    assert group_records(ledger.records(), "model")["gpt-4o"]["cache_hits"] == 1
+
+def test_usage_command_empty_ledger():
+    """An empty ledger prints a hint instead of tables."""
+    result = runner.invoke(app, ["usage", "--by", "model"])
+    assert result.exit_code == 0
+    assert "No API usage recorded" in result.stdout
+
+def test_usage_command_unknown_breakdown():
+    """An unknown --by value is reported as an error."""
+    UsageLedger().record("explain", "gpt-4o", 1, 1, 0.1)
+    result = runner.invoke(app, ["usage", "--by", "week"])
+    assert result.exit_code == 1
+    assert "Unknown breakdown 'week'" in result.stdout
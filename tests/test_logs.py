@@ -0,0 +1,35 @@
+# tests/test_logs.py
+
+import io
+
+from codex_cli.core.logs import TRUNCATED_MARK, iter_windows, line_template, looks_like_log, read_lines
+
+def test_line_template_masks_variable_fields():
+    line = "2024-05-01T10:00:01.123Z WARN req 3f2a9c1d-0000-4000-8000-0123456789ab from 10.0.0.1:8080 took 13ms (0x7ffe)"
+    assert line_template(line) == "<TS> WARN req <UUID> from <IP> took <NUM>ms (<HEX>)"
+
+def test_looks_like_log():
+    assert looks_like_log(["Jan  5 10:00:01 host sshd[42]: Accepted key", "level=info msg=started", "plain"])
+    assert not looks_like_log(["def main():", "    return 1", ""])
+    assert not looks_like_log([])
+
+def test_read_lines_truncates_long_lines():
+    stream = io.StringIO("short\n" + "x" * 25 + "\n" + "y" * 10 + "\nlast")
+    assert list(read_lines(stream, max_line_chars=10)) == ["short", "x" * 10 + TRUNCATED_MARK, "y" * 10, "last"]
+
+def test_log_windows_count_repeated_lines():
+    """Repeated lines only increase a counter, so a window covers them all."""
+    lines = [f"12:00:{i % 60:02d} INFO tick {i}" for i in range(10000)] + ["12:59:59 ERROR disk full"]
+    [window] = iter_windows(io.StringIO("\n".join(lines)), max_chars=1000)
+    assert window.is_log and window.last
+    assert (window.start_line, window.end_line, window.distinct) == (1, 10001, 2)
+    assert window.text == "L1-10000 ×10000: <TS> INFO tick <NUM>\nL10001: 12:59:59 ERROR disk full"
+
+def test_windows_stay_within_budget():
+    text = "".join(f"line {i} {'z' * 30}\n" for i in range(100))
+    windows = list(iter_windows(io.StringIO(text), max_chars=400, is_log=False))
+    assert len(windows) > 1
+    assert all(len(window.text) <= 400 for window in windows)
+    assert [w.start_line for w in windows[1:]] == [w.end_line + 1 for w in windows[:-1]]
+    assert windows[-1].end_line == 100 and windows[-1].last and not windows[0].last
+    assert "\n".join(window.text for window in windows) == text.rstrip("\n")
@@ -0,0 +1,102 @@
+# tests/test_mock_server.py
+
+import pytest
+from openai import OpenAI
+
+from codex_cli import bench
+from codex_cli.core import openai_utils
+from codex_cli.core.mock_server import MockOpenAIServer, MockServerConfig
+from codex_cli.core.script_library import ScriptLibrary
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    """Starts a mock server and points the shared OpenAI client at it."""
+    def start(**config):
+        server = MockOpenAIServer(MockServerConfig(**config)).start()
+        servers.append(server)
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        openai_utils.reset_openai_client()
+        return server
+    servers = []
+    yield start
+    openai_utils.reset_openai_client()
+    for server in servers:
+        server.stop()
+
+# --- Test Suite for the mock server ---
+
+def test_non_streaming_completion(mock_server):
+    """The SDK parses the mock's chat completion including usage."""
+    server = mock_server(completion_tokens=5)
+    client = OpenAI(api_key="test-key", base_url=server.base_url)
+    completion = client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi there"}])
+    assert completion.choices[0].message.content == "mock token stream answer text"
+    assert completion.usage.completion_tokens == 5
+    assert server.stats.requests == 1
+
+def test_streaming_completion(mock_server):
+    """stream_openai_response() reassembles the mock's server-sent events."""
+    server = mock_server(completion_tokens=4)
+    chunks = list(openai_utils.stream_openai_response("hi", use_cache=False))
+    assert "".join(chunks) == "mock token stream answer"
+    assert len(chunks) == 4
+    assert server.stats.streamed == 1
+
+def test_pooled_client_reuses_connection(mock_server):
+    """Several calls through the shared client use one keep-alive connection."""
+    server = mock_server()
+    for i in range(5):
+        assert openai_utils.get_openai_response(f"prompt {i}", use_cache=False)
+    assert server.stats.requests == 5
+    assert server.stats.connections == 1
+
+def test_error_injection_is_retried(mock_server, monkeypatch):
+    """Injected failures are absorbed by the retry layer."""
+    from codex_cli.core import resilience
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(resilience, "RETRY_MAX_ATTEMPTS", 10)
+    monkeypatch.setattr(resilience, "BREAKER_THRESHOLD", 0)
+    server = mock_server(error_rate=0.3, rate_limit_rate=0.2, retry_after=0.001, seed=7)
+    results = [openai_utils.get_openai_response(f"prompt {i}", use_cache=False) for i in range(10)]
+    assert all(results)
+    assert server.stats.statuses[200] == 10
+    assert server.stats.requests > 10
+
+def test_async_batch_against_server(mock_server):
+    """The async batch API runs requests concurrently against the server."""
+    server = mock_server(latency=0.05)
+    results = openai_utils.get_openai_responses([f"p{i}" for i in range(8)], max_concurrency=8, use_cache=False)
+    assert all(results)
+    assert server.stats.requests == 8
+    assert server.stats.connections > 1
+
+def test_async_batch_per_prompt_models_and_progress(mock_server):
+    """Each prompt can name its model, and on_result reports every completion."""
+    server = mock_server()
+    done = []
+    results = openai_utils.get_openai_responses(
+        ["p0", "p1", "p2"], model=["gpt-4o", "gpt-4o-mini", "gpt-4o"], use_cache=False,
+        on_result=lambda index, response: done.append(index),
+    )
+    assert all(results)
+    assert sorted(done) == [0, 1, 2]
+    assert server.stats.requests == 3
+
+# --- Test Suite for cstudio-bench ---
+
+def test_run_benchmark_reports_every_request():
+    """The harness drives each command and records one latency per request."""
+    results, server = bench.run_benchmark(["explain", "script", "config"], requests=4, concurrency=2, config=MockServerConfig())
+    assert set(results) == {"explain", "script", "config"}
+    assert all(len(result["latencies"]) == 4 for result in results.values())
+    assert server.stats.requests == 12
+    assert server.stats.statuses[200] == 12
+
+def test_run_benchmark_bypasses_script_library():
+    """Script requests reach the server even when the library holds a matching script."""
+    ScriptLibrary().add("print the number 0 and exit", "bash", "echo 0")
+    results, server = bench.run_benchmark(["script"], requests=4, concurrency=2, config=MockServerConfig())
+    assert len(results["script"]["latencies"]) == 4
+    assert server.stats.requests == 4
+    assert ScriptLibrary().search("print the number 0 and exit", "bash").script == "echo 0" # Library left as it was
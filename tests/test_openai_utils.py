@@ -0,0 +1,259 @@
+# tests/test_openai_utils.py
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from typer.testing import CliRunner
+
+from codex_cli.core import openai_utils
+from codex_cli.main import app, _needs_api
+
+runner = CliRunner()
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    """Ensure every test starts (and ends) without a cached client."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    openai_utils.reset_openai_client()
+    yield
+    openai_utils.reset_openai_client()
+
+# --- Test Suite for the pooled client ---
+
+def test_client_is_shared_between_calls():
+    """The same client (and connection pool) is returned on every call."""
+    first = openai_utils.get_openai_client()
+    second = openai_utils.get_openai_client()
+    assert first is not None
+    assert first is second
+
+def test_reset_creates_new_client():
+    """reset_openai_client() drops the cached client."""
+    first = openai_utils.get_openai_client()
+    openai_utils.reset_openai_client()
+    second = openai_utils.get_openai_client()
+    assert first is not second
+
+def test_client_missing_api_key(monkeypatch):
+    """No client is created (or cached) without an API key."""
+    monkeypatch.delenv("OPENAI_API_KEY")
+    assert openai_utils.get_openai_client() is None
+    assert openai_utils._client is None
+
+def test_http_client_uses_configured_limits(monkeypatch):
+    """Pool limits and timeouts come from the module settings."""
+    monkeypatch.setattr(openai_utils, "HTTP_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(openai_utils, "HTTP_CONNECT_TIMEOUT", 3.0)
+    http_client = openai_utils.build_http_client()
+    try:
+        pool = http_client._transport._pool
+        assert pool._max_connections == 7
+        assert http_client.timeout.connect == 3.0
+    finally:
+        http_client.close()
+
+def test_warm_client_skipped_without_key(monkeypatch):
+    """Pre-warming is a no-op when no API key is configured."""
+    monkeypatch.delenv("OPENAI_API_KEY")
+    assert openai_utils.warm_openai_client() is None
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        (["explain", "ls -la"], True),
+        (["config", "explain", "app.yaml"], True),
+        (["script", "list files", "-t", "bash"], True),
+        (["visualize", "module.py"], False),
+        (["explain", "--help"], False),
+        ([], False),
+    ]
+)
+def test_needs_api(argv, expected):
+    """Only API-backed commands trigger connection pre-warming."""
+    assert _needs_api(argv) is expected
+
+# --- Streaming ---
+
+def make_stream_chunk(content):
+    """Builds an object shaped like a streamed chat completion chunk."""
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+def test_stream_yields_deltas_and_caches(mocker):
+    """Deltas are yielded in order and the full text is cached afterwards."""
+    client = mocker.MagicMock()
+    client.chat.completions.create.return_value = iter(
+        [make_stream_chunk("Hel"), make_stream_chunk(None), make_stream_chunk("lo")]
+    )
+    mocker.patch('codex_cli.core.openai_utils.get_openai_client', return_value=client)
+
+    assert list(openai_utils.stream_openai_response("prompt")) == ["Hel", "lo"]
+    assert client.chat.completions.create.call_args.kwargs["stream"] is True
+    # Second call is served from the cache as one chunk
+    assert list(openai_utils.stream_openai_response("prompt")) == ["Hello"]
+    assert client.chat.completions.create.call_count == 1
+
+def test_stream_reports_time_to_first_token(mocker, monkeypatch):
+    """A debug line with time-to-first-token is printed when CSTUDIO_DEBUG is set."""
+    monkeypatch.setenv("CSTUDIO_DEBUG", "1")
+    client = mocker.MagicMock()
+    client.chat.completions.create.return_value = iter([make_stream_chunk("hi")])
+    mocker.patch('codex_cli.core.openai_utils.get_openai_client', return_value=client)
+    mock_print = mocker.patch.object(openai_utils.console, "print")
+
+    list(openai_utils.stream_openai_response("prompt", use_cache=False))
+    printed = " ".join(str(call.args[0]) for call in mock_print.call_args_list)
+    assert "Time to first token" in printed
+
+def test_explain_stream_option_uses_streaming(mocker):
+    """--stream renders through the streaming API instead of get_openai_response."""
+    mock_stream = mocker.patch('codex_cli.explain.stream_openai_response', return_value=iter(["Streamed ", "answer."]))
+    mock_api_call = mocker.patch('codex_cli.explain.get_openai_response')
+    result = runner.invoke(app, ["explain", "ls -la", "--stream"])
+
+    assert result.exit_code == 0
+    assert "Explanation:" in result.stdout
+    assert "Streamed answer." in result.stdout
+    mock_stream.assert_called_once()
+    mock_api_call.assert_not_called()
+
+def test_config_explain_stream_failure(mocker, tmp_path):
+    """An empty stream is reported as a failure."""
+    mocker.patch('codex_cli.config.stream_openai_response', return_value=iter([]))
+    config_file = tmp_path / "app.yaml"
+    config_file.write_text("key: value")
+    result = runner.invoke(app, ["config", "explain", str(config_file), "--stream"])
+
+    assert result.exit_code == 0
+    assert "Failed to get explanation from OpenAI" in result.stdout
+
+# --- Async batch API ---
+
+class FakeAsyncClient:
+    """Stands in for AsyncOpenAI, answering each prompt after a per-prompt delay."""
+    def __init__(self, delays: dict[str, float] | None = None):
+        self.delays = delays or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(prompt, 0.01))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        message = SimpleNamespace(content=f"answer to {prompt}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    async def close(self):
+        self.closed = True
+
+def test_async_batch_preserves_order_and_limits_concurrency(mocker):
+    """Results follow prompt order even when later prompts finish first."""
+    prompts = [f"p{i}" for i in range(10)]
+    fake = FakeAsyncClient({f"p{i}": 0.05 - i * 0.004 for i in range(10)})
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+
+    results = openai_utils.get_openai_responses(prompts, max_concurrency=3)
+    assert results == [f"answer to p{i}" for i in range(10)]
+    assert fake.max_in_flight == 3
+    assert fake.closed
+
+def test_async_batch_uses_cache(mocker):
+    """Prompts answered before are served from the cache without a request."""
+    fake = FakeAsyncClient()
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+    openai_utils.get_openai_responses(["a", "b"])
+    fake.max_in_flight = 0
+
+    assert openai_utils.get_openai_responses(["a", "b"]) == ["answer to a", "answer to b"]
+    assert fake.max_in_flight == 0
+
+def test_async_batch_timeout_returns_none(mocker):
+    """A request exceeding the per-request timeout yields None; others succeed."""
+    fake = FakeAsyncClient({"slow": 1.0})
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+
+    results = openai_utils.get_openai_responses(["fast", "slow"], timeout=0.1, use_cache=False)
+    assert results == ["answer to fast", None]
+
+def test_async_batch_cancellation(mocker):
+    """Cancelling the batch cancels all in-flight requests."""
+    fake = FakeAsyncClient({f"p{i}": 5.0 for i in range(4)})
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+
+    async def run_and_cancel():
+        task = asyncio.ensure_future(openai_utils.get_openai_responses_async([f"p{i}" for i in range(4)], max_concurrency=4))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run_and_cancel())
+    assert fake.cancelled == 4
+    assert fake.closed
+
+# --- Parallel candidates ---
+
+class CandidateClient(FakeAsyncClient):
+    """Answers the n-th request with the n-th (delay, text) pair."""
+    def __init__(self, answers: list[tuple[float, str]]):
+        super().__init__()
+        self.answers = list(answers)
+        self.calls = 0
+
+    async def _create(self, model, messages, **kwargs):
+        delay, text = self.answers[self.calls]
+        self.calls += 1
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+def _no_x(response):
+    return "contains x" if "x" in response else None
+
+def test_first_valid_response_cancels_the_rest(mocker):
+    """Invalid responses are skipped; the first valid one wins and slower requests are cancelled."""
+    fake = CandidateClient([(0.01, "x bad"), (0.05, "good"), (5.0, "slow")])
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+
+    response, rejected = openai_utils.get_first_valid_response("p", 3, _no_x, use_cache=False)
+
+    assert response == "good"
+    assert rejected == ["candidate 1: contains x"]
+    assert fake.cancelled == 1
+    assert fake.closed
+
+def test_first_valid_response_ranks_with_score(mocker):
+    """With a score function every candidate is awaited and the best valid one wins."""
+    fake = CandidateClient([(0.01, "ok"), (0.03, "better one"), (0.02, "x")])
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+
+    response, rejected = openai_utils.get_first_valid_response("p", 3, _no_x, score=len, use_cache=False)
+
+    assert response == "better one"
+    assert rejected == ["candidate 3: contains x"]
+
+def test_first_valid_response_caches_only_a_valid_winner(mocker):
+    fake = CandidateClient([(0.01, "x"), (0.01, "x"), (0.01, "fine")])
+    mocker.patch('codex_cli.core.openai_utils.build_async_openai_client', return_value=fake)
+
+    assert openai_utils.get_first_valid_response("p", 2, _no_x) == (None, ["candidate 1: contains x", "candidate 2: contains x"])
+    assert openai_utils.get_first_valid_response("p", 1, _no_x)[0] == "fine"
+    fake.calls = 0
+    assert openai_utils.get_first_valid_response("p", 3, _no_x) == ("fine", [])
+    assert fake.calls == 0
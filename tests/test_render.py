@@ -0,0 +1,65 @@
+# tests/test_render.py
+
+import io
+import pytest
+from rich.console import Console
+from rich.markdown import Markdown
+
+from codex_cli.core.render import last_block_boundary, render_markdown_stream
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("# Title\n\nSome text", len("# Title\n\n")),
+        ("no blank line yet", 0),
+        ("para one\n\npara two\n\npartial", len("para one\n\npara two\n\n")),
+        # Blank lines inside a fenced block are not boundaries
+        ("intro\n\n```python\nx = 1\n\ny = 2\n", len("intro\n\n")),
+        ("```\ncode\n```\n\nafter", len("```\ncode\n```\n\n")),
+        # A list or table stays open across blank lines until the next line shows it has ended
+        ("- one\n\n- two\n\nafter", 0),
+        ("- one\n\n  more\n\n- two\n\nafter\n", len("- one\n\n  more\n\n- two\n\n")),
+        ("intro\n\n1. one\n\n2. two\n\n", len("intro\n\n")),
+        ("| a | b |\n|---|---|\n| 1 | 2 |\n\nnext\n", len("| a | b |\n|---|---|\n| 1 | 2 |\n\n")),
+    ]
+)
+def test_last_block_boundary(text, expected):
+    """Only blank lines outside code fences end a block."""
+    assert last_block_boundary(text) == expected
+
+def test_last_block_boundary_from_offset():
+    """Scanning resumes from a previous boundary."""
+    text = "one\n\ntwo\n\nthree"
+    first = last_block_boundary(text[:6])
+    assert first == len("one\n\n")
+    assert last_block_boundary(text, first) == len("one\n\ntwo\n\n")
+
+def test_render_markdown_stream_returns_full_text():
+    """All deltas are rendered and the concatenated text is returned."""
+    output = io.StringIO()
+    console = Console(file=output, width=80, force_terminal=False)
+    chunks = ["# Heading\n\n", "First para", "graph.\n\n", "- item one\n", "- item two"]
+    text = render_markdown_stream(chunks, console, "Explanation:")
+    assert text == "".join(chunks)
+    rendered = output.getvalue()
+    assert "Explanation:" in rendered
+    assert "Heading" in rendered
+    assert "First paragraph." in rendered
+    assert "item two" in rendered
+
+def test_render_markdown_stream_keeps_lists_whole():
+    """A list whose items arrive as separate blocks renders as it would in one piece."""
+    def lines(rendered: str) -> list[str]:
+        return [line.rstrip() for line in rendered.splitlines() if line.strip()]
+    chunks = ["Steps:\n\n", "1. Open the file.\n\n", "   Check its header.\n\n", "2. Parse it.\n\n", "Done.\n"]
+    streamed, whole = io.StringIO(), io.StringIO()
+    render_markdown_stream(chunks, Console(file=streamed, width=80, force_terminal=False), "Explanation:")
+    Console(file=whole, width=80, force_terminal=False).print(Markdown("".join(chunks)))
+    assert lines(streamed.getvalue()) == ["Explanation:"] + lines(whole.getvalue())
+
+def test_render_markdown_stream_empty():
+    """Nothing (not even the title) is printed for an empty stream."""
+    output = io.StringIO()
+    console = Console(file=output, width=80)
+    assert render_markdown_stream(iter([]), console, "Explanation:") == ""
+    assert output.getvalue() == ""
@@ -0,0 +1,232 @@
+# tests/test_resilience.py
+
+import asyncio
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from openai import APIStatusError, APIConnectionError
+
+from codex_cli.core import openai_utils, resilience
+from codex_cli.core.resilience import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy,
+    call_with_retry, is_retryable, parse_duration, retry_after_seconds,
+)
+
+COMPLETION = {
+    "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "recovered"}, "finish_reason": "stop"}],
+}
+
+class FaultInjectingHandler(BaseHTTPRequestHandler):
+    """Chat completions endpoint that replays a scripted list of (status, headers) responses."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    script: list[tuple[int, dict]] = []
+    requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cls = type(self)
+        status, headers = cls.script[min(cls.requests, len(cls.script) - 1)]
+        cls.requests += 1
+        body = json.dumps(COMPLETION if status == 200 else {"error": {"message": f"injected {status}"}}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def fault_server(monkeypatch):
+    """Runs the fault-injecting server and points the OpenAI client at it."""
+    FaultInjectingHandler.script = [(200, {})]
+    FaultInjectingHandler.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FaultInjectingHandler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(resilience, "RETRY_MAX_ATTEMPTS", 4)
+    monkeypatch.setenv("CSTUDIO_NO_FALLBACK", "1") # Retry behavior of a single model
+    openai_utils.reset_openai_client()
+    yield FaultInjectingHandler
+    openai_utils.reset_openai_client()
+    server.shutdown()
+
+def make_status_error(status: int, headers: dict | None = None) -> APIStatusError:
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return APIStatusError(f"status {status}", response=response, body=None)
+
+# --- Against the fault-injecting server ---
+
+def test_recovers_from_429_and_503(fault_server):
+    """Transient 429 and 503 responses are retried until the call succeeds."""
+    fault_server.script = [(429, {"retry-after": "0.05"}), (503, {}), (200, {})]
+    assert openai_utils.get_openai_response("hello", use_cache=False) == "recovered"
+    assert fault_server.requests == 3
+
+def test_gives_up_after_max_attempts(fault_server):
+    """Persistent 503s fail the call after the configured number of attempts."""
+    fault_server.script = [(503, {})]
+    assert openai_utils.get_openai_response("hello", use_cache=False) is None
+    assert fault_server.requests == 4
+
+def test_client_errors_are_not_retried(fault_server):
+    """A 400 is returned immediately."""
+    fault_server.script = [(400, {})]
+    assert openai_utils.get_openai_response("hello", use_cache=False) is None
+    assert fault_server.requests == 1
+
+def test_circuit_breaker_fails_fast(fault_server, monkeypatch):
+    """Once the breaker opens, calls fail without reaching the server."""
+    monkeypatch.setattr(resilience.breaker_for("gpt-4o"), "threshold", 3)
+    fault_server.script = [(503, {})]
+    openai_utils.get_openai_response("first", use_cache=False)
+    assert fault_server.requests == 3 # Breaker opened on the third failure
+    assert resilience.breaker_for("gpt-4o").state == "open"
+
+    assert openai_utils.get_openai_response("second", use_cache=False) is None
+    assert fault_server.requests == 3
+
+def test_deadline_stops_retrying(fault_server, monkeypatch):
+    """A Retry-After longer than the remaining deadline ends the call."""
+    monkeypatch.setattr(resilience, "RETRY_DEADLINE", 1.0)
+    fault_server.script = [(429, {"retry-after": "30"})]
+    assert openai_utils.get_openai_response("hello", use_cache=False) is None
+    assert fault_server.requests == 1
+
+# --- Unit tests ---
+
+def test_backoff_is_capped_full_jitter():
+    """Delays are within [0, min(max_delay, base * 2**retry)]."""
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    for retry in range(8):
+        for _ in range(50):
+            assert 0 <= policy.backoff(retry) <= min(5.0, 2 ** retry)
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"retry-after": "2"}, 2.0),
+        ({"retry-after-ms": "250"}, 0.25),
+        ({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m30s"}, 90.0),
+        ({"x-ratelimit-remaining-tokens": "0", "x-ratelimit-reset-tokens": "750ms"}, 0.75),
+        ({"x-ratelimit-remaining-requests": "12", "x-ratelimit-reset-requests": "10s"}, None),
+        ({}, None),
+    ]
+)
+def test_retry_after_seconds(headers, expected):
+    """Server hints are read from Retry-After and exhausted rate-limit budgets."""
+    assert retry_after_seconds(make_status_error(429, headers)) == expected
+
+@pytest.mark.parametrize("value, expected", [("1s", 1.0), ("6m0s", 360.0), ("1h2m3.5s", 3723.5), ("20ms", 0.02), ("bogus", None)])
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == expected
+
+def test_is_retryable():
+    request = httpx.Request("POST", "http://test")
+    assert is_retryable(make_status_error(429))
+    assert is_retryable(make_status_error(503))
+    assert is_retryable(APIConnectionError(request=request))
+    assert not is_retryable(make_status_error(400))
+    assert not is_retryable(make_status_error(401))
+    assert not is_retryable(ValueError("local bug"))
+
+def test_call_with_retry_uses_retry_after_and_deadline():
+    """Waits requested by the server are honored; the deadline bounds the total."""
+    now = [0.0]
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    errors = [make_status_error(429, {"retry-after": "3"}), make_status_error(429, {"retry-after": "3"})]
+    def attempt(timeout):
+        raise errors.pop(0) if errors else AssertionError("no more attempts expected")
+
+    with pytest.raises(APIStatusError):
+        call_with_retry(attempt, RetryPolicy(max_attempts=5, deadline=5.0), CircuitBreaker(threshold=0), sleep=sleep, clock=lambda: now[0])
+    assert sleeps == [3.0] # The second wait would pass the deadline
+
+def test_rate_limits_with_retry_after_do_not_open_the_breaker():
+    """A burst of 429s that say when to retry is waited out; bare 429s and 5xx still count."""
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    errors = [make_status_error(429, {"retry-after": "1"}) for _ in range(4)]
+    def attempt(timeout):
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert call_with_retry(attempt, RetryPolicy(max_attempts=5), breaker, sleep=lambda seconds: None) == "ok"
+    assert breaker.state == "closed"
+
+    errors = [make_status_error(429), make_status_error(503)]
+    with pytest.raises(APIStatusError):
+        call_with_retry(attempt, RetryPolicy(max_attempts=2, base_delay=0), breaker, sleep=lambda seconds: None)
+    assert breaker.state == "open"
+
+def test_circuit_breaker_half_open_trial():
+    """After the cooldown one trial call is allowed; success closes the circuit."""
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=2, cooldown=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] = 10.0
+    breaker.before_call() # Trial call allowed
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call() # Only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+def test_fallback_chain_shares_one_deadline(monkeypatch):
+    """Each model gets the time the models before it left; none restarts the deadline."""
+    monkeypatch.setattr(resilience, "RETRY_DEADLINE", 10.0)
+    monkeypatch.setattr(resilience, "FALLBACK_ATTEMPTS", 1)
+    resilience.reset_breakers()
+    now = [0.0]
+    timeouts = {}
+    def attempt(model, timeout):
+        timeouts.setdefault(model, []).append(timeout)
+        now[0] += 4.0 # Each attempt times out after 4s
+        raise make_status_error(503)
+    def sleep(seconds):
+        now[0] += seconds
+
+    with pytest.raises(APIStatusError):
+        resilience.call_with_fallback(["a", "b", "c", "d"], attempt, sleep=sleep, clock=lambda: now[0])
+    assert timeouts["a"] == [10.0]
+    assert timeouts["b"] == [6.0]
+    assert timeouts["c"] == [2.0]
+    assert "d" not in timeouts # The deadline passed during the third model
+    assert now[0] == 12.0
+
+def test_fallback_chain_shares_one_deadline_async(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_DEADLINE", 10.0)
+    monkeypatch.setattr(resilience, "FALLBACK_ATTEMPTS", 1)
+    resilience.reset_breakers()
+    now = [0.0]
+    timeouts = []
+    async def attempt(model, timeout):
+        timeouts.append((model, timeout))
+        now[0] += 4.0
+        if model == "c":
+            return "answer"
+        raise make_status_error(503)
+    async def sleep(seconds):
+        now[0] += seconds
+
+    result = asyncio.run(resilience.call_with_fallback_async(["a", "b", "c"], attempt, sleep=sleep, clock=lambda: now[0]))
+    assert result == ("c", "answer")
+    assert timeouts == [("a", 10.0), ("b", 6.0), ("c", 2.0)]
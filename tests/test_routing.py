@@ -0,0 +1,159 @@
+# tests/test_routing.py
+
+import httpx
+import pytest
+from openai import APIStatusError, APITimeoutError
+
+from codex_cli.core import openai_utils, resilience
+from codex_cli.core.ledger import UsageLedger
+from codex_cli.core.resilience import CircuitOpenError, call_with_fallback, is_fallback_error
+from codex_cli.core.routing import default_policy, load_policy, model_chain, parse_policy, select_model
+
+ROUTING_TOML = """
+default_model = "big-model"
+
+[[rules]]
+commands = ["explain"]
+detail = "basic"
+max_tokens = 500
+model = "small-model"
+
+[[rules]]
+commands = ["config explain"]
+min_tokens = 2000
+model = "long-context-model"
+
+[fallbacks]
+"big-model" = ["small-model", "big-model"]
+"""
+
+def make_status_error(status: int, code: str | None = None) -> APIStatusError:
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    response = httpx.Response(status, request=request)
+    error = APIStatusError(f"status {status}", response=response, body={"code": code} if code else None)
+    error.code = code
+    return error
+
+@pytest.fixture
+def routing_file(monkeypatch, tmp_path):
+    path = tmp_path / "routing.toml"
+    path.write_text(ROUTING_TOML)
+    monkeypatch.setenv("CSTUDIO_ROUTING_FILE", str(path))
+    return path
+
+# --- Policy ---
+
+def test_default_policy_routes_small_basic_explanations():
+    """Short basic explanations use the small model; detailed or large ones the default."""
+    policy = default_policy()
+    assert policy.select("explain", 200, "basic") == "gpt-4o-mini"
+    assert policy.select("explain", 200, "detailed") == "gpt-4o"
+    assert policy.select("explain", 5000, "basic") == "gpt-4o"
+    assert policy.select("script", 10) == "gpt-4o"
+
+def test_policy_from_file(routing_file):
+    """Rules are read from the routing file and the first match wins."""
+    assert select_model("explain", 100, "BASIC") == "small-model"
+    assert select_model("explain", 501, "basic") == "big-model"
+    assert select_model("config explain", 100) == "big-model"
+    assert select_model("config explain", 5000) == "long-context-model"
+    assert model_chain("big-model") == ["big-model", "small-model"]
+    assert model_chain("small-model") == ["small-model"]
+
+def test_policy_reloads_when_file_changes(routing_file):
+    assert select_model("script", 10) == "big-model"
+    routing_file.write_text('default_model = "other-model"\n')
+    assert select_model("script", 10) == "other-model"
+
+def test_json_policy(monkeypatch, tmp_path):
+    path = tmp_path / "routing.json"
+    path.write_text('{"default_model": "json-model", "rules": [{"command": "script", "model": "script-model"}]}')
+    monkeypatch.setenv("CSTUDIO_ROUTING_FILE", str(path))
+    assert select_model("script", 10) == "script-model"
+    assert select_model("explain", 10) == "json-model"
+
+def test_invalid_file_falls_back_to_builtin_policy(monkeypatch, tmp_path, capsys):
+    """A broken routing file is reported and ignored."""
+    path = tmp_path / "routing.toml"
+    path.write_text("[[rules]]\ncommands = ['explain']\n")
+    monkeypatch.setenv("CSTUDIO_ROUTING_FILE", str(path))
+    assert load_policy() == default_policy()
+    assert "ignoring routing config" in capsys.readouterr().err
+
+def test_parse_policy_rejects_bad_fallbacks():
+    with pytest.raises(ValueError):
+        parse_policy({"fallbacks": {"gpt-4o": "gpt-4o-mini"}})
+
+def test_pinned_model_and_disabled_fallback(monkeypatch, routing_file):
+    monkeypatch.setenv("CSTUDIO_MODEL", "pinned-model")
+    assert select_model("explain", 100, "basic") == "pinned-model"
+    monkeypatch.setenv("CSTUDIO_NO_FALLBACK", "1")
+    assert model_chain("big-model") == ["big-model"]
+
+# --- Fallback ---
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (make_status_error(503), True),
+        (make_status_error(429), True),
+        (make_status_error(429, "insufficient_quota"), False),
+        (make_status_error(404, "model_not_found"), True),
+        (make_status_error(404), False),
+        (make_status_error(400), False),
+        (APITimeoutError(httpx.Request("POST", "http://test")), True),
+        (CircuitOpenError("open"), True),
+    ]
+)
+def test_is_fallback_error(error, expected):
+    assert is_fallback_error(error) == expected
+
+def test_call_with_fallback_moves_to_next_model(monkeypatch):
+    """An overloaded model gets FALLBACK_ATTEMPTS tries, then the next model answers."""
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(resilience, "FALLBACK_ATTEMPTS", 2)
+    calls, switches = [], []
+
+    def attempt(model, timeout):
+        calls.append(model)
+        if model == "primary":
+            raise make_status_error(529)
+        return f"answer from {model}"
+
+    model, result = call_with_fallback(["primary", "secondary"], attempt, on_fallback=lambda *args: switches.append(args))
+    assert (model, result) == ("secondary", "answer from secondary")
+    assert calls == ["primary", "primary", "secondary"]
+    assert switches[0][0] == "primary" and switches[0][2] == "secondary"
+    assert resilience.breaker_for("primary").failures == 2
+    assert resilience.breaker_for("secondary").failures == 0
+
+def test_call_with_fallback_raises_non_fallback_errors():
+    """Errors another model cannot fix are raised without trying it."""
+    calls = []
+
+    def attempt(model, timeout):
+        calls.append(model)
+        raise make_status_error(400)
+
+    with pytest.raises(APIStatusError):
+        call_with_fallback(["primary", "secondary"], attempt)
+    assert calls == ["primary"]
+
+def test_response_records_answering_model(monkeypatch):
+    """The ledger and cache use the model that answered, and the failed model is recorded as an error."""
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0.001)
+
+    class Completions:
+        def create(self, model, messages, timeout):
+            if model == "gpt-4o":
+                raise make_status_error(503)
+            message = type("Message", (), {"content": "fallback answer"})
+            return type("Completion", (), {"choices": [type("Choice", (), {"message": message})], "usage": None})
+
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": Completions()})})
+    monkeypatch.setattr(openai_utils, "get_openai_client", lambda: client)
+    assert openai_utils.get_openai_response("hello", model="gpt-4o") == "fallback answer"
+    records = UsageLedger().records()
+    assert [(r.model, r.status) for r in records] == [("gpt-4o", "error"), ("gpt-4o-mini", "ok")]
+    key = openai_utils.make_cache_key("gpt-4o-mini", openai_utils.SYSTEM_MESSAGE, "hello")
+    assert openai_utils.get_response_cache().get(key) == "fallback answer"
@@ -0,0 +1,106 @@
+# tests/test_sandbox.py
+
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+from codex_cli.main import app
+from codex_cli.core.sandbox import RunLimits, RunResult, SandboxError, run_script
+
+runner = CliRunner()
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="Sandboxed runs need a POSIX system")
+
+def test_run_script_reports_usage_in_a_temporary_directory():
+    """The script runs in an empty temporary directory, and its output and resource usage are reported."""
+    result = run_script("pwd; ls | wc -l; echo done", "bash")
+
+    assert result.ok
+    assert result.exit_code == 0
+    lines = result.stdout.split()
+    assert lines[0] != os.getcwd() and "cstudio-run-" in lines[0]
+    assert lines[1:] == ["0", "done"]
+    assert result.wall_time > 0 and result.cpu_time >= 0 and result.peak_rss > 0
+
+def test_run_script_hides_the_environment(monkeypatch):
+    """API keys and other variables are not passed to the script."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-secret")
+    result = run_script("import os; print(os.environ.get('OPENAI_API_KEY'))", "python")
+
+    assert result.stdout.strip() == "None"
+
+def test_run_script_wall_clock_timeout():
+    """The timeout kills the script and the processes it started."""
+    result = run_script("sleep 30 & sleep 30", "bash", RunLimits(timeout=0.5))
+
+    assert result.timed_out
+    assert not result.ok
+    assert result.wall_time < 10
+    assert result.status == "killed: wall-clock timeout"
+
+def test_run_script_cpu_limit():
+    result = run_script("while True: pass", "python", RunLimits(cpu_seconds=1, timeout=20))
+
+    assert not result.timed_out
+    assert result.status == "killed: CPU time limit exceeded"
+    assert result.cpu_time >= 0.9
+
+def test_run_script_memory_limit():
+    result = run_script("x = bytearray(1024 ** 3)", "python", RunLimits(memory_mb=256))
+
+    assert result.exit_code != 0
+    assert "MemoryError" in result.stderr
+
+def test_run_script_file_size_limit():
+    """A shell reports a command killed by SIGXFSZ as exit code 128 + 25."""
+    result = run_script("head -c 3000000 /dev/zero > big", "bash", RunLimits(file_mb=1))
+
+    assert not result.ok
+    assert "file size limit exceeded" in result.status
+
+def test_run_script_rejects_powershell():
+    with pytest.raises(SandboxError):
+        run_script("Get-Process", "powershell")
+
+def test_script_run_command(mocker):
+    """--run runs the generated script and prints its status and usage."""
+    mocker.patch("codex_cli.script.get_openai_response", return_value="echo sandboxed output")
+
+    result = runner.invoke(app, ["script", "print a message", "--run", "--no-library"])
+
+    assert result.exit_code == 0
+    assert "Sandboxed Run" in result.stdout
+    assert "exit code 0" in result.stdout
+    assert "sandboxed output" in result.stdout
+
+def test_script_run_command_failure_exits_with_error(mocker):
+    mocker.patch("codex_cli.script.get_openai_response", return_value="echo broken >&2; exit 3")
+
+    result = runner.invoke(app, ["script", "fail", "--run", "--no-library", "--timeout", "5"])
+
+    assert result.exit_code == 1
+    assert "exit code 3" in result.stdout
+    assert "broken" in result.stdout
+
+def test_script_dry_run_overrides_run(mocker):
+    mocker.patch("codex_cli.script.get_openai_response", return_value="echo hi")
+    run = mocker.patch("codex_cli.script.run_script")
+
+    result = runner.invoke(app, ["script", "say hi", "--run", "--dry-run", "--no-library"])
+
+    assert result.exit_code == 0
+    run.assert_not_called()
+
+def test_script_run_powershell_is_rejected_before_generation(mocker):
+    api = mocker.patch("codex_cli.script.get_openai_response")
+
+    result = runner.invoke(app, ["script", "list processes", "-t", "powershell", "--run"])
+
+    assert result.exit_code == 1
+    assert "--run supports bash and python scripts only" in result.stdout
+    api.assert_not_called()
+
+def test_run_result_status_for_signals():
+    assert RunResult(-9, 1.0, 0.5, 0).status == "killed: SIGKILL"
+    assert RunResult(0, 1.0, 0.5, 0).status == "exit code 0"
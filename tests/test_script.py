@@ -137,4 +137,32 @@ def test_script_command_with_dry_run(mocker):
 def test_clean_generated_code(raw_code, language, expected_cleaned_code):
     """Test the clean_generated_code function with various inputs."""
     cleaned = clean_generated_code(raw_code, language)
-    assert cleaned == expected_cleaned_code
\ No newline at end of file
+    assert cleaned == expected_cleaned_code
+def test_script_candidates_keep_the_first_that_parses(mocker):
+    """--candidates validates each completion locally and keeps one that parses."""
+    def fake_race(prompt, candidates, validate, **kwargs):
+        assert candidates == 3
+        assert validate("```python\nprint(1\n```") is not None
+        assert validate("```python\nprint(1)\n```") is None
+        return "```python\nprint(1)\n```", ["candidate 1: line 1: '(' was never closed"]
+    race = mocker.patch('codex_cli.script.get_first_valid_response', side_effect=fake_race)
+    single = mocker.patch('codex_cli.script.get_openai_response')
+
+    result = runner.invoke(app, ["script", "print one", "-t", "python", "--candidates", "3", "--no-library"])
+
+    assert result.exit_code == 0
+    race.assert_called_once()
+    single.assert_not_called()
+    assert "Rejected candidate 1" in result.stdout
+    assert "print(1)" in result.stdout
+
+def test_script_warns_about_a_syntax_error(mocker):
+    """A single generated script that does not parse is shown with a warning and not added to the library."""
+    mocker.patch('codex_cli.script.get_openai_response', return_value="print('unclosed'")
+    store = mocker.patch('codex_cli.script.store_script')
+
+    result = runner.invoke(app, ["script", "print something", "-t", "python", "--save"])
+
+    assert result.exit_code == 0
+    assert "does not pass compile()" in result.stdout
+    store.assert_not_called()
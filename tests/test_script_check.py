@@ -0,0 +1,27 @@
+# tests/test_script_check.py
+
+import shutil
+
+import pytest
+
+from codex_cli.core.script_check import check_script, checker_name
+
+def test_python_syntax_error_reports_line():
+    assert check_script("import os\nprint(os.getcwd())\n", "python") is None
+    assert check_script("def f(:\n    pass\n", "python").startswith("line 1:")
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="bash is not installed")
+def test_bash_syntax_error_reports_line():
+    assert check_script("for f in *.txt; do\n  echo \"$f\"\ndone\n", "bash") is None
+    error = check_script("if [ -f a ]; then\n  echo a\n", "bash")
+    assert error.startswith("line ") and "syntax error" in error
+    assert checker_name("bash") == "bash -n"
+
+def test_empty_script_is_invalid():
+    assert check_script("  \n", "bash") == "empty script"
+
+def test_missing_parser_passes(monkeypatch):
+    """Without pwsh, PowerShell scripts cannot be checked and are accepted."""
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    assert check_script("Get-Process | Where-Object {", "powershell") is None
+    assert checker_name("powershell") is None
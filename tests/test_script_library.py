@@ -0,0 +1,125 @@
+# tests/test_script_library.py
+
+from typer.testing import CliRunner
+
+from codex_cli.core.script_library import LibraryMatch, Parameter, ScriptLibrary, bm25_scores, parse_task, substitute
+from codex_cli.main import app
+
+runner = CliRunner()
+
+FIND_SCRIPT = "#!/bin/bash\n# Find files larger than 100MB in /data\nfind /data -type f -size +100M -exec ls -lh {} \\;"
+
+def test_parse_task_pulls_out_parameters():
+    task = parse_task("Find files larger than 100MB in /data/")
+    assert task.template == "find files larger than <num>mb in <path>"
+    assert task.params == [Parameter("num", "100", "MB"), Parameter("path", "/data")]
+
+    task = parse_task("Restart the service named nginx every 5 minutes and log to 'restart log.txt'")
+    assert task.template == "restart the service named <name> every <num> minutes and log to <str>"
+    assert [param.value for param in task.params] == ["nginx", "5", "restart log.txt"]
+    assert parse_task("delete *.tmp files in ~/cache").template == "delete <file> files in <path>"
+
+def test_substitute_replaces_values_once():
+    old = [Parameter("num", "100", "MB"), Parameter("path", "/data")]
+    new = [Parameter("num", "1000", "MB"), Parameter("path", "/var/log")]
+    script, changes = substitute(FIND_SCRIPT, old, new)
+    assert "find /var/log -type f -size +1000M" in script and "larger than 1000MB in /var/log" in script
+    assert changes == [("100", "1000"), ("/data", "/var/log")]
+    # A value missing from the script cannot be substituted
+    assert substitute("ls", old, new) is None
+    # Numbers are not replaced inside longer numbers
+    assert substitute("head -n 100; sleep 1005", [Parameter("num", "100")], [Parameter("num", "5")])[0] == "head -n 5; sleep 1005"
+
+def test_substitute_respects_token_and_path_boundaries():
+    script = "cp /data/a.csv /database/ && ls /srv/data /datasets"
+    adapted, _ = substitute(script, [Parameter("path", "/data")], [Parameter("path", "/mnt")])
+    assert adapted == "cp /mnt/a.csv /database/ && ls /srv/data /datasets"
+    # Only inside a longer path: nothing to substitute
+    assert substitute("ls /database", [Parameter("path", "/data")], [Parameter("path", "/mnt")]) is None
+
+def test_substitute_ignores_values_found_only_in_comments():
+    """A value that only appears in a comment is encoded some other way in the code (here 3 -> tail -n +4)."""
+    script = "#!/bin/bash\n# Keep the newest 3 backups in /backups\ncd /backups && ls -1t | tail -n +4 | xargs -r rm --"
+    assert substitute(script, [Parameter("num", "3")], [Parameter("num", "1")]) is None
+    # Comments are rewritten along with the code when the code has the value
+    adapted, _ = substitute("# keep 3\nhead -n 3 # 3 lines", [Parameter("num", "3")], [Parameter("num", "5")])
+    assert adapted == "# keep 5\nhead -n 5 # 5 lines"
+
+def test_substitute_requires_a_single_occurrence_in_code():
+    """A value that also appears as a file descriptor or a second constant is ambiguous."""
+    first, five = [Parameter("num", "2")], [Parameter("num", "5")]
+    assert substitute('head -n 2 "$f" 2>/dev/null', first, five) is None
+    assert substitute("cp /data/a /data/b", [Parameter("path", "/data")], [Parameter("path", "/mnt")]) is None
+
+def test_substitute_never_rewrites_exit_codes_or_file_descriptors():
+    one, three = [Parameter("num", "1")], [Parameter("num", "3")]
+    for script in ("exit 1", "return 1", "sys.exit(1)", "echo done >&1", "cmd 1>out.log", "read line 1<input"):
+        assert substitute(script, one, three) is None, script
+    assert substitute("head -n 1 f 2>&2", one, three)[0] == "head -n 3 f 2>&2"
+
+def test_library_does_not_serve_a_script_whose_logic_differs(tmp_path):
+    library = ScriptLibrary(tmp_path / "scripts.sqlite3")
+    library.add("keep the newest 3 backups in /backups", "bash",
+                "#!/bin/bash\n# Keep the newest 3 backups in /backups\ncd /backups && ls -1t | tail -n +4 | xargs -r rm --")
+
+    assert library.search("keep the newest 1 backups in /backups", "bash") is None
+
+def test_bm25_ranks_shared_rare_terms_first():
+    documents = [["find", "files", "larger"], ["list", "files"], ["compress", "logs"]]
+    scores = bm25_scores(["find", "files"], documents)
+    assert scores[0] > scores[1] > scores[2] == 0
+
+def test_library_serves_confident_matches_only(tmp_path):
+    library = ScriptLibrary(tmp_path / "scripts.sqlite3")
+    library.add("find files larger than 100MB in /data", "bash", FIND_SCRIPT, "gpt-4o", 200, 50)
+    library.add("compress logs older than 30 days in /var/log", "bash", "find /var/log -mtime +30 -exec gzip {} \\;")
+
+    match = library.search("Find files larger than 250MB in /srv", "bash")
+    assert match is not None and match.score > 0.85
+    assert "find /srv -type f -size +250M" in match.script
+    assert match.task == "find files larger than 100MB in /data" and match.model == "gpt-4o"
+
+    assert library.search("find files larger than 2GB in /srv", "bash") is None # Another unit
+    assert library.search("find files larger than 100MB in /data and delete them", "bash") is None # Another task
+    assert library.search("find files larger than 100MB in /data", "python") is None # Another script type
+
+def test_script_command_reuses_library(mocker):
+    mock_api_call = mocker.patch('codex_cli.script.get_openai_response', return_value=FIND_SCRIPT)
+    first = runner.invoke(app, ["script", "find files larger than 100MB in /data", "--save"])
+    assert first.exit_code == 0 and mock_api_call.call_count == 1
+
+    second = runner.invoke(app, ["script", "find files larger than 750MB in /home"])
+    assert second.exit_code == 0 and mock_api_call.call_count == 1 # Served from the library
+    output = " ".join(second.stdout.split())
+    assert "Reused a library script" in output and "100 → 750" in output
+    assert "find /home -type f -size +750M" in second.stdout
+
+    runner.invoke(app, ["script", "find files larger than 750MB in /home", "--no-library"])
+    assert mock_api_call.call_count == 2
+
+def test_script_command_stores_only_vouched_scripts(mocker):
+    """Scripts enter the library with --save or after a successful run, never from a dry run."""
+    mocker.patch('codex_cli.script.get_openai_response', return_value="echo ok")
+    store = mocker.patch('codex_cli.script.store_script')
+
+    runner.invoke(app, ["script", "print ok"])
+    runner.invoke(app, ["script", "print ok", "--save", "--dry-run"])
+    store.assert_not_called()
+    runner.invoke(app, ["script", "print ok", "--save"])
+    assert store.call_count == 1
+    runner.invoke(app, ["script", "print ok", "--run"])
+    assert store.call_count == 2
+    mocker.patch('codex_cli.script.get_openai_response', return_value="exit 3")
+    runner.invoke(app, ["script", "fail", "--run"])
+    assert store.call_count == 2
+
+def test_script_command_checks_library_scripts_before_serving(mocker):
+    """A library script that no longer parses after substitution is generated anew."""
+    mocker.patch('codex_cli.script.find_script', return_value=LibraryMatch("fi", "old task", 1.0, [("1", "2")]))
+    mock_api_call = mocker.patch('codex_cli.script.get_openai_response', return_value="echo fresh")
+
+    result = runner.invoke(app, ["script", "some task"])
+
+    assert result.exit_code == 0 and mock_api_call.call_count == 1
+    assert "Skipped a library script" in " ".join(result.stdout.split())
+    assert "echo fresh" in result.stdout
@@ -0,0 +1,83 @@
+# tests/test_singleflight.py
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from codex_cli.core import singleflight
+from codex_cli.core.mock_server import MockOpenAIServer, MockServerConfig
+from codex_cli.core.singleflight import InFlightLock, claim, single_flight
+
+def write_lock(path, **owner):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"host": "elsewhere", "pid": 1, "token": "other", "created": time.time(), **owner}))
+
+# --- Locks ---
+
+def test_only_one_owner(tmp_path):
+    first, second = InFlightLock("key", tmp_path), InFlightLock("key", tmp_path)
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+    assert not (tmp_path / "key.lock").exists()
+
+def test_lock_of_dead_process_is_stale(tmp_path):
+    """A lock left by a process that no longer exists on this host is broken."""
+    finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    write_lock(tmp_path / "key.lock", host=singleflight.socket.gethostname(), pid=int(finished.stdout))
+    lock, result = claim("key", lambda: None, tmp_path)
+    assert lock is not None and result is None
+    lock.release()
+
+def test_lock_without_heartbeat_is_stale(tmp_path):
+    """A lock whose owner stopped refreshing it (e.g. on another host) goes stale."""
+    path = tmp_path / "key.lock"
+    write_lock(path)
+    lock = InFlightLock("key", tmp_path, stale_after=30)
+    assert not lock.is_stale()
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    assert lock.is_stale()
+    assert lock.break_stale()
+    assert not path.exists()
+
+def test_waiter_receives_owner_result(tmp_path):
+    """A second caller waits for the first one and gets its published result."""
+    published = {}
+    owner, _ = claim("key", lambda: published.get("key"), tmp_path)
+    assert owner is not None
+
+    def finish():
+        time.sleep(0.2)
+        published["key"] = "answer"
+        owner.release()
+
+    threading.Thread(target=finish).start()
+    computed = []
+    result, shared = single_flight("key", lambda: computed.append(1), lambda: published.get("key"), tmp_path)
+    assert (result, shared) == ("answer", True)
+    assert not computed
+
+def test_waiter_computes_when_owner_fails(tmp_path):
+    """If the owner releases without publishing anything, the waiter makes the call itself."""
+    owner, _ = claim("key", lambda: None, tmp_path)
+    threading.Timer(0.1, owner.release).start()
+    result, shared = single_flight("key", lambda: "own answer", lambda: None, tmp_path)
+    assert (result, shared) == ("own answer", False)
+
+# --- Across processes ---
+
+def test_concurrent_processes_send_one_request(monkeypatch, tmp_path):
+    """Several processes asking the same question at once cost one API request."""
+    with MockOpenAIServer(MockServerConfig(latency=0.5)) as server:
+        env = {**os.environ, "OPENAI_API_KEY": "test-key", "OPENAI_BASE_URL": server.base_url, "CSTUDIO_NO_PREWARM": "1"}
+        code = "from codex_cli.core.openai_utils import get_openai_response; print(get_openai_response('same question'))"
+        processes = [subprocess.Popen([sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, text=True) for _ in range(4)]
+        outputs = [process.communicate(timeout=60)[0] for process in processes]
+        assert server.stats.requests == 1
+    answers = {output.strip().splitlines()[-1] for output in outputs}
+    assert len(answers) == 1 and answers != {"None"}
@@ -0,0 +1,47 @@
+# tests/test_skeleton.py
+
+from codex_cli.core.skeleton import KeyPathMemo, key_paths, parse_config, skeleton_of, skeleton_text
+
+HELM_VALUES = {
+    "replicaCount": 2,
+    "spec": {"template": {"spec": {"containers": [
+        {"name": "api", "image": "api:1", "resources": {"limits": {"cpu": "500m"}}},
+        {"name": "worker", "image": "worker:1", "resources": {"limits": {"cpu": "1"}}, "args": ["--queue", "jobs"]},
+    ]}}},
+}
+
+def test_parse_config_formats():
+    assert parse_config('{"a": 1}', "app.json") == ("JSON", {"a": 1})
+    assert parse_config("a:\n  b: 1\n", "values.yaml") == ("YAML", {"a": {"b": 1}})
+    assert parse_config("a: 1\n---\nb: 2\n", "multi.yml") == ("YAML", [{"a": 1}, {"b": 2}])
+    assert parse_config("[tool]\nname = 'x'\n", "pyproject.toml") == ("TOML", {"tool": {"name": "x"}})
+    assert parse_config("[db]\nhost = localhost\n", "app.ini") == ("INI", {"db": {"host": "localhost"}})
+    assert parse_config("{broken", "app.json") is None
+    assert parse_config("42", "app.json") is None # Not a mapping or list
+    assert parse_config("server { listen 80; }", "nginx.conf") is None
+
+def test_similar_entries_collapse():
+    services = {f"svc{i}": {"image": f"img:{i}", "ports": ["80:80"], **({"depends_on": ["db"]} if i < 3 else {})} for i in range(42)}
+    text = skeleton_text(skeleton_of({"services": services}))
+    assert "services:  # 42 similar `services.*` entries: svc0, svc1, svc2, svc3, svc4, …" in text
+    assert "depends_on:  # in 3 of 42; list of 3 items" in text
+    assert 'image: str  # e.g. "img:0", "img:1", "img:2" (42 values)' in text
+    assert text.count("image:") == 1
+
+def test_key_paths_are_normalized():
+    tree = skeleton_of(HELM_VALUES)
+    paths = key_paths(tree)
+    assert "spec.template.spec.containers[].resources" in paths
+    assert "spec.template.spec.containers[].resources.limits.cpu" in paths
+    assert "spec.template.spec.containers[].args[]" in paths
+    assert paths.index("replicaCount") < paths.index("spec.template") # Shallow paths first
+    assert "args:  # in 1 of 2; list of 2 items" in skeleton_text(tree)
+    assert key_paths(tree, 2) == paths[:2]
+
+def test_key_path_memo_scopes_top_level_keys(tmp_path):
+    memo = KeyPathMemo(tmp_path)
+    memo.set("name", ["name", "version", "dependencies"], "Package name.")
+    memo.set("spec.replicas", ["spec"], "Number of pods.")
+    assert memo.get("name", ["dependencies", "version", "name"]) == "Package name."
+    assert memo.get("name", ["name", "services"]) is None # Another kind of file
+    assert memo.get("spec.replicas", ["apiVersion", "spec"]) == "Number of pods."